@@ -2,6 +2,7 @@
 URL patterns for TeoCoin Burn Deposit API endpoints
 """
 
+from core.async_views import io_view
 from django.urls import path
 
 from . import burn_deposit_views
@@ -12,7 +13,10 @@ urlpatterns = [
     # Burn deposit endpoints
     path(
         "burn-deposit/",
-        burn_deposit_views.BurnDepositView.as_view(),
+        io_view(
+            burn_deposit_views.BurnDepositView.as_view(),
+            burn_deposit_views.BurnDepositAsyncView.as_view(),
+        ),
         name="burn_deposit",
     ),
     path(
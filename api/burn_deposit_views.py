@@ -3,17 +3,22 @@ TeoCoin Burn Deposit API Views
 Handles burning tokens from MetaMask and crediting platform balance
 """
 
+import asyncio
 import logging
 from decimal import Decimal
+from typing import Optional
 
+from asgiref.sync import sync_to_async
+from core.async_views import AsyncAPIView
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from services.db_teocoin_service import DBTeoCoinService
+from services.idempotency import idempotent
 from web3 import Web3
 
-from blockchain.blockchain import teocoin_service
+from blockchain.blockchain import get_async_teocoin_service, teocoin_service
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +30,9 @@ class BurnDepositView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    @idempotent(
+        "burn_deposit", key=lambda view, request: request.data.get("transaction_hash")
+    )
     def post(self, request):
         """
         Process a burn deposit transaction
@@ -37,158 +45,185 @@ class BurnDepositView(APIView):
         }
         """
         try:
-            logger.info(f"🔥 Burn deposit request from {request.user.email}")
-            logger.info(f"📄 Request data: {request.data}")
+            deposit = self.validate_deposit(request)
+            if isinstance(deposit, Response):
+                return deposit
+            tx_hash, amount_decimal, metamask_address = deposit
 
-            tx_hash = request.data.get("transaction_hash")
-            amount = request.data.get("amount")
-            metamask_address = request.data.get("metamask_address")
+            processed = self.already_processed(request, tx_hash)
+            if processed is not None:
+                return processed
 
-            logger.info(
-                f"📊 Parsed: tx_hash={tx_hash}, amount={amount}, address={metamask_address}"
+            # Verify transaction on blockchain
+            logger.info(f"🔍 Starting blockchain verification...")
+            verification_result = self.verify_burn_transaction(
+                tx_hash, amount_decimal, metamask_address
             )
 
-            # Validation
-            if not tx_hash or not amount or not metamask_address:
-                return Response(
-                    {
-                        "success": False,
-                        "error": "Transaction hash, amount, and MetaMask address are required",
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            try:
-                amount_decimal = Decimal(str(amount))
-                if amount_decimal <= 0:
-                    return Response(
-                        {"success": False, "error": "Amount must be greater than 0"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-            except (ValueError, TypeError):
-                return Response(
-                    {"success": False, "error": "Invalid amount format"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+            return self.credit_deposit(
+                request, tx_hash, amount_decimal, metamask_address, verification_result
+            )
 
-            logger.info(f"✅ Validation passed for {amount_decimal} TEO")
+        except Exception as e:
+            return self.deposit_error(e)
 
-            # Check teocoin_service initialization
-            if not hasattr(teocoin_service, "w3") or teocoin_service.w3 is None:
-                logger.error(
-                    "❌ TeoCoin service not properly initialized - Web3 connection missing"
-                )
-                return Response(
-                    {"success": False, "error": "Blockchain service not available"},
-                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
-                )
+    def validate_deposit(self, request):
+        """(tx_hash, amount, metamask_address) of a valid request, else an error Response"""
+        logger.info(f"🔥 Burn deposit request from {request.user.email}")
+        logger.info(f"📄 Request data: {request.data}")
 
-            if (
-                not hasattr(teocoin_service, "admin_private_key")
-                or not teocoin_service.admin_private_key
-            ):
-                logger.error("❌ Admin private key not configured")
-                return Response(
-                    {
-                        "success": False,
-                        "error": "Service configuration error - admin credentials missing",
-                    },
-                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
-                )
+        tx_hash = request.data.get("transaction_hash")
+        amount = request.data.get("amount")
+        metamask_address = request.data.get("metamask_address")
 
-            # Check if transaction already processed (prevent double-processing)
-            from blockchain.models import DBTeoCoinTransaction
+        logger.info(
+            f"📊 Parsed: tx_hash={tx_hash}, amount={amount}, address={metamask_address}"
+        )
 
-            existing_tx = DBTeoCoinTransaction.objects.filter(
-                user=request.user, blockchain_tx_hash=tx_hash
-            ).first()
+        # Validation
+        if not tx_hash or not amount or not metamask_address:
+            return Response(
+                {
+                    "success": False,
+                    "error": "Transaction hash, amount, and MetaMask address are required",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-            if existing_tx:
-                logger.warning(f"⚠️ Transaction {tx_hash} already processed")
+        try:
+            amount_decimal = Decimal(str(amount))
+            if amount_decimal <= 0:
                 return Response(
-                    {
-                        "success": False,
-                        "error": "Transaction already processed",
-                        "already_processed": True,
-                    },
-                    status=status.HTTP_409_CONFLICT,
+                    {"success": False, "error": "Amount must be greater than 0"},
+                    status=status.HTTP_400_BAD_REQUEST,
                 )
+        except (ValueError, TypeError):
+            return Response(
+                {"success": False, "error": "Invalid amount format"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-            logger.info(f"✅ Transaction not yet processed, continuing...")
+        logger.info(f"✅ Validation passed for {amount_decimal} TEO")
 
-            # Verify transaction on blockchain
-            logger.info(f"🔍 Starting blockchain verification...")
-            verification_result = self.verify_burn_transaction(
-                tx_hash, amount_decimal, metamask_address
+        # Check teocoin_service initialization
+        if not hasattr(teocoin_service, "w3") or teocoin_service.w3 is None:
+            logger.error(
+                "❌ TeoCoin service not properly initialized - Web3 connection missing"
+            )
+            return Response(
+                {"success": False, "error": "Blockchain service not available"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
 
-            logger.info(f"📊 Verification result: {verification_result}")
+        if (
+            not hasattr(teocoin_service, "admin_private_key")
+            or not teocoin_service.admin_private_key
+        ):
+            logger.error("❌ Admin private key not configured")
+            return Response(
+                {
+                    "success": False,
+                    "error": "Service configuration error - admin credentials missing",
+                },
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
 
-            if not verification_result["valid"]:
-                logger.warning(
-                    f"❌ Verification failed: {verification_result['error']}"
-                )
-                return Response(
-                    {"success": False, "error": verification_result["error"]},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+        return tx_hash, amount_decimal, metamask_address
 
-            logger.info(f"✅ Blockchain verification passed")
+    def already_processed(self, request, tx_hash):
+        """409 Response if the deposit was credited before, else None"""
+        # Deposits credited before the idempotency registry existed
+        from blockchain.models import DBTeoCoinTransaction
 
-            # Credit user's platform balance
-            logger.info(f"💰 Crediting user balance...")
-            db_service = DBTeoCoinService()
-            credit_result = db_service.credit_user(
-                user=request.user,
-                amount=amount_decimal,
-                transaction_type="deposit",
-                description=f"Burn deposit: {tx_hash[:10]}...",
-                metadata={
-                    "transaction_hash": tx_hash,
-                    "metamask_address": metamask_address,
-                    "block_number": verification_result.get("block_number"),
-                    "gas_used": verification_result.get("gas_used"),
+        existing_tx = DBTeoCoinTransaction.objects.filter(
+            user=request.user, blockchain_tx_hash=tx_hash
+        ).first()
+
+        if existing_tx:
+            logger.warning(f"⚠️ Transaction {tx_hash} already processed")
+            return Response(
+                {
+                    "success": False,
+                    "error": "Transaction already processed",
+                    "already_processed": True,
                 },
+                status=status.HTTP_409_CONFLICT,
             )
 
-            logger.info(f"📊 Credit result: {credit_result}")
+        logger.info(f"✅ Transaction not yet processed, continuing...")
+        return None
 
-            if credit_result and credit_result.get("success"):
-                logger.info(
-                    f"✅ Burn deposit successful: {amount_decimal} TEO for {request.user.email}"
-                )
+    def credit_deposit(
+        self, request, tx_hash, amount_decimal, metamask_address, verification_result
+    ):
+        """Credit the user's platform balance for a verified burn"""
+        logger.info(f"📊 Verification result: {verification_result}")
 
-                return Response(
-                    {
-                        "success": True,
-                        "message": f"Successfully deposited {amount_decimal} TEO to your platform balance",
-                        "amount": str(amount_decimal),
-                        "transaction_hash": tx_hash,
-                        "new_balance": str(credit_result.get("new_balance", 0)),
-                        "burn_verified": True,
-                    },
-                    status=status.HTTP_200_OK,
-                )
-            else:
-                logger.error(f"❌ Failed to credit balance: {credit_result}")
-                return Response(
-                    {"success": False, "error": "Failed to credit platform balance"},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
+        if not verification_result["valid"]:
+            logger.warning(
+                f"❌ Verification failed: {verification_result['error']}"
+            )
+            return Response(
+                {"success": False, "error": verification_result["error"]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        except Exception as e:
-            logger.error(f"❌ Error processing burn deposit: {e}")
-            import traceback
+        logger.info(f"✅ Blockchain verification passed")
+
+        # Credit user's platform balance
+        logger.info(f"💰 Crediting user balance...")
+        db_service = DBTeoCoinService()
+        credit_result = db_service.credit_user(
+            user=request.user,
+            amount=amount_decimal,
+            transaction_type="deposit",
+            description=f"Burn deposit: {tx_hash[:10]}...",
+            metadata={
+                "transaction_hash": tx_hash,
+                "metamask_address": metamask_address,
+                "block_number": verification_result.get("block_number"),
+                "gas_used": verification_result.get("gas_used"),
+            },
+        )
+
+        logger.info(f"📊 Credit result: {credit_result}")
+
+        if credit_result and credit_result.get("success"):
+            logger.info(
+                f"✅ Burn deposit successful: {amount_decimal} TEO for {request.user.email}"
+            )
 
-            logger.error(f"📜 Full traceback: {traceback.format_exc()}")
             return Response(
                 {
-                    "success": False,
-                    "error": "Internal server error during burn deposit processing",
+                    "success": True,
+                    "message": f"Successfully deposited {amount_decimal} TEO to your platform balance",
+                    "amount": str(amount_decimal),
+                    "transaction_hash": tx_hash,
+                    "new_balance": str(credit_result.get("new_balance", 0)),
+                    "burn_verified": True,
                 },
+                status=status.HTTP_200_OK,
+            )
+        else:
+            logger.error(f"❌ Failed to credit balance: {credit_result}")
+            return Response(
+                {"success": False, "error": "Failed to credit platform balance"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    def deposit_error(self, e):
+        logger.error(f"❌ Error processing burn deposit: {e}")
+        import traceback
+
+        logger.error(f"📜 Full traceback: {traceback.format_exc()}")
+        return Response(
+            {
+                "success": False,
+                "error": "Internal server error during burn deposit processing",
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
     def verify_burn_transaction(
         self, tx_hash: str, expected_amount: Decimal, expected_address: str
     ) -> dict:
@@ -207,24 +242,86 @@ class BurnDepositView(APIView):
                 logger.error(f"❌ Failed to get transaction receipt: {e}")
                 return {"valid": False, "error": "Transaction not found on blockchain"}
 
-            if not receipt:
-                return {"valid": False, "error": "Transaction not found"}
-
-            if receipt["status"] != 1:
-                return {"valid": False, "error": "Transaction failed on blockchain"}
-
-            logger.info(f"✅ Transaction found and successful")
+            failure = self._receipt_failure(receipt)
+            if failure:
+                return failure
 
             # Get transaction details
             try:
                 tx = w3.eth.get_transaction(tx_hash)
-                logger.info(
-                    f"📊 Transaction from: {tx.get('from')}, to: {tx.get('to')}"
-                )
             except Exception as e:
                 logger.error(f"❌ Failed to get transaction details: {e}")
                 return {"valid": False, "error": "Failed to get transaction details"}
 
+            return self.check_burn_transaction(
+                receipt, tx, expected_amount, expected_address, teocoin_service.contract
+            )
+
+        except Exception as e:
+            return self._verification_error(tx_hash, e)
+
+    async def averify_burn_transaction(
+        self, tx_hash: str, expected_amount: Decimal, expected_address: str
+    ) -> dict:
+        """
+        Async verify_burn_transaction(): receipt and transaction are fetched
+        concurrently from the async RPC provider
+        """
+        try:
+            logger.info(f"🔍 Verifying burn transaction: {tx_hash}")
+
+            async_teocoin = get_async_teocoin_service()
+            receipt, tx = await asyncio.gather(
+                async_teocoin.w3.eth.get_transaction_receipt(tx_hash),
+                async_teocoin.w3.eth.get_transaction(tx_hash),
+                return_exceptions=True,
+            )
+            if isinstance(receipt, Exception):
+                logger.error(f"❌ Failed to get transaction receipt: {receipt}")
+                return {"valid": False, "error": "Transaction not found on blockchain"}
+            logger.info(f"📊 Receipt status: {receipt.get('status')}")
+
+            failure = self._receipt_failure(receipt)
+            if failure:
+                return failure
+
+            if isinstance(tx, Exception):
+                logger.error(f"❌ Failed to get transaction details: {tx}")
+                return {"valid": False, "error": "Failed to get transaction details"}
+
+            return self.check_burn_transaction(
+                receipt, tx, expected_amount, expected_address, async_teocoin.contract
+            )
+
+        except Exception as e:
+            return self._verification_error(tx_hash, e)
+
+    def _receipt_failure(self, receipt) -> Optional[dict]:
+        if not receipt:
+            return {"valid": False, "error": "Transaction not found"}
+
+        if receipt["status"] != 1:
+            return {"valid": False, "error": "Transaction failed on blockchain"}
+
+        logger.info(f"✅ Transaction found and successful")
+        return None
+
+    def _verification_error(self, tx_hash: str, e: Exception) -> dict:
+        logger.error(f"❌ Error verifying burn transaction {tx_hash}: {e}")
+        import traceback
+
+        logger.error(f"📜 Verification traceback: {traceback.format_exc()}")
+        return {"valid": False, "error": f"Verification failed: {str(e)}"}
+
+    def check_burn_transaction(
+        self, receipt, tx, expected_amount: Decimal, expected_address: str, contract
+    ) -> dict:
+        """
+        Verify a successful transaction is a burn of expected_amount by
+        expected_address on the TEO contract (no RPC calls)
+        """
+        logger.info(f"📊 Transaction from: {tx.get('from')}, to: {tx.get('to')}")
+        try:
             # Verify sender address
             if tx.get("from", "").lower() != expected_address.lower():
                 logger.error(
@@ -236,9 +333,9 @@ class BurnDepositView(APIView):
                 }
 
             # Verify contract address (should be TEO contract)
-            if tx.get("to", "").lower() != teocoin_service.contract_address.lower():
+            if tx.get("to", "").lower() != contract.address.lower():
                 logger.error(
-                    f"❌ Contract mismatch: {tx.get('to')} != {teocoin_service.contract_address}"
+                    f"❌ Contract mismatch: {tx.get('to')} != {contract.address}"
                 )
                 return {"valid": False, "error": "Transaction not sent to TEO contract"}
 
@@ -247,7 +344,7 @@ class BurnDepositView(APIView):
             # Try to verify burn amount via Transfer events (most reliable method)
             logger.info(f"🔍 Checking Transfer events for burn...")
             burn_verified = self.verify_burn_via_events(
-                receipt, expected_amount, expected_address
+                receipt, expected_amount, expected_address, contract
             )
 
             if burn_verified["valid"]:
@@ -257,7 +354,6 @@ class BurnDepositView(APIView):
             # Fallback: Try to decode transaction input
             logger.info(f"🔍 Fallback: trying to decode transaction input...")
             try:
-                contract = teocoin_service.contract
                 decoded = contract.decode_function_input(tx.get("input", ""))
                 function_obj, function_inputs = decoded
 
@@ -314,21 +410,18 @@ class BurnDepositView(APIView):
                 }
 
         except Exception as e:
-            logger.error(f"❌ Error verifying burn transaction {tx_hash}: {e}")
-            import traceback
-
-            logger.error(f"📜 Verification traceback: {traceback.format_exc()}")
-            return {"valid": False, "error": f"Verification failed: {str(e)}"}
+            return self._verification_error(tx.get("hash"), e)
 
     def verify_burn_via_events(
-        self, receipt, expected_amount: Decimal, expected_address: str
+        self, receipt, expected_amount: Decimal, expected_address: str, contract=None
     ) -> dict:
         """
         Verify burn by checking Transfer events (fallback method)
         """
         try:
             logger.info(f"🔍 Verifying burn via Transfer events...")
-            contract = teocoin_service.contract
+            if contract is None:
+                contract = teocoin_service.contract
 
             # Get Transfer events from receipt
             try:
@@ -380,6 +473,39 @@ class BurnDepositView(APIView):
             return {"valid": False, "error": "Event verification failed"}
 
 
+class BurnDepositAsyncView(AsyncAPIView, BurnDepositView):
+    """
+    BurnDepositView for ASGI workers (ASYNC_IO_VIEWS): the burn is verified
+    over the async RPC provider, the database work runs in a thread
+    """
+
+    @idempotent(
+        "burn_deposit", key=lambda view, request: request.data.get("transaction_hash")
+    )
+    async def post(self, request):
+        try:
+            deposit = self.validate_deposit(request)
+            if isinstance(deposit, Response):
+                return deposit
+            tx_hash, amount_decimal, metamask_address = deposit
+
+            processed = await sync_to_async(self.already_processed)(request, tx_hash)
+            if processed is not None:
+                return processed
+
+            logger.info(f"🔍 Starting blockchain verification...")
+            verification_result = await self.averify_burn_transaction(
+                tx_hash, amount_decimal, metamask_address
+            )
+
+            return await sync_to_async(self.credit_deposit)(
+                request, tx_hash, amount_decimal, metamask_address, verification_result
+            )
+
+        except Exception as e:
+            return self.deposit_error(e)
+
+
 class BurnDepositStatusView(APIView):
     """
     Check if a transaction has already been processed
@@ -4,14 +4,20 @@ REST API endpoints for the new database-based TeoCoin system
 """
 
 import logging
+from datetime import datetime, timedelta
 from decimal import Decimal
 
 from blockchain.models import TeoCoinWithdrawalRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from services.db_teocoin_service import DBTeoCoinService
+from services.idempotency import idempotent
+from services.ledger_checkpoint_service import ledger_checkpoint_service, month_bounds
 
 logger = logging.getLogger(__name__)
 
@@ -77,6 +83,7 @@ class ApplyDiscountView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    @idempotent("teocoin_apply_discount")
     def post(self, request):
         """
         DEPRECATED: Apply TeoCoin discount
@@ -121,6 +128,7 @@ class PurchaseCourseView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    @idempotent("teocoin_purchase_course")
     def post(self, request):
         """Purchase course with TeoCoin"""
         try:
@@ -193,6 +201,7 @@ class WithdrawTokensView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    @idempotent("withdrawal_create")
     def post(self, request):
         """Create withdrawal request and auto-process it immediately"""
         try:
@@ -388,6 +397,101 @@ class TransactionHistoryView(APIView):
             )
 
 
+def _parse_day_or_datetime(value):
+    """(start, end) of a YYYY-MM-DD day, or (dt, dt) of an ISO datetime"""
+    day = parse_date(value)
+    if day is not None:
+        start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        return start, start + timedelta(days=1)
+    moment = parse_datetime(value)
+    if moment is None:
+        raise ValueError(f"Invalid date: {value}")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment, moment
+
+
+class BalanceAsOfView(APIView):
+    """Get user's TeoCoin ledger balance at a past date"""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Balance after the postings up to ?at= (end of day for a date)"""
+        try:
+            start, end = _parse_day_or_datetime(request.GET.get("at", ""))
+        except ValueError as e:
+            return Response(
+                {"success": False, "error": str(e)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # A day includes all of its postings; a datetime the ones up to it
+        balance = ledger_checkpoint_service.balance_as_of(
+            request.user.id, end, inclusive=start == end
+        )
+        return Response(
+            {"success": True, "at": request.GET["at"], "balance": balance}
+        )
+
+
+class StatementView(APIView):
+    """Get a paginated monthly TeoCoin statement"""
+
+    permission_classes = [IsAuthenticated]
+
+    MAX_PAGE_SIZE = 200
+
+    def get(self, request):
+        """Statement of ?month=YYYY-MM with running balances"""
+        try:
+            year, month = map(int, request.GET.get("month", "").split("-"))
+            start, end = month_bounds(year, month)
+            page = max(1, int(request.GET.get("page", 1)))
+            page_size = min(self.MAX_PAGE_SIZE, max(1, int(request.GET.get("page_size", 50))))
+        except ValueError:
+            return Response(
+                {"success": False, "error": "month (YYYY-MM), page and page_size are required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        statement = ledger_checkpoint_service.statement(
+            request.user.id, start, end, page, page_size
+        )
+        return Response({"success": True, "statement": statement})
+
+
+class StatementExportView(APIView):
+    """Stream the user's TeoCoin history as CSV or JSONL"""
+
+    permission_classes = [IsAuthenticated]
+
+    CONTENT_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+    def get(self, request, fmt):
+        """Export postings from ?start= up to ?end= (YYYY-MM-DD, both optional)"""
+        if fmt not in self.CONTENT_TYPES:
+            return Response(
+                {"success": False, "error": "Format must be csv or jsonl"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            start = request.GET.get("start")
+            end = request.GET.get("end")
+            start = _parse_day_or_datetime(start)[0] if start else None
+            end = _parse_day_or_datetime(end)[1] if end else None
+        except ValueError as e:
+            return Response(
+                {"success": False, "error": str(e)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        response = StreamingHttpResponse(
+            ledger_checkpoint_service.export(request.user.id, start, end, fmt),
+            content_type=self.CONTENT_TYPES[fmt],
+        )
+        response["Content-Disposition"] = f'attachment; filename="teocoin-statement.{fmt}"'
+        return response
+
+
 class PlatformStatisticsView(APIView):
     """Get platform-wide TeoCoin statistics"""
 
@@ -6,10 +6,13 @@ from django.urls import include, path
 
 from .db_teocoin_views import (
     ApplyDiscountView,
+    BalanceAsOfView,
     CalculateDiscountView,
     CreditUserView,
     PlatformStatisticsView,
     PurchaseCourseView,
+    StatementExportView,
+    StatementView,
     TeoCoinBalanceView,
     TransactionHistoryView,
 )
@@ -43,6 +46,13 @@ urlpatterns = [
     path("student/balance/", GetBalanceView.as_view(), name="student_balance"),
     path("balance/", TeoCoinBalanceView.as_view(), name="balance"),
     path("transactions/", TransactionHistoryView.as_view(), name="transactions"),
+    path("balance/as-of/", BalanceAsOfView.as_view(), name="balance_as_of"),
+    path("statement/", StatementView.as_view(), name="statement"),
+    path(
+        "statement/export/<str:fmt>/",
+        StatementExportView.as_view(),
+        name="statement_export",
+    ),
     # Discount System
     path(
         "calculate-discount/",
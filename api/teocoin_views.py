@@ -14,6 +14,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from services.hybrid_teocoin_service import hybrid_teocoin_service
 from services.teocoin_withdrawal_service import teocoin_withdrawal_service
+from services.idempotency import idempotent
 
 logger = logging.getLogger(__name__)
 
@@ -74,6 +75,7 @@ class CreateWithdrawalView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    @idempotent("withdrawal_create")
     def post(self, request):
         """
         Create withdrawal request
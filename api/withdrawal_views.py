@@ -14,7 +14,9 @@ from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from services.db_teocoin_service import db_teocoin_service
+from services.idempotency import idempotent
 from services.teocoin_withdrawal_service import teocoin_withdrawal_service
+from services.withdrawal_limit_service import withdrawal_limit_service
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +26,7 @@ class CreateWithdrawalView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    @idempotent("withdrawal_create")
     def post(self, request):
         """
         Create withdrawal request
@@ -408,18 +411,10 @@ class WithdrawalLimitsView(APIView):
     def get(self, request):
         """Get withdrawal limits for current user"""
         try:
-            from datetime import date
-
-            from blockchain.models import TeoCoinWithdrawalRequest
-
-            # Get daily usage
-            today = date.today()
-            daily_withdrawals = TeoCoinWithdrawalRequest.objects.filter(
-                user=request.user, created_at__date=today
-            )
-
-            daily_count = daily_withdrawals.count()
-            daily_amount = sum(w.amount for w in daily_withdrawals)
+            # Get daily usage (rolling window kept by the limit counter)
+            usage = withdrawal_limit_service.get_usage(request.user)
+            daily_count = usage["count"]
+            daily_amount = usage["amount"]
 
             # Get limits from service
             limits = {
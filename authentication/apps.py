@@ -11,3 +11,7 @@ class AuthenticationConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "authentication"
+
+    def ready(self):
+        # Cached JWT users are invalidated on user save, delete and logout
+        from . import user_cache  # noqa: F401
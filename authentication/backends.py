@@ -0,0 +1,34 @@
+"""
+JWT authentication resolving users from the user cache (see
+authentication.user_cache) instead of a database query per request.
+"""
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .user_cache import user_cache
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication with cached user lookups"""
+
+    def get_user(self, validated_token):
+        # Revocation checks compare the password hash, which is not cached
+        if api_settings.CHECK_REVOKE_TOKEN or api_settings.USER_ID_FIELD != "id":
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = user_cache.get(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return user
@@ -0,0 +1,94 @@
+import pytest
+from authentication.user_cache import bump_user_version, user_cache
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+User = get_user_model()
+
+
+@pytest.fixture
+def client_for(db):
+    cache.clear()
+    user_cache.clear_local()
+
+    def make(user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        return client
+
+    return make
+
+
+@pytest.fixture
+def student(db):
+    return User.objects.create_user(
+        username="poller", email="poller@example.com", password="pw", role="student"
+    )
+
+
+def role_of(client):
+    response = client.get(reverse("user-role-dashboard"))
+    return response.status_code, response.json().get("role")
+
+
+def test_polling_requests_resolve_the_user_without_queries(client_for, student, django_assert_num_queries):
+    client = client_for(student)
+    with django_assert_num_queries(1):
+        assert role_of(client) == (200, "student")
+    with django_assert_num_queries(0):
+        assert role_of(client) == (200, "student")
+
+    # Another process: only the shared level is warm
+    user_cache.clear_local()
+    with django_assert_num_queries(0):
+        assert role_of(client) == (200, "student")
+
+
+def test_user_changes_invalidate_the_cached_user(client_for, student):
+    client = client_for(student)
+    assert role_of(client) == (200, "student")
+
+    student.role = "teacher"
+    student.save()
+    assert role_of(client) == (200, "teacher")
+
+    User.objects.filter(pk=student.pk).update(is_active=False)
+    bump_user_version(student.pk)
+    assert role_of(client)[0] == 401
+
+
+def test_logout_bumps_the_version_and_password_stays_out_of_the_cache(client_for, student):
+    client = client_for(student)
+    role_of(client)
+    version = cache.get(f"auth_user_version:{student.pk}")
+
+    user_logged_out.send(sender=User, request=None, user=student)
+    assert cache.get(f"auth_user_version:{student.pk}") != version
+
+    cached = user_cache.get(student.pk)
+    assert "password" in cached.get_deferred_fields()
+    assert cached.check_password("pw")
+
+
+def test_teacher_approval_and_commits_bump_the_version(
+    client_for, student, django_capture_on_commit_callbacks
+):
+    from users.admin import make_teachers_approved
+
+    User.objects.filter(pk=student.pk).update(role="teacher", is_approved=False)
+    client = client_for(student)
+    role_of(client)
+    assert user_cache.get(student.pk).is_approved is False
+
+    make_teachers_approved(None, None, User.objects.filter(pk=student.pk))
+    assert user_cache.get(student.pk).is_approved is True
+
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        student.save()
+    version = cache.get(f"auth_user_version:{student.pk}")
+    callbacks[0]()
+    assert cache.get(f"auth_user_version:{student.pk}") != version
@@ -0,0 +1,161 @@
+"""
+User cache for JWT authentication.
+
+CachedJWTAuthentication resolves the token's user without a database query
+once it has been seen recently, from two levels:
+
+- a per-process LRU (AUTH_USER_CACHE_LOCAL_SIZE entries, kept for
+  AUTH_USER_CACHE_LOCAL_TTL seconds)
+- the shared cache, Redis in production (AUTH_USER_CACHE_TTL seconds)
+
+Both are keyed by user id and the user's version stamp, a random token kept
+in the shared cache and replaced whenever the user is saved (role change,
+deactivation...), deleted or logs out, and again when the transaction
+commits. Every request reads the stamp (one cache GET), so a change made by
+any process is seen by the next request. Updates that bypass save()
+(QuerySet.update) must call bump_user_version().
+
+Cached users carry every field but the password, which is loaded from the
+database if accessed.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "auth_user_version:{}"
+USER_KEY = "auth_user:{}"
+
+
+def _setting(name: str, default):
+    return getattr(settings, f"AUTH_USER_CACHE_{name}", default)
+
+
+class UserCache:
+    """Two-level cache of the users authenticated by JWT"""
+
+    def __init__(self):
+        self._local: "OrderedDict[Any, Tuple[str, float, tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def fields(self):
+        return [f for f in get_user_model()._meta.concrete_fields if f.attname != "password"]
+
+    def get(self, user_id) -> Optional[Any]:
+        """The user with primary key user_id, or None if it does not exist"""
+        try:
+            version = self._version(user_id)
+        except Exception as e:
+            logger.warning(f"User cache unavailable, loading user {user_id}: {e}")
+            values = self._load(user_id)
+            return self._build(values) if values is not None else None
+
+        values = self._local_get(user_id, version)
+        if values is None:
+            values = self._shared_get(user_id, version)
+            if values is None:
+                values = self._load(user_id)
+                if values is None:
+                    return None
+                cache.set(
+                    USER_KEY.format(user_id), (version, values), _setting("TTL", 60)
+                )
+            self._local_put(user_id, version, values)
+        return self._build(values)
+
+    def bump(self, user_id):
+        """Give the user a new version stamp: every cached copy becomes stale"""
+        cache.set(VERSION_KEY.format(user_id), uuid.uuid4().hex, None)
+        with self._lock:
+            self._local.pop(user_id, None)
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    # ========== LEVELS ==========
+
+    def _version(self, user_id) -> str:
+        key = VERSION_KEY.format(user_id)
+        version = cache.get(key)
+        if version is None:
+            # Random, never reused: an evicted stamp cannot revive a stale entry
+            cache.add(key, uuid.uuid4().hex, None)
+            version = cache.get(key)
+        return version
+
+    def _local_get(self, user_id, version: str) -> Optional[tuple]:
+        with self._lock:
+            entry = self._local.get(user_id)
+            if entry is None:
+                return None
+            entry_version, expires_at, values = entry
+            if entry_version != version or expires_at < time.monotonic():
+                del self._local[user_id]
+                return None
+            self._local.move_to_end(user_id)
+            return values
+
+    def _local_put(self, user_id, version: str, values: tuple):
+        expires_at = time.monotonic() + _setting("LOCAL_TTL", 10)
+        with self._lock:
+            self._local[user_id] = (version, expires_at, values)
+            self._local.move_to_end(user_id)
+            while len(self._local) > _setting("LOCAL_SIZE", 2048):
+                self._local.popitem(last=False)
+
+    def _shared_get(self, user_id, version: str) -> Optional[tuple]:
+        entry = cache.get(USER_KEY.format(user_id))
+        if entry is None or entry[0] != version:
+            return None
+        return entry[1]
+
+    def _load(self, user_id) -> Optional[tuple]:
+        return (
+            get_user_model()
+            .objects.filter(pk=user_id)
+            .values_list(*[f.attname for f in self.fields])
+            .first()
+        )
+
+    def _build(self, values: tuple):
+        User = get_user_model()
+        return User.from_db("default", [f.attname for f in self.fields], values)
+
+
+user_cache = UserCache()
+
+
+def bump_user_version(user_id):
+    """Invalidate the cached copies of a user (after changes that skip save())"""
+    try:
+        user_cache.bump(user_id)
+    except Exception as e:
+        logger.warning(f"Could not invalidate cached user {user_id}: {e}")
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, using=None, **kwargs):
+    bump_user_version(instance.pk)
+    # A request may cache the pre-commit row under the new stamp meanwhile
+    transaction.on_commit(lambda: bump_user_version(instance.pk), using=using)
+
+
+@receiver(user_logged_out)
+def invalidate_cached_user_on_logout(sender, request, user, **kwargs):
+    if user is not None:
+        bump_user_version(user.pk)
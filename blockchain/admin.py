@@ -10,6 +10,7 @@ from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django.utils.html import format_html
 from services.db_teocoin_service import DBTeoCoinService
+from services.withdrawal_limit_service import withdrawal_limit_service
 
 from .models import (
     DBTeoCoinBalance,
@@ -231,6 +232,12 @@ class DBTeoCoinTransactionAdmin(admin.ModelAdmin):
         return False
 
 
+def _rebuild_limit_counters(user_ids):
+    """Queryset updates skip the signals that keep the limit counters current"""
+    for user_id in user_ids:
+        withdrawal_limit_service.rebuild(user_id)
+
+
 @admin.register(TeoCoinWithdrawalRequest)
 class TeoCoinWithdrawalRequestAdmin(admin.ModelAdmin):
     """
@@ -281,13 +288,19 @@ class TeoCoinWithdrawalRequestAdmin(admin.ModelAdmin):
     @admin.action(description="Approve selected withdrawal requests")
     def approve_withdrawals(self, request, queryset):
         """Approve withdrawal requests."""
-        count = queryset.filter(status="pending").update(status="approved")
+        pending = queryset.filter(status="pending")
+        user_ids = set(pending.values_list("user_id", flat=True))
+        count = pending.update(status="approved")
+        _rebuild_limit_counters(user_ids)
         self.message_user(request, f"Approved {count} withdrawal requests.")
 
     @admin.action(description="Reject selected withdrawal requests")
     def reject_withdrawals(self, request, queryset):
         """Reject withdrawal requests."""
-        count = queryset.filter(status="pending").update(status="rejected")
+        pending = queryset.filter(status="pending")
+        user_ids = set(pending.values_list("user_id", flat=True))
+        count = pending.update(status="rejected")
+        _rebuild_limit_counters(user_ids)
         self.message_user(request, f"Rejected {count} withdrawal requests.")
 
 
@@ -35,14 +35,17 @@ This architecture provides the best of both worlds:
 - Real cryptocurrency functionality via selective blockchain integration
 """
 
+import asyncio
 import logging
 import time
 from decimal import Decimal
 from typing import Any, Dict, Optional
 
 from django.conf import settings
-from web3 import Web3
+from services.gas_oracle_service import gas_oracle_service
+from web3 import AsyncWeb3, Web3
 
+from .simulator import async_chain_provider, chain_provider
 from .teocoin_abi import TEOCOIN_ABI
 
 logger = logging.getLogger(__name__)
@@ -75,7 +78,7 @@ class TeoCoinService:
             )
 
         # Initialize Web3 connection
-        self.w3 = Web3(Web3.HTTPProvider(self.rpc_url))
+        self.w3 = Web3(chain_provider(self.rpc_url))
 
         # Add middleware for PoA chains (Polygon Amoy)
         try:
@@ -289,27 +292,102 @@ class TeoCoinService:
             except Exception:
                 return 30 * 10**9
 
+        # Cached network price + 10% buffer, clamped to 25-50 gwei
+        return gas_oracle_service.gas_price(self.w3, capped=True)
+
+
+class AsyncTeoCoinService:
+    """
+    Read-only TeoCoin queries over an async Web3 provider.
+
+    Used by the async views (core.async_views): balance, token info and
+    transaction lookups await the RPC instead of blocking a worker thread.
+    Nothing is requested at construction; an unreachable RPC surfaces as
+    errors of the individual queries.
+    """
+
+    def __init__(self):
+        self.rpc_url = getattr(
+            settings, "POLYGON_AMOY_RPC_URL", "https://rpc-amoy.polygon.technology/"
+        )
+        self.contract_address = getattr(settings, "TEOCOIN_CONTRACT_ADDRESS", None)
+        if not self.contract_address:
+            raise ValueError(
+                "TEOCOIN_CONTRACT_ADDRESS must be set in environment variables"
+            )
+
+        self.w3 = AsyncWeb3(async_chain_provider(self.rpc_url))
         try:
-            gas_price = self.w3.eth.gas_price
-            # Add 10% for reliability
-            gas_price = int(gas_price * 1.1)
+            from web3.middleware import ExtraDataToPOAMiddleware
 
-            # Set reasonable limits
-            min_gas_price = self.w3.to_wei("25", "gwei")
-            max_gas_price = self.w3.to_wei("50", "gwei")
+            self.w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+        except ImportError:
+            logger.warning("Could not load PoA middleware - using fallback")
 
-            if gas_price < min_gas_price:
-                gas_price = min_gas_price
-            elif gas_price > max_gas_price:
-                gas_price = max_gas_price
+        self.contract = self.w3.eth.contract(
+            address=Web3.to_checksum_address(self.contract_address), abi=TEOCOIN_ABI
+        )
 
-            return gas_price
-        except Exception:
-            return int(30 * 10**9)
+    async def get_balance(self, wallet_address: str) -> Decimal:
+        """TeoCoin balance of a wallet address (0 if the query fails)"""
+        start_time = time.time()
+        try:
+            checksum_address = Web3.to_checksum_address(wallet_address)
+            balance_wei = await self.contract.functions.balanceOf(checksum_address).call()
+            execution_time = time.time() - start_time
+            if execution_time > 1.0:
+                logger.warning(
+                    f"⚠️ Slow balance query ({execution_time:.3f}s) for {wallet_address}"
+                )
+            return Decimal(str(Web3.from_wei(balance_wei, "ether")))
+        except Exception as e:
+            execution_time = time.time() - start_time
+            logger.error(
+                f"Error retrieving balance for {wallet_address} after {execution_time:.3f}s: {e}"
+            )
+            return Decimal("0")
+
+    async def get_token_info(self) -> Dict[str, Any]:
+        """Token name, symbol, decimals and supply, queried concurrently"""
+        functions = self.contract.functions
+        try:
+            name, symbol, decimals, total_supply = await asyncio.gather(
+                functions.name().call(),
+                functions.symbol().call(),
+                functions.decimals().call(),
+                functions.totalSupply().call(),
+            )
+            return {
+                "name": name,
+                "symbol": symbol,
+                "decimals": decimals,
+                "contract_address": self.contract_address,
+                "total_supply": str(Web3.from_wei(total_supply, "ether")),
+            }
+        except Exception as e:
+            logger.error(f"Error retrieving token info: {e}")
+            return {}
+
+    async def get_transaction_receipt(self, tx_hash) -> Optional[Dict]:
+        """Receipt summary, same shape as TeoCoinService.get_transaction_receipt"""
+        try:
+            receipt = await self.w3.eth.get_transaction_receipt(tx_hash)
+            return {
+                "status": receipt["status"],
+                "block_number": receipt["blockNumber"],
+                "gas_used": receipt["gasUsed"],
+                "transaction_hash": receipt["transactionHash"].hex(),
+                "from": receipt["from"],
+                "to": receipt["to"],
+            }
+        except Exception as e:
+            logger.error(f"Error retrieving receipt for {tx_hash}: {e}")
+            return None
 
 
 # Global service instance for backward compatibility
 teocoin_service = None
+async_teocoin_service = None
 
 
 def get_teocoin_service():
@@ -324,6 +402,17 @@ def get_teocoin_service():
     return teocoin_service
 
 
+def get_async_teocoin_service() -> Optional[AsyncTeoCoinService]:
+    """Get or create the global AsyncTeoCoinService instance."""
+    global async_teocoin_service
+    if async_teocoin_service is None:
+        try:
+            async_teocoin_service = AsyncTeoCoinService()
+        except Exception as e:
+            logger.error(f"Failed to create AsyncTeoCoinService instance: {e}")
+    return async_teocoin_service
+
+
 # Initialize service instance
 try:
     teocoin_service = TeoCoinService()
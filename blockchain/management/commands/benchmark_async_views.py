@@ -0,0 +1,126 @@
+"""
+Django Management Command: Benchmark Async I/O Views
+Measures how many blockchain requests one worker keeps in flight, with the
+sync views and with their async variants (core.async_views), on the chain
+simulator with a fixed RPC latency.
+
+The sync view is served by --threads threads, like a gunicorn worker with
+that many threads; the async view by one event loop, like a uvicorn worker.
+Every request is a tx-status lookup (one RPC round trip, no database
+writes). Average requests in flight = total request time / wall time.
+
+Usage:
+    CHAIN_SIMULATOR_ENABLED=true python manage.py benchmark_async_views
+    CHAIN_SIMULATOR_ENABLED=true python manage.py benchmark_async_views --requests 500 --latency-ms 200 --threads 4
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory, force_authenticate
+from users.models import User
+
+from blockchain.blockchain import get_async_teocoin_service
+from blockchain.simulator import shared_simulator
+from blockchain.views_simplified import (
+    check_transaction_status,
+    check_transaction_status_async,
+)
+
+
+class Command(BaseCommand):
+    help = "Benchmark requests in flight per worker, sync vs async blockchain views"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", type=int, default=200, help="Requests per run (default 200)"
+        )
+        parser.add_argument(
+            "--latency-ms",
+            type=float,
+            default=100.0,
+            help="Simulated RPC latency in ms (default 100)",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=1,
+            help="Threads serving the sync view (gunicorn --threads, default 1)",
+        )
+
+    def handle(self, *args, **options):
+        if not getattr(settings, "CHAIN_SIMULATOR_ENABLED", False):
+            raise CommandError(
+                "Set CHAIN_SIMULATOR_ENABLED=true: the benchmark runs on the chain simulator"
+            )
+        if get_async_teocoin_service() is None:
+            raise CommandError("Async blockchain service not available")
+
+        shared_simulator().latency = options["latency_ms"] / 1000
+        count = options["requests"]
+
+        # Request bodies can be read once: each run gets its own requests
+        sync_run = self.run_sync(self.build_requests(count), options["threads"])
+        async_run = asyncio.run(self.run_async(self.build_requests(count)))
+
+        self.stdout.write(
+            f"⏱️ {count} tx-status requests, RPC latency {options['latency_ms']:.0f}ms"
+        )
+        self.report(f"sync ({options['threads']} threads)", sync_run)
+        self.report("async (1 event loop)", async_run)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"🚀 Async: {sync_run['wall'] / async_run['wall']:.1f}x the throughput per worker"
+            )
+        )
+
+    def build_requests(self, count):
+        factory = APIRequestFactory()
+        user = User(id=0, username="benchmark")
+        requests = []
+        for i in range(count):
+            request = factory.post(
+                "/api/v1/blockchain/tx-status/", {"tx_hash": f"0x{i:064x}"}, format="json"
+            )
+            force_authenticate(request, user=user)
+            requests.append(request)
+        return requests
+
+    def run_sync(self, requests, threads):
+        def timed(request):
+            start = time.perf_counter()
+            response = check_transaction_status(request)
+            return time.perf_counter() - start, response.status_code
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(timed, requests))
+        return self.summarize(results, time.perf_counter() - start)
+
+    async def run_async(self, requests):
+        async def timed(request):
+            start = time.perf_counter()
+            response = await check_transaction_status_async(request)
+            return time.perf_counter() - start, response.status_code
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(timed(request) for request in requests))
+        return self.summarize(results, time.perf_counter() - start)
+
+    def summarize(self, results, wall):
+        busy = sum(duration for duration, _ in results)
+        return {
+            "wall": wall,
+            "throughput": len(results) / wall,
+            "in_flight": busy / wall,
+            "errors": sum(1 for _, code in results if code >= 400),
+        }
+
+    def report(self, label, run):
+        self.stdout.write(
+            f"  {label:<22} {run['wall']:7.2f}s  {run['throughput']:8.1f} req/s  "
+            f"{run['in_flight']:6.1f} in flight  {run['errors']} errors"
+        )
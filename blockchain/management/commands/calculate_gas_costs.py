@@ -0,0 +1,71 @@
+"""
+Django Management Command: Calculate Gas Costs
+Shows the gas oracle state (cached EWMA gas price, memoized gas limits) and
+what typical platform transactions cost at the current price.
+
+Usage:
+    python manage.py calculate_gas_costs
+    python manage.py calculate_gas_costs --sample
+"""
+
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from services.gas_oracle_service import GWEI, gas_oracle_service
+from services.teocoin_withdrawal_service import teocoin_withdrawal_service
+
+# Typical gas used by platform transactions
+TYPICAL_GAS = {
+    "MATIC transfer": 21000,
+    "TEO mint": 120000,
+    "TEO transfer": 65000,
+}
+
+
+class Command(BaseCommand):
+    help = "Show the gas oracle state and typical transaction costs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sample",
+            action="store_true",
+            help="Sample the network fee level now instead of using the cached value",
+        )
+
+    def handle(self, *args, **options):
+        web3 = teocoin_withdrawal_service.web3
+        if options["sample"]:
+            if not web3:
+                self.stdout.write(self.style.ERROR("❌ Web3 not configured"))
+                return
+            gas_oracle_service.sample(web3)
+
+        state = gas_oracle_service.state()
+        self.stdout.write(self.style.SUCCESS("⛽ Gas Oracle"))
+        self.stdout.write(
+            f"   Clamp (capped prices): {state['min_gwei']}-{state['max_gwei']} gwei, "
+            f"refresh every {state['refresh_seconds']}s"
+        )
+
+        if not state["sampled"]:
+            self.stdout.write(
+                self.style.WARNING("   No sample yet (use --sample to read the network)")
+            )
+            return
+
+        self.stdout.write(
+            f"   Price: {state['price_gwei']} gwei, capped {state['capped_price_gwei']} gwei "
+            f"(EWMA {state['ewma_gwei']:.2f}, last sample {state['last_sample_gwei']:.2f} "
+            f"from {state['source']}, {state['samples']} samples, "
+            f"{state['age_seconds']}s old)"
+        )
+        for key, entry in state["estimates"].items():
+            self.stdout.write(
+                f"   Gas limit {key}: {entry['gas']} ({entry['age_seconds']}s old)"
+            )
+
+        price_wei = Decimal(str(state["price_gwei"])) * GWEI
+        self.stdout.write(self.style.SUCCESS("\n💰 Typical costs"))
+        for name, gas in TYPICAL_GAS.items():
+            cost = price_wei * gas / Decimal(10**18)
+            self.stdout.write(f"   {name}: {gas} gas = {cost:.6f} MATIC")
@@ -0,0 +1,42 @@
+"""
+Django Management Command: Checkpoint the TeoCoin Ledger
+Writes per-user running-total checkpoints of DBTeoCoinTransaction for fast
+historical balance and statement queries (see
+services.ledger_checkpoint_service). Meant to run daily.
+
+Usage:
+    python manage.py checkpoint_ledger
+    python manage.py checkpoint_ledger --every 1000
+    python manage.py checkpoint_ledger --user 42
+"""
+
+from django.core.management.base import BaseCommand
+from services.ledger_checkpoint_service import ledger_checkpoint_service
+
+
+class Command(BaseCommand):
+    help = "Write TeoCoin ledger balance checkpoints"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--every",
+            type=int,
+            help="Postings between checkpoints (default: LEDGER_CHECKPOINT_EVERY)",
+        )
+        parser.add_argument("--user", type=int, help="Only checkpoint this user id")
+
+    def handle(self, *args, **options):
+        if options["user"]:
+            written = ledger_checkpoint_service.checkpoint_user(
+                options["user"], every=options["every"]
+            )
+            stats = {"users": 1, "checkpoints": written}
+        else:
+            stats = ledger_checkpoint_service.checkpoint_all(every=options["every"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"📒 Ledger checkpoints: {stats['checkpoints']} written "
+                f"for {stats['users']} users"
+            )
+        )
@@ -1,5 +1,8 @@
 """
 Management command to process pending TeoCoin withdrawals
+
+Several instances can run at the same time: each claims its own withdrawals
+from the leased queue (services.withdrawal_queue_service).
 """
 
 import logging
@@ -7,7 +10,13 @@ import logging
 from blockchain.models import DBTeoCoinBalance, TeoCoinWithdrawalRequest
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
 from services.teocoin_withdrawal_service import teocoin_withdrawal_service
+from services.withdrawal_queue_service import (
+    default_worker_id,
+    withdrawal_queue_service,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +33,18 @@ class Command(BaseCommand):
             action="store_true",
             help="Show what would be processed without actually doing it",
         )
+        parser.add_argument(
+            "--limit", type=int, help="Maximum number of withdrawals to process"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10,
+            help="Withdrawals claimed per round trip (default: 10)",
+        )
+        parser.add_argument(
+            "--worker-id", help="Worker name in claims and stats (default: host:pid)"
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS("🚀 TeoCoin Withdrawal Processor"))
@@ -39,77 +60,108 @@ class Command(BaseCommand):
         platform_address = settings.PLATFORM_WALLET_ADDRESS
         self.stdout.write(f"🏛️ Platform wallet: {platform_address}")
 
+        # Requeue withdrawals whose worker died mid-processing
+        recovery = withdrawal_queue_service.recover_expired_leases()
+        if recovery["requeued"]:
+            self.stdout.write(
+                f"♻️ Requeued {recovery['requeued']} withdrawal(s) with expired leases"
+            )
+        for withdrawal_id in recovery["stuck"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"⚠️ Withdrawal {withdrawal_id} processing too long after broadcast"
+                )
+            )
+
         # Get pending withdrawals
+        only = None
         if options["withdrawal_id"]:
-            withdrawals = TeoCoinWithdrawalRequest.objects.filter(
+            only = [options["withdrawal_id"]]
+            if not TeoCoinWithdrawalRequest.objects.filter(
                 pk=options["withdrawal_id"], status="pending"
-            )
-            if not withdrawals.exists():
+            ).exists():
                 self.stdout.write(
                     self.style.ERROR(
                         f'❌ Withdrawal {options["withdrawal_id"]} not found or not pending'
                     )
                 )
                 return
-        else:
-            withdrawals = TeoCoinWithdrawalRequest.objects.filter(status="pending")
 
-        if not withdrawals.exists():
-            self.stdout.write(self.style.WARNING("📭 No pending withdrawals found"))
-            return
-
-        self.stdout.write(f"📋 Found {withdrawals.count()} pending withdrawal(s)")
-
-        # Process each withdrawal
-        for withdrawal in withdrawals:
-            self.stdout.write(f"\n👤 User: {withdrawal.user.email}")
-            self.stdout.write(f"💰 Amount: {withdrawal.amount} TEO")
-            self.stdout.write(f"📍 To Address: {withdrawal.metamask_address}")
-            self.stdout.write(f"📅 Created: {withdrawal.created_at}")
-
-            if options["dry_run"]:
+        if options["dry_run"]:
+            withdrawals = TeoCoinWithdrawalRequest.objects.filter(status="pending")
+            if only:
+                withdrawals = withdrawals.filter(pk__in=only)
+            self.stdout.write(f"📋 Found {withdrawals.count()} pending withdrawal(s)")
+            for withdrawal in withdrawals.select_related("user"):
+                self._show_withdrawal(withdrawal)
                 self.stdout.write(
                     self.style.WARNING("🔍 DRY RUN - Would process this withdrawal")
                 )
-                continue
-
-            # Test minting functionality
-            result = teocoin_withdrawal_service.mint_tokens_to_address(
-                amount=withdrawal.amount,
-                to_address=withdrawal.metamask_address,
-                withdrawal_id=withdrawal.pk,
-            )
-
-            if result["success"]:
-                tx_hash = result.get("transaction_hash", "demo_hash")
-                gas_used = result.get("gas_used", 0)
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"✅ Minted {withdrawal.amount} TEO to {withdrawal.metamask_address}"
-                    )
-                )
-                self.stdout.write(self.style.SUCCESS(f"📤 Transaction: {tx_hash}"))
-                self.stdout.write(self.style.SUCCESS(f"⛽ Gas used: {gas_used}"))
-
-                # Mark as completed
-                withdrawal.status = "completed"
-                withdrawal.transaction_hash = tx_hash
-                withdrawal.save()
-
-                # Update balance
-                balance_obj = DBTeoCoinBalance.objects.get(user=withdrawal.user)
-                balance_obj.pending_withdrawal -= withdrawal.amount
-                balance_obj.save()
+            return
 
-                self.stdout.write(
-                    self.style.SUCCESS(f"📝 Withdrawal marked as completed")
-                )
-            else:
-                self.stdout.write(self.style.ERROR(f'❌ Error: {result["error"]}'))
+        # Claim and process withdrawals; other workers running this command
+        # concurrently skip the rows claimed here
+        worker_id = options["worker_id"] or default_worker_id()
+        stats = withdrawal_queue_service.drain(
+            worker_id,
+            self._mint_withdrawal,
+            batch_size=options["batch_size"],
+            limit=options["limit"],
+            only=only,
+        )
 
         self.stdout.write("\n" + "=" * 50)
         self.stdout.write(self.style.SUCCESS("✅ Withdrawal processing completed!"))
+        self.stdout.write(
+            f"👷 Worker {worker_id}: {stats['succeeded']} completed, "
+            f"{stats['failed']} failed, {stats['lost']} lost "
+            f"in {stats['elapsed_seconds']}s ({stats['per_minute']}/min)"
+        )
 
         # Show updated status
         remaining = TeoCoinWithdrawalRequest.objects.filter(status="pending").count()
         self.stdout.write(f"📊 Remaining pending withdrawals: {remaining}")
+
+    def _show_withdrawal(self, withdrawal):
+        self.stdout.write(f"\n👤 User: {withdrawal.user.email}")
+        self.stdout.write(f"💰 Amount: {withdrawal.amount} TEO")
+        self.stdout.write(f"📍 To Address: {withdrawal.metamask_address}")
+        self.stdout.write(f"📅 Created: {withdrawal.created_at}")
+
+    def _mint_withdrawal(self, withdrawal):
+        """Mint a claimed withdrawal and mark it completed"""
+        self._show_withdrawal(withdrawal)
+        result = teocoin_withdrawal_service.mint_tokens_to_address(
+            amount=withdrawal.amount,
+            to_address=withdrawal.metamask_address,
+            withdrawal_id=withdrawal.pk,
+        )
+
+        if not result["success"]:
+            self.stdout.write(self.style.ERROR(f'❌ Error: {result["error"]}'))
+            return result
+
+        tx_hash = result.get("transaction_hash", "demo_hash")
+        gas_used = result.get("gas_used", 0)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Minted {withdrawal.amount} TEO to {withdrawal.metamask_address}"
+            )
+        )
+        self.stdout.write(self.style.SUCCESS(f"📤 Transaction: {tx_hash}"))
+        self.stdout.write(self.style.SUCCESS(f"⛽ Gas used: {gas_used}"))
+
+        with transaction.atomic():
+            # Mark as completed
+            withdrawal.status = "completed"
+            withdrawal.transaction_hash = tx_hash
+            withdrawal.completed_at = timezone.now()
+            withdrawal.save()
+
+            # Update balance
+            balance_obj = DBTeoCoinBalance.objects.get(user=withdrawal.user)
+            balance_obj.pending_withdrawal -= withdrawal.amount
+            balance_obj.save()
+
+        self.stdout.write(self.style.SUCCESS(f"📝 Withdrawal marked as completed"))
+        return result
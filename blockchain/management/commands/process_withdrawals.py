@@ -6,6 +6,9 @@ Usage:
     python manage.py process_withdrawals
     python manage.py process_withdrawals --dry-run
     python manage.py process_withdrawals --limit 10
+    python manage.py process_withdrawals --worker-id worker-2
+
+Several instances can run at the same time; each claims its own withdrawals.
 """
 
 import logging
@@ -16,6 +19,10 @@ from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 from django.utils import timezone
 from services.teocoin_withdrawal_service import teocoin_withdrawal_service
+from services.withdrawal_queue_service import (
+    default_worker_id,
+    withdrawal_queue_service,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +47,15 @@ class Command(BaseCommand):
             action="store_true",
             help="Process withdrawals even if blockchain connection is not available",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10,
+            help="Withdrawals claimed per round trip (default: 10)",
+        )
+        parser.add_argument(
+            "--worker-id", help="Worker name in claims and stats (default: host:pid)"
+        )
 
     def handle(self, *args, **options):
         """
@@ -62,6 +78,10 @@ class Command(BaseCommand):
             )
 
         try:
+            if not dry_run:
+                # Requeue withdrawals whose worker died mid-processing
+                withdrawal_queue_service.recover_expired_leases()
+
             # Get pending withdrawals
             pending_withdrawals = TeoCoinWithdrawalRequest.objects.filter(
                 status="pending"
@@ -88,39 +108,25 @@ class Command(BaseCommand):
                 )
                 return
 
-            processed_count = 0
-            failed_count = 0
-
-            for withdrawal in pending_withdrawals:
-                try:
-                    if dry_run:
-                        self._show_withdrawal_info(withdrawal)
-                    else:
-                        success = self._process_withdrawal(withdrawal, blockchain_ready)
-                        if success:
-                            processed_count += 1
-                            self.stdout.write(
-                                self.style.SUCCESS(
-                                    f"✅ Processed withdrawal #{withdrawal.id} - "
-                                    f"{withdrawal.amount} TEO to {withdrawal.metamask_address[:10]}..."
-                                )
-                            )
-                        else:
-                            failed_count += 1
-                            self.stdout.write(
-                                self.style.ERROR(
-                                    f"❌ Failed to process withdrawal #{withdrawal.id}"
-                                )
-                            )
-
-                except Exception as e:
-                    failed_count += 1
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f"❌ Error processing withdrawal #{withdrawal.id}: {e}"
-                        )
-                    )
-                    logger.error(f"Withdrawal processing error: {e}")
+            if dry_run:
+                for withdrawal in pending_withdrawals:
+                    self._show_withdrawal_info(withdrawal)
+                return
+
+            self.processed_count = 0
+            self.failed_count = 0
+
+            # Withdrawals are claimed from the leased queue, so concurrent runs
+            # of this command never process the same withdrawal
+            worker_id = options["worker_id"] or default_worker_id()
+            stats = withdrawal_queue_service.drain(
+                worker_id,
+                lambda withdrawal: self._settle_withdrawal(withdrawal, blockchain_ready),
+                batch_size=options["batch_size"],
+                limit=limit,
+            )
+            processed_count = self.processed_count
+            failed_count = self.failed_count
 
             # Summary
             if not dry_run:
@@ -129,7 +135,9 @@ class Command(BaseCommand):
                         f"\n📊 Processing Summary:\n"
                         f"   ✅ Processed: {processed_count}\n"
                         f"   ❌ Failed: {failed_count}\n"
-                        f"   📝 Total: {processed_count + failed_count}"
+                        f"   📝 Total: {processed_count + failed_count}\n"
+                        f"   👷 Worker {worker_id}: {stats['per_minute']}/min "
+                        f"over {stats['elapsed_seconds']}s"
                     )
                 )
 
@@ -165,6 +173,34 @@ class Command(BaseCommand):
             f"   🏠 IP: {withdrawal.ip_address or 'N/A'}\n"
         )
 
+    def _settle_withdrawal(self, withdrawal, blockchain_ready: bool) -> dict:
+        """
+        Queue handler: failed withdrawals are refunded right away rather than
+        retried, so every outcome settles the claim
+        """
+        try:
+            success = self._process_withdrawal(withdrawal, blockchain_ready)
+        except Exception as e:
+            success = False
+            logger.error(f"Withdrawal processing error: {e}")
+            self.stdout.write(
+                self.style.ERROR(f"❌ Error processing withdrawal #{withdrawal.id}: {e}")
+            )
+        if success:
+            self.processed_count += 1
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✅ Processed withdrawal #{withdrawal.id} - "
+                    f"{withdrawal.amount} TEO to {withdrawal.metamask_address[:10]}..."
+                )
+            )
+        else:
+            self.failed_count += 1
+            self.stdout.write(
+                self.style.ERROR(f"❌ Failed to process withdrawal #{withdrawal.id}")
+            )
+        return {"success": True}
+
     @transaction.atomic
     def _process_withdrawal(self, withdrawal, blockchain_ready: bool) -> bool:
         """
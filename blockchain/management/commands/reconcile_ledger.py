@@ -0,0 +1,60 @@
+"""
+Django Management Command: Reconcile TeoCoin Balances with the Ledger
+Aggregates DBTeoCoinTransaction postings per user in parallel id-range
+chunks and diffs them against DBTeoCoinBalance rows (see
+services.ledger_reconciliation_service).
+
+Usage:
+    python manage.py reconcile_ledger
+    python manage.py reconcile_ledger --workers 8 --chunk-size 200000
+    python manage.py reconcile_ledger --repair --report /tmp/drift.csv
+"""
+
+from django.core.management.base import BaseCommand
+from services.ledger_reconciliation_service import (
+    CHUNK_SIZE,
+    ledger_reconciliation_service,
+)
+
+
+class Command(BaseCommand):
+    help = "Reconcile TeoCoin balances against the ledger postings"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, help="Aggregation processes (default: CPU count)"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help=f"Posting ids per chunk (default: {CHUNK_SIZE})",
+        )
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Set drifted balances to the values derived from the ledger",
+        )
+        parser.add_argument("--report", help="CSV discrepancy report path")
+
+    def handle(self, *args, **options):
+        stats = ledger_reconciliation_service.reconcile(
+            chunk_size=options["chunk_size"],
+            workers=options["workers"],
+            repair=options["repair"],
+            report_path=options["report"],
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"📊 Reconciliation Summary:\n"
+                f"   📒 Postings: {stats['postings']} in {stats['chunks']} chunks "
+                f"({stats['workers']} workers)\n"
+                f"   👥 Users: {stats['users']}\n"
+                f"   ⚠️ Discrepancies: {stats['discrepancies']} (total drift {stats['drift']} TEO)\n"
+                f"   🔧 Repaired: {stats['repaired']}, skipped: {stats['skipped']}\n"
+                f"   ⏱️ Elapsed: {stats['elapsed_seconds']}s"
+            )
+        )
+        if stats["report"]:
+            self.stdout.write(f"📝 Report: {stats['report']}")
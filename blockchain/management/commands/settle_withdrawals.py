@@ -0,0 +1,68 @@
+"""
+Django Management Command: Settle TeoCoin Withdrawals in Batches
+Nets pending withdrawals per destination address and mints them in batched
+transactions (see services.withdrawal_settlement_service).
+
+Usage:
+    python manage.py settle_withdrawals
+    python manage.py settle_withdrawals --force
+    python manage.py settle_withdrawals --window 600 --max-batch 500
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from services.withdrawal_queue_service import withdrawal_queue_service
+from services.withdrawal_settlement_service import withdrawal_settlement_service
+
+
+class Command(BaseCommand):
+    help = "Settle pending TeoCoin withdrawals with netted, batched mints"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--window",
+            type=int,
+            help="Seconds the oldest withdrawal waits before settling (default: settings)",
+        )
+        parser.add_argument(
+            "--max-batch",
+            type=int,
+            help="Maximum withdrawals per settlement (default: settings)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Settle now even if the window has not elapsed",
+        )
+        parser.add_argument(
+            "--worker-id", help="Worker name in claims and stats (default: host:pid)"
+        )
+
+    def handle(self, *args, **options):
+        withdrawal_queue_service.recover_expired_leases()
+
+        window = options["window"]
+        stats = withdrawal_settlement_service.settle(
+            worker_id=options["worker_id"],
+            window=timedelta(seconds=window) if window else None,
+            max_batch=options["max_batch"],
+            force=options["force"],
+        )
+
+        if not stats["due"]:
+            self.stdout.write("⏳ Settlement window still open, nothing to do")
+            return
+        if stats.get("error"):
+            self.stdout.write(self.style.ERROR(f"❌ {stats['error']}"))
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"📊 Settlement Summary:\n"
+                f"   📝 Withdrawals: {stats['withdrawals']}\n"
+                f"   📤 Transactions: {stats['transactions']}\n"
+                f"   ✅ Settled: {stats['settled']}\n"
+                f"   ❌ Failed: {stats['failed']}"
+            )
+        )
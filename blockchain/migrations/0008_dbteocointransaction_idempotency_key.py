@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-19 09:11
+
+import re
+
+from django.db import migrations, models
+
+SUBMISSION_RX = re.compile(r"\(submission (\d+)\)")
+
+
+def backfill_peer_review_keys(apps, schema_editor):
+    """
+    Give already granted peer-review rewards the key used by the settlement
+    service, so settling an old submission again can't pay twice.
+    """
+    DBTeoCoinTransaction = apps.get_model("blockchain", "DBTeoCoinTransaction")
+
+    seen = set()
+    to_save = []
+    rows = DBTeoCoinTransaction.objects.filter(
+        transaction_type="bonus", idempotency_key__isnull=True
+    ).filter(
+        models.Q(description__startswith="[review_reward]")
+        | models.Q(description__startswith="[exercise_reward]")
+    ).order_by("created_at")
+    for tx in rows:
+        m = SUBMISSION_RX.search(tx.description or "")
+        if not m:
+            continue
+        key = f"peer_review:{m.group(1)}:{tx.user_id}"
+        if key in seen:
+            continue
+        seen.add(key)
+        tx.idempotency_key = key
+        to_save.append(tx)
+
+    DBTeoCoinTransaction.objects.bulk_update(to_save, ["idempotency_key"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0007_add_hold_transaction_types'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dbteocointransaction',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_peer_review_keys, migrations.RunPython.noop),
+    ]
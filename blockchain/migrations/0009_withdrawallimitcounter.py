@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 09:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0008_dbteocointransaction_idempotency_key'),
+        ('users', '0009_userprogress_recent_activities'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WithdrawalLimitCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='withdrawal_limit_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('buckets', models.JSONField(default=dict)),
+                ('in_flight', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'blockchain_withdrawal_limit_counter',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 09:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0009_withdrawallimitcounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teocoinwithdrawalrequest',
+            name='claimed_by',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='teocoinwithdrawalrequest',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='teocoinwithdrawalrequest',
+            index=models.Index(fields=['status', 'lease_expires_at'], name='blockchain__status_a7b44d_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-19 09:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0010_withdrawal_queue_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WithdrawalSettlementBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('submitted', 'Submitted'), ('confirmed', 'Confirmed'), ('failed', 'Failed')], default='submitted', max_length=20)),
+                ('worker', models.CharField(blank=True, default='', max_length=100)),
+                ('call_count', models.PositiveIntegerField(default=0)),
+                ('withdrawal_count', models.PositiveIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('transaction_hash', models.CharField(blank=True, max_length=66, null=True)),
+                ('gas_used', models.BigIntegerField(blank=True, null=True)),
+                ('gas_price_gwei', models.DecimalField(decimal_places=2, max_digits=8, null=True)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('confirmed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'blockchain_withdrawal_settlement_batch',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='teocoinwithdrawalrequest',
+            name='settlement_batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='withdrawals', to='blockchain.withdrawalsettlementbatch'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-19 10:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0011_withdrawal_settlement_batch'),
+        ('courses', '0016_reviewerinboxentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DBTeoCoinCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_transaction_id', models.BigIntegerField()),
+                ('as_of', models.DateTimeField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('credits', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('debits', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('posting_count', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'blockchain_db_teocoin_checkpoint',
+                'ordering': ['-as_of', '-last_transaction_id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='dbteocointransaction',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='blockchain__user_id_8caff9_idx'),
+        ),
+        migrations.AddField(
+            model_name='dbteocoincheckpoint',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='teocoin_checkpoints', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='dbteocoincheckpoint',
+            index=models.Index(fields=['user', 'as_of'], name='blockchain__user_id_3570a8_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dbteocoincheckpoint',
+            constraint=models.UniqueConstraint(fields=('user', 'last_transaction_id'), name='unique_teocoin_checkpoint'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:20
+
+from django.db import migrations
+
+
+def reset_checkpoints(apps, schema_editor):
+    """
+    Checkpoints totalled raw posting amounts, counting stakes and unstakes
+    as credits. Drop them: the next checkpoint_ledger run rebuilds them from
+    the bucket rules.
+    """
+    DBTeoCoinCheckpoint = apps.get_model("blockchain", "DBTeoCoinCheckpoint")
+    DBTeoCoinCheckpoint.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0012_ledger_checkpoints'),
+    ]
+
+    operations = [
+        migrations.RunPython(reset_checkpoints, migrations.RunPython.noop),
+    ]
@@ -348,6 +348,11 @@ class DBTeoCoinTransaction(models.Model):
     # Blockchain integration
     blockchain_tx_hash = models.CharField(max_length=66, blank=True, null=True)
 
+    # Set by DBTeoCoinService.post_many(): the same posting is never applied twice
+    idempotency_key = models.CharField(
+        max_length=100, unique=True, null=True, blank=True
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -359,12 +364,56 @@ class DBTeoCoinTransaction(models.Model):
             models.Index(fields=["user", "transaction_type"]),
             models.Index(fields=["created_at"]),
             models.Index(fields=["blockchain_tx_hash"]),
+            # Ledger order of one user, for checkpoint range scans
+            models.Index(fields=["user", "created_at", "id"]),
         ]
 
     def __str__(self):
         return f"{self.user.email} - {self.transaction_type} - {self.amount} TEO"
 
 
+class DBTeoCoinCheckpoint(models.Model):
+    """
+    Running totals of one user's ledger up to and including a posting.
+
+    Postings are ordered by (created_at, id); the checkpoint covers every
+    posting of the user up to `last_transaction_id`, whose created_at is
+    `as_of`. Written by LedgerCheckpointService at the end of each day with
+    postings and every LEDGER_CHECKPOINT_EVERY postings, so a historical
+    balance is one checkpoint read plus a bounded range scan.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="teocoin_checkpoints",
+    )
+    last_transaction_id = models.BigIntegerField()
+    as_of = models.DateTimeField()
+
+    # Sum of the amounts, and of the positive / negative ones separately
+    balance = models.DecimalField(max_digits=14, decimal_places=2)
+    credits = models.DecimalField(max_digits=14, decimal_places=2)
+    debits = models.DecimalField(max_digits=14, decimal_places=2)
+    posting_count = models.PositiveIntegerField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "blockchain_db_teocoin_checkpoint"
+        ordering = ["-as_of", "-last_transaction_id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "last_transaction_id"],
+                name="unique_teocoin_checkpoint",
+            )
+        ]
+        indexes = [models.Index(fields=["user", "as_of"])]
+
+    def __str__(self):
+        return f"Checkpoint {self.user_id} @ {self.as_of}: {self.balance} TEO"
+
+
 class TeoCoinWithdrawalRequest(models.Model):
     """
     Enhanced withdrawal request model for MetaMask integration
@@ -405,6 +454,17 @@ class TeoCoinWithdrawalRequest(models.Model):
     error_message = models.TextField(blank=True, null=True)
     retry_count = models.IntegerField(default=0)
 
+    # Processing queue (see services.withdrawal_queue_service)
+    claimed_by = models.CharField(max_length=100, blank=True, default="")
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    settlement_batch = models.ForeignKey(
+        "WithdrawalSettlementBatch",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="withdrawals",
+    )
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     processed_at = models.DateTimeField(null=True, blank=True)
@@ -420,8 +480,12 @@ class TeoCoinWithdrawalRequest(models.Model):
             models.Index(fields=["metamask_address"]),
             models.Index(fields=["status", "created_at"]),
             models.Index(fields=["daily_withdrawal_count"]),
+            models.Index(fields=["status", "lease_expires_at"]),
         ]
 
+    # Age after which a processing withdrawal needs attention
+    PROCESSING_TOO_LONG = timezone.timedelta(hours=24)
+
     def __str__(self):
         return f"Withdrawal #{self.id} - {self.user.email} - {self.amount} TEO - {self.status}"
 
@@ -429,7 +493,7 @@ class TeoCoinWithdrawalRequest(models.Model):
     def is_processing_too_long(self):
         """Check if withdrawal has been processing for too long (>24h)"""
         if self.status == "processing":
-            return timezone.now() - self.created_at > timezone.timedelta(hours=24)
+            return timezone.now() - self.created_at > self.PROCESSING_TOO_LONG
         return False
 
     @property
@@ -446,3 +510,68 @@ class TeoCoinWithdrawalRequest(models.Model):
             return "1-5 minutes"
         else:
             return "Completed"
+
+
+class WithdrawalSettlementBatch(models.Model):
+    """
+    One on-chain mint settling several withdrawal requests.
+
+    Withdrawals are netted per destination address into `call_count` mintTo
+    calls, sent as one multicall transaction (or one mintTo when a single
+    address is paid). The receipt's gas is split back to the withdrawals.
+    """
+
+    BATCH_STATUS = [
+        ("submitted", "Submitted"),
+        ("confirmed", "Confirmed"),
+        ("failed", "Failed"),
+    ]
+
+    status = models.CharField(max_length=20, choices=BATCH_STATUS, default="submitted")
+    worker = models.CharField(max_length=100, blank=True, default="")
+    call_count = models.PositiveIntegerField(default=0)
+    withdrawal_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2)
+
+    transaction_hash = models.CharField(max_length=66, null=True, blank=True)
+    gas_used = models.BigIntegerField(null=True, blank=True)
+    gas_price_gwei = models.DecimalField(max_digits=8, decimal_places=2, null=True)
+    error_message = models.TextField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    confirmed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "blockchain_withdrawal_settlement_batch"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Settlement batch #{self.pk} - {self.withdrawal_count} withdrawals - {self.status}"
+
+
+class WithdrawalLimitCounter(models.Model):
+    """
+    Rolling withdrawal usage of one user, used for O(1) limit checks.
+
+    `buckets` maps an hour ("2025-01-31T14") to the number and total amount of
+    withdrawal requests created in it; buckets older than the limit window are
+    pruned on every write. `in_flight` counts pending/processing requests.
+    Maintained by WithdrawalLimitService from TeoCoinWithdrawalRequest
+    create and status-change events.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="withdrawal_limit_counter",
+    )
+    buckets = models.JSONField(default=dict)
+    in_flight = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "blockchain_withdrawal_limit_counter"
+
+    def __str__(self):
+        return f"Withdrawal limits {self.user_id}: {self.in_flight} in flight"
@@ -0,0 +1,63 @@
+"""
+Background tasks for the TeoCoin ledger (queue "ledger") and the chain
+(queue "chain"). They wrap the services run by the reconcile_ledger,
+checkpoint_ledger and settle_withdrawals management commands.
+"""
+
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(queue="ledger", soft_time_limit=1800, time_limit=2100)
+def reconcile_ledger(repair=False, chunk_size=None):
+    """
+    Diff every balance row against the ledger (see reconcile_ledger).
+
+    Chunks are aggregated in the worker process itself: pool workers are
+    daemonic and cannot start a process pool of their own.
+    """
+    from services.ledger_reconciliation_service import (
+        CHUNK_SIZE,
+        ledger_reconciliation_service,
+    )
+
+    stats = ledger_reconciliation_service.reconcile(
+        chunk_size=chunk_size or CHUNK_SIZE, workers=1, repair=repair
+    )
+    stats["drift"] = str(stats["drift"])
+    return stats
+
+
+@shared_task(queue="ledger", soft_time_limit=1800, time_limit=2100)
+def checkpoint_ledger(user_id=None):
+    """Write ledger balance checkpoints for one user or for everyone"""
+    from services.ledger_checkpoint_service import ledger_checkpoint_service
+
+    if user_id is not None:
+        return {"users": 1, "checkpoints": ledger_checkpoint_service.checkpoint_user(user_id)}
+    return ledger_checkpoint_service.checkpoint_all()
+
+
+@shared_task(
+    bind=True, queue="chain", max_retries=3, soft_time_limit=240, time_limit=300
+)
+def settle_withdrawals(self, force=False):
+    """Requeue expired claims, then settle one netted batch of withdrawals"""
+    from services.withdrawal_queue_service import withdrawal_queue_service
+    from services.withdrawal_settlement_service import withdrawal_settlement_service
+
+    try:
+        withdrawal_queue_service.recover_expired_leases()
+        stats = withdrawal_settlement_service.settle(
+            worker_id=f"celery:{self.request.hostname or 'local'}", force=force
+        )
+    except Exception as exc:
+        # Claims left by a failed run are requeued once their lease expires
+        logger.error(f"Error settling withdrawals: {exc}")
+        raise self.retry(countdown=60, exc=exc)
+    if stats.get("error"):
+        logger.warning(f"Withdrawal settlement skipped: {stats['error']}")
+    return stats
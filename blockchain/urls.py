@@ -9,12 +9,15 @@ Only essential endpoints for MetaMask integration:
 Core TeoCoin operations use /api/v1/teocoin/ endpoints.
 """
 
+from core.async_views import io_view
 from django.urls import path
 
 from .views_simplified import (
     check_transaction_status,
+    check_transaction_status_async,
     get_token_info,
     get_wallet_balance,
+    get_wallet_balance_async,
     verify_deposit,
     onchain_mint,
 )
@@ -24,9 +27,13 @@ app_name = "blockchain"
 
 urlpatterns = [
     # Essential blockchain queries
-    path("balance/", get_wallet_balance, name="get_balance"),
+    path("balance/", io_view(get_wallet_balance, get_wallet_balance_async), name="get_balance"),
     path("token-info/", get_token_info, name="token_info"),
-    path("tx-status/", check_transaction_status, name="transaction_status"),
+    path(
+        "tx-status/",
+        io_view(check_transaction_status, check_transaction_status_async),
+        name="transaction_status",
+    ),
     path("onchain/mint/", onchain_mint, name="onchain_mint"),
     # idempotent withdraw for linked users
     path("wallet/withdraw/", withdraw_to_wallet, name="wallet_withdraw"),
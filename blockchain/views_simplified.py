@@ -14,8 +14,12 @@ Production deployments should implement additional security measures.
 """
 
 import logging
+import time
 from decimal import Decimal
 
+from asgiref.sync import sync_to_async
+from blockchain.blockchain import get_async_teocoin_service
+from core.async_views import async_api_view
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
@@ -135,6 +139,76 @@ def get_wallet_balance(request):
                 )
 
 
+@async_api_view(["GET"])
+@permission_classes([IsAuthenticated])
+async def get_wallet_balance_async(request):
+    """
+    Async get_wallet_balance(), for ASGI (see core.async_views).
+
+    Same responses; the RPC queries are awaited, so the worker serves other
+    requests meanwhile.
+    """
+    start_time = time.time()
+
+    user = request.user
+
+    try:
+        result = await blockchain_service.aget_user_wallet_balance(user)
+
+        response_time = time.time() - start_time
+        logger.info(
+            f"Balance API completed in {response_time:.3f}s via BlockchainService (async)"
+        )
+        if response_time > 1.0:
+            logger.warning(
+                f"Slow Balance API: {response_time:.3f}s for user {user.username}"
+            )
+
+        return Response(result)
+
+    except Exception as e:
+        logger.error(f"Error retrieving balance for {user.email}: {e}")
+
+        if not user.wallet_address:
+            return Response(
+                {"error": "Wallet not linked", "balance": "0", "wallet_address": None},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            async_teocoin = get_async_teocoin_service()
+            if async_teocoin is None:
+                raise RuntimeError("Async blockchain service not available")
+
+            token_balance, created = await sync_to_async(TokenBalance.objects.get_or_create)(
+                user=user, defaults={"balance": Decimal("0")}
+            )
+            if created or token_balance.is_stale(minutes=5):
+                balance = await async_teocoin.get_balance(user.wallet_address)
+                token_balance.balance = balance
+                await sync_to_async(token_balance.save)()
+            else:
+                balance = token_balance.balance
+
+            return Response(
+                {
+                    "balance": str(balance),
+                    "wallet_address": user.wallet_address,
+                    "token_info": await async_teocoin.get_token_info(),
+                    "user_id": user.id,
+                    "username": user.username,
+                    "cached": not created and not token_balance.is_stale(minutes=5),
+                }
+            )
+
+        except Exception as e2:
+            logger.error(f"Error retrieving balance for {user.email}: {e2}")
+            return Response(
+                {"error": "Error retrieving wallet balance", "balance": "0"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
 @api_view(["GET"])
 def get_token_info(request):
     """
@@ -200,32 +274,42 @@ def check_transaction_status(request):
         receipt = teocoin_service.get_transaction_receipt(tx_hash)
 
         if receipt:
-            # Update transaction status in database if record exists
-            try:
-                blockchain_tx = BlockchainTransaction.objects.get(tx_hash=tx_hash)
-                if receipt["status"] == 1:
-                    blockchain_tx.status = "confirmed"
-                    blockchain_tx.block_number = receipt["block_number"]
-                    blockchain_tx.gas_used = receipt["gas_used"]
-                else:
-                    blockchain_tx.status = "failed"
-                blockchain_tx.save()
-            except BlockchainTransaction.DoesNotExist:
-                # Transaction not found in our database - this is OK
-                pass
+            _record_receipt(tx_hash, receipt)
+        return _transaction_status_response(receipt)
+
+    except Exception as e:
+        logger.error(f"Error checking transaction status {tx_hash}: {e}")
+        return Response(
+            {"error": "Error checking transaction status"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
 
-            return Response(
-                {
-                    "status": "confirmed" if receipt["status"] == 1 else "failed",
-                    "block_number": receipt["block_number"],
-                    "gas_used": receipt["gas_used"],
-                    "transaction_hash": receipt["transaction_hash"],
-                }
-            )
-        else:
-            return Response(
-                {"status": "pending", "message": "Transaction still in progress"}
-            )
+
+@async_api_view(["POST"])
+@permission_classes([IsAuthenticated])
+async def check_transaction_status_async(request):
+    """
+    Async check_transaction_status(), for ASGI (see core.async_views).
+
+    The receipt is awaited from the async RPC provider; the database record
+    is updated in one thread-sensitive batch.
+    """
+    tx_hash = request.data.get("tx_hash")
+
+    if not tx_hash:
+        return Response(
+            {"error": "tx_hash is required"}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        async_teocoin = get_async_teocoin_service()
+        if async_teocoin is None:
+            raise RuntimeError("Async blockchain service not available")
+        receipt = await async_teocoin.get_transaction_receipt(tx_hash)
+
+        if receipt:
+            await sync_to_async(_record_receipt)(tx_hash, receipt)
+        return _transaction_status_response(receipt)
 
     except Exception as e:
         logger.error(f"Error checking transaction status {tx_hash}: {e}")
@@ -235,6 +319,37 @@ def check_transaction_status(request):
         )
 
 
+def _record_receipt(tx_hash, receipt):
+    """Update the transaction status in database if a record exists"""
+    try:
+        blockchain_tx = BlockchainTransaction.objects.get(tx_hash=tx_hash)
+        if receipt["status"] == 1:
+            blockchain_tx.status = "confirmed"
+            blockchain_tx.block_number = receipt["block_number"]
+            blockchain_tx.gas_used = receipt["gas_used"]
+        else:
+            blockchain_tx.status = "failed"
+        blockchain_tx.save()
+    except BlockchainTransaction.DoesNotExist:
+        # Transaction not found in our database - this is OK
+        pass
+
+
+def _transaction_status_response(receipt):
+    if not receipt:
+        return Response(
+            {"status": "pending", "message": "Transaction still in progress"}
+        )
+    return Response(
+        {
+            "status": "confirmed" if receipt["status"] == 1 else "failed",
+            "block_number": receipt["block_number"],
+            "gas_used": receipt["gas_used"],
+            "transaction_hash": receipt["transaction_hash"],
+        }
+    )
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def onchain_mint(request):
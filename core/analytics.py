@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 from decimal import Decimal
 
+from core.db_routing import use_replica
 from courses.models import Course, CourseEnrollment
 from django.db.models import Count, Q, Sum
 from django.http import JsonResponse
@@ -11,6 +12,7 @@ from users.models import User
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@use_replica
 def analytics_dashboard(request):
     """
     Analytics dashboard for admin users - Revenue and TeoCoin metrics
@@ -147,6 +149,7 @@ def get_analytics_data():
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@use_replica
 def revenue_chart_data(request):
     """API endpoint for revenue chart data"""
     # For development, we'll allow unauthenticated access temporarily
@@ -189,6 +192,7 @@ def revenue_chart_data(request):
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@use_replica
 def public_stats(request):
     """Public statistics for marketing/investor pages"""
 
@@ -6,6 +6,7 @@ of signals and cache invalidation systems when the app is ready.
 """
 
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
@@ -15,6 +16,7 @@ class CoreConfig(AppConfig):
     The core app provides shared functionality across the platform including:
     - API standards and response formatting
     - Performance monitoring middleware
+    - Slow query log (SLOW_QUERY_LOG_ENABLED)
     - Health check systems
     - Cache management and invalidation
     - Signal handling for business logic
@@ -44,3 +46,8 @@ class CoreConfig(AppConfig):
 
             logger = logging.getLogger("core")
             logger.warning(f"Failed to import some core modules: {e}")
+
+        if getattr(settings, "SLOW_QUERY_LOG_ENABLED", False):
+            from core.slow_queries import slow_query_log
+
+            slow_query_log.install()
@@ -0,0 +1,106 @@
+"""
+Async API views for the TeoArt School Platform.
+
+Endpoints that mostly wait on external I/O (blockchain RPC, Stripe) have
+async variants, served natively under ASGI: while a request awaits the
+network the worker's event loop serves other requests, instead of a
+gunicorn thread sitting idle for the whole round trip.
+
+DRF views are synchronous; AsyncAPIView keeps DRF's request parsing,
+authentication, permissions, throttling and exception handling, running
+the checks that may query the database in a thread. Handlers are
+``async def`` and group their ORM work in ``sync_to_async`` calls (thread
+sensitive: every call of a request runs on the same thread, in order),
+one per phase rather than one per query:
+
+    class BalanceView(AsyncAPIView):
+        async def get(self, request):
+            wallet = await sync_to_async(load_wallet)(request.user)
+            balance = await async_teocoin.get_balance(wallet.address)
+            ...
+
+    @async_api_view(["POST"])
+    @permission_classes([IsAuthenticated])
+    async def check_status(request): ...
+
+URLconfs mount a view pair with ``io_view(sync_view, async_view)``: the
+async variant is used when ASYNC_IO_VIEWS is enabled (ASGI deployments, see
+entrypoint.sh). Under WSGI async views still work, each request running its
+own event loop, but gain nothing.
+"""
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """APIView whose handlers are coroutines"""
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Authentication, permissions and throttles may query the database
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                # OPTIONS and method-not-allowed
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+def async_api_view(http_method_names=None):
+    """@api_view for ``async def`` function views"""
+    http_method_names = ["GET"] if http_method_names is None else http_method_names
+
+    def decorator(func):
+        WrappedAsyncAPIView = type("WrappedAsyncAPIView", (AsyncAPIView,), {"__doc__": func.__doc__})
+
+        allowed_methods = set(http_method_names) | {"options"}
+        WrappedAsyncAPIView.http_method_names = [method.lower() for method in allowed_methods]
+
+        async def handler(self, *args, **kwargs):
+            return await func(*args, **kwargs)
+
+        for method in http_method_names:
+            setattr(WrappedAsyncAPIView, method.lower(), handler)
+
+        WrappedAsyncAPIView.__name__ = func.__name__
+        WrappedAsyncAPIView.__module__ = func.__module__
+
+        # Policies set by the @permission_classes & co. decorators
+        for attr in (
+            "renderer_classes",
+            "parser_classes",
+            "authentication_classes",
+            "throttle_classes",
+            "permission_classes",
+            "schema",
+        ):
+            setattr(WrappedAsyncAPIView, attr, getattr(func, attr, getattr(APIView, attr)))
+
+        return WrappedAsyncAPIView.as_view()
+
+    return decorator
+
+
+def io_view(sync_view, async_view):
+    """The view to mount for an endpoint with an async variant"""
+    return async_view if getattr(settings, "ASYNC_IO_VIEWS", False) else sync_view
@@ -0,0 +1,299 @@
+"""
+Multiplexed batch requests for the TeoArt School Platform.
+
+POST /api/v1/batch/ (core.batch_api.MultiplexBatchAPI) runs a list of
+sub-requests and returns their responses in order, so a screen can load
+with one round trip instead of a bespoke bundle endpoint:
+
+    {"requests": [
+        {"id": "courses", "method": "GET", "path": "/api/v1/courses/", "params": {"page": 2}},
+        {"id": "read", "method": "POST", "path": "/api/v1/notifications/7/read/", "body": {},
+         "idempotency_key": "read-7-2f1c"}
+    ]}
+
+    {"responses": [
+        {"id": "courses", "status": 200, "headers": {...}, "body": {...}},
+        {"id": "read", "status": 200, "headers": {...}, "body": {...}}
+    ]}
+
+Each sub-request is resolved through the URLconf and its view called
+directly; middleware ran once, for the batch request:
+
+- authentication is shared: the batch request's user and token are forced
+  on every sub-request, which skips its own authentication and CSRF checks
+- consecutive reads (GET/HEAD/OPTIONS) run concurrently on a process-wide
+  pool of BATCH_MAX_WORKERS threads; a write runs alone, after the
+  sub-requests before it and before those after it
+- each sub-response has its own status: a failing sub-request does not
+  fail the batch
+- the batch request's Idempotency-Key header is not passed on (it would
+  collide across sub-requests); an entry's "idempotency_key" is sent as the
+  Idempotency-Key of its sub-request, so retried batches replay their
+  writes (services.idempotency) instead of running them again
+- reads of designated views use the read replica (core.db_routing) as
+  they would on their own, until a sub-request of the batch writes
+
+At most BATCH_MAX_REQUESTS sub-requests per batch; batches do not nest.
+"""
+
+import contextvars
+import io
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from urllib.parse import unquote_to_bytes
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections
+from django.http import Http404, JsonResponse, QueryDict
+from django.urls import Resolver404, resolve
+
+from core import db_routing
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+# META describing the batch request itself rather than its client
+_OWN_META = (
+    "REQUEST_METHOD",
+    "PATH_INFO",
+    "QUERY_STRING",
+    "CONTENT_TYPE",
+    "CONTENT_LENGTH",
+    "HTTP_CONTENT_TYPE",
+    "HTTP_CONTENT_LENGTH",
+    "HTTP_IDEMPOTENCY_KEY",
+)
+
+
+def _setting(name: str, default):
+    return getattr(settings, f"BATCH_{name}", default)
+
+
+class BatchError(ValueError):
+    """Malformed batch payload"""
+
+
+@dataclass
+class SubRequest:
+    """One entry of a batch payload"""
+
+    id: Any
+    method: str
+    path: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    body: Any = None
+    idempotency_key: Optional[str] = None
+
+    @property
+    def reads(self) -> bool:
+        return self.method in READ_METHODS
+
+
+def parse_batch(data) -> List[SubRequest]:
+    """The sub-requests of a batch payload; BatchError if it is malformed"""
+    entries = data.get("requests") if isinstance(data, dict) else None
+    if not isinstance(entries, list) or not entries:
+        raise BatchError("'requests' must be a non-empty list")
+    limit = _setting("MAX_REQUESTS", 20)
+    if len(entries) > limit:
+        raise BatchError(f"At most {limit} requests per batch")
+
+    subs = []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise BatchError(f"Request {index} must be an object")
+        method = str(entry.get("method", "GET")).upper()
+        path = entry.get("path")
+        params = entry.get("params") or {}
+        idempotency_key = entry.get("idempotency_key")
+        if method not in READ_METHODS + WRITE_METHODS:
+            raise BatchError(f"Request {index}: unsupported method {method}")
+        if not isinstance(path, str) or not path.startswith("/"):
+            raise BatchError(f"Request {index}: 'path' must be an absolute path")
+        if not isinstance(params, dict):
+            raise BatchError(f"Request {index}: 'params' must be an object")
+        if idempotency_key is not None and (
+            not isinstance(idempotency_key, str) or not idempotency_key
+        ):
+            raise BatchError(f"Request {index}: 'idempotency_key' must be a non-empty string")
+        subs.append(
+            SubRequest(
+                entry.get("id", index),
+                method,
+                path,
+                params,
+                entry.get("body"),
+                idempotency_key,
+            )
+        )
+    return subs
+
+
+def build_request(request, sub: SubRequest) -> WSGIRequest:
+    """The HttpRequest of a sub-request, with the batch request's client and user"""
+    path, _, query = sub.path.partition("?")
+    query_dict = QueryDict(query, mutable=True)
+    for key, value in sub.params.items():
+        values = value if isinstance(value, list) else [value]
+        query_dict.setlist(key, [str(v) for v in values])
+    body = b"" if sub.body is None else json.dumps(sub.body).encode()
+
+    environ = {
+        key: value
+        for key, value in request.META.items()
+        if key not in _OWN_META and not key.startswith("wsgi.")
+    }
+    environ.update(
+        {
+            "REQUEST_METHOD": sub.method,
+            "PATH_INFO": unquote_to_bytes(path).decode("iso-8859-1"),
+            "QUERY_STRING": query_dict.urlencode(),
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.url_scheme": request.scheme,
+        }
+    )
+    if sub.idempotency_key is not None:
+        environ["HTTP_IDEMPOTENCY_KEY"] = sub.idempotency_key
+    sub_request = WSGIRequest(environ)
+
+    # Shared authentication: DRF views take the forced user and token
+    sub_request.user = request.user
+    sub_request._force_auth_user = request.user
+    sub_request._force_auth_token = request.auth
+    # The batch request passed the CSRF checks, or needed none (token auth)
+    sub_request._dont_enforce_csrf_checks = True
+    return sub_request
+
+
+# ========== EXECUTION ==========
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_setting("MAX_WORKERS", 4), thread_name_prefix="batch-api"
+            )
+        return _executor
+
+
+def run_batch(request, subs: List[SubRequest]) -> List[Dict[str, Any]]:
+    """Serve the sub-requests of a batch; their responses, in order"""
+    sub_requests = [build_request(request, sub) for sub in subs]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(subs)
+    wrote = False
+
+    start = 0
+    while start < len(subs):
+        # A run of consecutive reads, or a single write
+        end = start + 1
+        if subs[start].reads:
+            while end < len(subs) and subs[end].reads:
+                end += 1
+
+        if end - start == 1 or _setting("MAX_WORKERS", 4) <= 1:
+            for i in range(start, end):
+                results[i], wrote_now = _run(subs[i], sub_requests[i], wrote)
+                wrote = wrote or wrote_now
+        else:
+            futures = [
+                _get_executor().submit(
+                    contextvars.copy_context().run,
+                    _run_in_pool,
+                    subs[i],
+                    sub_requests[i],
+                    wrote,
+                )
+                for i in range(start, end)
+            ]
+            for i, future in zip(range(start, end), futures):
+                results[i], _ = future.result()
+        start = end
+
+    outer = db_routing.current_state()
+    if outer is not None and wrote:
+        outer.wrote = True  # ReadReplicaMiddleware pins the client
+    return results
+
+
+def _run_in_pool(sub: SubRequest, sub_request, pinned: bool):
+    try:
+        return _run(sub, sub_request, pinned)
+    finally:
+        # As at the end of a request: pool threads keep no stale connections
+        close_old_connections()
+
+
+def _run(sub: SubRequest, sub_request, pinned: bool):
+    """(sub-response, whether the sub-request wrote)"""
+    with db_routing.routing_request(sub_request) as state:
+        if pinned:
+            state.pinned = True
+        response = _call(sub_request)
+        if state.failed and sub.reads:
+            # As ReadReplicaMiddleware does: served again from the primary
+            state.failed = False
+            state.disabled = True
+            response = _call(sub_request)
+    return _sub_response(sub, response), state.wrote
+
+
+def _call(request):
+    """The view's response to a sub-request, errors included"""
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return JsonResponse({"error": "Not found"}, status=404)
+    if not getattr(getattr(match.func, "view_class", None), "batchable", True):
+        return JsonResponse({"error": "Batches cannot be nested"}, status=400)
+
+    request.resolver_match = match
+    view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+    try:
+        response = view(request, *match.args, **match.kwargs)
+        if callable(getattr(response, "render", None)):
+            response = response.render()
+    except Http404:
+        return JsonResponse({"error": "Not found"}, status=404)
+    except PermissionDenied:
+        return JsonResponse({"error": "Permission denied"}, status=403)
+    except Exception:
+        logger.exception(f"Batch sub-request {request.method} {request.path} failed")
+        return JsonResponse({"error": "Internal server error"}, status=500)
+
+    if response.streaming:
+        return JsonResponse({"error": "Streaming responses cannot be batched"}, status=406)
+    return response
+
+
+def _sub_response(sub: SubRequest, response) -> Dict[str, Any]:
+    data = getattr(response, "data", None)
+    if data is not None:
+        body = data  # DRF: the data, not its rendering
+    elif not response.content:
+        body = None
+    elif response.get("Content-Type", "").startswith("application/json"):
+        body = json.loads(response.content)
+    else:
+        body = response.content.decode(response.charset, errors="replace")
+    return {
+        "id": sub.id,
+        "status": response.status_code,
+        "headers": dict(response.items()),
+        "body": body,
+    }
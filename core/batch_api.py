@@ -8,9 +8,11 @@ from notifications.serializers import NotificationSerializer
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from users.models import UserProgress
+from services.progress_service import progress_service
 from users.serializers import UserProgressSerializer
 
+from .batch import BatchError, parse_batch, run_batch
+
 
 class StudentBatchDataAPI(APIView):
     """
@@ -69,7 +71,7 @@ class StudentBatchDataAPI(APIView):
             courses_data.append(course_data)
 
         # ✅ OPTIMIZED - User progress data
-        user_progress, created = UserProgress.objects.get_or_create(user=user)
+        user_progress = progress_service.get_progress(user)
         progress_data = UserProgressSerializer(
             user_progress, context={"request": request}
         ).data
@@ -295,3 +297,22 @@ class LessonBatchDataAPI(APIView):
         cache.set(cache_key, data, 300)
 
         return Response(data)
+
+
+class MultiplexBatchAPI(APIView):
+    """
+    ✅ OPTIMIZED - Generic batch endpoint: many API calls in one round trip
+    Runs a list of sub-requests with the caller's authentication, reads
+    concurrently, and returns each response with its own status (core.batch)
+    """
+
+    permission_classes = [IsAuthenticated]
+    batchable = False
+
+    def post(self, request):
+        try:
+            sub_requests = parse_batch(request.data)
+        except BatchError as e:
+            return Response({"error": str(e)}, status=400)
+
+        return Response({"responses": run_batch(request, sub_requests)})
@@ -1,5 +1,6 @@
 from decimal import Decimal
 
+from core.db_routing import ReplicaReadsMixin
 from core.serializers import BlockchainTransactionSerializer
 from courses.models import Course
 from courses.serializers import CourseSerializer, TeacherCourseSerializer
@@ -14,12 +15,13 @@ from notifications.serializers import NotificationSerializer
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rewards.models import BlockchainTransaction
+from rewards.models import BlockchainTransaction, TokenBalance
 from services.db_teocoin_service import db_teocoin_service
+from services.teacher_stats_service import teacher_stats_service
 from users.permissions import IsStudent, IsTeacher
 
 
-class StudentDashboardView(APIView):
+class StudentDashboardView(ReplicaReadsMixin, APIView):
     permission_classes = [IsAuthenticated, IsStudent]
 
     def get(self, request):
@@ -120,7 +122,7 @@ class StudentDashboardView(APIView):
         return Response(data)
 
 
-class TeacherDashboardAPI(APIView):
+class TeacherDashboardAPI(ReplicaReadsMixin, APIView):
     permission_classes = [IsAuthenticated, IsTeacher]
 
     def get(self, request):
@@ -133,27 +135,9 @@ class TeacherDashboardAPI(APIView):
         if cached_data:
             return Response(cached_data)
 
-        # ✅ OTTIMIZZATO - Single query with annotations instead of N+1
-        courses = user.courses_created.prefetch_related(
-            "students", "lessons", "lessons__exercises"
-        ).annotate(student_count=Count("students"))
-
-        total_courses = courses.count()
-
-        # Calculate aggregated values from annotated queryset
-        total_earnings = Decimal("0")
-        total_students_set = set()
-
-        # Process courses data efficiently
-        for course in courses:
-            # Use annotated student_count instead of calling .count()
-            student_count = course.student_count
-            course_earnings = (
-                (course.price_eur or Decimal("0")) * student_count * Decimal("0.9")
-            )
-            total_earnings += course_earnings
-            # Collect all unique student IDs efficiently
-            total_students_set.update(course.students.values_list("id", flat=True))
+        # ✅ OTTIMIZZATO - Counters + one grouped query instead of per-course scans
+        stats = teacher_stats_service.get_dashboard_stats(user)
+        courses = teacher_stats_service.get_dashboard_courses(user)
 
         # ✅ OTTIMIZZATO - Calculate sales with single queries per period
         now = timezone.now()
@@ -181,20 +165,17 @@ class TeacherDashboardAPI(APIView):
         transactions_data = BlockchainTransactionSerializer(
             recent_transactions, many=True
         ).data
-        # Get blockchain balance
+        # Last known on-chain balance (refreshed by the wallet balance API);
+        # no live balanceOf RPC on the dashboard path
         blockchain_balance = "0"
         if user.wallet_address:
-            try:
-                from blockchain.blockchain import TeoCoinService
-
-                teo_service = TeoCoinService()
-                blockchain_balance = str(teo_service.get_balance(user.wallet_address))
-            except Exception as e:
-                import logging
-
-                logger = logging.getLogger(__name__)
-                logger.error(f"Error getting blockchain balance: {e}")
-                blockchain_balance = "0"
+            cached_balance = (
+                TokenBalance.objects.filter(user=user)
+                .values_list("balance", flat=True)
+                .first()
+            )
+            if cached_balance is not None:
+                blockchain_balance = str(cached_balance)
 
         # 🎯 NEW: Get TeoCoin DB balance for withdrawal functionality
         try:
@@ -220,33 +201,11 @@ class TeacherDashboardAPI(APIView):
                 "can_withdraw": False,
             }
 
-        # derive published/draft counts (retroactive from DB)
-        try:
-            published_count = courses.filter(status="published").count()
-        except Exception:
-            published_count = 0
-        try:
-            draft_count = courses.filter(status="draft").count()
-        except Exception:
-            draft_count = 0
-
         data = {
             "blockchain_balance": blockchain_balance,
             "teocoin_balance": teocoin_balance,  # 🎯 NEW: DB balance for withdrawal
             "wallet_address": user.wallet_address,
-            "stats": {
-                "total_courses": total_courses,
-                # Convert Decimal to string instead of float
-                "total_earnings": str(total_earnings),
-                # backward-compatible: original active_students field
-                "active_students": len(total_students_set),
-                # clearer names expected by frontend
-                "total_students": len(total_students_set),
-                "published_courses": published_count,
-                "draft_courses": draft_count,
-                # legacy potential field for pending; set to 0 if not applicable
-                "pending_courses": 0,
-            },
+            "stats": stats,
             "sales": {
                 # Keep as Decimal, convert to string
                 "daily": str(sales_data["daily"] or Decimal("0")),
@@ -298,7 +257,7 @@ class UserRoleDashboardAPI(APIView):
         return Response({"role": user.role, "dashboard_url": dashboard_url})
 
 
-class AdminDashboardAPI(APIView):
+class AdminDashboardAPI(ReplicaReadsMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -0,0 +1,313 @@
+"""
+Read-replica routing for the TeoArt School Platform.
+
+With READ_REPLICA_ALIAS naming a second entry of DATABASES, ReadReplicaRouter
+sends the reads of designated views to that replica; everything else,
+writes included, uses ``default``. Views opt in:
+
+- function views with the ``@use_replica`` decorator (placed right above the
+  function, below ``@api_view``)
+- APIView classes with ``ReplicaReadsMixin``: authentication and permission
+  checks still read the primary, the handler reads the replica
+- code outside a request (tasks, commands) with ``with replica_reads():``
+
+Only GET/HEAD/OPTIONS requests use the replica, and not when:
+
+- the client wrote recently: a request that writes pins its client to the
+  primary for READ_REPLICA_PIN_SECONDS, through a cookie and, for
+  authenticated users, a cache flag (API clients may not keep cookies)
+- the request itself has written
+- the replica failed: it is skipped for READ_REPLICA_RETRY_SECONDS, and a
+  request whose replica query failed is served again from the primary by
+  core.middleware.ReadReplicaMiddleware
+
+Locally, two SQLite files stand in for primary and replica (dev settings,
+READ_REPLICA_SQLITE=true) and ``manage.py simulate_replica --lag N`` copies
+the primary to the replica every N seconds.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    DatabaseError,
+    InterfaceError,
+    OperationalError,
+    connections,
+)
+from django.utils.functional import SimpleLazyObject, empty
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = "replica_pin"
+PIN_KEY = "replica_pin:{}"
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Apps whose rows are needed right after they are written, by every request
+PRIMARY_ONLY_APPS = ("sessions", "token_blacklist")
+
+
+def _setting(name: str, default):
+    return getattr(settings, f"READ_REPLICA_{name}", default)
+
+
+def replica_alias() -> str:
+    """The replica's DATABASES alias, "" when routing is disabled"""
+    alias = _setting("ALIAS", "")
+    return alias if alias and alias in settings.DATABASES else ""
+
+
+@dataclass
+class RoutingState:
+    """Routing decisions of one request (or replica_reads() block)"""
+
+    request: Any = None
+    replica: bool = False
+    wrote: bool = False
+    failed: bool = False
+    disabled: bool = False
+    pinned: Optional[bool] = None
+
+
+_state: ContextVar[Optional[RoutingState]] = ContextVar("db_routing_state", default=None)
+
+
+def current_state() -> Optional[RoutingState]:
+    return _state.get()
+
+
+@contextmanager
+def routing_request(request):
+    """Track the reads and writes of a request (see ReadReplicaMiddleware)"""
+    state = RoutingState(request=request)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def replica_reads():
+    """Read from the replica inside the block, if routing allows it"""
+    state = _state.get()
+    token = None
+    if state is None:
+        state = RoutingState()
+        token = _state.set(state)
+    previous = state.replica
+    state.replica = True
+    try:
+        yield state
+    finally:
+        state.replica = previous
+        if token is not None:
+            _state.reset(token)
+
+
+def use_replica(view):
+    """Serve a function view's safe requests from the replica"""
+
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        if request.method not in READ_METHODS:
+            return view(request, *args, **kwargs)
+        with replica_reads():
+            return view(request, *args, **kwargs)
+
+    wrapped.use_replica = True
+    return wrapped
+
+
+class ReplicaReadsMixin:
+    """APIView mixin: safe requests are handled reading from the replica"""
+
+    use_replica = True
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # After authentication, permissions and throttling: those read the primary
+        state = _state.get()
+        if state is not None and request.method in READ_METHODS:
+            state.replica = True
+
+
+# ========== PINNING ==========
+
+
+def _known_user_id(request) -> Optional[Any]:
+    """Id of the request's authenticated user, without resolving a lazy user"""
+    user = getattr(request, "user", None)
+    if isinstance(user, SimpleLazyObject):
+        if user._wrapped is empty:
+            return None
+        user = user._wrapped
+    if user is not None and getattr(user, "is_authenticated", False):
+        return user.pk
+    return None
+
+
+def is_pinned(state: RoutingState) -> bool:
+    """Whether the client wrote within READ_REPLICA_PIN_SECONDS"""
+    if state.pinned is not None:
+        return state.pinned
+    request = state.request
+    if request is None:
+        return False
+
+    try:
+        if float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time():
+            state.pinned = True
+            return True
+    except ValueError:
+        pass
+
+    user_id = _known_user_id(request)
+    if user_id is None:
+        # Not known yet: decided again once the view has authenticated the user
+        return False
+    try:
+        state.pinned = bool(cache.get(PIN_KEY.format(user_id)))
+    except Exception as e:
+        logger.warning(f"Replica pin unavailable for user {user_id}, using primary: {e}")
+        state.pinned = True
+    return state.pinned
+
+
+def pin_to_primary(request, response):
+    """Keep the request's client on the primary for READ_REPLICA_PIN_SECONDS"""
+    seconds = _setting("PIN_SECONDS", 5)
+    response.set_cookie(
+        PIN_COOKIE,
+        str(int(time.time() + seconds)),
+        max_age=seconds,
+        httponly=True,
+        samesite="Lax",
+        secure=settings.SESSION_COOKIE_SECURE,
+    )
+    user_id = _known_user_id(request)
+    if user_id is not None:
+        try:
+            cache.set(PIN_KEY.format(user_id), True, seconds)
+        except Exception as e:
+            logger.warning(f"Could not pin user {user_id} to the primary: {e}")
+
+
+# ========== REPLICA HEALTH ==========
+
+_down_until = {}
+_down_lock = threading.Lock()
+
+
+def mark_replica_down(alias: str, error: Exception):
+    retry = _setting("RETRY_SECONDS", 30)
+    with _down_lock:
+        _down_until[alias] = time.monotonic() + retry
+    logger.warning(f"Replica '{alias}' failed, reading from primary for {retry}s: {error}")
+
+
+def _replica_errors(alias: str):
+    def wrapper(execute, sql, params, many, context):
+        try:
+            return execute(sql, params, many, context)
+        except DatabaseError as e:
+            state = _state.get()
+            if state is not None:
+                state.failed = True
+            if isinstance(e, (OperationalError, InterfaceError)):
+                mark_replica_down(alias, e)
+            raise
+
+    wrapper.replica_alias = alias
+    return wrapper
+
+
+def replica_available(alias: str) -> bool:
+    """Whether the replica is up, connecting to it if needed"""
+    with _down_lock:
+        if _down_until.get(alias, 0) > time.monotonic():
+            return False
+        _down_until.pop(alias, None)
+
+    connection = connections[alias]
+    try:
+        connection.ensure_connection()
+    except DatabaseError as e:
+        mark_replica_down(alias, e)
+        return False
+    if not any(getattr(w, "replica_alias", None) == alias for w in connection.execute_wrappers):
+        # First, so that execute_wrapper() blocks (which pop the last) leave it in place
+        connection.execute_wrappers.insert(0, _replica_errors(alias))
+    return True
+
+
+# ========== ROUTER ==========
+
+
+class ReadReplicaRouter:
+    """Database router sending designated reads to READ_REPLICA_ALIAS"""
+
+    def db_for_read(self, model, **hints):
+        alias = replica_alias()
+        if not alias:
+            return None
+        state = _state.get()
+        if state is not None and self._reads_replica(state, model, alias):
+            return alias
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db == alias:
+            # Related rows of an object read from the replica, outside replica reads
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        if not replica_alias():
+            return None
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        alias = replica_alias()
+        if alias and {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, alias}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+    def _reads_replica(self, state: RoutingState, model, alias: str) -> bool:
+        if not state.replica or state.disabled or state.wrote or state.failed:
+            return False
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return False
+        if is_pinned(state):
+            return False
+        return replica_available(alias)
+
+
+# ========== LOCAL REPLICATION ==========
+
+
+def copy_sqlite_database(source: str = DEFAULT_DB_ALIAS, target: Optional[str] = None):
+    """Copy a SQLite database onto another (simulated replication)"""
+    target = target or replica_alias()
+    if not target:
+        raise ImproperlyConfigured("READ_REPLICA_ALIAS is not configured")
+    source_conn, target_conn = connections[source], connections[target]
+    for connection in (source_conn, target_conn):
+        if connection.vendor != "sqlite":
+            raise ImproperlyConfigured(f"'{connection.alias}' is not a SQLite database")
+        connection.ensure_connection()
+    source_conn.connection.backup(target_conn.connection)
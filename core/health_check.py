@@ -125,6 +125,13 @@ class HealthCheckView(View):
         try:
             from celery import current_app
 
+            from core.task_queue import runtime_mode
+
+            # Eager and local runtimes have no remote workers to inspect
+            mode = runtime_mode()
+            if mode != "broker":
+                return f"healthy ({mode})"
+
             # Try to get worker stats with timeout
             inspect = current_app.control.inspect()
             if hasattr(inspect, "stats"):
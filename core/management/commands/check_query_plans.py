@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.query_plans import CRITICAL_QUERIES, check_query_plans, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Esegue EXPLAIN sulle query critiche e fallisce se un piano contiene "
+        "una scansione completa o supera il costo massimo"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "queries", nargs="*", help="Query da verificare (default tutte)"
+        )
+        parser.add_argument(
+            "--scale", type=float, default=None,
+            help="Fattore dei volumi di seed (default QUERY_PLAN_SEED_SCALE)",
+        )
+        parser.add_argument(
+            "--database", default="default", help="Alias del database (default 'default')"
+        )
+        parser.add_argument(
+            "--plans", action="store_true", help="Mostra i piani di tutte le query"
+        )
+        parser.add_argument(
+            "--list", action="store_true", help="Elenca le query critiche ed esce"
+        )
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for name, query in CRITICAL_QUERIES.items():
+                self.stdout.write(f"{name:32} {query.description}")
+            return
+
+        unknown = [name for name in options["queries"] if name not in CRITICAL_QUERIES]
+        if unknown:
+            raise CommandError(f"Query sconosciute: {', '.join(unknown)}")
+
+        # Seed data and statistics are rolled back: the database is left as found
+        using = options["database"]
+        with transaction.atomic(using=using):
+            self.stdout.write("Inserimento dei dati rappresentativi...")
+            ids = seed(options["scale"], using=using)
+            reports = check_query_plans(ids, options["queries"], using=using)
+            transaction.set_rollback(True, using=using)
+
+        failed = [report for report in reports if not report.ok]
+        for report in reports:
+            costs = [s.cost for s in report.statements if s.cost is not None]
+            cost = f"  costo {max(costs):.0f}" if costs else ""
+            if report.ok:
+                self.stdout.write(self.style.SUCCESS(f"OK    {report.query.name}") + cost)
+            else:
+                self.stdout.write(
+                    self.style.ERROR(f"ERRORE {report.query.name}")
+                    + cost
+                    + f"  {'; '.join(report.problems)}"
+                )
+            if options["plans"] or not report.ok:
+                for line in report.render().splitlines():
+                    self.stdout.write(f"       {line}")
+
+        if failed:
+            raise CommandError(f"{len(failed)} query critiche su {len(reports)} con piani non validi")
+        self.stdout.write(self.style.SUCCESS(f"{len(reports)} query critiche verificate"))
@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from services.idempotency import idempotency_registry
+
+
+class Command(BaseCommand):
+    help = "Elimina le chiavi di idempotenza completate più vecchie di N giorni"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=30, help="Età minima in giorni (default 30)"
+        )
+
+    def handle(self, *args, **options):
+        deleted = idempotency_registry.purge(timedelta(days=options["days"]))
+        self.stdout.write(
+            self.style.SUCCESS(f"{deleted} chiavi di idempotenza eliminate")
+        )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from services.teacher_stats_service import teacher_stats_service
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Ricalcola (o verifica) i contatori di TeacherProfile dai corsi e dalle iscrizioni"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", type=int, action="append", help="ID insegnante (ripetibile)"
+        )
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Mostra solo le differenze senza modificare i contatori",
+        )
+
+    def handle(self, *args, **options):
+        teachers = User.objects.filter(role="teacher").order_by("pk")
+        if options["user"]:
+            teachers = User.objects.filter(pk__in=options["user"]).order_by("pk")
+
+        drifted = 0
+        for teacher in teachers.iterator():
+            drift = teacher_stats_service.verify(teacher)
+            if not drift:
+                continue
+            drifted += 1
+            for field, values in drift.items():
+                self.stdout.write(f"teacher {teacher.pk} {field}: {values}")
+            if not options["verify"]:
+                teacher_stats_service.rebuild_counters(teacher)
+
+        if options["verify"]:
+            self.stdout.write(f"{drifted} insegnanti con contatori non allineati")
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"Contatori ricalcolati per {drifted} insegnanti")
+            )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from services.progress_service import progress_service
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Ricalcola (o verifica) i contatori di UserProgress dalle tabelle di completamento"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", type=int, action="append", help="ID utente (ripetibile)"
+        )
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Mostra solo le differenze senza modificare i contatori",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(role="student").order_by("pk")
+        if options["user"]:
+            users = User.objects.filter(pk__in=options["user"]).order_by("pk")
+
+        drifted = 0
+        for user in users.iterator():
+            drift = progress_service.verify(user)
+            if not drift:
+                continue
+            drifted += 1
+            for field, values in drift.items():
+                self.stdout.write(f"user {user.pk} {field}: {values}")
+            if not options["verify"]:
+                progress_service.rebuild(user)
+
+        if options["verify"]:
+            self.stdout.write(f"{drifted} utenti con contatori non allineati")
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"Contatori ricalcolati per {drifted} utenti")
+            )
@@ -0,0 +1,39 @@
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from core.db_routing import copy_sqlite_database, replica_alias
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula la replica di lettura in locale: copia il database SQLite "
+        "primario sulla replica ogni --lag secondi"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lag", type=float, default=5.0,
+            help="Ritardo di replica in secondi (default 5)",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Copia una sola volta ed esce"
+        )
+
+    def handle(self, *args, **options):
+        alias = replica_alias()
+        if not alias:
+            raise CommandError(
+                "Nessuna replica configurata: imposta READ_REPLICA_SQLITE=true (dev)"
+            )
+
+        while True:
+            try:
+                copy_sqlite_database(target=alias)
+            except ImproperlyConfigured as e:
+                raise CommandError(str(e))
+            self.stdout.write(f"Replica '{alias}' allineata al primario")
+            if options["once"]:
+                return
+            time.sleep(options["lag"])
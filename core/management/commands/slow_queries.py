@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.slow_queries import log_file, read_records, summarize
+
+
+class Command(BaseCommand):
+    help = "Classifica i punti del codice che generano query lente (per tempo totale)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file", default=None, help="File JSONL delle query lente (default SLOW_QUERY_LOG_FILE)"
+        )
+        parser.add_argument(
+            "--hours", type=float, default=None, help="Solo le query delle ultime N ore"
+        )
+        parser.add_argument(
+            "--top", type=int, default=20, help="Numero di call site da mostrare (default 20)"
+        )
+        parser.add_argument(
+            "--shapes", type=int, default=3, help="Query più lente per call site (default 3)"
+        )
+
+    def handle(self, *args, **options):
+        path = options["file"] or log_file()
+        records = read_records(path)
+        if options["hours"] is not None:
+            since = timezone.now() - timedelta(hours=options["hours"])
+            records = [r for r in records if (parse_datetime(r["ts"]) or since) >= since]
+
+        if not records:
+            self.stdout.write(self.style.WARNING(f"Nessuna query lenta in {path}"))
+            return
+
+        ranked = summarize(records)
+        total_ms = sum(site["total_ms"] for site in ranked)
+        self.stdout.write(
+            f"{len(records)} query lente, {total_ms / 1000:.2f}s totali, "
+            f"da {len(ranked)} call site"
+        )
+        for position, site in enumerate(ranked[: options["top"]], start=1):
+            self.stdout.write(
+                self.style.SUCCESS(f"{position:>3}. {site['call_site']}")
+                + f"  totale {site['total_ms']:.1f}ms ({site['total_ms'] / (total_ms or 1):.0%}),"
+                f" {site['count']} query, media {site['avg_ms']:.1f}ms,"
+                f" max {site['max_ms']:.1f}ms"
+            )
+            for shape, shape_ms in site["shapes"][: options["shapes"]]:
+                self.stdout.write(f"       {shape_ms:9.1f}ms  {shape[:160]}")
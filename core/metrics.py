@@ -0,0 +1,361 @@
+"""
+Request metrics for the TeoArt School Platform.
+
+MetricsMiddleware records, per resolved route (method + URL pattern):
+
+- a latency histogram with log2 buckets (1ms, 2ms, 4ms ... 16s, +Inf)
+- SQL query count and time, via an execute wrapper on every connection
+  (of any thread: ORM calls of async views run in sync_to_async threads)
+- cache hits and misses of cache.get / cache.get_many
+- request count, total time and 5xx errors
+
+Each worker aggregates in process and every METRICS_FLUSH_SECONDS a
+background thread adds its deltas to shared counters in the METRICS_CACHE
+cache (Redis in production) with atomic incr, so the counters of all
+gunicorn workers merge without a request (or the event loop, under ASGI)
+waiting on those round trips. The
+counters are served as Prometheus text on /metrics and summarized
+(p50/p95/p99, queries per request, cache hit rate) as JSON on
+/admin/metrics/.
+"""
+
+import contextvars
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import caches
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.utils import timezone
+
+logger = logging.getLogger("api_performance")
+
+# Upper bounds of the latency buckets, in milliseconds (+Inf implied)
+BUCKETS_MS = [2**i for i in range(15)]
+FIELDS = ["count", "sum_us", "errors", "queries", "query_us", "cache_hits", "cache_misses"]
+INDEX_KEY = "metrics:index"
+UNRESOLVED = "<unresolved>"
+
+_current: contextvars.ContextVar = contextvars.ContextVar("request_metrics", default=None)
+
+
+def _setting(name: str, default):
+    return getattr(settings, f"METRICS_{name}", default)
+
+
+def bucket_index(duration_ms: float) -> int:
+    """Index of the first bucket whose upper bound holds duration_ms"""
+    for i, bound in enumerate(BUCKETS_MS):
+        if duration_ms <= bound:
+            return i
+    return len(BUCKETS_MS)
+
+
+def quantile(buckets: List[int], q: float) -> Optional[float]:
+    """Estimate a quantile (ms) from bucket counts, interpolating inside a bucket"""
+    total = sum(buckets)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for i, count in enumerate(buckets):
+        if count and seen + count >= rank:
+            if i == len(BUCKETS_MS):
+                return float(BUCKETS_MS[-1])
+            lower = BUCKETS_MS[i - 1] if i else 0
+            return lower + (BUCKETS_MS[i] - lower) * (rank - seen) / count
+        seen += count
+    return float(BUCKETS_MS[-1])
+
+
+class RequestStats:
+    """Counters of the request being served"""
+
+    __slots__ = ("queries", "query_us", "cache_hits", "cache_misses")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_us = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_us += int((time.perf_counter() - started) * 1_000_000)
+
+
+class MetricsRegistry:
+    """Per-process aggregation of request metrics, flushed to the shared cache"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Held for a whole flush: snapshot() waits for a background flush
+        self._flush_lock = threading.Lock()
+        self._local: Dict[tuple, Dict[str, Any]] = {}
+        self._last_flush = time.monotonic()
+        self._flushing = False
+
+    @property
+    def cache(self):
+        return caches[_setting("CACHE", "default")]
+
+    def record(self, method: str, route: str, duration: float, status: int, stats: RequestStats):
+        duration_ms = duration * 1000
+        with self._lock:
+            entry = self._local.setdefault(
+                (method, route),
+                {"buckets": [0] * (len(BUCKETS_MS) + 1), **{f: 0 for f in FIELDS}},
+            )
+            entry["buckets"][bucket_index(duration_ms)] += 1
+            entry["count"] += 1
+            entry["sum_us"] += int(duration * 1_000_000)
+            entry["errors"] += status >= 500
+            entry["queries"] += stats.queries
+            entry["query_us"] += stats.query_us
+            entry["cache_hits"] += stats.cache_hits
+            entry["cache_misses"] += stats.cache_misses
+            due = not self._flushing and (
+                time.monotonic() - self._last_flush >= _setting("FLUSH_SECONDS", 10)
+            )
+            if due:
+                self._flushing = True
+        if due:
+            threading.Thread(
+                target=self._background_flush, name="metrics-flush", daemon=True
+            ).start()
+
+    def _background_flush(self):
+        try:
+            self.flush()
+        finally:
+            self._flushing = False
+
+    def flush(self):
+        """Add the local deltas to the shared counters"""
+        with self._flush_lock:
+            with self._lock:
+                local, self._local = self._local, {}
+                self._last_flush = time.monotonic()
+            if local:
+                self._push(local)
+
+    def _push(self, local: Dict[tuple, Dict[str, Any]]):
+        cache = self.cache
+        try:
+            index = cache.get(INDEX_KEY) or {}
+            labels = {self._label_id(*label): label for label in local}
+            if not labels.keys() <= index.keys():
+                # Racing workers may drop each other's routes; re-added next flush
+                cache.set(INDEX_KEY, {**index, **labels}, None)
+            for label_id, label in labels.items():
+                entry = local[label]
+                deltas = {f"b{i}": n for i, n in enumerate(entry["buckets"])}
+                deltas.update({field: entry[field] for field in FIELDS})
+                for name, delta in deltas.items():
+                    if delta:
+                        self._incr(cache, f"metrics:{label_id}:{name}", delta)
+        except Exception as e:
+            logger.error(f"Metrics flush failed: {e}")
+
+    def _incr(self, cache, key: str, delta: int):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            if not cache.add(key, delta, None):
+                cache.incr(key, delta)
+
+    def _label_id(self, method: str, route: str) -> str:
+        return hashlib.md5(f"{method} {route}".encode()).hexdigest()[:16]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Merged counters of every route, after flushing this process"""
+        self.flush()
+        cache = self.cache
+        index = cache.get(INDEX_KEY) or {}
+        names = [f"b{i}" for i in range(len(BUCKETS_MS) + 1)] + FIELDS
+        values = cache.get_many(
+            [f"metrics:{label_id}:{name}" for label_id in index for name in names]
+        )
+        routes = []
+        for label_id, (method, route) in index.items():
+            counters = {name: values.get(f"metrics:{label_id}:{name}", 0) for name in names}
+            routes.append(
+                {
+                    "method": method,
+                    "route": route,
+                    "buckets": [counters[f"b{i}"] for i in range(len(BUCKETS_MS) + 1)],
+                    **{field: counters[field] for field in FIELDS},
+                }
+            )
+        return sorted(routes, key=lambda r: (r["route"], r["method"]))
+
+    def reset(self):
+        """Drop all counters (local and shared)"""
+        with self._flush_lock, self._lock:
+            self._local = {}
+        cache = self.cache
+        index = cache.get(INDEX_KEY) or {}
+        names = [f"b{i}" for i in range(len(BUCKETS_MS) + 1)] + FIELDS
+        cache.delete_many([f"metrics:{label_id}:{name}" for label_id in index for name in names])
+        cache.delete(INDEX_KEY)
+
+
+registry = MetricsRegistry()
+
+
+# ========== CACHE INSTRUMENTATION ==========
+
+
+def _instrument_backend(backend_class):
+    if getattr(backend_class, "_metrics_instrumented", False):
+        return
+    original_get = backend_class.get
+    original_get_many = backend_class.get_many
+    missing = object()
+
+    def get(self, key, default=None, version=None):
+        stats = _current.get()
+        value = original_get(self, key, missing, version)
+        if stats is not None:
+            if value is missing:
+                stats.cache_misses += 1
+            else:
+                stats.cache_hits += 1
+        return default if value is missing else value
+
+    def get_many(self, keys, version=None):
+        stats = _current.get()
+        keys = list(keys)
+        # Backends may implement get_many with get(); count the keys once
+        token = _current.set(None)
+        try:
+            values = original_get_many(self, keys, version=version)
+        finally:
+            _current.reset(token)
+        if stats is not None:
+            stats.cache_hits += len(values)
+            stats.cache_misses += len(keys) - len(values)
+        return values
+
+    backend_class.get = get
+    backend_class.get_many = get_many
+    backend_class._metrics_instrumented = True
+
+
+def instrument_caches():
+    """Count hits and misses of every configured cache backend"""
+    for alias in settings.CACHES:
+        _instrument_backend(type(caches[alias]))
+
+
+# ========== SQL INSTRUMENTATION ==========
+
+
+def _count_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats.sql_wrapper(execute, sql, params, many, context)
+
+
+def _install_on(connection):
+    # First in the list: connection.execute_wrapper() blocks pop the last one
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _count_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _install_on(connection)
+
+
+def instrument_connections():
+    """Count the queries of every current and future database connection"""
+    connection_created.connect(
+        _on_connection_created, weak=False, dispatch_uid="request_metrics"
+    )
+    for alias in connections:
+        _install_on(connections[alias])
+
+
+# ========== VIEWS ==========
+
+
+def _allowed(request) -> bool:
+    token = _setting("TOKEN", None)
+    if token:
+        return request.META.get("HTTP_AUTHORIZATION") == f"Bearer {token}"
+    return request.user.is_authenticated and request.user.is_staff
+
+
+def metrics_view(request):
+    """Prometheus text exposition of the request metrics"""
+    if not _allowed(request):
+        return HttpResponseForbidden("Metrics access denied")
+
+    lines = [
+        "# HELP http_request_duration_seconds Request latency per route",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    routes = registry.snapshot()
+    for r in routes:
+        labels = f'method="{r["method"]}",route="{r["route"]}"'
+        cumulative = 0
+        for i, count in enumerate(r["buckets"]):
+            cumulative += count
+            le = f"{BUCKETS_MS[i] / 1000:g}" if i < len(BUCKETS_MS) else "+Inf"
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f"http_request_duration_seconds_sum{{{labels}}} {r['sum_us'] / 1e6:.6f}")
+        lines.append(f"http_request_duration_seconds_count{{{labels}}} {r['count']}")
+
+    counters = [
+        ("http_request_errors_total", "Requests answered with a 5xx status", "errors", 1),
+        ("http_request_db_queries_total", "SQL queries run by requests", "queries", 1),
+        ("http_request_db_seconds_total", "Time spent in SQL queries", "query_us", 1e6),
+        ("http_request_cache_hits_total", "Cache hits during requests", "cache_hits", 1),
+        ("http_request_cache_misses_total", "Cache misses during requests", "cache_misses", 1),
+    ]
+    for name, help_text, field, scale in counters:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for r in routes:
+            value = r[field] / scale if scale != 1 else r[field]
+            lines.append(f'{name}{{method="{r["method"]}",route="{r["route"]}"}} {value:g}')
+
+    return HttpResponse("\n".join(lines) + "\n", content_type="text/plain; version=0.0.4")
+
+
+@staff_member_required
+def metrics_admin_view(request):
+    """Per-route latency percentiles, query counts and cache hit rates"""
+    routes = []
+    for r in registry.snapshot():
+        count = r["count"] or 1
+        lookups = r["cache_hits"] + r["cache_misses"]
+        routes.append(
+            {
+                "method": r["method"],
+                "route": r["route"],
+                "count": r["count"],
+                "errors": r["errors"],
+                "avg_ms": round(r["sum_us"] / count / 1000, 2),
+                **{
+                    f"p{int(q * 100)}_ms": round(quantile(r["buckets"], q) or 0, 2)
+                    for q in (0.5, 0.95, 0.99)
+                },
+                "queries_per_request": round(r["queries"] / count, 2),
+                "query_ms_per_request": round(r["query_us"] / count / 1000, 2),
+                "cache_hit_rate": round(r["cache_hits"] / lookups, 3) if lookups else None,
+            }
+        )
+    routes.sort(key=lambda r: r["avg_ms"] * r["count"], reverse=True)
+    return JsonResponse({"generated_at": timezone.now().isoformat(), "routes": routes})
@@ -1,7 +1,7 @@
 """
 Core middleware for the TeoArt School Platform.
 
-This module contains custom middleware for JWT handling, API performance monitoring,
+This module contains custom middleware for JWT handling, request metrics,
 and access control for different user roles.
 """
 
@@ -9,11 +9,18 @@ import datetime
 import logging
 import time
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 from django.http import HttpResponseForbidden, JsonResponse
 from django.shortcuts import redirect
+from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
 from rest_framework_simplejwt.tokens import AccessToken
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from core import db_routing, metrics, profiling
+from core.query_audit import N_PLUS_ONE_THRESHOLD, QueryAudit, query_budget_of
 
 # Loggers
 auth_logger = logging.getLogger("authentication")
@@ -156,57 +163,244 @@ class DashboardAccessMiddleware:
         return response
 
 
-class APITimingMiddleware:
+class MetricsMiddleware:
     """
-    Middleware for monitoring API response times and performance.
+    Middleware recording per-route request metrics.
 
-    This middleware logs the execution time of API calls and identifies
-    slow endpoints that may need optimization.
+    Records latency, SQL query count/time and cache hits/misses of every
+    request under its resolved route (see core.metrics), and flags slow
+    API calls in the api_performance log. Sync and async capable.
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         """Initialize the middleware with the next middleware in the chain."""
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        metrics.instrument_caches()
+        metrics.instrument_connections()
 
     def __call__(self, request):
         """
-        Monitor API call timing and log performance metrics.
+        Serve the request with query and cache instrumentation enabled.
 
         Args:
             request: The HTTP request object
 
         Returns:
-            HTTP response with timing information logged
+            HTTP response, with its metrics recorded
         """
-        start_time = time.time()
-        response = self.get_response(request)
-        duration = time.time() - start_time
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = metrics.RequestStats()
+        token = metrics._current.set(stats)
+        start_time = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics._current.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start_time)
+        return response
 
-        # Log performance metrics for API calls only
-        if request.path.startswith("/api/"):
-            api_logger.info(
-                f"API {request.method} {request.path} - "
-                f"{duration:.3f}s - {response.status_code}"
+    async def __acall__(self, request):
+        stats = metrics.RequestStats()
+        token = metrics._current.set(stats)
+        start_time = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics._current.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start_time)
+        return response
+
+    def record(self, request, response, stats, duration):
+        match = getattr(request, "resolver_match", None)
+        route = f"/{match.route}" if match and match.route else metrics.UNRESOLVED
+        metrics.registry.record(
+            request.method, route, duration, response.status_code, stats
+        )
+
+        # Flag slow API calls (>1 second, >3 seconds)
+        if request.path.startswith("/api/") and duration > 1.0:
+            log = api_logger.error if duration > 3.0 else api_logger.warning
+            log(
+                f"SLOW API {request.method} {request.path} ({route}) - "
+                f"{duration:.3f}s, {stats.queries} queries "
+                f"({stats.query_us / 1000:.1f}ms) - {response.status_code}"
+            )
+
+
+class QueryAuditMiddleware:
+    """
+    Middleware logging N+1 suspects and query budget overruns.
+
+    Enabled by QUERY_AUDIT_ENABLED (development): each request runs inside a
+    core.query_audit.QueryAudit, and requests repeating a query shape from
+    one call site, or running more queries than their view's query_budget,
+    are logged with the grouped queries.
+    """
+
+    def __init__(self, get_response):
+        """Initialize the middleware, unless query auditing is disabled."""
+        if not getattr(settings, "QUERY_AUDIT_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, "QUERY_AUDIT_THRESHOLD", N_PLUS_ONE_THRESHOLD)
+
+    def __call__(self, request):
+        """
+        Serve the request while grouping its queries.
+
+        Args:
+            request: The HTTP request object
+
+        Returns:
+            HTTP response, unchanged
+        """
+        with QueryAudit() as audit:
+            response = self.get_response(request)
+
+        match = getattr(request, "resolver_match", None)
+        budget = query_budget_of(match.func) if match else None
+        over_budget = budget is not None and audit.count > budget
+        if over_budget or audit.repeated(self.threshold):
+            budget_note = f" (budget {budget})" if budget is not None else ""
+            api_logger.warning(
+                f"QUERY AUDIT {request.method} {request.path} - "
+                f"{audit.count} queries{budget_note}\n{audit.report()}"
             )
 
-            # Log warning for slow API calls (>1 second)
-            if duration > 1.0:
+        return response
+
+
+class ProfilerMiddleware:
+    """
+    Middleware profiling requests on demand.
+
+    Enabled by PROFILER_ENABLED. Staff users profile a request with the
+    X-Profile: 1 header; a PROFILER_SAMPLE_RATE fraction of requests is
+    profiled and kept when slower than PROFILER_SLOW_SECONDS. Profiles
+    are written under logs/profiles/ (see core.profiling).
+    """
+
+    def __init__(self, get_response):
+        """Initialize the middleware, unless profiling is disabled."""
+        if not getattr(settings, "PROFILER_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_seconds = getattr(settings, "PROFILER_SLOW_SECONDS", 3.0)
+        profiling.instrument_external_calls()
+
+    def __call__(self, request):
+        """
+        Serve the request, profiled if requested or sampled.
+
+        Args:
+            request: The HTTP request object
+
+        Returns:
+            HTTP response, with an X-Profile-Id header when profiled on request
+        """
+        reason = profiling.should_profile(request)
+        if not reason:
+            return self.get_response(request)
+
+        started_at = timezone.now()
+        start_time = time.perf_counter()
+        with profiling.profiled() as profile:
+            response = self.get_response(request)
+        duration = time.perf_counter() - start_time
+
+        # should_profile() honours the header for staff only
+        user = getattr(request, "user", None)
+        if reason == "sampled" and duration <= self.slow_seconds:
+            return response
+
+        profile_id = profile.save(
+            {
+                "reason": reason,
+                "method": request.method,
+                "path": request.get_full_path(),
+                "status": response.status_code,
+                "user": getattr(user, "username", None),
+                "started_at": started_at.isoformat(),
+                "duration_ms": round(duration * 1000, 3),
+            }
+        )
+        api_logger.warning(
+            f"PROFILED {request.method} {request.path} - {duration:.3f}s "
+            f"({reason}) - profile {profile_id}"
+        )
+        if reason == "header":
+            response["X-Profile-Id"] = profile_id
+        return response
+
+
+class ReadReplicaMiddleware:
+    """
+    Middleware routing the reads of designated views to the read replica.
+
+    Enabled by READ_REPLICA_ALIAS (see core.db_routing): tracks each
+    request's reads and writes, pins clients that wrote to the primary and
+    serves again from the primary a safe request whose replica query failed.
+    Sync and async capable.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """Initialize the middleware, unless no replica is configured."""
+        if not db_routing.replica_alias():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """
+        Serve the request, from the primary again if the replica failed.
+
+        Args:
+            request: The HTTP request object
+
+        Returns:
+            HTTP response, with the pin cookie if the request wrote
+        """
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with db_routing.routing_request(request) as state:
+            response = self.get_response(request)
+            if state.failed and request.method in db_routing.READ_METHODS:
                 api_logger.warning(
-                    f"SLOW API {request.method} {request.path} - "
-                    f"{duration:.3f}s - Consider optimization"
+                    f"REPLICA FAILED {request.method} {request.path} - retrying on primary"
                 )
+                state.failed = False
+                state.disabled = True
+                response = self.get_response(request)
+            if state.wrote:
+                db_routing.pin_to_primary(request, response)
+        return response
 
-            # Log error for very slow API calls (>3 seconds)
-            if duration > 3.0:
-                api_logger.error(
-                    f"VERY SLOW API {request.method} {request.path} - "
-                    f"{duration:.3f}s - Immediate attention required"
+    async def __acall__(self, request):
+        with db_routing.routing_request(request) as state:
+            response = await self.get_response(request)
+            if state.failed and request.method in db_routing.READ_METHODS:
+                api_logger.warning(
+                    f"REPLICA FAILED {request.method} {request.path} - retrying on primary"
                 )
-
+                state.failed = False
+                state.disabled = True
+                response = await self.get_response(request)
+            if state.wrote:
+                await sync_to_async(db_routing.pin_to_primary)(request, response)
         return response
 
 
-class GlobalErrorHandlingMiddleware:
+class GlobalErrorHandlingMiddleware(MiddlewareMixin):
     """
     Middleware per gestione centralizzata degli errori
 
@@ -217,14 +411,9 @@ class GlobalErrorHandlingMiddleware:
     """
 
     def __init__(self, get_response):
-        self.get_response = get_response
+        super().__init__(get_response)
         self.logger = logging.getLogger(__name__)
 
-    def __call__(self, request):
-        """Processa la request normalmente"""
-        response = self.get_response(request)
-        return response
-
     def process_exception(self, request, exception):
         """
         Gestisce le eccezioni non catturate
@@ -299,3 +488,34 @@ class GlobalErrorHandlingMiddleware:
         else:
             ip = request.META.get("REMOTE_ADDR")
         return ip
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, sync and async capable.
+
+    WhiteNoiseMiddleware is sync only: under ASGI Django would run every
+    middleware below it, and the async views, through a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings=settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
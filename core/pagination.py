@@ -0,0 +1,37 @@
+"""
+Keyset pagination for list endpoints.
+
+CursorPagination seeks on the ordering column (`WHERE created_at < ...`)
+instead of OFFSET, so deep pages cost the same as the first one and rows
+inserted while a client is paging don't shift the results.
+
+The response body stays a plain JSON list, as returned by the existing list
+endpoints; the cursors travel in the RFC 8288 `Link` header.
+"""
+
+from core.constants import PAGINATION
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(CursorPagination):
+    page_size = PAGINATION["DEFAULT_PAGE_SIZE"]
+    max_page_size = PAGINATION["MAX_PAGE_SIZE"]
+    page_size_query_param = PAGINATION["PAGE_SIZE_QUERY_PARAM"]
+    ordering = ("-created_at", "-id")
+
+    def paginate(self, queryset, request, serializer_class, **serializer_kwargs):
+        """Paginate `queryset` and return the serialized page as a Response"""
+        page = self.paginate_queryset(queryset, request)
+        data = serializer_class(page, many=True, **serializer_kwargs).data
+        return self.get_paginated_response(data)
+
+    def get_paginated_response(self, data):
+        links = []
+        next_link, previous_link = self.get_next_link(), self.get_previous_link()
+        if next_link:
+            links.append(f'<{next_link}>; rel="next"')
+        if previous_link:
+            links.append(f'<{previous_link}>; rel="prev"')
+        headers = {"Link": ", ".join(links)} if links else None
+        return Response(data, headers=headers)
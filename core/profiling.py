@@ -0,0 +1,344 @@
+"""
+Request profiler for the TeoArt School Platform.
+
+ProfilerMiddleware (PROFILER_ENABLED) profiles a request when:
+
+- a staff user sends the ``X-Profile: 1`` header (checked before profiling
+  starts: a staff session or a valid staff JWT; otherwise it is ignored), or
+- it is picked by PROFILER_SAMPLE_RATE and ends up slower than
+  PROFILER_SLOW_SECONDS.
+
+A sampler thread reads the request thread's Python stack every
+PROFILER_INTERVAL_MS (sys._current_frames, stdlib only). SQL queries,
+blockchain RPC calls and Stripe API calls are timed as they run, and a
+sample taken during one of them gets a synthetic leaf frame such as
+``[sql]`` or ``[rpc eth_call]``.
+
+Each kept profile is written under PROFILER_DIR (logs/profiles/) as:
+
+- ``<id>.collapsed``: one ``frame;frame;frame count`` line per stack
+  (flamegraph.pl, speedscope, inferno)
+- ``<id>.json``: request, duration, SQL and external call timings
+
+/admin/profiles/ lists them for download.
+"""
+
+import contextvars
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+from importlib import import_module
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth import get_user
+from django.db import connections
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils import timezone
+from django.utils.html import format_html, format_html_join
+from rest_framework.exceptions import APIException
+
+from core.query_audit import normalize_sql
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_ID = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$")
+
+_active: contextvars.ContextVar = contextvars.ContextVar("request_profile", default=None)
+
+
+def _setting(name: str, default):
+    return getattr(settings, f"PROFILER_{name}", default)
+
+
+def profile_dir() -> str:
+    return str(_setting("DIR", os.path.join(settings.BASE_DIR, "logs", "profiles")))
+
+
+def _frame_label(code, base_dir: str) -> str:
+    filename = code.co_filename
+    if filename.startswith(base_dir):
+        filename = filename[len(base_dir) + 1:]
+    elif "site-packages" in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{code.co_name}"
+
+
+class RequestProfile:
+    """Stack samples and timed calls of one request"""
+
+    def __init__(self, interval: float):
+        self.id = f"{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sql: Dict[str, List[float]] = {}
+        self.calls: List[Dict[str, Any]] = []
+        # Innermost timed call in progress, as a synthetic leaf frame
+        self.current_call: Optional[str] = None
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self):
+        self._sampler = threading.Thread(
+            target=self._sample_loop, name=f"profiler-{self.id}", daemon=True
+        )
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def _sample_loop(self):
+        base_dir = str(settings.BASE_DIR)
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code, base_dir))
+                frame = frame.f_back
+            stack.reverse()
+            leaf = self.current_call
+            if leaf:
+                stack.append(leaf)
+            self.samples[";".join(stack)] += 1
+
+    @contextmanager
+    def timed(self, kind: str, name: str):
+        """Time an external call made by the request"""
+        outer, self.current_call = self.current_call, f"[{kind} {name}]"
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.current_call = outer
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.calls.append({"kind": kind, "name": name, "ms": round(elapsed_ms, 3)})
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        outer, self.current_call = self.current_call, "[sql]"
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.current_call = outer
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.sql.setdefault(normalize_sql(sql), []).append(elapsed_ms)
+
+    def save(self, meta: Dict[str, Any]) -> str:
+        """Write the collapsed stacks and the metadata; returns the profile id"""
+        directory = profile_dir()
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"{self.id}.collapsed"), "w") as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+
+        # SQL statements slowest first, by total time
+        sql = sorted(
+            (
+                {"sql": shape, "count": len(times), "total_ms": round(sum(times), 3)}
+                for shape, times in self.sql.items()
+            ),
+            key=lambda q: q["total_ms"],
+            reverse=True,
+        )
+        meta = {
+            "id": self.id,
+            "samples": sum(self.samples.values()),
+            "interval_ms": self.interval * 1000,
+            "sql_queries": sum(q["count"] for q in sql),
+            "sql_ms": round(sum(q["total_ms"] for q in sql), 3),
+            **meta,
+            "sql": sql,
+            "calls": self.calls,
+        }
+        with open(os.path.join(directory, f"{self.id}.json"), "w") as f:
+            json.dump(meta, f, indent=2, default=str)
+        self._prune(directory)
+        return self.id
+
+    def _prune(self, directory: str):
+        """Keep the newest PROFILER_MAX_PROFILES profiles"""
+        keep = _setting("MAX_PROFILES", 200)
+        ids = sorted(name[:-5] for name in os.listdir(directory) if name.endswith(".json"))
+        for stale in ids[:-keep] if len(ids) > keep else []:
+            for ext in (".json", ".collapsed"):
+                try:
+                    os.remove(os.path.join(directory, stale + ext))
+                except FileNotFoundError:
+                    pass
+
+
+@contextmanager
+def profiled(interval: Optional[float] = None):
+    """Profile the code run inside the block, on the current thread"""
+    if interval is None:
+        interval = _setting("INTERVAL_MS", 5) / 1000
+    profile = RequestProfile(interval)
+    token = _active.set(profile)
+    profile.start()
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(profile.sql_wrapper))
+            yield profile
+    finally:
+        profile.stop()
+        _active.reset(token)
+
+
+def _is_staff_request(request) -> bool:
+    """
+    Whether the request comes from a staff session or carries a valid staff JWT.
+
+    The profiler runs before the session and authentication middleware, so
+    both are resolved here, the token with the API's authentication backend.
+    """
+    from authentication.backends import CachedJWTAuthentication
+
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session_key:
+        engine = import_module(settings.SESSION_ENGINE)
+        user = get_user(SimpleNamespace(session=engine.SessionStore(session_key)))
+        if user.is_authenticated and user.is_staff:
+            return True
+    try:
+        authenticated = CachedJWTAuthentication().authenticate(request)
+    except APIException:
+        return False
+    return bool(authenticated and authenticated[0].is_staff)
+
+
+def should_profile(request) -> str:
+    """Why the request gets profiled: "header", "sampled" or "" (not profiled)"""
+    if request.META.get(PROFILE_HEADER) == "1" and _is_staff_request(request):
+        return "header"
+    rate = _setting("SAMPLE_RATE", 0.0)
+    if rate and random.random() < rate:
+        return "sampled"
+    return ""
+
+
+# ========== EXTERNAL CALL INSTRUMENTATION ==========
+
+
+def _timed_method(cls, method_name: str, kind: str, describe):
+    original = getattr(cls, method_name)
+    if getattr(original, "_profiled", False):
+        return
+
+    @wraps(original)
+    def wrapper(self, *args, **kwargs):
+        profile = _active.get()
+        if profile is None:
+            return original(self, *args, **kwargs)
+        with profile.timed(kind, describe(*args, **kwargs)):
+            return original(self, *args, **kwargs)
+
+    wrapper._profiled = True
+    setattr(cls, method_name, wrapper)
+
+
+def _stripe_request(method, url, *args, **kwargs):
+    path = re.sub(r"/(pi|ch|cus|re|evt)_[A-Za-z0-9]+", r"/\1_*", url.split("?")[0])
+    return f"{method.upper()} {re.sub(r'^https?://[^/]+', '', path)}"
+
+
+def instrument_external_calls():
+    """Time blockchain RPC and Stripe API calls made by profiled requests"""
+    from web3.providers.rpc import HTTPProvider
+
+    from blockchain.simulator import ChainSimulatorProvider
+
+    for provider in (HTTPProvider, ChainSimulatorProvider):
+        _timed_method(provider, "make_request", "rpc", lambda method, *a, **k: str(method))
+    try:
+        from stripe._http_client import HTTPClient
+    except ImportError:
+        return
+    _timed_method(HTTPClient, "request_with_retries", "stripe", _stripe_request)
+
+
+# ========== ADMIN VIEWS ==========
+
+
+def list_profiles(limit: int = 200) -> List[Dict[str, Any]]:
+    """Metadata of the stored profiles, newest first"""
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+        if len(profiles) >= limit:
+            break
+    return profiles
+
+
+@staff_member_required
+def profiles_admin_view(request):
+    """Stored request profiles with download links"""
+    rows = format_html_join(
+        "\n",
+        "<tr><td>{}</td><td>{} {}</td><td>{}</td><td>{} ms</td><td>{} ({} ms)</td>"
+        "<td>{}</td><td>{}</td><td><a href='{}/collapsed/'>collapsed</a> "
+        "<a href='{}/json/'>json</a></td></tr>",
+        (
+            (
+                p.get("started_at", ""),
+                p.get("method", ""),
+                p.get("path", ""),
+                p.get("status", ""),
+                p.get("duration_ms", ""),
+                p.get("sql_queries", 0),
+                p.get("sql_ms", 0),
+                len(p.get("calls", [])),
+                p.get("reason", ""),
+                p["id"],
+                p["id"],
+            )
+            for p in list_profiles()
+        ),
+    )
+    html = format_html(
+        "<html><head><title>Request profiles</title></head><body>"
+        "<h1>Request profiles</h1><p>Directory: {}</p>"
+        "<table border='1' cellpadding='4'><tr><th>Started</th><th>Request</th>"
+        "<th>Status</th><th>Duration</th><th>SQL</th><th>External calls</th>"
+        "<th>Reason</th><th>Download</th></tr>{}</table></body></html>",
+        profile_dir(),
+        rows,
+    )
+    return HttpResponse(html)
+
+
+@staff_member_required
+def profile_download_view(request, profile_id: str, kind: str):
+    """Download the collapsed stacks or the metadata of one profile"""
+    ext = {"collapsed": ".collapsed", "json": ".json"}.get(kind)
+    if ext is None or not PROFILE_ID.match(profile_id):
+        raise Http404("Profile not found")
+    path = os.path.join(profile_dir(), profile_id + ext)
+    if not os.path.exists(path):
+        raise Http404("Profile not found")
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=profile_id + ext)
@@ -0,0 +1,203 @@
+"""
+Query auditing for the TeoArt School Platform.
+
+QueryAudit records the SQL run inside a block (all database aliases) and
+groups it by normalized statement and call site - the innermost frame of
+project code that issued the query. A statement shape repeated from the
+same call site is the fingerprint of an N+1: a related object or count
+loaded once per row instead of once per page.
+
+Views declare how many queries they may run with a ``query_budget`` class
+attribute. check_query_budget() calls a view against datasets of growing
+size and fails when it runs over budget or when its query count grows with
+the data, naming the repeated queries and where they come from.
+QueryAuditMiddleware (QUERY_AUDIT_ENABLED) logs the same findings for live
+requests.
+"""
+
+import re
+import sys
+import time
+import traceback
+from collections import OrderedDict
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import connections
+
+N_PLUS_ONE_THRESHOLD = 5
+
+_LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%s"), "?"),
+    # IN lists of any length share a shape
+    (re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE), "IN (...)"),
+    (re.compile(r"\s+"), " "),
+]
+
+# Frames that issue queries on behalf of the code being audited
+_SKIPPED_FRAMES = (
+    "core/query_audit.py",
+    "core/middleware.py",
+    "core/metrics.py",
+    "core/profiling.py",
+    "core/slow_queries.py",
+)
+
+
+def normalize_sql(sql: str) -> str:
+    """Statement shape: literals and placeholders replaced with ?"""
+    for pattern, replacement in _LITERALS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def call_site() -> str:
+    """Innermost frame of project code (not Django, DRF or other libraries)"""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack(sys._getframe(1))):
+        filename = frame.filename
+        if (
+            filename.startswith(base_dir)
+            and "site-packages" not in filename
+            and not filename.endswith(_SKIPPED_FRAMES)
+        ):
+            return f"{filename[len(base_dir) + 1:]}:{frame.lineno} in {frame.name}"
+    return "<library>"
+
+
+@dataclass
+class QueryGroup:
+    """Queries of one shape issued from one call site"""
+
+    sql: str
+    call_site: str
+    count: int = 0
+    duration: float = 0.0
+    example: str = ""
+    aliases: set = field(default_factory=set)
+
+
+class QueryAudit:
+    """
+    Context manager recording and grouping the queries run inside it.
+
+    Usage:
+        with QueryAudit() as audit:
+            response = view(request)
+        assert not audit.repeated(), audit.report()
+    """
+
+    def __init__(self, using: Optional[Iterable[str]] = None):
+        self.using = list(using) if using is not None else list(connections)
+        self.count = 0
+        self._groups: "OrderedDict[tuple, QueryGroup]" = OrderedDict()
+        self._stack: Optional[ExitStack] = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in self.using:
+            self._stack.enter_context(
+                connections[alias].execute_wrapper(self._wrapper(alias))
+            )
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        self._stack = None
+
+    def _wrapper(self, alias: str):
+        def wrapper(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self._record(alias, sql, time.perf_counter() - started)
+
+        return wrapper
+
+    def _record(self, alias: str, sql: str, duration: float):
+        shape = normalize_sql(sql)
+        site = call_site()
+        group = self._groups.get((shape, site))
+        if group is None:
+            group = self._groups[(shape, site)] = QueryGroup(shape, site, example=sql)
+        group.count += 1
+        group.duration += duration
+        group.aliases.add(alias)
+        self.count += 1
+
+    @property
+    def groups(self) -> List[QueryGroup]:
+        """Query groups, most repeated first"""
+        return sorted(self._groups.values(), key=lambda g: g.count, reverse=True)
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[QueryGroup]:
+        """Groups run at least threshold times: N+1 suspects"""
+        return [g for g in self.groups if g.count >= threshold]
+
+    def report(self, limit: int = 10) -> str:
+        lines = [f"{self.count} queries in {len(self._groups)} groups:"]
+        for g in self.groups[:limit]:
+            lines.append(f"  {g.count:>4}x {g.duration * 1000:7.1f}ms  {g.call_site}")
+            lines.append(f"         {g.sql[:200]}")
+        return "\n".join(lines)
+
+
+def query_budget_of(view) -> Optional[int]:
+    """query_budget declared by a view class, function view or as_view() callable"""
+    view = getattr(view, "view_class", None) or getattr(view, "cls", None) or view
+    return getattr(view, "query_budget", None)
+
+
+def check_query_budget(
+    call: Callable[[], object],
+    seed: Callable[[int], object],
+    sizes: Iterable[int] = (1, 10),
+    budget: Optional[int] = None,
+):
+    """
+    Assert a view's query count is bounded and independent of the data size.
+
+    Args:
+        call: Serves one request, returns the response (called once per size)
+        seed: Adds data so the view lists the given number of rows in total
+        sizes: Dataset sizes to compare, increasing
+        budget: Maximum queries per request at any size
+
+    Returns:
+        The QueryAudit of each size
+
+    Raises:
+        AssertionError naming the groups that grow with the data
+    """
+    audits = []
+    for size in sizes:
+        seed(size)
+        with QueryAudit() as audit:
+            response = call()
+        status = getattr(response, "status_code", 200)
+        assert status < 400, f"Request failed with {status} at size {size}"
+        if budget is not None and audit.count > budget:
+            raise AssertionError(
+                f"{audit.count} queries at size {size}, budget is {budget}\n{audit.report()}"
+            )
+        audits.append((size, audit))
+
+    (small_size, small), (large_size, large) = audits[0], audits[-1]
+    if large.count > small.count:
+        baseline = {(g.sql, g.call_site): g.count for g in small.groups}
+        grown = [
+            g for g in large.groups if g.count > baseline.get((g.sql, g.call_site), 0)
+        ]
+        details = "\n".join(
+            f"  {g.count}x {g.call_site}\n    {g.sql[:200]}" for g in grown
+        )
+        raise AssertionError(
+            f"Query count grows with the data: {small.count} queries for "
+            f"{small_size} rows, {large.count} for {large_size} rows\n{details}"
+        )
+    return [audit for _, audit in audits]
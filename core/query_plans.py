@@ -0,0 +1,469 @@
+"""
+Query plan checks for the TeoArt School Platform.
+
+CRITICAL_QUERIES names the ORM queries on the hot paths: balance lookups,
+transaction history, the notification feed, pending withdrawals, payment
+snapshot correlation and enrollment checks. check_query_plans() runs each
+one against seeded data, captures the SQL it executes and EXPLAINs it:
+
+- SQLite: EXPLAIN QUERY PLAN. A ``SCAN <table>`` step using no index is a
+  full scan, a ``USE TEMP B-TREE FOR ORDER BY`` step a sort.
+- PostgreSQL: EXPLAIN (FORMAT JSON). A ``Seq Scan`` node is a full scan,
+  a ``Sort`` node a sort, and the Total Cost of the plan must stay within
+  the query's max_cost (QUERY_PLAN_MAX_COST by default).
+
+A query fails on a full scan, on a sort when it declares
+``allow_sort=False`` (lists that must be read in index order), and on a
+cost over budget. seed() fills the tables with representative volumes
+(scaled by QUERY_PLAN_SEED_SCALE) and refreshes the planner statistics.
+`manage.py check_query_plans` runs the checks in a rolled back
+transaction; core/tests/test_query_plans.py runs them with the test suite.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+
+# Volumes at scale 1.0: per-user rows are multiplied by the user count
+SEED_VOLUMES = {
+    "teachers": 20,
+    "students": 500,
+    "courses_per_teacher": 5,
+    "enrollments_per_student": 4,
+    "transactions_per_user": 20,
+    "notifications_per_user": 20,
+    "withdrawals": 2000,
+    "snapshots": 2000,
+}
+
+# SQLite: "SCAN users_user" (3.36+) or "SCAN TABLE users_user"
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\S+)(.*)$")
+
+
+def _setting(name: str, default):
+    return getattr(settings, f"QUERY_PLAN_{name}", default)
+
+
+# ========== REGISTRY ==========
+
+
+@dataclass
+class CriticalQuery:
+    """A hot-path query: `run` executes it for the ids returned by seed()"""
+
+    name: str
+    run: Callable[[Dict[str, Any]], Any]
+    description: str = ""
+    max_cost: Optional[float] = None
+    allow_sort: bool = True
+    # Small lookup tables a full scan is acceptable on
+    allow_scan: Tuple[str, ...] = ()
+
+    @property
+    def cost_budget(self) -> float:
+        if self.max_cost is not None:
+            return self.max_cost
+        return _setting("MAX_COST", 1000.0)
+
+
+CRITICAL_QUERIES: Dict[str, CriticalQuery] = {}
+
+
+def critical_query(name: str, **options):
+    """Register the decorated function as the critical query `name`"""
+
+    def register(func):
+        CRITICAL_QUERIES[name] = CriticalQuery(
+            name=name, run=func, description=(func.__doc__ or "").strip(), **options
+        )
+        return func
+
+    return register
+
+
+@critical_query("balance.lookup")
+def _balance_lookup(ids):
+    """Wallet balance of a user"""
+    from blockchain.models import DBTeoCoinBalance
+
+    return DBTeoCoinBalance.objects.filter(user_id=ids["student"]).first()
+
+
+@critical_query("transactions.history", allow_sort=False)
+def _transaction_history(ids):
+    """Latest ledger postings of a user"""
+    from blockchain.models import DBTeoCoinTransaction
+
+    return list(
+        DBTeoCoinTransaction.objects.filter(user_id=ids["student"]).order_by(
+            "-created_at", "-id"
+        )[:20]
+    )
+
+
+@critical_query("transactions.earned_total")
+def _earned_total(ids):
+    """Total earned by a teacher"""
+    from blockchain.models import DBTeoCoinTransaction
+    from django.db.models import Sum
+
+    return DBTeoCoinTransaction.objects.filter(
+        user_id=ids["teacher"], transaction_type="earned"
+    ).aggregate(total=Sum("amount"))
+
+
+@critical_query("notifications.feed", allow_sort=False)
+def _notification_feed(ids):
+    """First page of a user's notifications, newest first"""
+    from notifications.models import Notification
+
+    return list(
+        Notification.objects.filter(user_id=ids["student"]).order_by("-created_at")[:20]
+    )
+
+
+@critical_query("notifications.unread_count")
+def _unread_count(ids):
+    """Unread badge of a user"""
+    from notifications.models import Notification
+
+    return Notification.objects.filter(user_id=ids["student"], read=False).count()
+
+
+@critical_query("withdrawals.pending", allow_sort=False)
+def _pending_withdrawals(ids):
+    """Oldest pending withdrawals, as claimed by the processing queue"""
+    from blockchain.models import TeoCoinWithdrawalRequest
+
+    return list(
+        TeoCoinWithdrawalRequest.objects.filter(status="pending")
+        .order_by("created_at", "pk")
+        .values_list("pk", flat=True)[:50]
+    )
+
+
+@critical_query("withdrawals.user_open")
+def _open_withdrawals(ids):
+    """Pending or processing withdrawals of a user (daily limit checks)"""
+    from blockchain.models import TeoCoinWithdrawalRequest
+
+    return TeoCoinWithdrawalRequest.objects.filter(
+        user_id=ids["student"], status__in=["pending", "processing"]
+    ).exists()
+
+
+@critical_query("snapshots.by_payment_intent")
+def _snapshot_by_payment_intent(ids):
+    """Snapshot of a Stripe webhook, by payment intent"""
+    from rewards.models import PaymentDiscountSnapshot
+
+    return PaymentDiscountSnapshot.objects.filter(
+        stripe_payment_intent_id=ids["payment_intent"]
+    ).first()
+
+
+@critical_query("snapshots.by_checkout_session")
+def _snapshot_by_checkout_session(ids):
+    """Snapshot of a Stripe webhook, by checkout session"""
+    from rewards.models import PaymentDiscountSnapshot
+
+    return PaymentDiscountSnapshot.objects.filter(
+        stripe_checkout_session_id=ids["checkout_session"]
+    ).first()
+
+
+@critical_query("snapshots.by_order")
+def _snapshot_by_order(ids):
+    """Snapshot of an order (idempotent checkout)"""
+    from rewards.models import PaymentDiscountSnapshot
+
+    return PaymentDiscountSnapshot.objects.filter(external_txn_id=ids["order"]).first()
+
+
+@critical_query("snapshots.for_decision")
+def _snapshot_for_decision(ids):
+    """Latest snapshot of a student, teacher and course (teacher decisions)"""
+    from rewards.models import PaymentDiscountSnapshot
+
+    return (
+        PaymentDiscountSnapshot.objects.filter(
+            student_id=ids["student"], teacher_id=ids["teacher"], course_id=ids["course"]
+        )
+        .order_by("-created_at")
+        .first()
+    )
+
+
+@critical_query("enrollments.check")
+def _enrollment_check(ids):
+    """Is a student enrolled in a course"""
+    from courses.models import CourseEnrollment
+
+    return CourseEnrollment.objects.filter(
+        student_id=ids["student"], course_id=ids["course"]
+    ).exists()
+
+
+@critical_query("enrollments.student_courses")
+def _student_courses(ids):
+    """Courses a student is enrolled in"""
+    from courses.models import CourseEnrollment
+
+    return list(
+        CourseEnrollment.objects.filter(student_id=ids["student"]).values_list(
+            "course_id", flat=True
+        )
+    )
+
+
+# ========== SEEDING ==========
+
+
+def seed(scale: Optional[float] = None, using: str = "default") -> Dict[str, Any]:
+    """
+    Insert representative volumes (SEED_VOLUMES x scale) and refresh the
+    planner statistics. Returns the ids the critical queries look up.
+    """
+    from blockchain.models import (
+        DBTeoCoinBalance,
+        DBTeoCoinTransaction,
+        TeoCoinWithdrawalRequest,
+    )
+    from courses.models import Course, CourseEnrollment
+    from django.contrib.auth import get_user_model
+    from notifications.models import Notification
+    from rewards.models import PaymentDiscountSnapshot
+
+    if scale is None:
+        scale = _setting("SEED_SCALE", 1.0)
+    volume = {key: max(1, int(value * scale)) for key, value in SEED_VOLUMES.items()}
+    volume["courses_per_teacher"] = SEED_VOLUMES["courses_per_teacher"]
+    volume["enrollments_per_student"] = SEED_VOLUMES["enrollments_per_student"]
+
+    User = get_user_model()
+    users = User.objects.using(using)
+    users.bulk_create(
+        User(username=f"qplan-{role}-{i}", email=f"qplan-{role}-{i}@example.com", role=role)
+        for role, count in (("teacher", volume["teachers"]), ("student", volume["students"]))
+        for i in range(count)
+    )
+    teachers = list(users.filter(username__startswith="qplan-teacher-").values_list("pk", flat=True))
+    students = list(users.filter(username__startswith="qplan-student-").values_list("pk", flat=True))
+    everyone = teachers + students
+
+    Course.objects.using(using).bulk_create(
+        Course(title=f"Course {t}-{n}", description="-", teacher_id=t, is_approved=True)
+        for t in teachers
+        for n in range(volume["courses_per_teacher"])
+    )
+    courses = list(
+        Course.objects.using(using).filter(teacher_id__in=teachers).values_list("pk", "teacher_id")
+    )
+    CourseEnrollment.objects.using(using).bulk_create(
+        CourseEnrollment(student_id=s, course_id=courses[(i * 7 + n) % len(courses)][0])
+        for i, s in enumerate(students)
+        for n in range(volume["enrollments_per_student"])
+    )
+
+    DBTeoCoinBalance.objects.using(using).bulk_create(
+        DBTeoCoinBalance(user_id=u, available_balance=Decimal("100")) for u in everyone
+    )
+    kinds = ["earned", "spent_discount", "bonus", "hold", "hold_capture"]
+    DBTeoCoinTransaction.objects.using(using).bulk_create(
+        (
+            DBTeoCoinTransaction(
+                user_id=u, transaction_type=kinds[n % len(kinds)], amount=Decimal("1"), description="-"
+            )
+            for u in everyone
+            for n in range(volume["transactions_per_user"])
+        ),
+        batch_size=1000,
+    )
+    Notification.objects.using(using).bulk_create(
+        (
+            Notification(user_id=u, message="-", notification_type="bonus_received", read=n % 3 > 0)
+            for u in everyone
+            for n in range(volume["notifications_per_user"])
+        ),
+        batch_size=1000,
+    )
+
+    # Most withdrawals are settled: pending ones are a small slice
+    statuses = ["completed"] * 17 + ["failed", "processing", "pending"]
+    TeoCoinWithdrawalRequest.objects.using(using).bulk_create(
+        (
+            TeoCoinWithdrawalRequest(
+                user_id=students[i % len(students)],
+                amount=Decimal("5"),
+                metamask_address=f"0x{i:040x}",
+                status=statuses[i % len(statuses)],
+            )
+            for i in range(volume["withdrawals"])
+        ),
+        batch_size=1000,
+    )
+    snapshot_statuses = ["confirmed", "confirmed", "applied", "failed", "pending"]
+    PaymentDiscountSnapshot.objects.using(using).bulk_create(
+        (
+            PaymentDiscountSnapshot(
+                external_txn_id=f"qplan-order-{i}",
+                order_id=f"qplan-order-{i}",
+                stripe_checkout_session_id=f"cs_qplan_{i}",
+                stripe_payment_intent_id=f"pi_qplan_{i}",
+                course_id=courses[i % len(courses)][0],
+                teacher_id=courses[i % len(courses)][1],
+                student_id=students[i % len(students)],
+                price_eur=Decimal("100"),
+                discount_percent=10,
+                student_pay_eur=Decimal("90"),
+                teacher_eur=Decimal("45"),
+                platform_eur=Decimal("45"),
+                status=snapshot_statuses[i % len(snapshot_statuses)],
+            )
+            for i in range(volume["snapshots"])
+        ),
+        batch_size=1000,
+    )
+
+    analyze(using)
+    course, teacher = courses[0]
+    return {
+        "student": students[0],
+        "teacher": teacher,
+        "course": course,
+        "order": "qplan-order-0",
+        "payment_intent": "pi_qplan_0",
+        "checkout_session": "cs_qplan_0",
+    }
+
+
+def analyze(using: str = "default"):
+    """Refresh the planner statistics after bulk inserts"""
+    connection = connections[using]
+    if connection.vendor in ("postgresql", "sqlite"):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+
+# ========== PLANS ==========
+
+
+@dataclass
+class StatementPlan:
+    sql: str
+    plan: Any
+    full_scans: List[str] = field(default_factory=list)
+    sorts: int = 0
+    cost: Optional[float] = None
+
+
+@dataclass
+class PlanReport:
+    query: CriticalQuery
+    vendor: str
+    statements: List[StatementPlan] = field(default_factory=list)
+    problems: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+    def render(self) -> str:
+        lines = []
+        for statement in self.statements:
+            lines.append(statement.sql)
+            if isinstance(statement.plan, list) and all(isinstance(s, str) for s in statement.plan):
+                lines.extend(f"  {step}" for step in statement.plan)
+            else:
+                lines.append(json.dumps(statement.plan, indent=2))
+        return "\n".join(lines)
+
+
+def sqlite_plan(sql: str, steps: List[str]) -> StatementPlan:
+    """Full scans and sorts of an EXPLAIN QUERY PLAN"""
+    plan = StatementPlan(sql=sql, plan=steps)
+    for step in steps:
+        match = _SQLITE_SCAN.match(step)
+        if match and "USING" not in match.group(2) and match.group(1) != "CONSTANT":
+            plan.full_scans.append(match.group(1))
+        elif step.startswith("USE TEMP B-TREE FOR") and "ORDER BY" in step:
+            plan.sorts += 1
+    return plan
+
+
+def _plan_nodes(node: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def postgres_plan(sql: str, document) -> StatementPlan:
+    """Full scans, sorts and total cost of an EXPLAIN (FORMAT JSON)"""
+    if isinstance(document, str):
+        document = json.loads(document)
+    root = document[0]["Plan"]
+    plan = StatementPlan(sql=sql, plan=document, cost=float(root.get("Total Cost", 0)))
+    for node in _plan_nodes(root):
+        if node.get("Node Type") == "Seq Scan":
+            plan.full_scans.append(node.get("Relation Name", "?"))
+        elif node.get("Node Type") == "Sort":
+            plan.sorts += 1
+    return plan
+
+
+def explain(sql: str, params, using: str = "default") -> StatementPlan:
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            return postgres_plan(sql, cursor.fetchone()[0])
+        if connection.vendor == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return sqlite_plan(sql, [row[-1] for row in cursor.fetchall()])
+    raise NotImplementedError(f"No query plan support for {connection.vendor}")
+
+
+class _Capture:
+    def __init__(self):
+        self.statements: List[Tuple[str, Any]] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            self.statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def check_query(query: CriticalQuery, ids: Dict[str, Any], using: str = "default") -> PlanReport:
+    """Run the query, EXPLAIN what it executed and list the plan problems"""
+    connection = connections[using]
+    capture = _Capture()
+    with connection.execute_wrapper(capture):
+        query.run(ids)
+
+    report = PlanReport(query=query, vendor=connection.vendor)
+    if not capture.statements:
+        report.problems.append("no SELECT executed")
+    for sql, params in capture.statements:
+        plan = explain(sql, params, using)
+        report.statements.append(plan)
+        for table in plan.full_scans:
+            if table not in query.allow_scan:
+                report.problems.append(f"full scan of {table}")
+        if plan.sorts and not query.allow_sort:
+            report.problems.append("sort not served by an index")
+        if plan.cost is not None and plan.cost > query.cost_budget:
+            report.problems.append(f"cost {plan.cost:.0f} over budget {query.cost_budget:.0f}")
+    return report
+
+
+def check_query_plans(
+    ids: Dict[str, Any], names: Optional[Iterable[str]] = None, using: str = "default"
+) -> List[PlanReport]:
+    """Plan reports of the named critical queries (all of them by default)"""
+    names = list(names) if names else list(CRITICAL_QUERIES)
+    return [check_query(CRITICAL_QUERIES[name], ids, using) for name in names]
@@ -0,0 +1,245 @@
+"""
+Slow query log for the TeoArt School Platform.
+
+With SLOW_QUERY_LOG_ENABLED, every database connection gets an execute
+wrapper timing each statement. Statements slower than
+SLOW_QUERY_THRESHOLD_MS are logged, one JSON object per line, to
+SLOW_QUERY_LOG_FILE (rotated at SLOW_QUERY_LOG_MAX_BYTES, keeping
+SLOW_QUERY_LOG_BACKUPS files) with:
+
+- duration, database alias and vendor
+- the statement and its normalized shape (literals replaced with ?)
+- the shape of its parameters (types and lengths, never the values)
+- the call site: the innermost frame of project code that ran it
+- on PostgreSQL, the EXPLAIN (FORMAT JSON) plan of SELECT statements
+
+Plans are captured and lines written by a background thread, off the
+request path; when it falls SLOW_QUERY_MAX_PENDING records behind, new
+records are written without a plan. `manage.py slow_queries` ranks the
+call sites by total time.
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+from core.query_audit import call_site, normalize_sql
+
+logger = logging.getLogger("slow_queries")
+MAX_STATEMENT_LENGTH = 2000
+EXPLAINABLE = ("SELECT", "WITH")
+
+
+def _setting(name: str, default):
+    return getattr(settings, f"SLOW_QUERY_{name}", default)
+
+
+def log_file() -> str:
+    return str(_setting("LOG_FILE", os.path.join(settings.BASE_DIR, "logs", "slow_queries.jsonl")))
+
+
+def params_shape(params, many: bool = False) -> Any:
+    """Types (and lengths) of the query parameters, without their values"""
+    if params is None:
+        return None
+    if many:
+        rows = list(params)
+        return {"rows": len(rows), "row": params_shape(rows[0]) if rows else None}
+    if isinstance(params, dict):
+        return {key: params_shape(value) for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [_value_shape(value) for value in params]
+    return _value_shape(params)
+
+
+def _value_shape(value) -> str:
+    name = type(value).__name__
+    if isinstance(value, (str, bytes, list, tuple, set, frozenset)):
+        return f"{name}[{len(value)}]"
+    return name
+
+
+class SlowQueryLog:
+    """Execute wrapper recording statements slower than the threshold"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._handler: Optional[logging.Handler] = None
+
+    # ========== INSTALLATION ==========
+
+    def install(self):
+        """Wrap every current and future database connection"""
+        connection_created.connect(
+            self._on_connection_created, weak=False, dispatch_uid="slow_query_log"
+        )
+        for alias in connections:
+            self._install_on(connections[alias])
+
+    def uninstall(self):
+        connection_created.disconnect(dispatch_uid="slow_query_log")
+        for alias in connections:
+            wrappers = connections[alias].execute_wrappers
+            if self in wrappers:
+                wrappers.remove(self)
+
+    def _on_connection_created(self, sender, connection, **kwargs):
+        self._install_on(connection)
+
+    def _install_on(self, connection):
+        # First in the list: connection.execute_wrapper() blocks pop the last one
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, self)
+
+    # ========== RECORDING ==========
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(self._local, "explaining", False):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            if duration_ms >= _setting("THRESHOLD_MS", 200):
+                self.record(context["connection"], sql, params, many, duration_ms)
+
+    def record(self, connection, sql: str, params, many: bool, duration_ms: float):
+        record = {
+            "ts": timezone.now().isoformat(),
+            "alias": connection.alias,
+            "vendor": connection.vendor,
+            "duration_ms": round(duration_ms, 3),
+            "call_site": call_site(),
+            "shape": normalize_sql(sql),
+            "statement": sql[:MAX_STATEMENT_LENGTH],
+            "params": params_shape(params, many),
+            "many": many,
+            "explain": None,
+        }
+        explain = (
+            connection.vendor == "postgresql"
+            and not many
+            and sql.lstrip().upper().startswith(EXPLAINABLE)
+        )
+        with self._lock:
+            backlog = self._pending >= _setting("MAX_PENDING", 100)
+            if not backlog:
+                self._pending += 1
+        if backlog:
+            self._write(record)
+            return
+        self._get_executor().submit(
+            self._finish, record, sql if explain else None, params
+        )
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="slow-query-log"
+                )
+            return self._executor
+
+    def _finish(self, record: Dict[str, Any], sql: Optional[str], params):
+        try:
+            if sql is not None:
+                record["explain"] = self._explain(record["alias"], sql, params)
+            self._write(record)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _explain(self, alias: str, sql: str, params):
+        self._local.explaining = True
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plan = cursor.fetchone()[0]
+            return json.loads(plan) if isinstance(plan, str) else plan
+        except Exception as e:
+            return {"error": str(e)}
+        finally:
+            self._local.explaining = False
+
+    def _write(self, record: Dict[str, Any]):
+        path = log_file()
+        if self._handler is None or self._handler.baseFilename != os.path.abspath(path):
+            self._open(path)
+        logger.info(json.dumps(record, default=str))
+
+    def _open(self, path: str):
+        """(Re)attach the rotating JSONL handler to the slow_queries logger"""
+        if self._handler is not None:
+            logger.removeHandler(self._handler)
+            self._handler.close()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._handler = logging.handlers.RotatingFileHandler(
+            path,
+            maxBytes=_setting("LOG_MAX_BYTES", 10 * 1024 * 1024),
+            backupCount=_setting("LOG_BACKUPS", 5),
+        )
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(self._handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+    def flush(self):
+        """Wait until the queued records are written"""
+        if self._executor is not None:
+            self._executor.submit(lambda: None).result()
+
+
+slow_query_log = SlowQueryLog()
+
+
+# ========== SUMMARY ==========
+
+
+def read_records(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Records of the log file and its rotated backups, oldest file first"""
+    path = path or log_file()
+    paths = [f"{path}.{i}" for i in range(_setting("LOG_BACKUPS", 5), 0, -1)] + [path]
+    records = []
+    for candidate in paths:
+        if not os.path.exists(candidate):
+            continue
+        with open(candidate) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    return records
+
+
+def summarize(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Call sites ranked by total time, with their slowest statement shapes"""
+    sites: Dict[str, Dict[str, Any]] = {}
+    for r in records:
+        site = sites.setdefault(
+            r["call_site"],
+            {"call_site": r["call_site"], "count": 0, "total_ms": 0.0, "max_ms": 0.0, "shapes": {}},
+        )
+        site["count"] += 1
+        site["total_ms"] += r["duration_ms"]
+        site["max_ms"] = max(site["max_ms"], r["duration_ms"])
+        site["shapes"][r["shape"]] = site["shapes"].get(r["shape"], 0.0) + r["duration_ms"]
+    ranked = sorted(sites.values(), key=lambda s: s["total_ms"], reverse=True)
+    for site in ranked:
+        site["avg_ms"] = site["total_ms"] / site["count"]
+        site["shapes"] = sorted(site["shapes"].items(), key=lambda kv: kv[1], reverse=True)
+    return ranked
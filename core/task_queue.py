@@ -0,0 +1,57 @@
+"""
+Background task helpers for the TeoArt School Platform.
+
+Tasks (``@shared_task`` in each app's tasks.py) declare their queue:
+
+- ``ledger``: ledger reconciliation and checkpoints
+- ``chain``: withdrawal settlement and anything talking to the chain
+- ``notifications``: emails and user notifications
+- ``analytics``: reports, statistics and cache warming (default queue)
+
+Work started by a request is enqueued with enqueue_on_commit(), so the task
+never runs before (or without) the rows it reads being committed. The
+runtime depends on settings (see schoolplatform/settings/base.py):
+
+- ``eager``: CELERY_TASK_ALWAYS_EAGER, tasks run inline in the caller; the
+  default when no CELERY_BROKER_URL is configured, as no worker is deployed
+- ``local``: CELERY_BROKER_URL=filesystem://, messages go through
+  TASK_QUEUE_DIR and a worker on the same box consumes them
+- ``broker``: a real broker (Redis, RabbitMQ)
+
+When the broker cannot be reached, enqueue() runs the task inline rather
+than losing it.
+"""
+
+import logging
+
+from celery import current_app
+from django.db import transaction
+from kombu.exceptions import OperationalError
+
+logger = logging.getLogger(__name__)
+
+QUEUES = ("ledger", "chain", "notifications", "analytics")
+
+
+def runtime_mode() -> str:
+    """"eager", "local" (filesystem broker) or "broker" """
+    conf = current_app.conf
+    if conf.task_always_eager:
+        return "eager"
+    if str(conf.broker_url or "").startswith("filesystem://"):
+        return "local"
+    return "broker"
+
+
+def enqueue(task, *args, **kwargs):
+    """Send task(*args, **kwargs) to its queue; run it inline if the broker is down"""
+    try:
+        return task.apply_async(args, kwargs)
+    except OperationalError as e:
+        logger.warning(f"Broker unavailable for {task.name}, running inline: {e}")
+        return task.apply(args, kwargs)
+
+
+def enqueue_on_commit(task, *args, using=None, **kwargs):
+    """Enqueue the task once the current transaction commits (now if none is open)"""
+    transaction.on_commit(lambda: enqueue(task, *args, **kwargs), using=using, robust=True)
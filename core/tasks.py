@@ -1,4 +1,5 @@
 # ✅ OTTIMIZZATO - Celery background tasks for heavy operations
+# Queues and time limits: see core.task_queue
 import logging
 
 from celery import shared_task
@@ -9,46 +10,26 @@ from django.utils import timezone
 logger = logging.getLogger(__name__)
 
 
-@shared_task(bind=True, max_retries=3)
+@shared_task(bind=True, queue="analytics", max_retries=3, soft_time_limit=120, time_limit=150)
 def generate_user_progress_report(self, user_id):
     """
     Generate detailed progress report for a user - run in background
     """
     try:
-        from courses.models import CourseEnrollment, LessonCompletion
-        from users.models import User, UserProgress
+        from services.progress_service import progress_service
+        from users.models import User
 
         user = User.objects.get(id=user_id)
-        user_progress, created = UserProgress.objects.get_or_create(user=user)
 
-        # Calculate detailed statistics
-        enrollments = CourseEnrollment.objects.filter(student=user).select_related(
-            "course"
+        # Grouped recomputation of every counter (also realigns drift)
+        progress = progress_service.rebuild(user)
+        total_courses = progress["total_courses_enrolled"]
+        completed_courses = progress["total_courses_completed"]
+        completed_lessons = progress["total_lessons_completed"]
+        total_lessons = (
+            user.enrollments.aggregate(n=Count("course__lessons"))["n"] or 0
         )
 
-        total_courses = enrollments.count()
-        completed_courses = enrollments.filter(completed=True).count()
-
-        # Calculate total lessons and completed lessons
-        total_lessons = 0
-        completed_lessons = 0
-
-        for enrollment in enrollments:
-            course_lessons = enrollment.course.lessons.count()
-            total_lessons += course_lessons
-
-            completed_course_lessons = LessonCompletion.objects.filter(
-                student=user, lesson__course=enrollment.course
-            ).count()
-            completed_lessons += completed_course_lessons
-
-        # Update user progress
-        user_progress.total_courses_enrolled = total_courses
-        user_progress.total_courses_completed = completed_courses
-        user_progress.total_lessons_completed = completed_lessons
-        user_progress.last_activity_date = timezone.now()
-        user_progress.save()
-
         # Clear related cache
         cache.delete(f"student_dashboard_{user_id}")
         cache.delete(f"student_batch_data_{user_id}")
@@ -68,52 +49,39 @@ def generate_user_progress_report(self, user_id):
         raise self.retry(countdown=60, exc=exc)
 
 
-@shared_task(bind=True, max_retries=3)
+@shared_task(bind=True, queue="analytics", max_retries=3, soft_time_limit=120, time_limit=150)
 def calculate_teacher_statistics(self, teacher_id):
     """
     Calculate detailed statistics for a teacher - run in background
     """
     try:
-        from courses.models import Course, CourseEnrollment
-        from rewards.models import TeoCoinTransaction
+        from django.db.models import Sum
+        from rewards.models import BlockchainTransaction
+        from services.teacher_stats_service import teacher_stats_service
         from users.models import User
 
         teacher = User.objects.get(id=teacher_id, role="teacher")
 
-        # Get teacher's courses with student counts
-        courses = Course.objects.filter(teacher=teacher).annotate(
-            student_count=Count("enrollments")
-        )
-
-        # Calculate totals
-        total_courses = courses.count()
-        total_students = (
-            CourseEnrollment.objects.filter(course__teacher=teacher)
-            .values("student")
-            .distinct()
-            .count()
-        )
-
-        # Calculate earnings
-        from django.db import models
-
-        total_earnings = (
-            TeoCoinTransaction.objects.filter(
-                user=teacher, transaction_type="course_earned"
-            ).aggregate(total=models.Sum("amount"))["total"]
-            or 0
+        # One grouped query for courses/students/earnings, then realign the
+        # TeacherProfile counters read by the dashboard
+        course_stats = teacher_stats_service.aggregate_course_stats(teacher)
+        counters = teacher_stats_service.rebuild_counters(
+            teacher, course_stats=course_stats
         )
+        total_courses = counters["total_courses"]
+        total_students = course_stats["total_students"]
+        total_earnings = counters["total_earnings"]
 
         # Monthly earnings
         start_of_month = timezone.now().replace(
             day=1, hour=0, minute=0, second=0, microsecond=0
         )
         monthly_earnings = (
-            TeoCoinTransaction.objects.filter(
+            BlockchainTransaction.objects.filter(
                 user=teacher,
                 transaction_type="course_earned",
                 created_at__gte=start_of_month,
-            ).aggregate(total=models.Sum("amount"))["total"]
+            ).aggregate(total=Sum("amount"))["total"]
             or 0
         )
 
@@ -135,7 +103,7 @@ def calculate_teacher_statistics(self, teacher_id):
         raise self.retry(countdown=60, exc=exc)
 
 
-@shared_task(bind=True)
+@shared_task(bind=True, queue="analytics", soft_time_limit=60, time_limit=90)
 def warm_cache_for_popular_courses(self):
     """
     Pre-warm cache for the most popular courses
@@ -178,7 +146,7 @@ def warm_cache_for_popular_courses(self):
         raise exc
 
 
-@shared_task(bind=True)
+@shared_task(bind=True, queue="analytics", soft_time_limit=60, time_limit=90)
 def cleanup_old_cache_keys(self):
     """
     Clean up old/unused cache keys (if using Redis)
@@ -202,7 +170,7 @@ def cleanup_old_cache_keys(self):
         raise exc
 
 
-@shared_task(bind=True, max_retries=2)
+@shared_task(bind=True, queue="notifications", max_retries=2, soft_time_limit=30, time_limit=60)
 def send_progress_notification(self, user_id, achievement_type, details):
     """
     Send progress notification to user - run in background
@@ -0,0 +1,106 @@
+"""
+Async API views (core.async_views) under ASGI.
+
+Coroutines are driven with async_to_sync: thread-sensitive sync_to_async
+calls then run on the test's thread, inside its database transaction.
+"""
+
+import asyncio
+import time
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncClient
+from django.urls import path
+from rest_framework.decorators import permission_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from users.models import User
+
+from core import metrics
+from core.async_views import AsyncAPIView, async_api_view, io_view
+
+LATENCY = 0.2
+
+
+class SlowLookupView(AsyncAPIView):
+    permission_classes = [AllowAny]
+
+    async def get(self, request):
+        await asyncio.sleep(LATENCY)  # An RPC round trip
+        return Response({"users": await sync_to_async(User.objects.count)()})
+
+
+@async_api_view(["GET"])
+@permission_classes([IsAuthenticated])
+async def whoami(request):
+    return Response({"username": request.user.username})
+
+
+urlpatterns = [
+    path("slow/", SlowLookupView.as_view()),
+    path("whoami/", whoami),
+]
+
+pytestmark = [pytest.mark.urls(__name__), pytest.mark.django_db]
+
+
+def make_user(username):
+    return User.objects.create_user(
+        username=username, email=f"{username}@example.com", password="pw", role="student"
+    )
+
+
+def burst(url, count):
+    async def requests():
+        client = AsyncClient()
+        return await asyncio.gather(*(client.get(url) for _ in range(count)))
+
+    return async_to_sync(requests)()
+
+
+def test_requests_wait_on_io_together():
+    make_user("student")
+    started = time.perf_counter()
+    responses = burst("/slow/", 10)
+    elapsed = time.perf_counter() - started
+
+    assert [r.json()["users"] for r in responses] == [1] * 10
+    assert elapsed < 5 * LATENCY  # One after the other: 10 * LATENCY
+
+
+def test_metrics_count_queries_run_in_threads():
+    # The test database connection predates the middleware (built per request)
+    metrics.instrument_connections()
+    with mock.patch.object(metrics.registry, "record") as record:
+        burst("/slow/", 1)
+    method, route, duration, status, stats = record.call_args.args
+    assert (method, route, status) == ("GET", "/slow/", 200)
+    assert duration >= LATENCY
+    assert stats.queries == 1
+
+
+def test_function_views_keep_their_policies():
+    factory = APIRequestFactory()
+    view = async_to_sync(whoami)
+    assert view(factory.get("/whoami/")).status_code == 401
+
+    user = make_user("student")
+    request = factory.get("/whoami/")
+    force_authenticate(request, user=user)
+    response = view(request)
+    assert response.status_code == 200
+    assert response.data == {"username": "student"}
+
+    request = factory.post("/whoami/")
+    force_authenticate(request, user=user)
+    assert view(request).status_code == 405
+
+
+def test_async_views_are_mounted_when_enabled(settings):
+    settings.ASYNC_IO_VIEWS = False
+    assert io_view("sync", "async") == "sync"
+    settings.ASYNC_IO_VIEWS = True
+    assert io_view("sync", "async") == "async"
@@ -0,0 +1,186 @@
+"""
+Generic batch endpoint (core.batch): sub-requests run through the URLconf
+with the caller's authentication, reads concurrently on the pool threads
+(hence transactional tests: the threads use their own connections).
+"""
+
+import time
+
+import pytest
+from django.http import HttpResponse
+from django.urls import path
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from services.idempotency import idempotent
+from users.models import User
+
+from core.batch_api import MultiplexBatchAPI
+
+LATENCY = 0.2
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def slow_count(request):
+    time.sleep(LATENCY)
+    return Response({"users": User.objects.count(), "page": request.query_params.get("page")})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def whoami(request):
+    return Response({"username": request.user.username})
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def signup(request):
+    make_user(request.data["username"])
+    return Response({"created": request.data["username"]}, status=201)
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@idempotent("batch_signup")
+def keyed_signup(request):
+    make_user(request.data["username"])
+    return Response({"created": request.data["username"]}, status=201)
+
+
+def broken(request):
+    raise RuntimeError("boom")
+
+
+def plain(request):
+    return HttpResponse("ok", content_type="text/plain")
+
+
+urlpatterns = [
+    path("api/v1/batch/", MultiplexBatchAPI.as_view()),
+    path("slow/", slow_count),
+    path("whoami/", whoami),
+    path("signup/", signup),
+    path("keyed-signup/", keyed_signup),
+    path("broken/", broken),
+    path("plain/", plain),
+]
+
+pytestmark = [pytest.mark.urls(__name__), pytest.mark.django_db(transaction=True)]
+
+
+def make_user(username):
+    return User.objects.create_user(
+        username=username, email=f"{username}@example.com", password="pw", role="student"
+    )
+
+
+def batch(user, requests):
+    request = APIRequestFactory().post("/api/v1/batch/", {"requests": requests}, format="json")
+    if user is not None:
+        force_authenticate(request, user=user)
+    return MultiplexBatchAPI.as_view()(request)
+
+
+def test_reads_run_concurrently():
+    user = make_user("student")
+    started = time.perf_counter()
+    response = batch(user, [{"path": "/slow/", "params": {"page": i}} for i in range(4)])
+    elapsed = time.perf_counter() - started
+
+    assert response.status_code == 200
+    assert [r["body"] for r in response.data["responses"]] == [
+        {"users": 1, "page": str(i)} for i in range(4)
+    ]
+    assert elapsed < 3 * LATENCY  # One after the other: 4 * LATENCY
+
+
+def test_sub_requests_share_the_callers_authentication():
+    user = make_user("student")
+    response = batch(user, [{"id": "me", "path": "/whoami/"}])
+    assert response.data["responses"] == [
+        {
+            "id": "me",
+            "status": 200,
+            "headers": response.data["responses"][0]["headers"],
+            "body": {"username": "student"},
+        }
+    ]
+    assert batch(None, [{"path": "/whoami/"}]).status_code == 401
+
+
+def test_writes_run_between_the_reads_around_them():
+    user = make_user("student")
+    response = batch(
+        user,
+        [
+            {"path": "/slow/"},
+            {"path": "/slow/"},
+            {"method": "POST", "path": "/signup/", "body": {"username": "friend"}},
+            {"path": "/slow/"},
+        ],
+    )
+    statuses = [r["status"] for r in response.data["responses"]]
+    users = [r["body"].get("users") for r in response.data["responses"]]
+    assert statuses == [200, 200, 201, 200]
+    assert users == [1, 1, None, 2]
+
+
+def test_each_sub_request_has_its_own_status():
+    user = make_user("student")
+    response = batch(
+        user,
+        [
+            {"path": "/whoami/"},
+            {"path": "/missing/"},
+            {"path": "/broken/"},
+            {"method": "POST", "path": "/whoami/"},
+            {"path": "/plain/"},
+            {"path": "/api/v1/batch/", "method": "POST", "body": {"requests": []}},
+        ],
+    )
+    responses = response.data["responses"]
+    assert response.status_code == 200
+    assert [r["status"] for r in responses] == [200, 404, 500, 405, 200, 400]
+    assert [r["id"] for r in responses] == list(range(6))
+    assert responses[4]["body"] == "ok"
+    assert responses[5]["body"] == {"error": "Batches cannot be nested"}
+
+
+@pytest.mark.parametrize(
+    "requests",
+    [
+        [],
+        "/whoami/",
+        [{"path": "whoami/"}],
+        [{"path": "/whoami/", "method": "TRACE"}],
+        [{"path": "/whoami/", "params": ["page"]}],
+        [{"path": "/whoami/", "idempotency_key": 7}],
+        [{"path": "/whoami/"}] * 3,
+    ],
+)
+def test_malformed_batches_are_rejected(settings, requests):
+    settings.BATCH_MAX_REQUESTS = 2
+    response = batch(make_user("student"), requests)
+    assert response.status_code == 400
+    assert "error" in response.data
+
+
+def test_retried_writes_replay_through_their_idempotency_key():
+    user = make_user("student")
+    requests = [
+        {
+            "method": "POST",
+            "path": "/keyed-signup/",
+            "body": {"username": "friend"},
+            "idempotency_key": "signup-friend",
+        }
+    ]
+    first = batch(user, requests).data["responses"][0]
+    retry = batch(user, requests).data["responses"][0]
+
+    assert first["status"] == retry["status"] == 201
+    assert retry["body"] == first["body"]
+    assert retry["headers"]["Idempotent-Replayed"] == "true"
+    assert User.objects.filter(username="friend").count() == 1
@@ -0,0 +1,125 @@
+"""
+Read-replica routing (core.db_routing).
+
+The test settings declare a second in-memory SQLite database, "replica",
+which only changes when copy_sqlite_database() replicates the primary onto
+it: until then it lags behind, like a real replica.
+"""
+
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import OperationalError, connections
+from django.http import JsonResponse
+from django.test import Client
+from django.urls import path
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from users.models import User
+
+from core import db_routing
+from core.db_routing import ReplicaReadsMixin, copy_sqlite_database, use_replica
+
+
+def make_user(username):
+    return User.objects.create_user(
+        username=username, email=f"{username}@example.com", password="pw", role="student"
+    )
+
+
+@use_replica
+def user_count(request):
+    return JsonResponse({"users": User.objects.count()})
+
+
+def register(request):
+    make_user(request.POST["username"])
+    return JsonResponse({}, status=201)
+
+
+class UserCountAPI(ReplicaReadsMixin, APIView):
+    def get(self, request):
+        return Response({"users": User.objects.count()})
+
+    def post(self, request):
+        make_user(request.data["username"])
+        return Response({}, status=201)
+
+
+urlpatterns = [
+    path("count/", user_count),
+    path("register/", register),
+    path("api/count/", UserCountAPI.as_view()),
+]
+
+pytestmark = [
+    pytest.mark.urls(__name__),
+    pytest.mark.django_db(transaction=True, databases=["default", "replica"]),
+]
+
+
+@pytest.fixture(autouse=True)
+def replica(settings):
+    settings.READ_REPLICA_ALIAS = "replica"
+    db_routing._down_until.clear()
+    yield
+    db_routing._down_until.clear()
+
+
+def counted(client, url="/count/"):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.json()["users"]
+
+
+def test_designated_views_read_the_replica():
+    make_user("primary")
+    client = Client()
+    assert counted(client) == 0  # Not replicated yet
+
+    call_command("simulate_replica", "--once", stdout=StringIO())
+    assert counted(client) == 1
+    assert User.objects.count() == 1  # Other code reads the primary
+
+
+def test_client_that_wrote_is_pinned_to_the_primary():
+    client = Client()
+    response = client.post("/register/", {"username": "writer"})
+    assert db_routing.PIN_COOKIE in response.cookies
+    assert counted(client) == 1
+    assert counted(Client()) == 0
+
+    client.cookies[db_routing.PIN_COOKIE] = "0"  # Pin expired
+    assert counted(client) == 0
+
+
+def test_authenticated_user_is_pinned_without_cookies(django_user_model):
+    user = make_user("api")
+    copy_sqlite_database()
+    client = APIClient()
+    client.force_authenticate(user)
+    assert client.post("/api/count/", {"username": "new"}).status_code == 201
+
+    fresh = APIClient()  # Same user, no pin cookie
+    fresh.force_authenticate(user)
+    assert counted(fresh, "/api/count/") == 2
+
+    other = APIClient()
+    other.force_authenticate(django_user_model(pk=999, username="other"))
+    assert counted(other, "/api/count/") == 1
+
+
+def test_replica_errors_fall_back_to_the_primary():
+    make_user("primary")
+
+    def replica_down(execute, sql, params, many, context):
+        raise OperationalError("replica unreachable")
+
+    client = Client(raise_request_exception=False)
+    with connections["replica"].execute_wrapper(replica_down):
+        assert counted(client) == 1
+    # Skipped until READ_REPLICA_RETRY_SECONDS have passed
+    assert counted(client) == 1
+    assert "replica" in db_routing._down_until
@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.test import Client
+from django.urls import path
+
+from core import metrics
+
+
+def item_view(request, pk):
+    cache.get(f"item:{pk}")
+    cache.set(f"item:{pk}", pk)
+    cache.get(f"item:{pk}")
+    cache.get_many([f"item:{pk}", "other"])
+    return JsonResponse({"users": get_user_model().objects.count()})
+
+
+urlpatterns = [
+    path("items/<int:pk>/", item_view),
+    path("metrics", metrics.metrics_view),
+    path("admin/metrics/", metrics.metrics_admin_view),
+]
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics(settings):
+    settings.METRICS_FLUSH_SECONDS = 0
+    cache.clear()
+    metrics.registry.reset()
+    yield
+    metrics.registry.reset()
+
+
+def test_quantiles_from_log_buckets():
+    assert metrics.bucket_index(0.4) == 0
+    assert metrics.bucket_index(3) == 2
+    assert metrics.bucket_index(10**6) == len(metrics.BUCKETS_MS)
+
+    buckets = [0] * (len(metrics.BUCKETS_MS) + 1)
+    buckets[metrics.bucket_index(3)] = 90  # (2ms, 4ms]
+    buckets[metrics.bucket_index(100)] = 10  # (64ms, 128ms]
+    assert metrics.quantile(buckets, 0.5) == pytest.approx(2 + 2 * 50 / 90)
+    assert 64 < metrics.quantile(buckets, 0.95) <= 128
+    assert metrics.quantile([0] * len(buckets), 0.5) is None
+
+
+def test_workers_merge_through_shared_counters():
+    stats = metrics.RequestStats()
+    stats.queries = 3
+    workers = [metrics.MetricsRegistry(), metrics.MetricsRegistry()]
+    for worker in workers:
+        for _ in range(5):
+            worker.record("GET", "/api/v1/things/", 0.003, 200, stats)
+        worker.flush()
+
+    [route] = workers[0].snapshot()
+    assert route["count"] == 10
+    assert route["queries"] == 30
+    assert route["buckets"][metrics.bucket_index(3)] == 10
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+def test_requests_are_recorded_per_route(settings, django_user_model):
+    client = Client()
+    for pk in range(4):
+        assert client.get(f"/items/{pk}/").status_code == 200
+    client.get("/nowhere/")
+
+    staff = django_user_model.objects.create_user(
+        username="ops", email="ops@example.com", password=None, role="admin", is_staff=True
+    )
+    client.force_login(staff)
+    routes = {r["route"]: r for r in client.get("/admin/metrics/").json()["routes"]}
+
+    items = routes["/items/<int:pk>/"]
+    assert items["count"] == 4 and items["errors"] == 0
+    assert items["queries_per_request"] >= 1
+    # per request: 1 miss + 1 hit from get(), 1 hit + 1 miss from get_many()
+    assert items["cache_hit_rate"] == 0.5
+    assert items["p50_ms"] <= items["p99_ms"]
+    assert routes[metrics.UNRESOLVED]["count"] == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+def test_prometheus_endpoint_requires_token(settings):
+    settings.METRICS_TOKEN = "s3cret"
+    client = Client()
+    client.get("/items/1/")
+    assert client.get("/metrics").status_code == 403
+
+    body = client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret").content.decode()
+    labels = 'method="GET",route="/items/<int:pk>/"'
+    assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1' in body
+    assert f"http_request_duration_seconds_count{{{labels}}} 1" in body
+    assert f"http_request_cache_misses_total{{{labels}}} 2" in body
+
+
+def test_flush_runs_off_the_request_path(monkeypatch):
+    registry = metrics.MetricsRegistry()
+    release = threading.Event()
+    pushed = []
+
+    def slow_push(local):
+        release.wait(5)
+        pushed.append(local)
+
+    monkeypatch.setattr(registry, "_push", slow_push)
+    started = time.perf_counter()
+    for _ in range(3):
+        registry.record("GET", "/api/v1/things/", 0.003, 200, metrics.RequestStats())
+    assert time.perf_counter() - started < 1
+    assert pushed == []
+
+    release.set()
+    registry.flush()  # waits for the background flush
+    assert sum(local[("GET", "/api/v1/things/")]["count"] for local in pushed) == 3
@@ -0,0 +1,124 @@
+import json
+import time
+
+import pytest
+from blockchain.simulator import ChainSimulatorProvider
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.test import Client
+from django.urls import path
+from web3 import Web3
+
+from core import profiling
+
+
+def slow_view(request):
+    users = get_user_model().objects.count()
+    chain_id = Web3(ChainSimulatorProvider()).eth.chain_id
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    return JsonResponse({"users": users, "chain_id": chain_id})
+
+
+urlpatterns = [
+    path("slow/", slow_view),
+    path("admin/profiles/", profiling.profiles_admin_view),
+    path("admin/profiles/<str:profile_id>/<str:kind>/", profiling.profile_download_view),
+]
+
+
+@pytest.fixture
+def profiler(settings, tmp_path):
+    settings.PROFILER_ENABLED = True
+    settings.PROFILER_DIR = str(tmp_path)
+    settings.PROFILER_INTERVAL_MS = 1
+    settings.PROFILER_SAMPLE_RATE = 0
+    return tmp_path
+
+
+@pytest.fixture
+def staff(django_user_model):
+    return django_user_model.objects.create_user(
+        username="ops", email="ops@example.com", password=None, role="admin", is_staff=True
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+def test_staff_header_profiles_the_request(profiler, staff):
+    client = Client()
+    client.force_login(staff)
+    response = client.get("/slow/", HTTP_X_PROFILE="1")
+    profile_id = response["X-Profile-Id"]
+
+    collapsed = (profiler / f"{profile_id}.collapsed").read_text().splitlines()
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in collapsed) >= 5
+    assert any("core/tests/test_profiling.py:slow_view" in line for line in collapsed)
+
+    meta = json.loads((profiler / f"{profile_id}.json").read_text())
+    assert meta["reason"] == "header" and meta["user"] == "ops"
+    assert meta["duration_ms"] >= 50
+    assert meta["sql_queries"] >= 1
+    assert any('FROM "users_user"' in q["sql"] for q in meta["sql"])
+    assert {"kind": "rpc", "name": "eth_chainId"} in [
+        {k: c[k] for k in ("kind", "name")} for c in meta["calls"]
+    ]
+
+    page = client.get("/admin/profiles/").content.decode()
+    assert f"{profile_id}/collapsed/" in page
+    download = client.get(f"/admin/profiles/{profile_id}/collapsed/")
+    assert b"slow_view" in b"".join(download.streaming_content)
+    assert client.get("/admin/profiles/..%2Fsecret/json/").status_code == 404
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+def test_header_is_ignored_for_other_users(profiler, django_user_model):
+    client = Client()
+    client.force_login(
+        django_user_model.objects.create_user(
+            username="s", email="s@example.com", password=None, role="student"
+        )
+    )
+    response = client.get("/slow/", HTTP_X_PROFILE="1")
+    assert response.status_code == 200 and "X-Profile-Id" not in response
+    assert list(profiler.iterdir()) == []
+
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+def test_sampled_requests_are_kept_only_when_slow(profiler, settings):
+    settings.PROFILER_SAMPLE_RATE = 1.0
+    settings.PROFILER_SLOW_SECONDS = 10
+    Client().get("/slow/")
+    assert list(profiler.iterdir()) == []
+
+    settings.PROFILER_SLOW_SECONDS = 0.01
+    Client().get("/slow/")
+    [meta] = profiling.list_profiles()
+    assert meta["reason"] == "sampled" and meta["path"] == "/slow/"
+
+
+@pytest.mark.django_db
+def test_header_needs_a_staff_session_or_jwt_before_profiling(staff, django_user_model):
+    from django.test import RequestFactory
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    student = django_user_model.objects.create_user(
+        username="s", email="s@example.com", password=None, role="student"
+    )
+
+    def reason(**headers):
+        return profiling.should_profile(RequestFactory().get("/", HTTP_X_PROFILE="1", **headers))
+
+    assert reason(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(staff)}") == "header"
+    assert reason(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(student)}") == ""
+    assert reason(HTTP_AUTHORIZATION="Bearer not-a-token") == ""
+    assert reason() == ""
+
+    client = Client()
+    client.force_login(staff)
+    request = RequestFactory().get("/", HTTP_X_PROFILE="1")
+    request.COOKIES = {name: cookie.value for name, cookie in client.cookies.items()}
+    assert profiling.should_profile(request) == "header"
@@ -0,0 +1,238 @@
+"""
+Query budgets of the list endpoints.
+
+Each endpoint is served against seeded datasets of growing size: it must
+stay within the query_budget its view declares and run as many queries for
+16 rows as for 4 (see core.query_audit.check_query_budget).
+"""
+
+import logging
+
+import pytest
+from courses.models import Course, Exercise, ExerciseReview, ExerciseSubmission, Lesson
+from courses.views.courses import CourseListCreateView, CourseViewSet
+from courses.views.exercises import (
+    AssignedReviewsView,
+    ExerciseSubmissionsView,
+    ReviewHistoryView,
+    SubmissionHistoryView,
+)
+from courses.views.pending import PendingCoursesView
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import ResolverMatch
+from django.utils import timezone
+from notifications.models import Notification
+from notifications.views import NotificationListView
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.middleware import QueryAuditMiddleware
+from core.query_audit import (
+    QueryAudit,
+    check_query_budget,
+    normalize_sql,
+    query_budget_of,
+)
+
+# 4 rows hold every kind of notification
+SIZES = (4, 16)
+
+
+class Dataset:
+    """Seeds rows on demand, so each size adds to the previous one"""
+
+    def __init__(self, django_user_model):
+        self.users = django_user_model.objects
+        self.rows = 0
+        self.teacher = self.user("teacher", role="teacher", is_approved=True)
+        self.student = self.user("student")
+        self.reviewers = [self.user(f"reviewer{i}") for i in range(3)]
+        self.course = Course.objects.create(
+            title="Base", description="d", teacher=self.teacher, is_approved=True
+        )
+        self.lesson = Lesson.objects.create(
+            title="L", content="x", teacher=self.teacher, course=self.course
+        )
+        self.exercise = Exercise.objects.create(title="E", lesson=self.lesson)
+
+    def user(self, username, role="student", **fields):
+        return self.users.create_user(
+            username=username,
+            email=f"{username}@example.com",
+            password=None,
+            role=role,
+            **fields,
+        )
+
+    def grow(self, make_row):
+        def seed(size):
+            while self.rows < size:
+                make_row(self.rows)
+                self.rows += 1
+
+        return seed
+
+    def course_row(self, i, approved=True):
+        teacher = self.user(f"t{i}", role="teacher", is_approved=True)
+        course = Course.objects.create(
+            title=f"Course {i}", description="d", teacher=teacher, is_approved=approved
+        )
+        for n in range(2):
+            Lesson.objects.create(
+                title=f"L{n}", content="x", teacher=teacher, course=course, duration=10
+            )
+        course.students.add(self.student, *self.reviewers[:2])
+
+    def submission_row(self, i, reviewed=True):
+        exercise = Exercise.objects.create(title=f"E{i}", lesson=self.lesson)
+        submission = ExerciseSubmission.objects.create(
+            exercise=exercise, student=self.student, content="c"
+        )
+        for reviewer in self.reviewers:
+            ExerciseReview.objects.create(
+                submission=submission,
+                reviewer=reviewer,
+                score=8 if reviewed else None,
+                reviewed_at=timezone.now() if reviewed else None,
+            )
+        return submission
+
+    def notification_row(self, i):
+        submission = self.submission_row(i)
+        kind, related_id = [
+            ("exercise_graded", submission.pk),
+            ("lesson_purchased", self.lesson.pk),
+            ("course_approved", self.course.pk),
+            ("teocoins_earned", 10),
+        ][i % 4]
+        Notification.objects.create(
+            user=self.student,
+            message=f"n{i}",
+            notification_type=kind,
+            related_object_id=related_id,
+        )
+
+
+def get(view, user, path="/", **kwargs):
+    def call():
+        request = APIRequestFactory().get(path)
+        force_authenticate(request, user=user)
+        return view(request, **kwargs)
+
+    return call
+
+
+def test_normalized_shapes_ignore_literals():
+    a = normalize_sql("SELECT * FROM t WHERE id = 12 AND name = 'x''y' AND k IN (%s, %s)")
+    b = normalize_sql("SELECT  *  FROM t WHERE id = 7 AND name = 'z' AND k IN (%s)")
+    assert a == b == "SELECT * FROM t WHERE id = ? AND name = ? AND k IN (...)"
+
+
+@pytest.mark.django_db
+def test_audit_groups_repeated_queries_by_call_site(django_user_model):
+    data = Dataset(django_user_model)
+    for i in range(6):
+        data.course_row(i)
+
+    with QueryAudit() as audit:
+        for course in Course.objects.all():
+            course.teacher.username  # one query per course
+
+    [suspect] = audit.repeated()
+    assert suspect.count == 7
+    assert suspect.call_site.startswith("core/tests/test_query_budgets.py:")
+    assert 'FROM "users_user"' in suspect.sql
+    assert audit.count == 8 and "8 queries in 2 groups" in audit.report()
+
+
+@pytest.mark.django_db
+def test_growing_query_count_fails_the_budget(django_user_model):
+    data = Dataset(django_user_model)
+
+    def call():
+        return [c.teacher.username for c in Course.objects.all()]
+
+    with pytest.raises(AssertionError, match="grows with the data") as exc:
+        check_query_budget(call, data.grow(data.course_row), SIZES)
+    assert "test_query_budgets.py" in str(exc.value)
+
+
+@pytest.mark.django_db
+def test_middleware_logs_n_plus_one_requests(settings, django_user_model, caplog):
+    settings.QUERY_AUDIT_ENABLED = True
+    data = Dataset(django_user_model)
+    data.grow(data.course_row)(6)
+
+    def n_plus_one_view(request):
+        [c.teacher.username for c in Course.objects.all()]
+        return HttpResponse()
+
+    n_plus_one_view.query_budget = 3
+    request = RequestFactory().get("/courses/")
+    request.resolver_match = ResolverMatch(n_plus_one_view, (), {})
+    with caplog.at_level(logging.WARNING, logger="api_performance"):
+        QueryAuditMiddleware(n_plus_one_view)(request)
+    assert "QUERY AUDIT GET /courses/ - 8 queries (budget 3)" in caplog.text
+    assert "7x" in caplog.text
+
+
+ENDPOINTS = {
+    "course_list": (
+        CourseListCreateView,
+        lambda data: (get(CourseListCreateView.as_view(), data.student), data.course_row),
+    ),
+    "course_viewset": (
+        CourseViewSet,
+        lambda data: (
+            get(CourseViewSet.as_view({"get": "list"}), data.student),
+            data.course_row,
+        ),
+    ),
+    "pending_courses": (
+        PendingCoursesView,
+        lambda data: (
+            get(PendingCoursesView.as_view(), data.user("admin", role="admin", is_staff=True)),
+            lambda i: data.course_row(i, approved=False),
+        ),
+    ),
+    "exercise_submissions": (
+        ExerciseSubmissionsView,
+        lambda data: (
+            get(ExerciseSubmissionsView.as_view(), data.teacher, exercise_id=data.exercise.pk),
+            lambda i: ExerciseSubmission.objects.filter(
+                pk=data.submission_row(i).pk
+            ).update(exercise=data.exercise),
+        ),
+    ),
+    "submission_history": (
+        SubmissionHistoryView,
+        lambda data: (get(SubmissionHistoryView.as_view(), data.student), data.submission_row),
+    ),
+    "assigned_reviews": (
+        AssignedReviewsView,
+        lambda data: (
+            get(AssignedReviewsView.as_view(), data.reviewers[0]),
+            lambda i: data.submission_row(i, reviewed=False),
+        ),
+    ),
+    "review_history": (
+        ReviewHistoryView,
+        lambda data: (get(ReviewHistoryView.as_view(), data.reviewers[0]), data.submission_row),
+    ),
+    "notifications": (
+        NotificationListView,
+        lambda data: (get(NotificationListView.as_view(), data.student), data.notification_row),
+    ),
+}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", ENDPOINTS)
+def test_endpoint_stays_within_query_budget(name, django_user_model):
+    view_class, setup = ENDPOINTS[name]
+    budget = query_budget_of(view_class)
+    assert budget is not None, f"{view_class.__name__} declares no query_budget"
+
+    data = Dataset(django_user_model)
+    call, make_row = setup(data)
+    check_query_budget(call, data.grow(make_row), SIZES, budget=budget)
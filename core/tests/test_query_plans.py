@@ -0,0 +1,81 @@
+"""
+Query plans of the critical queries (core.query_plans).
+
+The registry runs against a seeded dataset: every critical query must be
+served by an index, and list queries declaring allow_sort=False must not
+sort. Postgres plans are analyzed from canned EXPLAIN output.
+"""
+
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from notifications.models import Notification
+
+from core.query_plans import (
+    CRITICAL_QUERIES,
+    CriticalQuery,
+    check_query,
+    check_query_plans,
+    postgres_plan,
+    seed,
+)
+
+
+@pytest.fixture
+def ids(db):
+    return seed(scale=0.1)
+
+
+def test_critical_queries_use_indexes(ids):
+    reports = check_query_plans(ids)
+    assert len(reports) == len(CRITICAL_QUERIES)
+    failures = {r.query.name: r.problems for r in reports if not r.ok}
+    assert failures == {}, "\n\n".join(
+        r.render() for r in reports if r.query.name in failures
+    )
+
+
+def test_unindexed_filter_and_sort_are_reported(ids):
+    query = CriticalQuery(
+        name="notifications.by_link",
+        run=lambda ids: list(Notification.objects.filter(link="/x/").order_by("message")[:5]),
+        allow_sort=False,
+    )
+    report = check_query(query, ids)
+    assert report.problems == [
+        "full scan of notifications_notification",
+        "sort not served by an index",
+    ]
+
+    query.allow_scan = ("notifications_notification",)
+    query.allow_sort = True
+    assert check_query(query, ids).ok
+
+
+def test_postgres_plan_finds_seq_scans_and_cost():
+    plan = postgres_plan(
+        "SELECT ...",
+        """[{"Plan": {"Node Type": "Limit", "Total Cost": 1523.5, "Plans": [
+            {"Node Type": "Sort", "Total Cost": 1500.0, "Plans": [
+                {"Node Type": "Seq Scan", "Relation Name": "notifications_notification",
+                 "Total Cost": 1200.0}]}]}}]""",
+    )
+    assert plan.full_scans == ["notifications_notification"]
+    assert plan.sorts == 1
+    assert plan.cost == 1523.5
+
+
+def test_command_lists_and_checks(db):
+    out = StringIO()
+    call_command("check_query_plans", "--list", stdout=out)
+    assert "notifications.feed" in out.getvalue()
+
+    out = StringIO()
+    call_command(
+        "check_query_plans", "enrollments.check", "withdrawals.pending", "--scale", "0.05", stdout=out
+    )
+    assert "OK    enrollments.check" in out.getvalue()
+    assert "2 query critiche verificate" in out.getvalue()
+    # Seed data rolled back
+    assert not Notification.objects.exists()
@@ -0,0 +1,66 @@
+import json
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from core.slow_queries import SlowQueryLog, params_shape, read_records
+
+
+@pytest.fixture
+def slow_log(settings, tmp_path):
+    settings.SLOW_QUERY_THRESHOLD_MS = 0
+    settings.SLOW_QUERY_LOG_FILE = str(tmp_path / "slow.jsonl")
+    settings.SLOW_QUERY_LOG_MAX_BYTES = 4000
+    settings.SLOW_QUERY_LOG_BACKUPS = 3
+    log = SlowQueryLog()
+    log.install()
+    yield log
+    log.uninstall()
+
+
+def lookup_users(n):
+    User = get_user_model()
+    for i in range(n):
+        User.objects.filter(username=f"user{i}").exists()
+
+
+def test_params_shape_hides_values():
+    assert params_shape(("secret", 42, [1, 2, 3], None)) == ["str[6]", "int", "list[3]", "NoneType"]
+    assert params_shape([("a", 1), ("b", 2)], many=True) == {"rows": 2, "row": ["str[1]", "int"]}
+
+
+@pytest.mark.django_db
+def test_slow_statements_are_logged_with_call_site(slow_log, settings):
+    lookup_users(3)
+    slow_log.flush()
+
+    records = [r for r in read_records() if 'FROM "users_user"' in r["shape"]]
+    assert len(records) == 3
+    record = records[0]
+    assert record["call_site"].startswith("core/tests/test_slow_queries.py:")
+    assert record["call_site"].endswith("in lookup_users")
+    assert record["params"] == ["int", "str[5]"]
+    assert "user0" not in json.dumps(record["params"])
+    assert record["vendor"] == "sqlite" and record["explain"] is None
+    # Literal-free shape shared by every lookup
+    assert len({r["shape"] for r in records}) == 1
+
+
+@pytest.mark.django_db
+def test_log_rotates_and_summary_ranks_call_sites(slow_log, settings, tmp_path):
+    lookup_users(40)
+    get_user_model().objects.count()
+    slow_log.flush()
+
+    assert (tmp_path / "slow.jsonl.1").exists()
+    records = read_records()
+    assert sum("in lookup_users" in r["call_site"] for r in records) > 3
+
+    out = StringIO()
+    call_command("slow_queries", "--top", "2", stdout=out)
+    lines = out.getvalue().splitlines()
+    assert f"{len(records)} query lente" in lines[0]
+    assert "in lookup_users" in lines[1]
+    assert "totale" in lines[1] and "max" in lines[1]
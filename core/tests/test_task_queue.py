@@ -0,0 +1,43 @@
+import pytest
+from django.core import mail
+from kombu.exceptions import OperationalError
+from notifications.tasks import send_email
+from schoolplatform.celery import app
+
+from core.task_queue import QUEUES, enqueue, enqueue_on_commit, runtime_mode
+
+
+def test_tasks_declare_a_queue_and_time_limits():
+    app.loader.import_default_modules()
+    tasks = [
+        task
+        for name, task in app.tasks.items()
+        if name.split(".")[0] in ("core", "blockchain", "notifications")
+    ]
+    assert {"blockchain.tasks.settle_withdrawals", "notifications.tasks.send_email"} <= {
+        task.name for task in tasks
+    }
+    for task in tasks:
+        assert task.queue in QUEUES, task.name
+        assert task.soft_time_limit < task.time_limit, task.name
+
+
+@pytest.mark.django_db
+def test_enqueue_on_commit_waits_for_the_transaction(django_capture_on_commit_callbacks):
+    assert runtime_mode() == "eager"
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        enqueue_on_commit(send_email, subject="Hi", message="Body", recipient_list=["t@example.com"])
+        assert mail.outbox == []
+
+    assert len(callbacks) == 1
+    assert [m.subject for m in mail.outbox] == ["Hi"]
+
+
+def test_enqueue_runs_inline_when_the_broker_is_down(monkeypatch):
+    def broker_down(*args, **kwargs):
+        raise OperationalError("connection refused")
+
+    monkeypatch.setattr(send_email, "apply_async", broker_down)
+    result = enqueue(send_email, subject="Down", message="-", recipient_list=["t@example.com"])
+    assert result.successful()
+    assert [m.subject for m in mail.outbox] == ["Down"]
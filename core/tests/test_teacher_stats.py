@@ -0,0 +1,124 @@
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from courses.models import Course, CourseEnrollment, Exercise, Lesson
+from services.teacher_stats_service import teacher_stats_service
+from users.models import TeacherProfile
+
+
+def _make_catalog(django_user_model, n_courses, n_students=3):
+    teacher = django_user_model.objects.create_user(
+        username="teacher", email="teacher@example.com", password="p", role="teacher"
+    )
+    students = [
+        django_user_model.objects.create_user(
+            username=f"s{i}", email=f"s{i}@example.com", password="p", role="student"
+        )
+        for i in range(n_students)
+    ]
+    for c in range(n_courses):
+        course = Course.objects.create(
+            title=f"C{c}",
+            description="d",
+            teacher=teacher,
+            price_eur=Decimal("10.00"),
+            is_approved=c % 2 == 0,
+        )
+        lesson = Lesson.objects.create(title=f"L{c}", content="x" * 150, teacher=teacher, course=course)
+        course.lessons.add(lesson)
+        Exercise.objects.create(title="E", lesson=lesson)
+        for student in students:
+            CourseEnrollment.objects.create(student=student, course=course)
+    return teacher, students
+
+
+@pytest.mark.django_db
+def test_aggregate_counts_distinct_students_and_statuses(django_user_model):
+    teacher, _ = _make_catalog(django_user_model, n_courses=3)
+
+    stats = teacher_stats_service.aggregate_course_stats(teacher)
+
+    assert stats["total_courses"] == 3
+    assert stats["published_courses"] == 2
+    assert stats["draft_courses"] == 1
+    # the same 3 students are enrolled in every course
+    assert stats["total_students"] == 3
+    assert stats["total_earnings"] == Decimal("81.00")
+
+
+@pytest.mark.django_db
+def test_counters_follow_enrollment_events(django_user_model):
+    teacher, students = _make_catalog(django_user_model, n_courses=1)
+    teacher_stats_service.rebuild_counters(teacher)
+
+    course = Course.objects.create(title="New", description="d", teacher=teacher, price_eur=Decimal("20.00"))
+    enrollment = CourseEnrollment.objects.create(student=students[0], course=course)
+
+    profile = TeacherProfile.objects.get(user=teacher)
+    assert profile.total_courses == 2
+    assert profile.total_earnings == Decimal("45.00")
+
+    enrollment.delete()
+    course.students.add(students[1], students[2])
+    profile.refresh_from_db()
+    assert profile.total_earnings == Decimal("63.00")
+
+    course.students.remove(students[1])
+    profile.refresh_from_db()
+    assert profile.total_earnings == Decimal("45.00")
+    assert profile.total_earnings == teacher_stats_service.aggregate_course_stats(teacher)["total_earnings"]
+
+
+@pytest.mark.django_db
+def test_dashboard_stats_come_from_counters_kept_by_events(django_user_model, django_assert_num_queries):
+    teacher, students = _make_catalog(django_user_model, n_courses=2)
+    teacher_stats_service.rebuild_counters(teacher)
+
+    course = Course.objects.create(title="New", description="d", teacher=teacher, price_eur=Decimal("20.00"))
+    outsider = django_user_model.objects.create_user(
+        username="new", email="new@example.com", password="p", role="student"
+    )
+    course.students.add(students[0])
+    outsider.core_students.add(course, Course.objects.get(title="C1"))
+    course.is_approved = True
+    course.save()
+
+    with django_assert_num_queries(1):
+        stats = teacher_stats_service.get_dashboard_stats(teacher)
+    assert stats["published_courses"] == 2 and stats["draft_courses"] == 1
+    assert teacher_stats_service.verify(teacher) == {}
+
+    CourseEnrollment.objects.filter(student=students[0]).delete()
+    Course.objects.get(title="C0").delete()
+    assert teacher_stats_service.verify(teacher) == {}
+
+    TeacherProfile.objects.filter(user=teacher).update(total_students=0)
+    assert set(teacher_stats_service.verify(teacher)) == {"total_students"}
+    call_command("rebuild_teacher_stats", user=[teacher.pk])
+    assert teacher_stats_service.verify(teacher) == {}
+
+
+@pytest.mark.django_db
+def test_dashboard_query_count_does_not_grow_with_courses(django_user_model):
+    def dashboard_queries(n_courses):
+        django_user_model.objects.all().delete()
+        cache.clear()
+        teacher, _ = _make_catalog(django_user_model, n_courses=n_courses)
+        client = APIClient()
+        client.force_authenticate(teacher)
+        client.get("/api/v1/dashboard/teacher/")  # first read syncs the counters
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get("/api/v1/dashboard/teacher/")
+        assert response.status_code == 200
+        assert response.data["stats"]["total_courses"] == n_courses
+        assert all(c["lessons"][0]["exercises_count"] == 1 for c in response.data["courses"])
+        return len(ctx.captured_queries)
+
+    assert dashboard_queries(1) == dashboard_queries(6)
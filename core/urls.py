@@ -11,13 +11,19 @@ URL Patterns:
     /health/ - Platform health check endpoint
     /dashboard/ - Dashboard APIs for student, teacher, and admin
     /api/ - Batch data APIs for optimized frontend data loading
+    /batch/ - Generic batch endpoint running many API requests in one call
 """
 
 from django.urls import include, path
 
 from .analytics import analytics_dashboard, public_stats, revenue_chart_data
 from .api import dashboard_data
-from .batch_api import CourseBatchDataAPI, LessonBatchDataAPI, StudentBatchDataAPI
+from .batch_api import (
+    CourseBatchDataAPI,
+    LessonBatchDataAPI,
+    MultiplexBatchAPI,
+    StudentBatchDataAPI,
+)
 
 # Import views
 from .dashboard import (
@@ -72,6 +78,7 @@ urlpatterns = [
         LessonBatchDataAPI.as_view(),
         name="lesson-batch-data",
     ),
+    path("batch/", MultiplexBatchAPI.as_view(), name="batch"),
     # ============================================
     # INTEGRATED APPS
     # ============================================
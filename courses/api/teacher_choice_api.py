@@ -26,6 +26,7 @@ from rest_framework.response import Response
 from users.permissions import IsTeacher
 from decimal import Decimal
 from rewards.models import PaymentDiscountSnapshot, BlockchainTransaction, TokenBalance
+from services.idempotency import idempotent
 from services.reward_service import reward_service
 
 
@@ -141,6 +142,7 @@ class TeacherChoiceViewSet(viewsets.ModelViewSet):
         )
 
     @action(detail=True, methods=["post"])
+    @idempotent("teacher_choice_accept", key=lambda view, request, pk=None: pk)
     def accept(self, request, pk=None):
         """Accept a TeoCoin discount request"""
         try:
@@ -155,7 +157,8 @@ class TeacherChoiceViewSet(viewsets.ModelViewSet):
                     )
 
             if decision.decision == "accepted":
-                # Already accepted: best-effort backfill snapshot/ledger to ensure consistency
+                # Accepted before the idempotency registry existed (retries of
+                # newer accepts are replayed by @idempotent): best-effort backfill snapshot/ledger to ensure consistency
                 try:
                     from decimal import Decimal, ROUND_DOWN
 
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0014_fix_teo_decimal_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseenrollment',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, help_text='Last lesson completion in this course', null=True),
+        ),
+        migrations.AddField(
+            model_name='courseenrollment',
+            name='lessons_completed',
+            field=models.PositiveIntegerField(default=0, help_text='Lessons of this course completed by the student'),
+        ),
+    ]
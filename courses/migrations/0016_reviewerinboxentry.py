@@ -0,0 +1,68 @@
+# Generated by Django 5.2.5 on 2026-10-19 09:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+SOURCE_FIELDS = {
+    "review_id": "id",
+    "reviewer_id": "reviewer_id",
+    "assigned_at": "assigned_at",
+    "completed_at": "reviewed_at",
+    "submission_id": "submission_id",
+    "submitted_at": "submission__created_at",
+    "exercise_id": "submission__exercise_id",
+    "exercise_title": "submission__exercise__title",
+    "lesson_id": "submission__exercise__lesson_id",
+    "course_id": "submission__exercise__lesson__course_id",
+    "student_id": "submission__student_id",
+    "student_username": "submission__student__username",
+}
+
+
+def fill_inbox(apps, schema_editor):
+    ExerciseReview = apps.get_model("courses", "ExerciseReview")
+    ReviewerInboxEntry = apps.get_model("courses", "ReviewerInboxEntry")
+
+    entries = []
+    rows = ExerciseReview.objects.values("score", *SOURCE_FIELDS.values())
+    for row in rows.iterator(chunk_size=1000):
+        values = {field: row[source] for field, source in SOURCE_FIELDS.items()}
+        if row["score"] is None:
+            values["completed_at"] = None
+        elif values["completed_at"] is None:
+            values["completed_at"] = values["assigned_at"]
+        entries.append(ReviewerInboxEntry(**values))
+    ReviewerInboxEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_courseenrollment_last_activity_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewerInboxEntry',
+            fields=[
+                ('review', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='inbox_entry', serialize=False, to='courses.exercisereview')),
+                ('assigned_at', models.DateTimeField()),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('submission_id', models.PositiveIntegerField()),
+                ('submitted_at', models.DateTimeField()),
+                ('exercise_id', models.PositiveIntegerField()),
+                ('exercise_title', models.CharField(max_length=255)),
+                ('lesson_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('course_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('student_id', models.PositiveIntegerField()),
+                ('student_username', models.CharField(max_length=150)),
+                ('reviewer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('completed_at__isnull', True)), fields=['reviewer', 'assigned_at', 'review'], name='reviewer_inbox_pending_idx')],
+            },
+        ),
+        migrations.RunPython(fill_inbox, migrations.RunPython.noop),
+    ]
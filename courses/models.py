@@ -522,6 +522,14 @@ class CourseEnrollment(models.Model):
         null=True, blank=True, help_text="Date when course was completed"
     )
 
+    # PROGRESS TRACKING (maintained by services/signals.py)
+    lessons_completed = models.PositiveIntegerField(
+        default=0, help_text="Lessons of this course completed by the student"
+    )
+    last_activity_at = models.DateTimeField(
+        null=True, blank=True, help_text="Last lesson completion in this course"
+    )
+
     class Meta:
         unique_together = ("student", "course")
 
@@ -593,29 +601,50 @@ class ExerciseReview(models.Model):
     # recommendations field removed as part of cleanup
     reviewed_at = models.DateTimeField(null=True, blank=True)
 
+    @staticmethod
+    def score_aggregate(submission_id):
+        """
+        Review counts and averages of a submission in one aggregate query.
+
+        `average` is on the 1-10 scale kept by submission.average_score: reviews
+        with the 3-field breakdown (1-5) count as their mean * 2, legacy
+        reviews with only `score` are already 1-10. `score_average` is the plain
+        mean of `score`, used for the pass/fail rule.
+        """
+        breakdown = models.Q(
+            technical__isnull=False, creative__isnull=False, following__isnull=False
+        )
+        normalized = models.Case(
+            models.When(
+                breakdown,
+                then=(
+                    models.F("technical") + models.F("creative") + models.F("following")
+                )
+                * 2.0
+                / 3.0,
+            ),
+            default=models.F("score"),
+            output_field=models.FloatField(),
+        )
+        return ExerciseReview.objects.filter(submission_id=submission_id).aggregate(
+            total=models.Count("id"),
+            completed=models.Count("id", filter=models.Q(score__isnull=False)),
+            average=models.Avg(normalized),
+            score_average=models.Avg("score"),
+        )
+
     @staticmethod
     def calculate_average_score(submission):
-        reviews = submission.reviews.all()
-        if reviews.exists():
-            # We keep submission.average_score in the 1-10 scale for backward
-            # compatibility. For reviews that provide a 3-field breakdown (1-5)
-            # we convert to 1-10 by multiplying the mean by 2. Legacy reviews that
-            # only have `score` are assumed to already be 1-10.
-            vals = []
-            for r in reviews:
-                if r.technical is not None and r.creative is not None and r.following is not None:
-                    mean_1_5 = (r.technical + r.creative + r.following) / 3.0
-                    vals.append(mean_1_5 * 2.0)
-                elif r.score is not None:
-                    vals.append(float(r.score))
-            average = sum(vals) / len(vals) if vals else None
-            submission.average_score = average
-            # Approvato solo se almeno 3 review e media (1-10) >= 5 (equiv. 2.5 on 1-5)
-            if reviews.count() >= 3:
-                submission.is_approved = (average is not None and average >= 5)
-            submission.save()
-            return submission.is_approved if reviews.count() >= 3 else None
-        return None
+        stats = ExerciseReview.score_aggregate(submission.pk)
+        if not stats["total"]:
+            return None
+        average = stats["average"]
+        submission.average_score = average
+        # Approvato solo se almeno 3 review e media (1-10) >= 5 (equiv. 2.5 on 1-5)
+        if stats["total"] >= 3:
+            submission.is_approved = average is not None and average >= 5
+        submission.save()
+        return submission.is_approved if stats["total"] >= 3 else None
 
     @staticmethod
     def reward_reviewer(review):
@@ -660,6 +689,86 @@ class ExerciseReview(models.Model):
             )
 
 
+class ReviewerInboxEntry(models.Model):
+    """
+    Reviewer inbox read model: one row per ExerciseReview carrying the
+    submission, exercise, lesson, course and student fields shown by
+    AssignedReviewsView, so the inbox is served from this table alone.
+
+    Rows are written by the ExerciseReview handlers in services/signals.py
+    when a review is assigned, completed or rotated (deleted and re-assigned).
+    Renamed or moved exercises, moved lessons and username changes are copied
+    into open rows only; completed rows keep the values they were closed with.
+    """
+
+    review = models.OneToOneField(
+        ExerciseReview,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="inbox_entry",
+    )
+    reviewer = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    assigned_at = models.DateTimeField()
+    # Null while the review is pending (ExerciseReview.score IS NULL)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    submission_id = models.PositiveIntegerField()
+    submitted_at = models.DateTimeField()
+    exercise_id = models.PositiveIntegerField()
+    exercise_title = models.CharField(max_length=255)
+    lesson_id = models.PositiveIntegerField(null=True, blank=True)
+    course_id = models.PositiveIntegerField(null=True, blank=True)
+    student_id = models.PositiveIntegerField()
+    student_username = models.CharField(max_length=150)
+
+    SOURCE_FIELDS = {
+        "review_id": "id",
+        "reviewer_id": "reviewer_id",
+        "assigned_at": "assigned_at",
+        "completed_at": "reviewed_at",
+        "submission_id": "submission_id",
+        "submitted_at": "submission__created_at",
+        "exercise_id": "submission__exercise_id",
+        "exercise_title": "submission__exercise__title",
+        "lesson_id": "submission__exercise__lesson_id",
+        "course_id": "submission__exercise__lesson__course_id",
+        "student_id": "submission__student_id",
+        "student_username": "submission__student__username",
+    }
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["reviewer", "assigned_at", "review"],
+                condition=models.Q(completed_at__isnull=True),
+                name="reviewer_inbox_pending_idx",
+            )
+        ]
+
+    @classmethod
+    def sync(cls, reviews):
+        """
+        Upsert the inbox rows of the `reviews` queryset: one joined SELECT and
+        one INSERT ... ON CONFLICT, whatever the number of reviews.
+        """
+        entries = []
+        for row in reviews.values("score", *cls.SOURCE_FIELDS.values()):
+            values = {field: row[source] for field, source in cls.SOURCE_FIELDS.items()}
+            if row["score"] is None:
+                values["completed_at"] = None
+            elif values["completed_at"] is None:
+                # legacy reviews scored without a reviewed_at timestamp
+                values["completed_at"] = values["assigned_at"]
+            entries.append(cls(**values))
+        return cls.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=["review"],
+            update_fields=[f for f in cls.SOURCE_FIELDS if f != "review_id"],
+        )
+
+
 class PeerReviewFeedbackItem(models.Model):
     AREA_CHOICES = [
         ("highlights", "Highlight Strengths"),
@@ -1,3 +1,4 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from users.serializers import UserSerializer
 
@@ -5,8 +6,10 @@ from .models import (
     Course,
     CourseEnrollment,
     Exercise,
+    ExerciseReview,
     ExerciseSubmission,
     Lesson,
+    ReviewerInboxEntry,
     TeacherChoicePreference,
     TeacherDiscountDecision,
     PeerReviewFeedbackItem,
@@ -106,11 +109,45 @@ class ExerciseSubmissionSerializer(serializers.ModelSerializer):
     def get_text(self, obj):
         return obj.content
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Preload everything get_reviews() and the other fields read.
+
+        Completed reviews come with their reviewer (JOIN) and feedback items
+        (one extra query for the whole page), so serializing any number of
+        submissions costs a fixed number of queries.
+        """
+        completed_reviews = (
+            ExerciseReview.objects.filter(reviewed_at__isnull=False)
+            .select_related("reviewer")
+            .prefetch_related("feedback_items")
+            .order_by("reviewed_at")
+        )
+        return queryset.select_related("exercise", "student").prefetch_related(
+            Prefetch("reviews", queryset=completed_reviews, to_attr="completed_reviews")
+        )
+
+    @staticmethod
+    def _feedback_by_area(review):
+        """Map area -> content of the newest feedback item of the review"""
+        by_area = {}
+        # served from the prefetch cache when loaded via setup_eager_loading()
+        for it in review.feedback_items.all():  # newest first (Meta.ordering)
+            by_area.setdefault(it.area, it.content)
+        return by_area
+
     def get_reviews(self, obj):
         result = []
         # Keep ordering stable (by reviewed_at). Only include completed reviews
         # so the frontend does not receive empty/unreviewed entries.
-        reviews_qs = obj.reviews.filter(reviewed_at__isnull=False).order_by("reviewed_at")
+        reviews_qs = getattr(obj, "completed_reviews", None)
+        if reviews_qs is None:
+            reviews_qs = (
+                obj.reviews.filter(reviewed_at__isnull=False)
+                .select_related("reviewer")
+                .order_by("reviewed_at")
+            )
 
         def _norm_score(v):
             try:
@@ -149,19 +186,12 @@ class ExerciseSubmissionSerializer(serializers.ModelSerializer):
             suggestions = getattr(r, "suggestions_comment", None)
             final = getattr(r, "final_comment", None)
 
-            # Try to load PeerReviewFeedbackItem entries linked to this review
+            # Fall back to the PeerReviewFeedbackItem entries linked to this review
             try:
-                # import locally to avoid circular imports at module load
-                from courses.models import PeerReviewFeedbackItem
-
-                items = PeerReviewFeedbackItem.objects.filter(review=r)
-                for it in items:
-                    if it.area == 'highlights' and not strengths:
-                        strengths = it.content
-                    if it.area == 'suggestions' and not suggestions:
-                        suggestions = it.content
-                    if it.area == 'final' and not final:
-                        final = it.content
+                items = self._feedback_by_area(r)
+                strengths = strengths or items.get("highlights")
+                suggestions = suggestions or items.get("suggestions")
+                final = final or items.get("final")
             except Exception:
                 # If anything fails, leave narrative fields as they are (prefer empty over parsing blob)
                 pass
@@ -210,6 +240,37 @@ class PeerReviewFeedbackItemSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class ReviewerInboxEntrySerializer(serializers.ModelSerializer):
+    """Pending review as listed by AssignedReviewsView (legacy payload keys)"""
+
+    pk = serializers.IntegerField(source="review_id", read_only=True)
+    submission_pk = serializers.IntegerField(source="submission_id", read_only=True)
+    student = serializers.SerializerMethodField()
+    status = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReviewerInboxEntry
+        fields = [
+            "pk",
+            "submission_id",
+            "submission_pk",
+            "exercise_id",
+            "exercise_title",
+            "assigned_at",
+            "student",
+            "course_id",
+            "lesson_id",
+            "submitted_at",
+            "status",
+        ]
+
+    def get_student(self, obj):
+        return {"id": obj.student_id, "name": obj.student_username}
+
+    def get_status(self, obj):
+        return "reviewed" if obj.completed_at else "pending"
+
+
 class TeacherLessonSerializer(serializers.ModelSerializer):
     total_students = serializers.SerializerMethodField()
     total_earnings = serializers.SerializerMethodField()
@@ -258,16 +319,23 @@ class TeacherCourseSerializer(serializers.ModelSerializer):
             "lessons",
         ]
 
+    def _student_count(self, obj):
+        # Prefer the `student_count` annotation (see TeacherStatsService)
+        count = getattr(obj, "student_count", None)
+        if count is None:
+            count = obj.students.count()
+        return count
+
     def get_total_earnings(self, obj):
         from decimal import Decimal
 
-        return str(obj.price_eur * obj.students.count() * Decimal("0.9"))
+        return str(obj.price_eur * self._student_count(obj) * Decimal("0.9"))
 
     def get_total_students(self, obj):
-        return obj.students.count()
+        return self._student_count(obj)
 
     def get_enrolled_students(self, obj):
-        return obj.students.count()
+        return self._student_count(obj)
 
     def get_cover_image_url(self, obj):
         if obj.cover_image:
@@ -278,29 +346,44 @@ class TeacherCourseSerializer(serializers.ModelSerializer):
 
     def get_lessons(self, obj):
         # Restituisce le lezioni del corso con informazioni di base
-        lessons = obj.lessons.all().order_by("order", "created_at")
+        if "lessons" in getattr(obj, "_prefetched_objects_cache", {}):
+            # already ordered and annotated by the prefetch queryset
+            lessons = obj.lessons.all()
+        else:
+            lessons = obj.lessons.all().order_by("order", "created_at")
         lesson_data = []
         for lesson in lessons:
             lesson_data.append(
                 {
                     "id": lesson.id,
                     "title": lesson.title,
-                    "description": (
-                        lesson.content[:100] + "..."
-                        if lesson.content and len(lesson.content) > 100
-                        else lesson.content
-                    ),
+                    "description": self._lesson_preview(lesson),
                     "duration": lesson.duration,
                     "order": lesson.order,
                     "lesson_type": lesson.lesson_type,
                     "created_at": lesson.created_at,
-                    "exercises_count": lesson.exercises.count(),
+                    "exercises_count": (
+                        lesson.exercises_total
+                        if hasattr(lesson, "exercises_total")
+                        else lesson.exercises.count()
+                    ),
                     "course_id": obj.id,  # Aggiungiamo esplicitamente il course_id
                     "course": obj.id,  # Per compatibilità
                 }
             )
         return lesson_data
 
+    @staticmethod
+    def _lesson_preview(lesson):
+        # Prefer the SQL-truncated `content_preview` (see TeacherStatsService)
+        if hasattr(lesson, "content_preview"):
+            preview, length = lesson.content_preview, lesson.content_length
+        else:
+            preview, length = lesson.content, len(lesson.content or "")
+        if preview and length > 100:
+            return preview[:100] + "..."
+        return preview
+
     # Provide compatibility fields expected by frontend
     published = serializers.BooleanField(source="is_approved", read_only=True)
     status = serializers.SerializerMethodField()
@@ -454,6 +537,14 @@ class CourseSerializer(serializers.ModelSerializer):
         read_only_fields = ["teacher", "students"]
         extra_kwargs = {"lessons": {"read_only": True}}
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Preload the teacher, lessons and students every course is serialized
+        with, so listing any number of courses costs a fixed number of queries.
+        """
+        return queryset.select_related("teacher").prefetch_related("students", "lessons")
+
     def get_teocoin_price(self, obj):
         return obj.get_teocoin_price() if hasattr(obj, "get_teocoin_price") else None
 
@@ -464,6 +555,9 @@ class CourseSerializer(serializers.ModelSerializer):
 
     def get_is_enrolled(self, obj):
         user = self.context["request"].user
+        if "students" in getattr(obj, "_prefetched_objects_cache", {}):
+            # served from the prefetch cache when loaded via setup_eager_loading()
+            return any(student.pk == user.pk for student in obj.students.all())
         return obj.students.filter(pk=user.pk).exists()
 
     def get_student_count(self, obj):
@@ -0,0 +1,68 @@
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from courses.models import Course, CourseEnrollment
+from courses.views.payments import ConfirmPaymentAsyncView, CreatePaymentIntentAsyncView
+
+User = get_user_model()
+
+
+@pytest.fixture
+def course(db, settings):
+    settings.STRIPE_SECRET_KEY = "sk_test_" + "x" * 24
+    teacher = User.objects.create_user(username='t1', email='t1@example.com', password='pass', role='teacher')
+    return Course.objects.create(title='C1', price_eur=Decimal('80.00'), teacher=teacher)
+
+
+@pytest.fixture
+def student(db):
+    return User.objects.create_user(username='s1', email='s1@example.com', password='pass', role='student')
+
+
+def post(view_class, path, data, user, course_id):
+    request = APIRequestFactory().post(path, data, format='json')
+    force_authenticate(request, user=user)
+    return async_to_sync(view_class.as_view())(request, course_id=course_id)
+
+
+def test_create_intent_with_async_stripe_client(course, student):
+    intent = SimpleNamespace(id='pi_async_1', client_secret='secret_1')
+    with mock.patch('stripe.PaymentIntent.create_async', return_value=intent) as create:
+        response = post(CreatePaymentIntentAsyncView, '/create-payment-intent/', {}, student, course.id)
+
+    assert response.status_code == 201
+    assert response.data['payment_intent_id'] == 'pi_async_1'
+    assert response.data['course'] == {'title': 'C1', 'instructor': 't1'}
+    assert create.call_args.kwargs['amount'] == 8000
+
+
+def test_stripe_errors_are_reported(course, student):
+    with mock.patch('stripe.PaymentIntent.create_async', side_effect=RuntimeError('down')):
+        response = post(CreatePaymentIntentAsyncView, '/create-payment-intent/', {}, student, course.id)
+
+    assert response.status_code == 500
+    assert response.data['code'] == 'STRIPE_API_ERROR'
+
+
+def test_confirm_payment_enrolls_student(course, student):
+    intent = SimpleNamespace(
+        id='pi_async_2',
+        status='succeeded',
+        metadata={'original_price': '80.00', 'discount_amount': '0', 'use_teocoin_discount': 'False'},
+    )
+    with mock.patch('stripe.PaymentIntent.retrieve_async', return_value=intent) as retrieve:
+        response = post(
+            ConfirmPaymentAsyncView, '/confirm-payment/', {'payment_intent_id': 'pi_async_2'}, student, course.id
+        )
+
+    retrieve.assert_called_once_with('pi_async_2')
+    assert response.status_code == 200, response.data
+    enrollment = CourseEnrollment.objects.get(student=student, course=course)
+    assert enrollment.stripe_payment_intent_id == 'pi_async_2'
+    assert enrollment.amount_paid_eur == Decimal('80.00')
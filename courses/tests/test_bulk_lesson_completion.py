@@ -0,0 +1,171 @@
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from blockchain.models import DBTeoCoinTransaction
+from courses.models import Course, CourseEnrollment, Lesson, LessonCompletion
+from courses.views.lessons import BulkLessonCompleteView, MarkLessonCompleteView
+from rewards.automation import reward_system
+from services.progress_service import progress_service
+from users.models import UserProgress
+
+
+def _post(user, lesson_ids):
+    request = APIRequestFactory().post(
+        "/api/v1/lessons/complete/", {"lesson_ids": lesson_ids}, format="json"
+    )
+    force_authenticate(request, user=user)
+    return BulkLessonCompleteView.as_view()(request)
+
+
+@pytest.fixture
+def catalog(django_user_model):
+    teacher = django_user_model.objects.create_user(
+        username="teacher", email="teacher@example.com", password="p", role="teacher"
+    )
+    student = django_user_model.objects.create_user(
+        username="student", email="student@example.com", password="p", role="student"
+    )
+    courses = []
+    for c in range(2):
+        course = Course.objects.create(
+            title=f"C{c}", description="d", teacher=teacher, price_eur=Decimal("100.00")
+        )
+        Lesson.objects.bulk_create(
+            Lesson(title=f"L{c}{i}", content="x", teacher=teacher, course=course, order=i)
+            for i in range(3)
+        )
+        courses.append(course)
+    return student, courses
+
+
+@pytest.mark.django_db
+def test_bulk_completion_completes_course_once(catalog):
+    student, (course, other) = catalog
+    CourseEnrollment.objects.create(student=student, course=course)
+    progress_service.get_progress(student)
+    lesson_ids = list(course.lessons_in_course.values_list("id", flat=True))
+    LessonCompletion.objects.create(student=student, lesson_id=lesson_ids[0])
+    foreign = other.lessons_in_course.first().pk
+
+    response = _post(student, lesson_ids + [lesson_ids[1], foreign, 999999])
+
+    assert response.status_code == 200
+    assert sorted(response.data["completed"]) == lesson_ids[1:]
+    assert response.data["already_completed"] == [lesson_ids[0]]
+    assert {r["reason"] for r in response.data["rejected"]} == {
+        "not_enrolled",
+        "not_found",
+    }
+    [summary] = response.data["courses"]
+    assert summary["course_completed"] is True
+    assert summary["completion_bonus"] == 10
+
+    enrollment = CourseEnrollment.objects.get(student=student, course=course)
+    assert enrollment.completed and enrollment.lessons_completed == 3
+    assert progress_service.verify(student) == {}
+    assert UserProgress.objects.get(user=student).total_courses_completed == 1
+    assert DBTeoCoinTransaction.objects.filter(user=student, course=course).count() == 2
+
+    # replaying the same batch is a no-op
+    replay = _post(student, lesson_ids)
+    assert replay.data["completed"] == []
+    assert replay.data["courses"] == []
+    assert DBTeoCoinTransaction.objects.filter(user=student, course=course).count() == 2
+
+
+@pytest.mark.django_db
+def test_bulk_completion_validates_payload(catalog):
+    student, _ = catalog
+    assert _post(student, []).status_code == 400
+    assert _post(student, ["abc"]).status_code == 400
+    assert _post(student, list(range(1, 300))).status_code == 400
+
+
+@pytest.mark.django_db
+def test_single_completions_pay_like_a_batch(catalog):
+    student, (course, other) = catalog
+    for c in (course, other):
+        CourseEnrollment.objects.create(student=student, course=c)
+    progress_service.get_progress(student)
+
+    for lesson in course.lessons_in_course.all():
+        LessonCompletion.objects.create(student=student, lesson=lesson)
+        assert reward_system.reward_lesson_completion(student, lesson, course)
+    assert reward_system.check_and_reward_course_completion(student, course)
+    _post(student, list(other.lessons_in_course.values_list("id", flat=True)))
+
+    def paid(c):
+        return sorted(
+            DBTeoCoinTransaction.objects.filter(user=student, course=c).values_list(
+                "transaction_type", "amount"
+            )
+        )
+
+    single = paid(course)
+    assert sum(amount for _, amount in single) == sum(amount for _, amount in paid(other))
+    assert ("bonus", Decimal("10.00")) in single
+    course.refresh_from_db()
+    other.refresh_from_db()
+    assert course.reward_distributed == other.reward_distributed
+
+
+@pytest.mark.django_db
+def test_single_lesson_view_completes_through_the_batch(catalog):
+    student, (course, _) = catalog
+    CourseEnrollment.objects.create(student=student, course=course)
+    progress_service.get_progress(student)
+
+    for lesson_id in course.lessons_in_course.values_list("id", flat=True):
+        request = APIRequestFactory().post(f"/lessons/{lesson_id}/mark_complete/")
+        force_authenticate(request, user=student)
+        response = MarkLessonCompleteView.as_view()(request, lesson_id=lesson_id)
+        assert response.status_code == 200
+
+    enrollment = CourseEnrollment.objects.get(student=student, course=course)
+    assert enrollment.completed and enrollment.lessons_completed == 3
+    assert progress_service.verify(student) == {}
+    assert ("bonus", Decimal("10.00")) in DBTeoCoinTransaction.objects.filter(
+        user=student, course=course
+    ).values_list("transaction_type", "amount")
+
+
+@pytest.mark.django_db
+def test_single_lesson_view_reports_service_errors(catalog, monkeypatch):
+    student, (course, _) = catalog
+    CourseEnrollment.objects.create(student=student, course=course)
+
+    def ledger_down(*args, **kwargs):
+        raise RuntimeError("ledger unavailable")
+
+    monkeypatch.setattr(reward_system, "reward_lesson_batch", ledger_down)
+    lesson_id = course.lessons_in_course.first().pk
+    request = APIRequestFactory().post(f"/lessons/{lesson_id}/mark_complete/")
+    force_authenticate(request, user=student)
+    response = MarkLessonCompleteView.as_view()(request, lesson_id=lesson_id)
+
+    assert response.status_code == 500
+    assert "ledger unavailable" in response.data["error"]
+
+
+@pytest.mark.django_db
+def test_completions_invalidate_the_student_dashboard(
+    catalog, django_capture_on_commit_callbacks
+):
+    student, (course, _) = catalog
+    CourseEnrollment.objects.create(student=student, course=course)
+    keys = [f"student_dashboard_{student.pk}", f"student_batch_data_{student.pk}"]
+    cache.set_many({key: "stale" for key in keys})
+
+    lesson_ids = list(course.lessons_in_course.values_list("id", flat=True))
+    with django_capture_on_commit_callbacks(execute=True):
+        _post(student, lesson_ids)
+    assert cache.get_many(keys) == {}
+
+    # replays insert nothing and leave the cache alone
+    cache.set_many({key: "fresh" for key in keys})
+    with django_capture_on_commit_callbacks(execute=True):
+        _post(student, lesson_ids)
+    assert cache.get_many(keys) == {key: "fresh" for key in keys}
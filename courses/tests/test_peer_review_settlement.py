@@ -0,0 +1,99 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from blockchain.models import DBTeoCoinBalance, DBTeoCoinTransaction
+from courses.models import Course, Exercise, ExerciseReview, ExerciseSubmission, Lesson
+from courses.views.exercises import ReviewExerciseView
+from notifications.models import Notification
+from services.peer_review_service import peer_review_settlement_service
+
+
+@pytest.fixture
+def submission(django_user_model):
+    teacher = django_user_model.objects.create_user(
+        username="teacher", email="teacher@example.com", password="p", role="teacher"
+    )
+    student = django_user_model.objects.create_user(
+        username="student", email="student@example.com", password="p", role="student"
+    )
+    course = Course.objects.create(title="C", description="d", teacher=teacher)
+    lesson = Lesson.objects.create(title="L", content="x", teacher=teacher, course=course)
+    exercise = Exercise.objects.create(title="E", lesson=lesson)
+    submission = ExerciseSubmission.objects.create(
+        exercise=exercise, student=student, content="c"
+    )
+    for i in range(3):
+        reviewer = django_user_model.objects.create_user(
+            username=f"r{i}", email=f"r{i}@example.com", password="p", role="student"
+        )
+        ExerciseReview.objects.create(submission=submission, reviewer=reviewer)
+        submission.reviewers.add(reviewer)
+    return submission
+
+
+def _review(submission, reviewer, **data):
+    request = APIRequestFactory().post(
+        f"/api/v1/submissions/{submission.pk}/review/", data, format="json"
+    )
+    force_authenticate(request, user=reviewer)
+    return ReviewExerciseView.as_view()(request, submission_id=submission.pk)
+
+
+def _balance(user):
+    row = DBTeoCoinBalance.objects.filter(user=user).first()
+    return row.available_balance if row else Decimal("0")
+
+
+@pytest.mark.django_db
+def test_last_review_settles_submission(submission):
+    first, second, last = [r.reviewer for r in submission.reviews.order_by("id")]
+    assert _review(submission, first, score=8).status_code == 201
+    assert _review(submission, second, technical=4, creative=4, following=4).status_code == 201
+    assert not DBTeoCoinTransaction.objects.exists()
+
+    assert _review(submission, last, score=5).status_code == 201
+
+    submission.refresh_from_db()
+    assert submission.reviewed and submission.passed and submission.is_approved
+    assert submission.reward_amount == 2
+    # breakdown 4/4/4 counts as 8 on the 1-10 scale
+    assert submission.average_score == pytest.approx(7.0)
+    ledger = DBTeoCoinTransaction.objects.filter(
+        idempotency_key__startswith=f"peer_review:{submission.pk}:"
+    )
+    assert ledger.count() == 4
+    for user in (submission.student, first, second, last):
+        assert _balance(user) == Decimal("2")
+    assert set(
+        Notification.objects.filter(related_object_id=submission.pk)
+        .exclude(notification_type="review_assigned")
+        .values_list("notification_type", flat=True)
+    ) == {"exercise_graded", "reward_earned"}
+
+
+@pytest.mark.django_db
+def test_settlement_is_idempotent_and_set_based(submission):
+    ExerciseReview.objects.filter(submission=submission).update(score=4)
+    with CaptureQueriesContext(connection) as ctx:
+        summary = peer_review_settlement_service.settle(submission)
+    assert summary["passed"] is False
+    assert len(summary["posted"]) == 3
+    sql = [q["sql"] for q in ctx.captured_queries]
+
+    def writes(verb, model):
+        return len([q for q in sql if q.startswith(f'{verb} "{model._meta.db_table}"')])
+
+    assert writes("INSERT INTO", DBTeoCoinTransaction) == 1
+    assert writes("UPDATE", DBTeoCoinBalance) == 1
+    assert writes("INSERT INTO", Notification) == 1
+
+    # a retry, or a second request racing the first, pays nobody twice
+    ExerciseSubmission.objects.filter(pk=submission.pk).update(reviewed=False)
+    assert peer_review_settlement_service.settle(submission)["posted"] == []
+    assert DBTeoCoinTransaction.objects.count() == 3
+    submission.refresh_from_db()
+    assert peer_review_settlement_service.settle(submission) is None
@@ -0,0 +1,143 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from courses.models import (
+    Course,
+    Exercise,
+    ExerciseReview,
+    ExerciseSubmission,
+    Lesson,
+    ReviewerInboxEntry,
+)
+from courses.views.exercises import AssignedReviewsView
+
+
+@pytest.fixture
+def catalog(django_user_model):
+    teacher = django_user_model.objects.create_user(
+        username="teacher", email="teacher@example.com", password="p", role="teacher"
+    )
+    student = django_user_model.objects.create_user(
+        username="student", email="student@example.com", password="p", role="student"
+    )
+    reviewer = django_user_model.objects.create_user(
+        username="reviewer", email="reviewer@example.com", password="p", role="student"
+    )
+    course = Course.objects.create(title="C", description="d", teacher=teacher)
+    lesson = Lesson.objects.create(title="L", content="x", teacher=teacher, course=course)
+    return student, reviewer, lesson
+
+
+def _assign(student, reviewer, lesson, n):
+    reviews = []
+    for i in range(n):
+        exercise = Exercise.objects.create(title=f"E{i}", lesson=lesson)
+        submission = ExerciseSubmission.objects.create(
+            exercise=exercise, student=student, content="c"
+        )
+        reviews.append(
+            ExerciseReview.objects.create(submission=submission, reviewer=reviewer)
+        )
+        submission.reviewers.add(reviewer)
+    return reviews
+
+
+def _inbox(reviewer, **params):
+    request = APIRequestFactory().get("/api/v1/reviews/assigned/", params)
+    force_authenticate(request, user=reviewer)
+    with CaptureQueriesContext(connection) as ctx:
+        response = AssignedReviewsView.as_view()(request)
+    assert response.status_code == 200
+    return response, ctx.captured_queries
+
+
+@pytest.mark.django_db
+def test_inbox_is_served_from_read_model(catalog):
+    student, reviewer, lesson = catalog
+    [review] = _assign(student, reviewer, lesson, 1)
+
+    response, one = _inbox(reviewer)
+    [item] = response.data
+    assert item["pk"] == review.pk
+    assert item["exercise_title"] == "E0"
+    assert item["student"] == {"id": student.pk, "name": "student"}
+    assert item["course_id"] == lesson.course_id
+    assert item["lesson_id"] == lesson.pk
+    assert item["status"] == "pending"
+
+    _assign(student, reviewer, lesson, 4)
+    response, five = _inbox(reviewer)
+    assert len(response.data) == 5
+    assert len(one) == len(five)
+    sql = " ".join(q["sql"] for q in five)
+    assert "courses_exercisereview" not in sql
+    assert "courses_exercisesubmission" not in sql
+
+
+@pytest.mark.django_db
+def test_inbox_follows_completion_and_rotation(catalog, django_user_model):
+    student, reviewer, lesson = catalog
+    first, stale = _assign(student, reviewer, lesson, 2)
+
+    first.score = 7
+    first.reviewed_at = timezone.now()
+    first.save()
+    response, _ = _inbox(reviewer)
+    assert [item["pk"] for item in response.data] == [stale.pk]
+
+    substitute = django_user_model.objects.create_user(
+        username="sub", email="sub@example.com", password="p", role="student"
+    )
+    ExerciseReview.objects.filter(pk=stale.pk).update(
+        assigned_at=timezone.now() - timezone.timedelta(days=2)
+    )
+    call_command("rotate_stale_reviewers")
+
+    response, _ = _inbox(reviewer)
+    assert response.data == []
+    response, _ = _inbox(substitute)
+    assert [item["exercise_title"] for item in response.data] == ["E1"]
+    assert ReviewerInboxEntry.objects.filter(review_id=stale.pk).count() == 0
+
+
+@pytest.mark.django_db
+def test_inbox_is_keyset_paginated(catalog):
+    student, reviewer, lesson = catalog
+    reviews = _assign(student, reviewer, lesson, 5)
+
+    first, _ = _inbox(reviewer, page_size=3)
+    assert len(first.data) == 3
+    cursor = first["Link"].split("cursor=")[1].split(">")[0].split("&")[0]
+    second, _ = _inbox(reviewer, page_size=3, cursor=cursor)
+    assert [item["pk"] for item in first.data + second.data] == [r.pk for r in reviews]
+
+
+@pytest.mark.django_db
+def test_open_entries_follow_renames_and_moves(catalog):
+    student, reviewer, lesson = catalog
+    done, pending = _assign(student, reviewer, lesson, 2)
+    done.score = 7
+    done.save()
+
+    for review in (done, pending):
+        exercise = review.submission.exercise
+        exercise.title = f"{exercise.title} (v2)"
+        exercise.save()
+    original_course_id = lesson.course_id
+    other = Course.objects.create(title="C2", description="d", teacher=lesson.teacher)
+    lesson.course = other
+    lesson.save(update_fields=["course"])
+    student.username = "renamed"
+    student.save()
+
+    entry = ReviewerInboxEntry.objects.get(review_id=pending.pk)
+    assert entry.exercise_title == "E1 (v2)"
+    assert entry.course_id == other.pk
+    assert entry.student_username == "renamed"
+    closed = ReviewerInboxEntry.objects.get(review_id=done.pk)
+    assert (closed.exercise_title, closed.student_username) == ("E0", "student")
+    assert closed.course_id == original_course_id
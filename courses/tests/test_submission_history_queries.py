@@ -0,0 +1,95 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from courses.models import (
+    Course,
+    Exercise,
+    ExerciseReview,
+    ExerciseSubmission,
+    Lesson,
+    PeerReviewFeedbackItem,
+)
+from courses.views.exercises import SubmissionHistoryView
+
+
+@pytest.fixture
+def users(django_user_model):
+    teacher = django_user_model.objects.create_user(
+        username="teacher", email="teacher@example.com", password="p", role="teacher"
+    )
+    student = django_user_model.objects.create_user(
+        username="student", email="student@example.com", password="p", role="student"
+    )
+    reviewers = [
+        django_user_model.objects.create_user(
+            username=f"r{i}", email=f"r{i}@example.com", password="p", role="student"
+        )
+        for i in range(3)
+    ]
+    return teacher, student, reviewers
+
+
+def _submit(teacher, student, reviewers, n):
+    course = Course.objects.create(title="C", description="d", teacher=teacher)
+    lesson = Lesson.objects.create(title="L", content="x", teacher=teacher, course=course)
+    for i in range(n):
+        exercise = Exercise.objects.create(title=f"E{i}", lesson=lesson)
+        submission = ExerciseSubmission.objects.create(
+            exercise=exercise, student=student, content="c"
+        )
+        for reviewer in reviewers:
+            review = ExerciseReview.objects.create(
+                submission=submission,
+                reviewer=reviewer,
+                score=8,
+                reviewed_at=timezone.now(),
+            )
+            PeerReviewFeedbackItem.objects.create(
+                submission=submission,
+                review=review,
+                reviewer=reviewer,
+                area="highlights",
+                content=f"good {reviewer.username}",
+            )
+
+
+def _history(student, **params):
+    request = APIRequestFactory().get("/api/v1/exercises/submissions/", params)
+    force_authenticate(request, user=student)
+    with CaptureQueriesContext(connection) as ctx:
+        response = SubmissionHistoryView.as_view()(request)
+    assert response.status_code == 200
+    return response, len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_history_query_count_is_constant(users):
+    teacher, student, reviewers = users
+    _submit(teacher, student, reviewers, 1)
+    response, one = _history(student)
+    [submission] = response.data
+    assert len(submission["reviews"]) == 3
+    assert submission["reviews"][0]["strengths_comment"] == "good r0"
+
+    _submit(teacher, student, reviewers, 5)
+    response, six = _history(student)
+    assert len(response.data) == 6
+    assert one == six
+
+
+@pytest.mark.django_db
+def test_history_is_keyset_paginated(users):
+    teacher, student, reviewers = users
+    _submit(teacher, student, reviewers[:1], 5)
+
+    first, _ = _history(student, page_size=3)
+    assert len(first.data) == 3
+    cursor = first["Link"].split("cursor=")[1].split(">")[0].split("&")[0]
+
+    second, _ = _history(student, page_size=3, cursor=cursor)
+    assert len(second.data) == 2
+    ids = [s["id"] for s in first.data + second.data]
+    assert ids == sorted(ids, reverse=True)
@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from courses.models import Course, CourseEnrollment, Exercise, Lesson
+from courses.views.courses import TeacherCoursesView
+
+
+@pytest.fixture
+def teacher(django_user_model):
+    cache.clear()
+    return django_user_model.objects.create_user(
+        username="teacher", email="teacher@example.com", password="p", role="teacher"
+    )
+
+
+def _course(teacher, n_lessons, title="C"):
+    course = Course.objects.create(
+        title=title, description="d", teacher=teacher, price_eur=Decimal("10.00")
+    )
+    for i in range(n_lessons):
+        lesson = Lesson.objects.create(
+            title=f"{title}-L{i}", content="x" * 150, teacher=teacher, course=course, order=i
+        )
+        course.lessons.add(lesson)
+        Exercise.objects.create(title="E", lesson=lesson)
+    return course
+
+
+def _list(teacher):
+    request = APIRequestFactory().get("/api/v1/teacher/courses/")
+    force_authenticate(request, user=teacher)
+    with CaptureQueriesContext(connection) as ctx:
+        response = TeacherCoursesView.as_view()(request)
+    assert response.status_code == 200
+    return response.data, ctx.captured_queries
+
+
+@pytest.mark.django_db
+def test_listing_query_count_is_constant(teacher, django_user_model):
+    course = _course(teacher, 1)
+    student = django_user_model.objects.create_user(
+        username="s", email="s@example.com", password="p", role="student"
+    )
+    CourseEnrollment.objects.create(student=student, course=course)
+    data, small = _list(teacher)
+    [item] = data
+    assert item["total_students"] == 1
+    assert item["total_earnings"] == "9.000"
+    [lesson] = item["lessons"]
+    assert lesson["exercises_count"] == 1
+    assert lesson["description"] == "x" * 100 + "..."
+
+    cache.clear()
+    for c in range(3):
+        _course(teacher, 4, title=f"C{c}")
+    data, big = _list(teacher)
+    assert len(data) == 4
+    assert sum(len(item["lessons"]) for item in data) == 13
+    assert len(small) == len(big)
+    # lesson content is truncated in SQL, never selected in full
+    lesson_sql = [q["sql"] for q in big if 'FROM "courses_lesson"' in q["sql"]]
+    [sql] = lesson_sql
+    assert 'SUBSTR("courses_lesson"."content", 1, 100)' in sql
+    # only referenced by SUBSTR() and LENGTH()
+    assert sql.count('"courses_lesson"."content"') == 2
+
+
+@pytest.mark.django_db
+def test_listing_is_cached_until_generation_bump(teacher):
+    course = _course(teacher, 1)
+    _list(teacher)
+    data, queries = _list(teacher)
+    assert [q for q in queries if "courses_" in q["sql"]] == []
+
+    Exercise.objects.create(title="E2", lesson=course.lessons.first())
+    data, _ = _list(teacher)
+    assert data[0]["lessons"][0]["exercises_count"] == 2
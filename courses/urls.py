@@ -45,6 +45,7 @@ from courses.views.hybrid_payment import HybridPaymentView
 # === LESSONS ===
 from courses.views.lessons import (
     AllLessonsWithCourseView,
+    BulkLessonCompleteView,
     CourseLessonsView,
     LessonCreateAssignView,
     LessonDetailView,
@@ -54,7 +55,9 @@ from courses.views.lessons import (
 
 # === PAYMENTS ===
 from courses.views.payments import (
+    ConfirmPaymentAsyncView,
     ConfirmPaymentView,
+    CreatePaymentIntentAsyncView,
     CreatePaymentIntentView,
     PaymentSummaryView,
     TeoCoinDiscountStatusView,
@@ -66,6 +69,7 @@ from courses.views.pending import (
     PendingCoursesView,
     RejectCourseView,
 )
+from core.async_views import io_view
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
@@ -153,6 +157,11 @@ urlpatterns = [
         MarkLessonCompleteView.as_view(),
         name="lesson-mark-complete",
     ),
+    path(
+        "lessons/complete/",
+        BulkLessonCompleteView.as_view(),
+        name="lessons-bulk-complete",
+    ),
     # === EXERCISES ===
     path("exercises/create/", CreateExerciseView.as_view(), name="create-exercise"),
     path(
@@ -238,12 +247,12 @@ urlpatterns = [
     path("debug/stripe/", DebugStripeView.as_view(), name="debug-stripe"),
     path(
         "courses/<int:course_id>/create-payment-intent/",
-        CreatePaymentIntentView.as_view(),
+        io_view(CreatePaymentIntentView.as_view(), CreatePaymentIntentAsyncView.as_view()),
         name="create-payment-intent",
     ),
     path(
         "courses/<int:course_id>/confirm-payment/",
-        ConfirmPaymentView.as_view(),
+        io_view(ConfirmPaymentView.as_view(), ConfirmPaymentAsyncView.as_view()),
         name="confirm-payment",
     ),
     path(
@@ -3,6 +3,7 @@ import logging
 from courses.models import Course
 from courses.serializers import CourseSerializer
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db import models
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters as drf_filters
@@ -12,6 +13,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from services.course_service import course_service
 from services.exceptions import CourseNotFoundError, TeoArtServiceException
+from services.teacher_stats_service import teacher_stats_service
 from users.permissions import IsAdminOrApprovedTeacherOrReadOnly, IsTeacher
 from rest_framework.permissions import IsAuthenticated
 
@@ -21,6 +23,8 @@ logger = logging.getLogger(__name__)
 class CourseViewSet(viewsets.ModelViewSet):
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticated, IsAdminOrApprovedTeacherOrReadOnly]
+    # Max SQL queries per request at any page size (core.query_audit)
+    query_budget = 4
 
     def get_queryset(self):
         # ✅ OTTIMIZZATO - Prevent N+1 queries with select_related and prefetch_related
@@ -34,6 +38,8 @@ class CourseViewSet(viewsets.ModelViewSet):
 class CourseListCreateView(generics.ListCreateAPIView):
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticated, IsAdminOrApprovedTeacherOrReadOnly]
+    # Max SQL queries per request at any page size (core.query_audit)
+    query_budget = 4
     filter_backends = [
         DjangoFilterBackend,
         drf_filters.SearchFilter,
@@ -371,23 +377,17 @@ class TeacherCoursesView(generics.ListAPIView):
         return TeacherCourseSerializer
 
     def get_queryset(self):
-        user = self.request.user
-        # Return all courses where the user is the teacher (include unapproved so teacher can edit drafts)
-        # Optimize: select_related teacher, prefetch only necessary lesson fields in order
-        from django.db.models import Prefetch
-        from courses.models import Lesson
-
-        lessons_qs = (
-            Lesson.objects.all()
-            .only("id", "title", "order", "duration", "lesson_type", "created_at")
-            .order_by("order", "created_at")
-        )
+        # All courses of the teacher, drafts included so they can be edited;
+        # one annotated course query plus one grouped lesson query
+        return teacher_stats_service.get_course_listing(self.request.user)
 
-        qs = (
-            Course.objects.filter(teacher=user)
-            .select_related("teacher")
-            .prefetch_related(Prefetch("lessons", queryset=lessons_qs))
-            .only("id", "title", "description", "price_eur", "cover_image", "is_approved", "created_at", "updated_at", "category", "teacher")
-            .order_by("-created_at")
-        )
-        return qs
+    def list(self, request, *args, **kwargs):
+        # Cached under the teacher's cache generation, bumped by every course,
+        # lesson, exercise and enrollment change (see services/signals.py)
+        generation = teacher_stats_service.cache_generation(request.user.id)
+        cache_key = f"teacher_courses_{request.user.id}_{generation}"
+        data = cache.get(cache_key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(cache_key, data, 600)
+        return Response(data)
@@ -1,6 +1,7 @@
 import logging
 import random
 
+from core.pagination import KeysetPagination
 from courses.models import (
     Course,
     Exercise,
@@ -8,11 +9,13 @@ from courses.models import (
     ExerciseSubmission,
     Lesson,
     PeerReviewFeedbackItem,
+    ReviewerInboxEntry,
 )
 from courses.serializers import (
     ExerciseSerializer,
     ExerciseSubmissionSerializer,
     PeerReviewFeedbackItemSerializer,
+    ReviewerInboxEntrySerializer,
 )
 from courses.utils.peer_feedback_parser import parse_peer_review_blob
 from django.db import transaction
@@ -28,6 +31,8 @@ from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
+from services.idempotency import idempotent
+from services.peer_review_service import peer_review_settlement_service
 from users.models import User
 from users.permissions import IsTeacher
 from django.db.models import Count, Avg, Q, Max
@@ -386,6 +391,12 @@ class SubmitExerciseView(APIView):
 class ReviewExerciseView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotent(
+        "exercise_review",
+        key=lambda view, request, submission_id=None, exercise_id=None: (
+            f"submission:{submission_id}" if submission_id else f"exercise:{exercise_id}"
+        ),
+    )
     def post(self, request, submission_id=None, exercise_id=None):
         """
         Accept either a submission_id (preferred) or an exercise_id in the URL.
@@ -495,153 +506,23 @@ class ReviewExerciseView(APIView):
         review.reviewed_at = timezone.now()
         review.save()
 
-        # Premio immediato al reviewer: 2 TEO per ogni review completata (idempotente)
-        try:
-            from blockchain.models import DBTeoCoinTransaction
-
-            exists = (
-                DBTeoCoinTransaction.objects.filter(
-                    user=request.user, transaction_type="bonus"
-                )
-                .filter(
-                    Q(description__contains="[review_reward]")
-                    & Q(description__contains=f"ref=review:{review.id}")
-                )
-                .exists()
-            )
-            if not exists:
-                _ = create_reward_transaction(
-                    user=request.user,
-                    amount=2,
-                    transaction_type="review_reward",
-                    submission_id=submission.id,
-                    reference=f"review:{review.id}",
-                )
-        except Exception as e:
-            logger.error(f"Errore creazione reward reviewer immediato: {e}")
-
         # Aggiorna sempre la media dopo ogni review
         ExerciseReview.calculate_average_score(submission)
 
-        reviews = ExerciseReview.objects.filter(submission=submission)
-        if all(r.score is not None for r in reviews) and not submission.reviewed:
-            # Mark as reviewed FIRST to prevent double processing
-            submission.reviewed = True
-            submission.save(update_fields=["reviewed"])
-
-            logger.info(f"🔄 Starting reward processing for submission {submission.id}")
-
-            # Use atomic transaction to ensure all rewards are created
-            try:
-                with transaction.atomic():
-                    logger.info(
-                        f"📊 Calculating average score for submission {submission.id}"
-                    )
-                    # Calcola media e numero di review completate
-                    scores = [r.score for r in reviews if r.score is not None]
-                    completed_count = len(scores)
-                    average = (
-                        (sum(scores) / completed_count) if completed_count > 0 else None
-                    )
-
-                    # Regola: studente premiato solo se almeno 3 review e media >= 6
-                    passed = (
-                        average is not None and completed_count >= 3 and average >= 6
-                    )
-
-                    logger.info(
-                        f"📈 Submission {submission.id}: completed={completed_count}, average={average}, passed={passed}"
-                    )
-
-                    # Update submission status
-                    submission.passed = passed
-
-                    reward_transactions_created = []
-
-                    # Premio fisso 2 TEO allo studente SE passato (idempotente)
-                    if passed:
-                        from blockchain.models import DBTeoCoinTransaction
-
-                        existing_student_reward = (
-                            DBTeoCoinTransaction.objects.filter(
-                                user=submission.student, transaction_type="bonus"
-                            )
-                            .filter(
-                                Q(description__contains="[exercise_reward]")
-                                & Q(description__contains=f"submission {submission.id}")
-                            )
-                            .exists()
-                        )
-
-                        if not existing_student_reward:
-                            student_reward_amount = 2
-                            submission.reward_amount = student_reward_amount
-                            exercise_reward = create_reward_transaction(
-                                submission.student,
-                                student_reward_amount,
-                                "exercise_reward",
-                                submission.id,
-                            )
-                            reward_transactions_created.append(exercise_reward)
-                            if exercise_reward:
-                                logger.info(
-                                    f"✅ Exercise reward transaction created: ID {exercise_reward.id}"
-                                )
-                            else:
-                                logger.error(
-                                    f"❌ Failed to create exercise reward transaction"
-                                )
-                        else:
-                            logger.info(
-                                "ℹ️ Exercise reward already exists; skipping duplicate grant."
-                            )
-
-                    logger.info(f"💾 Saving submission changes for {submission.id}")
-                    # Save submission changes
-                    submission.save()
-
-                    logger.info(
-                        f"📢 Creating notification for student {submission.student.username}"
-                    )
-                    # Create notification for student
-                    Notification.objects.create(
-                        user=submission.student,
-                        message=(
-                            f"Il tuo esercizio '{submission.exercise.title}' è stato valutato con una media di {average:.1f}"
-                            if average is not None
-                            else "Il tuo esercizio è stato valutato."
-                        ),
-                        notification_type="exercise_graded",
-                        related_object_id=getattr(submission, "id", None),
-                    )
-
-                    logger.info(
-                        f"✅ Review completed for submission {submission.id}. Created {len(reward_transactions_created)} reward transactions."
-                    )
-
-            except Exception as e:
-                logger.error(
-                    f"❌ Error processing rewards for submission {submission.id}: {e}"
-                )
-                logger.error(f"❌ Exception type: {type(e).__name__}")
-                import traceback
-
-                logger.error(f"❌ Full traceback:\n{traceback.format_exc()}")
-
-                # If reward processing fails, at least mark the review as complete
-                # The rewards can be processed later manually
-                if not submission.reviewed:
-                    submission.reviewed = True
-                    submission.save(update_fields=["reviewed"])
-
-                # Return a more specific error message
-                return Response(
-                    {
-                        "error": f"Errore durante il processing dei reward: {str(e)}",
-                        "details": "La valutazione è stata salvata ma ci potrebbero essere problemi con i reward. Contatta l'amministratore.",
-                    },
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
+        # Quando arriva l'ultima review: pass/fail e reward di studente e reviewer
+        try:
+            peer_review_settlement_service.settle(submission)
+        except Exception as e:
+            logger.error(
+                f"❌ Error processing rewards for submission {submission.id}: {e}"
+            )
+            return Response(
+                {
+                    "error": f"Errore durante il processing dei reward: {str(e)}",
+                    "details": "La valutazione è stata salvata ma ci potrebbero essere problemi con i reward. Contatta l'amministratore.",
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
 
         logger.info(
             f"🎉 Successfully returning response for submission {submission.id}"
@@ -669,8 +550,10 @@ class MySubmissionView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, exercise_id):
-        submission = ExerciseSubmission.objects.filter(
-            exercise_id=exercise_id, student=request.user
+        submission = ExerciseSubmissionSerializer.setup_eager_loading(
+            ExerciseSubmission.objects.filter(
+                exercise_id=exercise_id, student=request.user
+            )
         ).first()
         if not submission:
             return Response({"detail": "Nessuna submission trovata."}, status=404)
@@ -679,20 +562,21 @@ class MySubmissionView(APIView):
 
 class SubmissionHistoryView(APIView):
     permission_classes = [IsAuthenticated]
+    # Max SQL queries per request at any page size (core.query_audit)
+    query_budget = 3
 
     def get(self, request):
-        """Return all submissions by the current user, newest first."""
-        qs = (
+        """Return the current user's submissions, newest first (keyset-paginated)."""
+        qs = ExerciseSubmissionSerializer.setup_eager_loading(
             ExerciseSubmission.objects.filter(student=request.user)
-            .select_related("exercise")
-            .prefetch_related("reviews")
-            .order_by("-created_at")
         )
-        return Response(ExerciseSubmissionSerializer(qs, many=True).data)
+        return KeysetPagination().paginate(qs, request, ExerciseSubmissionSerializer)
 
 
 class ReviewHistoryView(APIView):
     permission_classes = [IsAuthenticated]
+    # Max SQL queries per request at any page size (core.query_audit)
+    query_budget = 1
 
     def get(self, request):
         """Return the review history for the current user (as reviewer)."""
@@ -728,60 +612,47 @@ class ReviewHistoryView(APIView):
         return Response(data)
 
 
+class ReviewerInboxPagination(KeysetPagination):
+    # Oldest assignment first, matching the pending partial index
+    ordering = ("assigned_at", "review_id")
+
+
 class AssignedReviewsView(APIView):
     permission_classes = [IsAuthenticated]
+    # Max SQL queries per request at any page size (core.query_audit)
+    query_budget = 1
 
     def get(self, request):
-        reviews = ExerciseReview.objects.filter(
-            reviewer=request.user, score__isnull=True
+        """Pending reviews of the current user, served from the inbox read model."""
+        entries = ReviewerInboxEntry.objects.filter(
+            reviewer=request.user, completed_at__isnull=True
+        )
+        return ReviewerInboxPagination().paginate(
+            entries, request, ReviewerInboxEntrySerializer
         )
-        data = []
-        for r in reviews:
-            sub = getattr(r, "submission", None)
-            exercise = getattr(sub, "exercise", None) if sub else None
-            course_id = None
-            lesson_id = None
-            if exercise and getattr(exercise, "lesson", None) and getattr(exercise.lesson, "course", None):
-                course_id = exercise.lesson.course.id
-                lesson_id = exercise.lesson.id
-            student_obj = None
-            if sub and getattr(sub, "student", None):
-                student_obj = {"id": sub.student.id, "name": getattr(sub.student, "username", None)}
-            status = None
-            if sub:
-                status = "reviewed" if getattr(sub, "reviewed", False) else "pending"
-            data.append(
-                {
-                    "pk": r.pk,
-                    "submission_id": sub.pk if sub else None,
-                    "submission_pk": sub.pk if sub else None,
-                    "exercise_id": getattr(sub, "exercise_id", None) if sub else None,
-                    "exercise_title": exercise.title if exercise else None,
-                    "assigned_at": r.assigned_at,
-                    "student": student_obj,
-                    "course_id": course_id,
-                    "lesson_id": lesson_id,
-                    "submitted_at": getattr(sub, "created_at", None) if sub else None,
-                    "status": status,
-                }
-            )
-        return Response(data)
 
 
 class ExerciseSubmissionsView(APIView):
     permission_classes = [IsAuthenticated]
+    # Max SQL queries per request at any page size (core.query_audit)
+    query_budget = 4
 
     def get(self, request, exercise_id):
-        exercise = get_object_or_404(Exercise, pk=exercise_id)
+        exercise = get_object_or_404(
+            Exercise.objects.select_related("lesson__course__teacher"), pk=exercise_id
+        )
         # Solo admin o docente del corso (gestione lesson/course null safe)
         teacher = None
         if exercise.lesson and exercise.lesson.course:
             teacher = exercise.lesson.course.teacher
         if not (request.user.is_staff or (teacher and teacher == request.user)):
             return Response({"detail": "Non autorizzato."}, status=403)
-        submissions = ExerciseSubmission.objects.filter(exercise=exercise)
-        data = ExerciseSubmissionSerializer(submissions, many=True).data
-        return Response(data)
+        submissions = ExerciseSubmissionSerializer.setup_eager_loading(
+            ExerciseSubmission.objects.filter(exercise=exercise)
+        )
+        return KeysetPagination().paginate(
+            submissions, request, ExerciseSubmissionSerializer
+        )
 
 
 class ExerciseDebugReviewersView(APIView):
@@ -9,6 +9,8 @@ from rest_framework.generics import RetrieveAPIView
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from services.course_service import course_service
+from services.exceptions import TeoArtServiceException
 from users.permissions import IsTeacher
 
 
@@ -90,43 +92,29 @@ class LessonViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Registra il completamento della lezione per lo studente
-        completion, created = LessonCompletion.objects.get_or_create(
-            student=request.user, lesson=lesson
-        )
-
-        # Import here to avoid circular imports
+        # Registra il completamento (e i premi) per lo studente
         try:
-            pass
+            result = course_service.complete_lessons(request.user, [lesson.pk])
+        except TeoArtServiceException as e:
+            return Response({"error": e.message}, status=e.status_code)
 
-            # The automated reward system will be triggered by the signal
-            # But we can also check course completion here for immediate feedback
+        try:
+            # Progress for immediate feedback
             total_lessons = course.lessons.count()
             completed_lessons = LessonCompletion.objects.filter(
                 student=request.user, lesson__course=course
             ).count()
 
-            if completed_lessons >= total_lessons:
-                # Mark course as completed and trigger completion bonus
-                enrollment, _ = CourseEnrollment.objects.get_or_create(
-                    student=request.user, course=course
+            # complete_lessons marks the course completed and pays the bonus
+            if any(c["course_completed"] for c in result["courses"]):
+                return Response(
+                    {
+                        "completed": True,
+                        "course_completed": True,
+                        "detail": "🎓 Congratulazioni! Hai completato tutto il corso!",
+                    },
+                    status=status.HTTP_200_OK,
                 )
-
-                if not enrollment.completed:
-                    enrollment.completed = True
-                    enrollment.save()
-
-                    return Response(
-                        {
-                            "completed": True,
-                            "course_completed": True,
-                            "detail": "🎓 Congratulazioni! Hai completato tutto il corso!",
-                        },
-                        status=status.HTTP_200_OK,
-                    )
-                else:
-                    # Even if course already marked completed, still return unlocked info
-                    pass
             # Determine next lesson and first exercise to unlock
             next_lesson = (
                 Lesson.objects.filter(course=course, order__gt=lesson.order).order_by("order").first()
@@ -292,7 +280,10 @@ class MarkLessonCompleteView(APIView):
                 {"detail": "Non sei iscritto a questo corso."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        LessonCompletion.objects.get_or_create(student=request.user, lesson=lesson)
+        try:
+            course_service.complete_lessons(request.user, [lesson.pk])
+        except TeoArtServiceException as e:
+            return Response({"error": e.message}, status=e.status_code)
         total = Lesson.objects.filter(course=course).count()
         if lesson.order == total:
             return Response(
@@ -304,3 +295,34 @@ class MarkLessonCompleteView(APIView):
                 {"completed": True, "detail": "Lezione segnata come completata."},
                 status=status.HTTP_200_OK,
             )
+
+
+class BulkLessonCompleteView(APIView):
+    """
+    Mark many lessons as completed in one request (offline replay).
+
+    POST {"lesson_ids": [1, 2, 3]}
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        lesson_ids = request.data.get("lesson_ids")
+        if not isinstance(lesson_ids, list) or not lesson_ids:
+            return Response(
+                {"detail": "lesson_ids deve essere una lista non vuota."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            lesson_ids = [int(lesson_id) for lesson_id in lesson_ids]
+        except (TypeError, ValueError):
+            return Response(
+                {"detail": "lesson_ids deve contenere solo ID numerici."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            result = course_service.complete_lessons(request.user, lesson_ids)
+        except TeoArtServiceException as e:
+            return Response({"error": e.message}, status=e.status_code)
+        return Response(result, status=status.HTTP_200_OK)
@@ -1,8 +1,12 @@
 import logging
 import os
+from dataclasses import dataclass
 from decimal import Decimal
+from typing import Any, Optional
 
 import stripe
+from asgiref.sync import sync_to_async
+from core.async_views import AsyncAPIView
 from courses.models import Course, CourseEnrollment
 from django.conf import settings
 from django.shortcuts import get_object_or_404
@@ -29,6 +33,22 @@ from rewards.services.transaction_services import get_or_create_payment_snapshot
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class PaymentIntentPlan:
+    """What CreatePaymentIntentView needs to create and record a payment intent"""
+
+    course: Course
+    user: Any
+    intent_data: dict
+    use_teocoin_discount: bool
+    discount_percent: Any
+    original_price: Decimal
+    discount_amount: Decimal
+    final_price: Decimal
+    discount_request_id: Optional[str]
+    existing_snapshot: Optional[PaymentDiscountSnapshot]
+
+
 class CreatePaymentIntentView(APIView):
     """
     Create Stripe payment intent with TeoCoin discount integration
@@ -46,659 +66,293 @@ class CreatePaymentIntentView(APIView):
 
     def post(self, request, course_id):
         try:
-            course = get_object_or_404(Course, id=course_id)
-            user = request.user
-
-            logger.info(
-                f"💳 Creating payment intent for course {course_id} by user {user.id}"
-            )
-
-            # Extract request data
-            use_teocoin_discount = request.data.get("use_teocoin_discount", False)
-            discount_percent = request.data.get("discount_percent", 0)
-            student_address = request.data.get("student_address", "")
-            request.data.get("student_signature", "")
+            plan = self.plan_intent(request, course_id)
+            if isinstance(plan, Response):
+                return plan
 
-            # Debug: log incoming discount-related request fields (non-sensitive)
             try:
-                rd = request.data
-                dbg = {
-                    "use_teocoin_discount": bool(rd.get("use_teocoin_discount", False)),
-                    "discount_percent": rd.get("discount_percent"),
-                    "discount_eur": rd.get("discount_eur"),
-                    "has_breakdown": bool(rd.get("breakdown")),
-                }
-                logger.info(f"[CreatePaymentIntent] incoming discount payload: {dbg}")
-            except Exception:
-                pass
-
-            logger.info(
-                f"💳 Payment data: use_discount={use_teocoin_discount}, discount={discount_percent}%"
-            )
-
-            # Calculate pricing
-            original_price = course.price_eur
-            discount_amount = Decimal("0")
-            final_price = original_price
-            discount_request_id = None
-
-            logger.info(f"💰 Course pricing: original=€{original_price}")
-
-            # Validate Stripe configuration
-            if not settings.STRIPE_SECRET_KEY:
-                logger.error("❌ Stripe secret key not configured")
-                return Response(
-                    {
-                        "error": "Payment system not configured",
-                        "code": "STRIPE_NOT_CONFIGURED",
-                    },
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
-
-            # Process TeoCoin discount if requested
-            if use_teocoin_discount and discount_percent > 0:
-                try:
-                    logger.info(
-                        f"🔄 Processing TEO discount: {discount_percent}% for user {user.id}"
-                    )
-
-                    # NO IMMEDIATE TEO DEDUCTION - discount should already be applied via confirm_discount
-                    # Check if there's an existing applied discount snapshot with hold for this session
-                    
-                    # Try to extract checkout_session_id from breakdown payload or generate one
-                    breakdown_data = request.data.get("breakdown", {})
-                    checkout_session_id = breakdown_data.get("checkout_session_id")
-                    
-                    if not checkout_session_id:
-                        # Generate session ID to find existing discount snapshots
-                        checkout_session_id = f"payment_session_{user.id}_{course_id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}"
-                    
-                    # Look for existing applied discount for this user + course
-                    existing_discount = PaymentDiscountSnapshot.objects.filter(
-                        student=user,
-                        course=course,
-                        status="applied",
-                        wallet_hold_id__isnull=False
-                    ).order_by('-created_at').first()
-                    
-                    if existing_discount:
-                        # Use existing discount
-                        discount_amount = existing_discount.discount_amount_eur
-                        final_price = existing_discount.student_pay_eur
-                        
-                        logger.info(
-                            f"✅ Using existing applied discount: snapshot_id={existing_discount.id}, "
-                            f"discount_amount={discount_amount}, hold_id={existing_discount.wallet_hold_id}"
-                        )
-                    else:
-                        # NO DISCOUNT APPLIED YET - User must call confirm_discount first
-                        logger.warning(
-                            f"⚠️ No applied discount found for user {user.id}, course {course_id}. "
-                            f"Frontend should call confirm_discount first."
-                        )
-                        # Return metadata to inform frontend
-                        teo_discount_not_applied = True
-                        # Proceed with full price for now
-                        discount_amount = Decimal("0")
-                        final_price = original_price
+                payment_intent = stripe.PaymentIntent.create(**plan.intent_data)
+                logger.info(f"✅ Stripe payment intent created: {payment_intent.id}")
+                self.record_intent(plan, payment_intent)
+            except Exception as stripe_err:
+                return self.stripe_error(stripe_err)
 
-                    logger.info(
-                        f"✅ TEO discount processed: discount=€{discount_amount}, final_price=€{final_price}"
-                    )
+            return self.intent_response(plan, payment_intent)
 
-                    logger.info(
-                        f"✅ TeoCoin discount calculated: {discount_percent}% off €{original_price}"
-                    )
-                    logger.info(
-                        f"💰 Student will pay €{final_price} (TEO deduction handled separately)"
-                    )
-                    logger.info(
-                        f"📋 TEO will be deducted by ApplyDiscountView to prevent double deduction"
-                    )
+        except Exception as e:
+            return self.intent_error(e)
 
-                    # Teacher will be notified through the absorption dashboard
+    def plan_intent(self, request, course_id):
+        """PaymentIntentPlan of the request, else an error Response"""
+        course = get_object_or_404(Course.objects.select_related("teacher"), id=course_id)
+        user = request.user
 
-                except Exception as e:
-                    logger.error(f"Discount creation error: {e}")
-                    return Response(
-                        {
-                            "error": "TeoCoin discount system error",
-                            "details": str(e),
-                            "code": "DISCOUNT_SYSTEM_ERROR",
-                        },
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    )
+        logger.info(
+            f"💳 Creating payment intent for course {course_id} by user {user.id}"
+        )
 
-            # Validate and set Stripe configuration with robust error handling
-            stripe_secret = settings.STRIPE_SECRET_KEY
+        # Extract request data
+        use_teocoin_discount = request.data.get("use_teocoin_discount", False)
+        discount_percent = request.data.get("discount_percent", 0)
+        student_address = request.data.get("student_address", "")
+        request.data.get("student_signature", "")
 
-            # Check for common configuration issues
-            if not stripe_secret:
-                logger.error("❌ STRIPE_SECRET_KEY is None or empty")
-                return Response(
-                    {
-                        "error": "Payment system not configured - missing secret key",
-                        "code": "STRIPE_KEY_MISSING",
-                    },
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
+        # Debug: log incoming discount-related request fields (non-sensitive)
+        try:
+            rd = request.data
+            dbg = {
+                "use_teocoin_discount": bool(rd.get("use_teocoin_discount", False)),
+                "discount_percent": rd.get("discount_percent"),
+                "discount_eur": rd.get("discount_eur"),
+                "has_breakdown": bool(rd.get("breakdown")),
+            }
+            logger.info(f"[CreatePaymentIntent] incoming discount payload: {dbg}")
+        except Exception:
+            pass
 
-            if (
-                "your_str" in str(stripe_secret)
-                or "example" in str(stripe_secret).lower()
-            ):
-                logger.error(
-                    f"❌ STRIPE_SECRET_KEY appears to be a placeholder: {str(stripe_secret)[:20]}..."
-                )
-                # Try to get from environment directly as fallback
-                stripe_secret = os.getenv("STRIPE_SECRET_KEY")
-                if not stripe_secret or "your_str" in str(stripe_secret):
-                    return Response(
-                        {
-                            "error": "Payment system misconfigured - placeholder key detected",
-                            "code": "STRIPE_KEY_PLACEHOLDER",
-                        },
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    )
-                logger.warning("⚠️ Used fallback environment variable for Stripe key")
+        logger.info(
+            f"💳 Payment data: use_discount={use_teocoin_discount}, discount={discount_percent}%"
+        )
 
-            if len(str(stripe_secret)) < 20:
-                logger.error(
-                    f"❌ STRIPE_SECRET_KEY too short: {len(str(stripe_secret))} chars"
-                )
-                return Response(
-                    {
-                        "error": "Payment system misconfigured - invalid key length",
-                        "code": "STRIPE_KEY_INVALID_LENGTH",
-                    },
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
+        # Calculate pricing
+        original_price = course.price_eur
+        discount_amount = Decimal("0")
+        final_price = original_price
+        discount_request_id = None
 
-            # Create Stripe payment intent for final price
-            logger.info(f"💳 Creating Stripe payment intent for €{final_price} (discount_amount={discount_amount})")
+        logger.info(f"💰 Course pricing: original=€{original_price}")
 
-            stripe.api_key = stripe_secret
-            logger.info(
-                f"🔑 Stripe API key set to: {str(stripe.api_key)[:15]}...{str(stripe.api_key)[-4:] if stripe.api_key else 'NONE'}"
+        # Validate Stripe configuration
+        if not settings.STRIPE_SECRET_KEY:
+            logger.error("❌ Stripe secret key not configured")
+            return Response(
+                {
+                    "error": "Payment system not configured",
+                    "code": "STRIPE_NOT_CONFIGURED",
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
-            # Validate final price
-            if final_price <= 0:
-                logger.error(f"❌ Invalid final price: €{final_price}")
-                return Response(
-                    {"error": "Invalid payment amount", "code": "INVALID_AMOUNT"},
-                    status=status.HTTP_400_BAD_REQUEST,
+        # Process TeoCoin discount if requested
+        if use_teocoin_discount and discount_percent > 0:
+            try:
+                logger.info(
+                    f"🔄 Processing TEO discount: {discount_percent}% for user {user.id}"
                 )
 
-            intent_data = {
-                "amount": int(final_price * 100),  # Convert to cents
-                "currency": "eur",
-                "metadata": {
-                    "course_id": course_id,
-                    "user_id": user.id,
-                    "original_price": str(original_price),
-                    "discount_amount": str(discount_amount),
-                    "discount_percent": discount_percent,
-                    "use_teocoin_discount": str(use_teocoin_discount),
-                    "student_address": student_address,
-                },
-            }
+                # NO IMMEDIATE TEO DEDUCTION - discount should already be applied via confirm_discount
+                # Check if there's an existing applied discount snapshot with hold for this session
 
-            # If we previously detected insufficient TEO balance, expose it to frontend
-            if locals().get('teo_balance_insufficient', False):
-                intent_data["metadata"]["teo_balance_insufficient"] = "True"
-                
-            # If TEO discount was not applied, inform frontend
-            if locals().get('teo_discount_not_applied', False):
-                intent_data["metadata"]["teo_discount_not_applied"] = "True"
-
-            # Add discount request ID if applicable
-            if discount_request_id:
-                intent_data["metadata"]["discount_request_id"] = str(
-                    discount_request_id
-                )
+                # Try to extract checkout_session_id from breakdown payload or generate one
+                breakdown_data = request.data.get("breakdown", {})
+                checkout_session_id = breakdown_data.get("checkout_session_id")
 
-            # ISSUE-04A: Add correlation metadata for webhook lookup
-            # Look for existing applied discount snapshot for this user + course
-            existing_snapshot = None
-            if use_teocoin_discount and discount_amount > 0:
-                existing_snapshot = PaymentDiscountSnapshot.objects.filter(
+                if not checkout_session_id:
+                    # Generate session ID to find existing discount snapshots
+                    checkout_session_id = f"payment_session_{user.id}_{course_id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}"
+
+                # Look for existing applied discount for this user + course
+                existing_discount = PaymentDiscountSnapshot.objects.filter(
                     student=user,
                     course=course,
-                    status__in=["applied", "pending"],
+                    status="applied",
                     wallet_hold_id__isnull=False
                 ).order_by('-created_at').first()
-                
-                if existing_snapshot:
-                    # Add critical metadata for webhook correlation
-                    intent_data["metadata"]["discount_snapshot_id"] = str(existing_snapshot.id)
-                    intent_data["metadata"]["hold_id"] = str(existing_snapshot.wallet_hold_id)
-                    intent_data["metadata"]["order_id"] = str(existing_snapshot.order_id) if existing_snapshot.order_id else ""
-                    logger.info(f"🔗 Added correlation metadata: snapshot_id={existing_snapshot.id}, hold_id={existing_snapshot.wallet_hold_id}")
 
-            logger.info(f"💳 Stripe intent data: {intent_data}")
+                if existing_discount:
+                    # Use existing discount
+                    discount_amount = existing_discount.discount_amount_eur
+                    final_price = existing_discount.student_pay_eur
 
-            try:
-                payment_intent = stripe.PaymentIntent.create(**intent_data)
-                logger.info(f"✅ Stripe payment intent created: {payment_intent.id}")
-                
-                # ISSUE-04A: Immediately persist stripe_payment_intent_id in existing snapshot  
-                snapshot_updated = False
-                if existing_snapshot:
-                    existing_snapshot.stripe_payment_intent_id = payment_intent.id
-                    existing_snapshot.external_txn_id = payment_intent.id
-                    existing_snapshot.save(update_fields=['stripe_payment_intent_id', 'external_txn_id'])
-                    logger.info(f"🔗 Updated snapshot {existing_snapshot.id} with stripe_payment_intent_id: {payment_intent.id}")
-                    snapshot_updated = True
-                
-                # Persist a PaymentDiscountSnapshot now (idempotent). This ensures
-                # a snapshot exists as soon as the payment intent is created so
-                # teacher notifications and frontend can rely on it.
-                # SKIP if we already updated an existing snapshot to prevent duplicates
-                try:
-                    if use_teocoin_discount and discount_amount > 0 and not snapshot_updated:
-                        # Resolve tier from teacher profile if available
-                        tier = None
-                        tp = getattr(course.teacher, "teacher_profile", None)
-                        if tp:
-                            tier_obj = Tier.objects.filter(name=tp.staking_tier, is_active=True).first()
-                            if tier_obj:
-                                tier = {
-                                    "teacher_split_percent": tier_obj.teacher_split_percent,
-                                    "platform_split_percent": tier_obj.platform_split_percent,
-                                    "max_accept_discount_ratio": tier_obj.max_accept_discount_ratio,
-                                    "teo_bonus_multiplier": tier_obj.teo_bonus_multiplier,
-                                    "name": tier_obj.name,
-                                }
-
-                        breakdown = compute_discount_breakdown(
-                            price_eur=original_price,
-                            discount_percent=_Decimal(str(discount_percent if 'discount_percent' in locals() else 0)),
-                            tier=tier,
-                            accept_teo=False,
-                            accept_ratio=None,
-                        )
+                    logger.info(
+                        f"✅ Using existing applied discount: snapshot_id={existing_discount.id}, "
+                        f"discount_amount={discount_amount}, hold_id={existing_discount.wallet_hold_id}"
+                    )
+                else:
+                    # NO DISCOUNT APPLIED YET - User must call confirm_discount first
+                    logger.warning(
+                        f"⚠️ No applied discount found for user {user.id}, course {course_id}. "
+                        f"Frontend should call confirm_discount first."
+                    )
+                    # Return metadata to inform frontend
+                    teo_discount_not_applied = True
+                    # Proceed with full price for now
+                    discount_amount = Decimal("0")
+                    final_price = original_price
 
-                        from django.db import IntegrityError
-
-                        defaults_payload = {
-                            "course": course,
-                            "student": user,
-                            "teacher": course.teacher if getattr(course, "teacher", None) else None,
-                            "price_eur": original_price,
-                            "discount_percent": int(discount_percent) if 'discount_percent' in locals() else 0,
-                            "discount_amount_eur": discount_amount,
-                            "student_pay_eur": breakdown.get("student_pay_eur"),
-                            "teacher_eur": breakdown.get("teacher_eur"),
-                            "platform_eur": breakdown.get("platform_eur"),
-                            "teacher_teo": breakdown.get("teacher_teo"),
-                            "platform_teo": breakdown.get("platform_teo"),
-                            "absorption_policy": breakdown.get("absorption_policy", "none"),
-                            "teacher_accepted_teo": breakdown.get("teacher_teo", 0),
-                            "tier_name": (tier.get("name") if tier else None),
-                            "tier_teacher_split_percent": (tier.get("teacher_split_percent") if tier else None),
-                            "tier_platform_split_percent": (tier.get("platform_split_percent") if tier else None),
-                            "tier_max_accept_discount_ratio": (tier.get("max_accept_discount_ratio") if tier else None),
-                            "tier_teo_bonus_multiplier": (tier.get("teo_bonus_multiplier") if tier else None),
-                            
-                            # STRIPE CORRELATION FOR WEBHOOK
-                            "stripe_payment_intent_id": payment_intent.id,
-                        }
-                        try:
-                            # Try to find an existing local snapshot created by the frontend
-                            # (order_id like 'local_...' or synthetic) for same student/course
-                            # and attach the external payment id to avoid duplicates.
-                            from django.db import transaction as dj_transaction
-                            from django.db.models import Q
-
-                            attached = None
-                            with dj_transaction.atomic():
-                                # First try: match snapshots for same course where student is the current user
-                                # or student is missing, and with common local prefixes.
-                                attached = (
-                                    PaymentDiscountSnapshot.objects.select_for_update()
-                                    .filter(course=course, external_txn_id__isnull=True)
-                                    .filter(Q(student=user) | Q(student__isnull=True))
-                                    .filter(
-                                        Q(order_id__startswith='local_') |
-                                        Q(order_id__startswith='discount_synthetic_') |
-                                        Q(order_id__startswith='discount_') |
-                                        Q(order_id__startswith='checkout_session_')  # FIX: Include checkout session snapshots
-                                    )
-                                    .order_by('-created_at')
-                                    .first()
-                                )
-                                # If found, attach stripe id
-                                if attached:
-                                    attached.external_txn_id = str(payment_intent.id)
-                                    attached.source = 'stripe'
-                                    attached.stripe_payment_intent_id = payment_intent.id
-                                    attached.save(update_fields=['external_txn_id', 'source', 'stripe_payment_intent_id'])
-                            if attached:
-                                snap = attached
-                                created = False
-                            else:
-                                snap, created = get_or_create_payment_snapshot(order_id=str(payment_intent.id), defaults=defaults_payload, source="stripe")
-                        except Exception:
-                            # ALSO respect snapshot_updated flag in fallback to prevent duplicates
-                            if not snapshot_updated:
-                                snap, created = PaymentDiscountSnapshot.objects.get_or_create(order_id=str(payment_intent.id), defaults=defaults_payload)
-                            else:
-                                snap = existing_snapshot
-                                created = False
-                except Exception:
-                    logger.exception("Failed to persist PaymentDiscountSnapshot at intent creation")
-            except Exception as stripe_err:
-                logger.error(f"❌ Stripe API error: {stripe_err}")
+                logger.info(
+                    f"✅ TEO discount processed: discount=€{discount_amount}, final_price=€{final_price}"
+                )
+
+                logger.info(
+                    f"✅ TeoCoin discount calculated: {discount_percent}% off €{original_price}"
+                )
+                logger.info(
+                    f"💰 Student will pay €{final_price} (TEO deduction handled separately)"
+                )
+                logger.info(
+                    f"📋 TEO will be deducted by ApplyDiscountView to prevent double deduction"
+                )
+
+                # Teacher will be notified through the absorption dashboard
+
+            except Exception as e:
+                logger.error(f"Discount creation error: {e}")
                 return Response(
                     {
-                        "error": f"Stripe payment error: {str(stripe_err)}",
-                        "code": "STRIPE_API_ERROR",
+                        "error": "TeoCoin discount system error",
+                        "details": str(e),
+                        "code": "DISCOUNT_SYSTEM_ERROR",
                     },
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 )
 
-            return Response(
-                {
-                    "success": True,
-                    "client_secret": payment_intent.client_secret,
-                    "payment_intent_id": payment_intent.id,
-                    "pricing": {
-                        "original_price": str(original_price),
-                        "discount_amount": str(discount_amount),
-                        "final_price": str(final_price),
-                        "discount_percent": discount_percent,
-                    },
-                    "discount_request_id": discount_request_id,
-                    "course": {
-                        "title": course.title,
-                        "instructor": (
-                            course.teacher.username if course.teacher else "Unknown"
-                        ),
-                    },
-                },
-                status=status.HTTP_201_CREATED,
-            )
+        # Validate and set Stripe configuration with robust error handling
+        stripe_secret = settings.STRIPE_SECRET_KEY
 
-        except Exception as e:
-            logger.error(f"Payment intent creation error: {e}")
+        # Check for common configuration issues
+        if not stripe_secret:
+            logger.error("❌ STRIPE_SECRET_KEY is None or empty")
             return Response(
                 {
-                    "error": "Failed to create payment intent",
-                    "details": str(e),
-                    "code": "PAYMENT_INTENT_ERROR",
+                    "error": "Payment system not configured - missing secret key",
+                    "code": "STRIPE_KEY_MISSING",
                 },
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
-
-class ConfirmPaymentView(APIView):
-    """
-    Confirm successful payment and enroll student
-
-    POST /api/v1/courses/{course_id}/payment/confirm/
-    {
-        "payment_intent_id": "pi_...",
-        "process_discount": true
-    }
-    """
-
-    permission_classes = [IsAuthenticated]
-
-    def post(self, request, course_id):
-        try:
-            course = get_object_or_404(Course, id=course_id)
-            user = request.user
-            # Accept several possible keys that the frontend may send.
-            # Frontends can post different shapes (payment_intent, payment_intent_id, pi_id, intent_id).
-            payment_intent_id = (
-                request.data.get("payment_intent_id")
-                or request.data.get("payment_intent")
-                or request.data.get("pi_id")
-                or request.data.get("intent_id")
-                or request.data.get("pi")
+        if (
+            "your_str" in str(stripe_secret)
+            or "example" in str(stripe_secret).lower()
+        ):
+            logger.error(
+                f"❌ STRIPE_SECRET_KEY appears to be a placeholder: {str(stripe_secret)[:20]}..."
             )
-            # If payment_intent is an object/Stripe response, accept its `id` field
-            try:
-                if isinstance(payment_intent_id, dict) and payment_intent_id.get("id"):
-                    payment_intent_id = payment_intent_id.get("id")
-            except Exception:
-                pass
-            process_discount = request.data.get("process_discount", True)
-
-            # Diagnostic: log incoming payload shape and key fields to aid investigation
-            try:
-                logger.info(
-                    f"[ConfirmPayment] incoming payload keys={list(request.data.keys())} payment_intent_id={payment_intent_id} user_id={user.id} course_id={course_id} process_discount={process_discount}"
-                )
-            except Exception:
-                logger.debug("[ConfirmPayment] failed to log incoming payload summary")
-
-            if not payment_intent_id:
-                logger.error(f"ConfirmPaymentView: missing payment_intent id in payload: {request.data}")
+            # Try to get from environment directly as fallback
+            stripe_secret = os.getenv("STRIPE_SECRET_KEY")
+            if not stripe_secret or "your_str" in str(stripe_secret):
                 return Response(
                     {
-                        "error": "Payment intent ID required",
-                        "code": "MISSING_PAYMENT_INTENT",
+                        "error": "Payment system misconfigured - placeholder key detected",
+                        "code": "STRIPE_KEY_PLACEHOLDER",
                     },
-                    status=status.HTTP_400_BAD_REQUEST,
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 )
+            logger.warning("⚠️ Used fallback environment variable for Stripe key")
 
-            # Verify payment with Stripe
-            stripe.api_key = settings.STRIPE_SECRET_KEY
-            payment_intent = stripe.PaymentIntent.retrieve(payment_intent_id)
-
-            # Diagnostic: log Stripe PaymentIntent basic info (id, status, metadata keys)
-            try:
-                pi_meta = getattr(payment_intent, "metadata", {}) or {}
-                logger.info(
-                    f"[ConfirmPayment] Stripe PI retrieved: id={getattr(payment_intent, 'id', None)} status={getattr(payment_intent, 'status', None)} metadata_keys={list(pi_meta.keys())}"
-                )
-            except Exception:
-                logger.debug("[ConfirmPayment] failed to log Stripe PaymentIntent info")
+        if len(str(stripe_secret)) < 20:
+            logger.error(
+                f"❌ STRIPE_SECRET_KEY too short: {len(str(stripe_secret))} chars"
+            )
+            return Response(
+                {
+                    "error": "Payment system misconfigured - invalid key length",
+                    "code": "STRIPE_KEY_INVALID_LENGTH",
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
 
-            if payment_intent.status != "succeeded":
-                return Response(
-                    {
-                        "error": "Payment not completed",
-                        "payment_status": payment_intent.status,
-                        "code": "PAYMENT_NOT_COMPLETED",
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+        # Create Stripe payment intent for final price
+        logger.info(f"💳 Creating Stripe payment intent for €{final_price} (discount_amount={discount_amount})")
 
-            # Extract metadata
-            from decimal import Decimal
+        stripe.api_key = stripe_secret
+        logger.info(
+            f"🔑 Stripe API key set to: {str(stripe.api_key)[:15]}...{str(stripe.api_key)[-4:] if stripe.api_key else 'NONE'}"
+        )
 
-            metadata = payment_intent.metadata
-            discount_request_id = metadata.get("discount_request_id")
-            use_teocoin_discount = metadata.get("use_teocoin_discount") == "True"
-            original_price = Decimal(metadata.get("original_price", "0"))
-            discount_amount = Decimal(metadata.get("discount_amount", "0"))
-            metadata.get("student_address", "")
-
-            # Check if already enrolled
-            existing_enrollment = CourseEnrollment.objects.filter(
-                student=user, course=course
-            ).first()
-
-            if existing_enrollment:
-                logger.warning(
-                    f"[ConfirmPayment] user_id={user.id} already has enrollment id={existing_enrollment.pk} for course_id={course_id} - skipping creation"
-                )
-                return Response(
-                    {
-                        "error": "Already enrolled in this course",
-                        "enrollment_id": existing_enrollment.pk,
-                        "code": "ALREADY_ENROLLED",
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+        # Validate final price
+        if final_price <= 0:
+            logger.error(f"❌ Invalid final price: €{final_price}")
+            return Response(
+                {"error": "Invalid payment amount", "code": "INVALID_AMOUNT"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-            # Create enrollment with proper payment tracking
-            final_price = original_price - discount_amount
-            payment_method = "teocoin_discount" if use_teocoin_discount else "stripe"
+        intent_data = {
+            "amount": int(final_price * 100),  # Convert to cents
+            "currency": "eur",
+            "metadata": {
+                "course_id": course_id,
+                "user_id": user.id,
+                "original_price": str(original_price),
+                "discount_amount": str(discount_amount),
+                "discount_percent": discount_percent,
+                "use_teocoin_discount": str(use_teocoin_discount),
+                "student_address": student_address,
+            },
+        }
+
+        # If we previously detected insufficient TEO balance, expose it to frontend
+        if locals().get('teo_balance_insufficient', False):
+            intent_data["metadata"]["teo_balance_insufficient"] = "True"
+
+        # If TEO discount was not applied, inform frontend
+        if locals().get('teo_discount_not_applied', False):
+            intent_data["metadata"]["teo_discount_not_applied"] = "True"
+
+        # Add discount request ID if applicable
+        if discount_request_id:
+            intent_data["metadata"]["discount_request_id"] = str(
+                discount_request_id
+            )
 
-            enrollment = CourseEnrollment.objects.create(
+        # ISSUE-04A: Add correlation metadata for webhook lookup
+        # Look for existing applied discount snapshot for this user + course
+        existing_snapshot = None
+        if use_teocoin_discount and discount_amount > 0:
+            existing_snapshot = PaymentDiscountSnapshot.objects.filter(
                 student=user,
                 course=course,
-                payment_method=payment_method,
-                stripe_payment_intent_id=payment_intent_id,
-                amount_paid_eur=final_price,
-                original_price_eur=original_price,
-                discount_amount_eur=discount_amount,
-                teocoin_discount_request_id=discount_request_id,
-            )
-
-            # Diagnostic: log enrollment creation details
-            try:
-                logger.info(
-                    f"✅ Student enrolled: username={user.username} user_id={user.id} course_id={course_id} course_title={course.title} enrollment_id={getattr(enrollment,'pk',None)} payment_intent={payment_intent_id} final_price=€{final_price}"
-                )
-            except Exception:
-                logger.debug("[ConfirmPayment] failed to log enrollment creation details")
-
-            # CRITICAL: Capture TEO hold AFTER payment confirmed and enrollment created
-            if use_teocoin_discount and discount_amount > 0:
-                try:
-                    logger.info(
-                        f"💰 Payment confirmed, now capturing TEO hold: {discount_amount} TEO"
-                    )
-                    
-                    # FIRST: Find and update existing applied snapshot with stripe_payment_intent_id
-                    # This is critical for webhook correlation and settlement service
-                    applied_snapshot = PaymentDiscountSnapshot.objects.filter(
-                        student=user,
-                        course=course,
-                        status="applied",
-                        wallet_hold_id__isnull=False
-                    ).order_by('-created_at').first()
-                    
-                    if applied_snapshot:
-                        # Update snapshot with stripe_payment_intent_id for webhook correlation
-                        applied_snapshot.stripe_payment_intent_id = payment_intent_id
-                        applied_snapshot.external_txn_id = payment_intent_id
-                        applied_snapshot.save(update_fields=['stripe_payment_intent_id', 'external_txn_id'])
-                        logger.info(f"🔗 Updated snapshot {applied_snapshot.id} with stripe_payment_intent_id: {payment_intent_id}")
-                    
-                    # SECOND: Find the snapshot with updated stripe_payment_intent_id for capturing hold
-                    if not applied_snapshot:
-                        applied_snapshot = PaymentDiscountSnapshot.objects.filter(
-                            student=user,
-                            course=course,
-                            status="applied",
-                            wallet_hold_id__isnull=False,
-                            external_txn_id=payment_intent_id
-                        ).first()
-                    
-                    if applied_snapshot and applied_snapshot.wallet_hold_id:
-                        # Skip capture for R1.1 snapshots (those with decisions) - they handle TEO later
-                        if applied_snapshot.decision is not None:
-                            logger.info(f"🔗 Skipping immediate capture for R1.1 snapshot {applied_snapshot.id} - waiting for teacher decision")
-                        else:
-                            # CAPTURE THE HOLD: Convert hold to actual deduction (only for non-R1.1 snapshots)
-                            from services.wallet_hold_service import wallet_hold_service
-                            
-                            capture_success = wallet_hold_service.capture_hold(
-                                hold_id=applied_snapshot.wallet_hold_id,
-                                description=f"Payment confirmed for course: {course.title}",
-                                course=course
-                            )
-                            
-                            if capture_success:
-                                # Update snapshot status to CONFIRMED
-                                applied_snapshot.status = "confirmed"
-                                applied_snapshot.confirmed_at = timezone.now()
-                                applied_snapshot.wallet_capture_id = f"capture_{applied_snapshot.wallet_hold_id}"
-                                applied_snapshot.save(update_fields=["status", "confirmed_at", "wallet_capture_id"])
-                                
-                                logger.info(
-                                    f"✅ SUCCESS: TEO hold captured - {discount_amount} TEO "
-                                    f"(hold_id={applied_snapshot.wallet_hold_id}, snapshot_id={applied_snapshot.id})"
-                                )
-                            else:
-                                logger.error(
-                                    f"❌ FAILED: Could not capture TEO hold {applied_snapshot.wallet_hold_id} "
-                                    f"for payment {payment_intent_id}"
-                                )
-                                # Mark snapshot as failed
-                                applied_snapshot.status = "failed"
-                                applied_snapshot.failed_at = timezone.now()
-                                applied_snapshot.save(update_fields=["status", "failed_at"])
-                    else:
-                        logger.warning(
-                            f"⚠️ No applied TEO discount snapshot found for user {user.id}, course {course_id}. "
-                            f"This might indicate the discount was not properly applied before payment."
-                        )
-
-                except Exception as e:
-                    logger.error(f"❌ TeoCoin deduction error after payment: {e}")
-                    logger.error(
-                        f"❌ Course: {course.title}, User: {user.email}, Amount: {discount_amount} TEO"
-                    )
-
-            # Process teacher notification for discount decision
-            teacher_notification_sent = False
-            if use_teocoin_discount and discount_request_id and process_discount:
-                try:
-                    # Teacher has 2 hours to decide: Accept TEO vs Keep EUR
-                    # This is handled by the TeoCoin discount service
-                    teacher_notification_sent = True
-                    logger.info(
-                        f"📧 Teacher notification sent for discount request {discount_request_id}"
-                    )
-
-                except Exception as e:
-                    logger.error(f"Teacher notification error: {e}")
-
-            # Award purchase bonus TEO to student using clean database system
-            try:
-                # HOTFIX: Check if purchase bonus is enabled
-                if not getattr(settings, 'PURCHASE_BONUS_ENABLED', False):
-                    logger.info(
-                        f"🚫 Purchase bonus skipped (flag OFF) for order {metadata.get('order_id', 'unknown')}",
-                        extra={
-                            "reason": "bonus_skipped_flag_off",
-                            "user_id": user.id,
-                            "course_id": course.id,
-                            "flag_value": False,
-                        }
-                    )
-                else:
-                    from decimal import Decimal
-
-                    # 5 TEO bonus for course purchase
-                    purchase_bonus = Decimal("5.0")
-                    success = hybrid_teocoin_service.add_balance(
-                        user=user,
-                        amount=purchase_bonus,
-                        transaction_type="course_bonus",
-                        description=f"Purchase bonus for course: {course.title}",
-                        course=course,
-                    )
-                    if success:
-                        logger.info(
-                            f"🪙 {purchase_bonus} TEO purchase bonus awarded to {user.email}"
-                        )
-                    else:
-                        logger.error(f"Failed to award purchase bonus to {user.email}")
-            except Exception as e:
-                logger.error(f"TEO purchase bonus error: {e}")
-
-            # Persist discount snapshot idempotently
-            try:
-                # Determine discount_percent and accept flags
-                discount_percent = int(metadata.get("discount_percent", 0))
-                # FIX: Auto-detect TEO discount from payment metadata instead of relying on request parameter
-                use_teocoin_discount = metadata.get("use_teocoin_discount") == "True"
-                accept_teo = use_teocoin_discount and discount_amount > 0
-                accept_ratio = request.data.get("accept_ratio", None)
-                if accept_ratio is not None:
-                    try:
-                        accept_ratio = _Decimal(str(accept_ratio))
-                    except Exception:
-                        accept_ratio = None
-
+                status__in=["applied", "pending"],
+                wallet_hold_id__isnull=False
+            ).order_by('-created_at').first()
+
+            if existing_snapshot:
+                # Add critical metadata for webhook correlation
+                intent_data["metadata"]["discount_snapshot_id"] = str(existing_snapshot.id)
+                intent_data["metadata"]["hold_id"] = str(existing_snapshot.wallet_hold_id)
+                intent_data["metadata"]["order_id"] = str(existing_snapshot.order_id) if existing_snapshot.order_id else ""
+                logger.info(f"🔗 Added correlation metadata: snapshot_id={existing_snapshot.id}, hold_id={existing_snapshot.wallet_hold_id}")
+
+        logger.info(f"💳 Stripe intent data: {intent_data}")
+
+        return PaymentIntentPlan(
+            course=course,
+            user=user,
+            intent_data=intent_data,
+            use_teocoin_discount=use_teocoin_discount,
+            discount_percent=discount_percent,
+            original_price=original_price,
+            discount_amount=discount_amount,
+            final_price=final_price,
+            discount_request_id=discount_request_id,
+            existing_snapshot=existing_snapshot,
+        )
+
+    def record_intent(self, plan, payment_intent):
+        """Attach the created payment intent to the discount snapshots"""
+        course, user = plan.course, plan.user
+        use_teocoin_discount = plan.use_teocoin_discount
+        discount_percent = plan.discount_percent
+        original_price = plan.original_price
+        discount_amount = plan.discount_amount
+        existing_snapshot = plan.existing_snapshot
+
+        # ISSUE-04A: Immediately persist stripe_payment_intent_id in existing snapshot  
+        snapshot_updated = False
+        if existing_snapshot:
+            existing_snapshot.stripe_payment_intent_id = payment_intent.id
+            existing_snapshot.external_txn_id = payment_intent.id
+            existing_snapshot.save(update_fields=['stripe_payment_intent_id', 'external_txn_id'])
+            logger.info(f"🔗 Updated snapshot {existing_snapshot.id} with stripe_payment_intent_id: {payment_intent.id}")
+            snapshot_updated = True
+
+        # Persist a PaymentDiscountSnapshot now (idempotent). This ensures
+        # a snapshot exists as soon as the payment intent is created so
+        # teacher notifications and frontend can rely on it.
+        # SKIP if we already updated an existing snapshot to prevent duplicates
+        try:
+            if use_teocoin_discount and discount_amount > 0 and not snapshot_updated:
                 # Resolve tier from teacher profile if available
                 tier = None
                 tp = getattr(course.teacher, "teacher_profile", None)
@@ -715,25 +369,26 @@ class ConfirmPaymentView(APIView):
 
                 breakdown = compute_discount_breakdown(
                     price_eur=original_price,
-                    discount_percent=_Decimal(str(discount_percent)),
+                    discount_percent=_Decimal(str(discount_percent if 'discount_percent' in locals() else 0)),
                     tier=tier,
-                    accept_teo=accept_teo,
-                    accept_ratio=accept_ratio,
+                    accept_teo=False,
+                    accept_ratio=None,
                 )
 
-                # Persist snapshot idempotently; handle race via IntegrityError
+                from django.db import IntegrityError
+
                 defaults_payload = {
                     "course": course,
                     "student": user,
                     "teacher": course.teacher if getattr(course, "teacher", None) else None,
                     "price_eur": original_price,
-                    "discount_percent": discount_percent,
+                    "discount_percent": int(discount_percent) if 'discount_percent' in locals() else 0,
                     "discount_amount_eur": discount_amount,
-                    "student_pay_eur": breakdown["student_pay_eur"],
-                    "teacher_eur": breakdown["teacher_eur"],
-                    "platform_eur": breakdown["platform_eur"],
-                    "teacher_teo": breakdown["teacher_teo"],
-                    "platform_teo": breakdown["platform_teo"],
+                    "student_pay_eur": breakdown.get("student_pay_eur"),
+                    "teacher_eur": breakdown.get("teacher_eur"),
+                    "platform_eur": breakdown.get("platform_eur"),
+                    "teacher_teo": breakdown.get("teacher_teo"),
+                    "platform_teo": breakdown.get("platform_teo"),
                     "absorption_policy": breakdown.get("absorption_policy", "none"),
                     "teacher_accepted_teo": breakdown.get("teacher_teo", 0),
                     "tier_name": (tier.get("name") if tier else None),
@@ -741,16 +396,21 @@ class ConfirmPaymentView(APIView):
                     "tier_platform_split_percent": (tier.get("platform_split_percent") if tier else None),
                     "tier_max_accept_discount_ratio": (tier.get("max_accept_discount_ratio") if tier else None),
                     "tier_teo_bonus_multiplier": (tier.get("teo_bonus_multiplier") if tier else None),
+
+                    # STRIPE CORRELATION FOR WEBHOOK
+                    "stripe_payment_intent_id": payment_intent.id,
                 }
                 try:
-                    # If a local snapshot exists for this student/course, attach the
-                    # external payment_intent id to that snapshot instead of creating
-                    # a new one with the stripe id.
+                    # Try to find an existing local snapshot created by the frontend
+                    # (order_id like 'local_...' or synthetic) for same student/course
+                    # and attach the external payment id to avoid duplicates.
                     from django.db import transaction as dj_transaction
                     from django.db.models import Q
 
                     attached = None
                     with dj_transaction.atomic():
+                        # First try: match snapshots for same course where student is the current user
+                        # or student is missing, and with common local prefixes.
                         attached = (
                             PaymentDiscountSnapshot.objects.select_for_update()
                             .filter(course=course, external_txn_id__isnull=True)
@@ -764,169 +424,584 @@ class ConfirmPaymentView(APIView):
                             .order_by('-created_at')
                             .first()
                         )
+                        # If found, attach stripe id
                         if attached:
-                            attached.external_txn_id = str(payment_intent_id)
+                            attached.external_txn_id = str(payment_intent.id)
                             attached.source = 'stripe'
-                            attached.save(update_fields=['external_txn_id', 'source'])
+                            attached.stripe_payment_intent_id = payment_intent.id
+                            attached.save(update_fields=['external_txn_id', 'source', 'stripe_payment_intent_id'])
                     if attached:
                         snap = attached
                         created = False
                     else:
-                        # R1.1 Fix: Use apply_discount_and_snapshot to create snapshot WITH decision atomically
-                        logger.info(f"🔍 R1.1 Fix evaluation: accept_teo={accept_teo}, teacher={course.teacher.username if course.teacher else None}, teacher_teo={breakdown.get('teacher_teo', 0)}")
-                        
-                        if accept_teo and course.teacher and breakdown.get("teacher_teo", 0) > 0:
-                            logger.info(f"✅ Using R1.1 Fix - creating snapshot with decision atomically")
-                            try:
-                                # Create snapshot + decision atomically using R1.1 pattern
-                                result = apply_discount_and_snapshot(
-                                    student_user_id=user.id,
-                                    teacher_id=course.teacher.id,
-                                    course_id=course.id,
-                                    teo_cost=discount_amount,  # Total discount amount in TEO
-                                    offered_teacher_teo=_Decimal(str(breakdown["teacher_teo"])),
-                                    stripe_payment_intent_id=str(payment_intent_id)
-                                )
-                                # Get the created snapshot
-                                snap = PaymentDiscountSnapshot.objects.get(id=result["snapshot_id"])
-                                created = True
-                                logger.info(f"✅ R1.1 Fix success - created snapshot {snap.id} with decision {result['pending_decision_id']}")
-                            except Exception as e:
-                                logger.error(f"❌ R1.1 Fix failed with exception: {e} - falling back to non-R1.1")
-                                # Fallback to non-R1.1 on any error
-                                snap, created = get_or_create_payment_snapshot(order_id=str(payment_intent_id), defaults=defaults_payload, source="stripe")
-                        else:
-                            logger.warning(f"❌ R1.1 Fix conditions not met - using fallback (accept_teo={accept_teo}, teacher={course.teacher.username if course.teacher else None}, teacher_teo={breakdown.get('teacher_teo', 0)})")
-                            # Fallback to non-R1.1 for non-TEO transactions
-                            snap, created = get_or_create_payment_snapshot(order_id=str(payment_intent_id), defaults=defaults_payload, source="stripe")
+                        snap, created = get_or_create_payment_snapshot(order_id=str(payment_intent.id), defaults=defaults_payload, source="stripe")
                 except Exception:
-                    snap, created = PaymentDiscountSnapshot.objects.get_or_create(order_id=str(payment_intent_id), defaults=defaults_payload)
+                    # ALSO respect snapshot_updated flag in fallback to prevent duplicates
+                    if not snapshot_updated:
+                        snap, created = PaymentDiscountSnapshot.objects.get_or_create(order_id=str(payment_intent.id), defaults=defaults_payload)
+                    else:
+                        snap = existing_snapshot
+                        created = False
+        except Exception:
+            logger.exception("Failed to persist PaymentDiscountSnapshot at intent creation")
+
+    def intent_response(self, plan, payment_intent):
+        return Response(
+            {
+                "success": True,
+                "client_secret": payment_intent.client_secret,
+                "payment_intent_id": payment_intent.id,
+                "pricing": {
+                    "original_price": str(plan.original_price),
+                    "discount_amount": str(plan.discount_amount),
+                    "final_price": str(plan.final_price),
+                    "discount_percent": plan.discount_percent,
+                },
+                "discount_request_id": plan.discount_request_id,
+                "course": {
+                    "title": plan.course.title,
+                    "instructor": (
+                        plan.course.teacher.username if plan.course.teacher else "Unknown"
+                    ),
+                },
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    def stripe_error(self, stripe_err):
+        logger.error(f"❌ Stripe API error: {stripe_err}")
+        return Response(
+            {
+                "error": f"Stripe payment error: {str(stripe_err)}",
+                "code": "STRIPE_API_ERROR",
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+    def intent_error(self, e):
+        logger.error(f"Payment intent creation error: {e}")
+        return Response(
+            {
+                "error": "Failed to create payment intent",
+                "details": str(e),
+                "code": "PAYMENT_INTENT_ERROR",
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+class CreatePaymentIntentAsyncView(AsyncAPIView, CreatePaymentIntentView):
+    """
+    CreatePaymentIntentView for ASGI workers (ASYNC_IO_VIEWS): the intent is
+    created with Stripe's async client, the database work runs in a thread
+    """
 
-                # Structured logging for confirm snapshot
-                try:
-                    logger.info("discount_confirm", extra={
-                        "event": "discount_confirm",
-                        "order_id": str(payment_intent_id),
-                        "user_id": user.id,
-                        "course_id": course_id,
-                        "teacher_id": course.teacher.id if getattr(course, "teacher", None) else None,
-                        "student_id": user.id,
-                        "discount_percent": discount_percent,
-                        "accept_teo": accept_teo,
-                        "accept_ratio": str(accept_ratio) if accept_ratio is not None else None,
-                        "tier_name": (tier.get("name") if tier else None),
-                        "created": created,
-                        "snapshot_id": getattr(snap, "id", None),
-                    })
-                except Exception:
-                    logger.debug("discount_confirm logging failed")
+    async def post(self, request, course_id):
+        try:
+            plan = await sync_to_async(self.plan_intent)(request, course_id)
+            if isinstance(plan, Response):
+                return plan
 
-                # Ensure teacher receives an in-app notification for this snapshot
-                try:
-                    # Compute teacher_bonus from tier multiplier if available
-                    teacher_teo_decimal = breakdown.get("teacher_teo", 0)
-                    teacher_bonus = 0
-                    try:
-                        mult = tier.get("teo_bonus_multiplier") if tier else None
-                        if mult:
-                            # if teacher_teo includes bonus, extract bonus portion
-                            teacher_bonus = float(Decimal(str(teacher_teo_decimal)) - (Decimal(str(teacher_teo_decimal)) / Decimal(str(mult))))
-                    except Exception:
-                        teacher_bonus = 0
-
-                    # expiration: 24 hours from snapshot creation
-                    expires_at = (snap.created_at + timedelta(hours=24)) if getattr(snap, 'created_at', None) else (timezone.now() + timedelta(hours=24))
-
-                    # Log the notify call with offered preview when possible
-                    try:
-                        # Use the module-level compute_discount_breakdown already imported
-                        offered_preview = compute_discount_breakdown(
-                            price_eur=snap.price_eur,
-                            discount_percent=snap.discount_percent,
-                            tier=None,
-                            accept_teo=True,
-                            accept_ratio=1,
+            try:
+                payment_intent = await stripe.PaymentIntent.create_async(**plan.intent_data)
+                logger.info(f"✅ Stripe payment intent created: {payment_intent.id}")
+                await sync_to_async(self.record_intent)(plan, payment_intent)
+            except Exception as stripe_err:
+                return self.stripe_error(stripe_err)
+
+            return self.intent_response(plan, payment_intent)
+
+        except Exception as e:
+            return self.intent_error(e)
+
+
+class ConfirmPaymentView(APIView):
+    """
+    Confirm successful payment and enroll student
+
+    POST /api/v1/courses/{course_id}/payment/confirm/
+    {
+        "payment_intent_id": "pi_...",
+        "process_discount": true
+    }
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, course_id):
+        try:
+            confirmation = self.confirmation_request(request, course_id)
+            if isinstance(confirmation, Response):
+                return confirmation
+            course, payment_intent_id, process_discount = confirmation
+
+            # Verify payment with Stripe
+            stripe.api_key = settings.STRIPE_SECRET_KEY
+            payment_intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+
+            return self.complete_payment(
+                request, course_id, course, payment_intent_id, process_discount, payment_intent
+            )
+        except Exception as e:
+            return self.confirmation_error(e)
+
+    def confirmation_request(self, request, course_id):
+        """(course, payment_intent_id, process_discount), else an error Response"""
+        course = get_object_or_404(Course, id=course_id)
+        user = request.user
+        # Accept several possible keys that the frontend may send.
+        # Frontends can post different shapes (payment_intent, payment_intent_id, pi_id, intent_id).
+        payment_intent_id = (
+            request.data.get("payment_intent_id")
+            or request.data.get("payment_intent")
+            or request.data.get("pi_id")
+            or request.data.get("intent_id")
+            or request.data.get("pi")
+        )
+        # If payment_intent is an object/Stripe response, accept its `id` field
+        try:
+            if isinstance(payment_intent_id, dict) and payment_intent_id.get("id"):
+                payment_intent_id = payment_intent_id.get("id")
+        except Exception:
+            pass
+        process_discount = request.data.get("process_discount", True)
+
+        # Diagnostic: log incoming payload shape and key fields to aid investigation
+        try:
+            logger.info(
+                f"[ConfirmPayment] incoming payload keys={list(request.data.keys())} payment_intent_id={payment_intent_id} user_id={user.id} course_id={course_id} process_discount={process_discount}"
+            )
+        except Exception:
+            logger.debug("[ConfirmPayment] failed to log incoming payload summary")
+
+        if not payment_intent_id:
+            logger.error(f"ConfirmPaymentView: missing payment_intent id in payload: {request.data}")
+            return Response(
+                {
+                    "error": "Payment intent ID required",
+                    "code": "MISSING_PAYMENT_INTENT",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return course, payment_intent_id, process_discount
+
+    def complete_payment(
+        self, request, course_id, course, payment_intent_id, process_discount, payment_intent
+    ):
+        """Enroll the student once Stripe reports the payment as succeeded"""
+        user = request.user
+
+        # Diagnostic: log Stripe PaymentIntent basic info (id, status, metadata keys)
+        try:
+            pi_meta = getattr(payment_intent, "metadata", {}) or {}
+            logger.info(
+                f"[ConfirmPayment] Stripe PI retrieved: id={getattr(payment_intent, 'id', None)} status={getattr(payment_intent, 'status', None)} metadata_keys={list(pi_meta.keys())}"
+            )
+        except Exception:
+            logger.debug("[ConfirmPayment] failed to log Stripe PaymentIntent info")
+
+        if payment_intent.status != "succeeded":
+            return Response(
+                {
+                    "error": "Payment not completed",
+                    "payment_status": payment_intent.status,
+                    "code": "PAYMENT_NOT_COMPLETED",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Extract metadata
+        from decimal import Decimal
+
+        metadata = payment_intent.metadata
+        discount_request_id = metadata.get("discount_request_id")
+        use_teocoin_discount = metadata.get("use_teocoin_discount") == "True"
+        original_price = Decimal(metadata.get("original_price", "0"))
+        discount_amount = Decimal(metadata.get("discount_amount", "0"))
+        metadata.get("student_address", "")
+
+        # Check if already enrolled
+        existing_enrollment = CourseEnrollment.objects.filter(
+            student=user, course=course
+        ).first()
+
+        if existing_enrollment:
+            logger.warning(
+                f"[ConfirmPayment] user_id={user.id} already has enrollment id={existing_enrollment.pk} for course_id={course_id} - skipping creation"
+            )
+            return Response(
+                {
+                    "error": "Already enrolled in this course",
+                    "enrollment_id": existing_enrollment.pk,
+                    "code": "ALREADY_ENROLLED",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Create enrollment with proper payment tracking
+        final_price = original_price - discount_amount
+        payment_method = "teocoin_discount" if use_teocoin_discount else "stripe"
+
+        enrollment = CourseEnrollment.objects.create(
+            student=user,
+            course=course,
+            payment_method=payment_method,
+            stripe_payment_intent_id=payment_intent_id,
+            amount_paid_eur=final_price,
+            original_price_eur=original_price,
+            discount_amount_eur=discount_amount,
+            teocoin_discount_request_id=discount_request_id,
+        )
+
+        # Diagnostic: log enrollment creation details
+        try:
+            logger.info(
+                f"✅ Student enrolled: username={user.username} user_id={user.id} course_id={course_id} course_title={course.title} enrollment_id={getattr(enrollment,'pk',None)} payment_intent={payment_intent_id} final_price=€{final_price}"
+            )
+        except Exception:
+            logger.debug("[ConfirmPayment] failed to log enrollment creation details")
+
+        # CRITICAL: Capture TEO hold AFTER payment confirmed and enrollment created
+        if use_teocoin_discount and discount_amount > 0:
+            try:
+                logger.info(
+                    f"💰 Payment confirmed, now capturing TEO hold: {discount_amount} TEO"
+                )
+
+                # FIRST: Find and update existing applied snapshot with stripe_payment_intent_id
+                # This is critical for webhook correlation and settlement service
+                applied_snapshot = PaymentDiscountSnapshot.objects.filter(
+                    student=user,
+                    course=course,
+                    status="applied",
+                    wallet_hold_id__isnull=False
+                ).order_by('-created_at').first()
+
+                if applied_snapshot:
+                    # Update snapshot with stripe_payment_intent_id for webhook correlation
+                    applied_snapshot.stripe_payment_intent_id = payment_intent_id
+                    applied_snapshot.external_txn_id = payment_intent_id
+                    applied_snapshot.save(update_fields=['stripe_payment_intent_id', 'external_txn_id'])
+                    logger.info(f"🔗 Updated snapshot {applied_snapshot.id} with stripe_payment_intent_id: {payment_intent_id}")
+
+                # SECOND: Find the snapshot with updated stripe_payment_intent_id for capturing hold
+                if not applied_snapshot:
+                    applied_snapshot = PaymentDiscountSnapshot.objects.filter(
+                        student=user,
+                        course=course,
+                        status="applied",
+                        wallet_hold_id__isnull=False,
+                        external_txn_id=payment_intent_id
+                    ).first()
+
+                if applied_snapshot and applied_snapshot.wallet_hold_id:
+                    # Skip capture for R1.1 snapshots (those with decisions) - they handle TEO later
+                    if applied_snapshot.decision is not None:
+                        logger.info(f"🔗 Skipping immediate capture for R1.1 snapshot {applied_snapshot.id} - waiting for teacher decision")
+                    else:
+                        # CAPTURE THE HOLD: Convert hold to actual deduction (only for non-R1.1 snapshots)
+                        from services.wallet_hold_service import wallet_hold_service
+
+                        capture_success = wallet_hold_service.capture_hold(
+                            hold_id=applied_snapshot.wallet_hold_id,
+                            description=f"Payment confirmed for course: {course.title}",
+                            course=course
                         )
-                        offered_teacher_preview = offered_preview.get("teacher_teo")
-                    except Exception:
-                        offered_teacher_preview = breakdown.get("teacher_teo", 0)
-
-                    try:
-                        logger.info("discount_notify_call", extra={
-                            "event": "discount_notify_call",
-                            "order_id": getattr(snap, "order_id", None),
-                            "snapshot_id": getattr(snap, "id", None),
-                            "offered_teacher_teo": str(offered_teacher_preview),
-                        })
-                    except Exception:
-                        pass
-
-                    # Ensure a single absorption opportunity exists for this snapshot
-                    try:
-                        from rewards.models import TeacherDiscountAbsorption
-
-                        if snap and snap.id:
-                            TeacherDiscountAbsorption.objects.update_or_create(
-                                teacher=snap.teacher,
-                                course=snap.course,
-                                student=snap.student,
-                                discount_amount_eur=snap.discount_amount_eur,
-                                defaults={
-                                    "course_price_eur": getattr(snap, "price_eur", 0),
-                                    "discount_percentage": int(getattr(snap, "discount_percent", 0) or 0),
-                                    "teo_used_by_student": getattr(snap, "teacher_teo", 0) or 0,
-                                    "teacher_commission_rate": getattr(snap, "tier_teacher_split_percent", 0) or 0,
-                                    "expires_at": expires_at,
-                                },
+
+                        if capture_success:
+                            # Update snapshot status to CONFIRMED
+                            applied_snapshot.status = "confirmed"
+                            applied_snapshot.confirmed_at = timezone.now()
+                            applied_snapshot.wallet_capture_id = f"capture_{applied_snapshot.wallet_hold_id}"
+                            applied_snapshot.save(update_fields=["status", "confirmed_at", "wallet_capture_id"])
+
+                            logger.info(
+                                f"✅ SUCCESS: TEO hold captured - {discount_amount} TEO "
+                                f"(hold_id={applied_snapshot.wallet_hold_id}, snapshot_id={applied_snapshot.id})"
                             )
-                    except Exception:
-                        pass
-
-                    teocoin_notification_service.notify_teacher_discount_pending(
-                        teacher=snap.teacher,
-                        student=snap.student,
-                        course_title=snap.course.title if snap.course else "",
-                        discount_percent=int(snap.discount_percent or 0),
-                        teo_cost=float(breakdown.get("teacher_teo", 0)),
-                        teacher_bonus=teacher_bonus,
-                        request_id=snap.id,
-                        expires_at=expires_at,
-                        offered_teacher_teo=float(offered_teacher_preview) if offered_teacher_preview is not None else None,
+                        else:
+                            logger.error(
+                                f"❌ FAILED: Could not capture TEO hold {applied_snapshot.wallet_hold_id} "
+                                f"for payment {payment_intent_id}"
+                            )
+                            # Mark snapshot as failed
+                            applied_snapshot.status = "failed"
+                            applied_snapshot.failed_at = timezone.now()
+                            applied_snapshot.save(update_fields=["status", "failed_at"])
+                else:
+                    logger.warning(
+                        f"⚠️ No applied TEO discount snapshot found for user {user.id}, course {course_id}. "
+                        f"This might indicate the discount was not properly applied before payment."
                     )
-                except Exception as e:
-                    logger.error(f"Failed to send teocoin teacher notification for snapshot {getattr(snap,'id',None)}: {e}")
 
             except Exception as e:
-                logger.error(f"Payment confirmation error: {e}")
-                return Response(
-                    {
-                        "error": "Failed to confirm payment",
-                        "details": str(e),
-                        "code": "PAYMENT_CONFIRMATION_ERROR",
-                    },
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                logger.error(f"❌ TeoCoin deduction error after payment: {e}")
+                logger.error(
+                    f"❌ Course: {course.title}, User: {user.email}, Amount: {discount_amount} TEO"
                 )
-            # If we reached this point (i.e. not inside the inner exception block),
-            # the confirmation flow completed successfully. Provide a structured
-            # success response (this code path was previously unreachable due to
-            # being nested under the exception return block).
+
+        # Process teacher notification for discount decision
+        teacher_notification_sent = False
+        if use_teocoin_discount and discount_request_id and process_discount:
             try:
-                return Response(
-                    {
-                        "success": True,
-                        "status": "enrolled",
-                        "enrollment_id": getattr(enrollment, "pk", None),
-                        "course_id": course_id,
-                        "snapshot_id": getattr(snap, "id", None),
-                    },
-                    status=status.HTTP_200_OK,
+                # Teacher has 2 hours to decide: Accept TEO vs Keep EUR
+                # This is handled by the TeoCoin discount service
+                teacher_notification_sent = True
+                logger.info(
+                    f"📧 Teacher notification sent for discount request {discount_request_id}"
+                )
+
+            except Exception as e:
+                logger.error(f"Teacher notification error: {e}")
+
+        # Award purchase bonus TEO to student using clean database system
+        try:
+            # HOTFIX: Check if purchase bonus is enabled
+            if not getattr(settings, 'PURCHASE_BONUS_ENABLED', False):
+                logger.info(
+                    f"🚫 Purchase bonus skipped (flag OFF) for order {metadata.get('order_id', 'unknown')}",
+                    extra={
+                        "reason": "bonus_skipped_flag_off",
+                        "user_id": user.id,
+                        "course_id": course.id,
+                        "flag_value": False,
+                    }
                 )
+            else:
+                from decimal import Decimal
+
+                # 5 TEO bonus for course purchase
+                purchase_bonus = Decimal("5.0")
+                success = hybrid_teocoin_service.add_balance(
+                    user=user,
+                    amount=purchase_bonus,
+                    transaction_type="course_bonus",
+                    description=f"Purchase bonus for course: {course.title}",
+                    course=course,
+                )
+                if success:
+                    logger.info(
+                        f"🪙 {purchase_bonus} TEO purchase bonus awarded to {user.email}"
+                    )
+                else:
+                    logger.error(f"Failed to award purchase bonus to {user.email}")
+        except Exception as e:
+            logger.error(f"TEO purchase bonus error: {e}")
+
+        # Persist discount snapshot idempotently
+        try:
+            # Determine discount_percent and accept flags
+            discount_percent = int(metadata.get("discount_percent", 0))
+            # FIX: Auto-detect TEO discount from payment metadata instead of relying on request parameter
+            use_teocoin_discount = metadata.get("use_teocoin_discount") == "True"
+            accept_teo = use_teocoin_discount and discount_amount > 0
+            accept_ratio = request.data.get("accept_ratio", None)
+            if accept_ratio is not None:
+                try:
+                    accept_ratio = _Decimal(str(accept_ratio))
+                except Exception:
+                    accept_ratio = None
+
+            # Resolve tier from teacher profile if available
+            tier = None
+            tp = getattr(course.teacher, "teacher_profile", None)
+            if tp:
+                tier_obj = Tier.objects.filter(name=tp.staking_tier, is_active=True).first()
+                if tier_obj:
+                    tier = {
+                        "teacher_split_percent": tier_obj.teacher_split_percent,
+                        "platform_split_percent": tier_obj.platform_split_percent,
+                        "max_accept_discount_ratio": tier_obj.max_accept_discount_ratio,
+                        "teo_bonus_multiplier": tier_obj.teo_bonus_multiplier,
+                        "name": tier_obj.name,
+                    }
+
+            breakdown = compute_discount_breakdown(
+                price_eur=original_price,
+                discount_percent=_Decimal(str(discount_percent)),
+                tier=tier,
+                accept_teo=accept_teo,
+                accept_ratio=accept_ratio,
+            )
+
+            # Persist snapshot idempotently; handle race via IntegrityError
+            defaults_payload = {
+                "course": course,
+                "student": user,
+                "teacher": course.teacher if getattr(course, "teacher", None) else None,
+                "price_eur": original_price,
+                "discount_percent": discount_percent,
+                "discount_amount_eur": discount_amount,
+                "student_pay_eur": breakdown["student_pay_eur"],
+                "teacher_eur": breakdown["teacher_eur"],
+                "platform_eur": breakdown["platform_eur"],
+                "teacher_teo": breakdown["teacher_teo"],
+                "platform_teo": breakdown["platform_teo"],
+                "absorption_policy": breakdown.get("absorption_policy", "none"),
+                "teacher_accepted_teo": breakdown.get("teacher_teo", 0),
+                "tier_name": (tier.get("name") if tier else None),
+                "tier_teacher_split_percent": (tier.get("teacher_split_percent") if tier else None),
+                "tier_platform_split_percent": (tier.get("platform_split_percent") if tier else None),
+                "tier_max_accept_discount_ratio": (tier.get("max_accept_discount_ratio") if tier else None),
+                "tier_teo_bonus_multiplier": (tier.get("teo_bonus_multiplier") if tier else None),
+            }
+            try:
+                # If a local snapshot exists for this student/course, attach the
+                # external payment_intent id to that snapshot instead of creating
+                # a new one with the stripe id.
+                from django.db import transaction as dj_transaction
+                from django.db.models import Q
+
+                attached = None
+                with dj_transaction.atomic():
+                    attached = (
+                        PaymentDiscountSnapshot.objects.select_for_update()
+                        .filter(course=course, external_txn_id__isnull=True)
+                        .filter(Q(student=user) | Q(student__isnull=True))
+                        .filter(
+                            Q(order_id__startswith='local_') |
+                            Q(order_id__startswith='discount_synthetic_') |
+                            Q(order_id__startswith='discount_') |
+                            Q(order_id__startswith='checkout_session_')  # FIX: Include checkout session snapshots
+                        )
+                        .order_by('-created_at')
+                        .first()
+                    )
+                    if attached:
+                        attached.external_txn_id = str(payment_intent_id)
+                        attached.source = 'stripe'
+                        attached.save(update_fields=['external_txn_id', 'source'])
+                if attached:
+                    snap = attached
+                    created = False
+                else:
+                    # R1.1 Fix: Use apply_discount_and_snapshot to create snapshot WITH decision atomically
+                    logger.info(f"🔍 R1.1 Fix evaluation: accept_teo={accept_teo}, teacher={course.teacher.username if course.teacher else None}, teacher_teo={breakdown.get('teacher_teo', 0)}")
+
+                    if accept_teo and course.teacher and breakdown.get("teacher_teo", 0) > 0:
+                        logger.info(f"✅ Using R1.1 Fix - creating snapshot with decision atomically")
+                        try:
+                            # Create snapshot + decision atomically using R1.1 pattern
+                            result = apply_discount_and_snapshot(
+                                student_user_id=user.id,
+                                teacher_id=course.teacher.id,
+                                course_id=course.id,
+                                teo_cost=discount_amount,  # Total discount amount in TEO
+                                offered_teacher_teo=_Decimal(str(breakdown["teacher_teo"])),
+                                stripe_payment_intent_id=str(payment_intent_id)
+                            )
+                            # Get the created snapshot
+                            snap = PaymentDiscountSnapshot.objects.get(id=result["snapshot_id"])
+                            created = True
+                            logger.info(f"✅ R1.1 Fix success - created snapshot {snap.id} with decision {result['pending_decision_id']}")
+                        except Exception as e:
+                            logger.error(f"❌ R1.1 Fix failed with exception: {e} - falling back to non-R1.1")
+                            # Fallback to non-R1.1 on any error
+                            snap, created = get_or_create_payment_snapshot(order_id=str(payment_intent_id), defaults=defaults_payload, source="stripe")
+                    else:
+                        logger.warning(f"❌ R1.1 Fix conditions not met - using fallback (accept_teo={accept_teo}, teacher={course.teacher.username if course.teacher else None}, teacher_teo={breakdown.get('teacher_teo', 0)})")
+                        # Fallback to non-R1.1 for non-TEO transactions
+                        snap, created = get_or_create_payment_snapshot(order_id=str(payment_intent_id), defaults=defaults_payload, source="stripe")
+            except Exception:
+                snap, created = PaymentDiscountSnapshot.objects.get_or_create(order_id=str(payment_intent_id), defaults=defaults_payload)
+
+            # Structured logging for confirm snapshot
+            try:
+                logger.info("discount_confirm", extra={
+                    "event": "discount_confirm",
+                    "order_id": str(payment_intent_id),
+                    "user_id": user.id,
+                    "course_id": course_id,
+                    "teacher_id": course.teacher.id if getattr(course, "teacher", None) else None,
+                    "student_id": user.id,
+                    "discount_percent": discount_percent,
+                    "accept_teo": accept_teo,
+                    "accept_ratio": str(accept_ratio) if accept_ratio is not None else None,
+                    "tier_name": (tier.get("name") if tier else None),
+                    "created": created,
+                    "snapshot_id": getattr(snap, "id", None),
+                })
             except Exception:
-                # Defensive fallback: ensure we still return a generic success when variables are missing
-                return Response({"success": True, "status": "enrolled"}, status=status.HTTP_200_OK)
+                logger.debug("discount_confirm logging failed")
+
+            # Ensure teacher receives an in-app notification for this snapshot
+            try:
+                # Compute teacher_bonus from tier multiplier if available
+                teacher_teo_decimal = breakdown.get("teacher_teo", 0)
+                teacher_bonus = 0
+                try:
+                    mult = tier.get("teo_bonus_multiplier") if tier else None
+                    if mult:
+                        # if teacher_teo includes bonus, extract bonus portion
+                        teacher_bonus = float(Decimal(str(teacher_teo_decimal)) - (Decimal(str(teacher_teo_decimal)) / Decimal(str(mult))))
+                except Exception:
+                    teacher_bonus = 0
+
+                # expiration: 24 hours from snapshot creation
+                expires_at = (snap.created_at + timedelta(hours=24)) if getattr(snap, 'created_at', None) else (timezone.now() + timedelta(hours=24))
+
+                # Log the notify call with offered preview when possible
+                try:
+                    # Use the module-level compute_discount_breakdown already imported
+                    offered_preview = compute_discount_breakdown(
+                        price_eur=snap.price_eur,
+                        discount_percent=snap.discount_percent,
+                        tier=None,
+                        accept_teo=True,
+                        accept_ratio=1,
+                    )
+                    offered_teacher_preview = offered_preview.get("teacher_teo")
+                except Exception:
+                    offered_teacher_preview = breakdown.get("teacher_teo", 0)
+
+                try:
+                    logger.info("discount_notify_call", extra={
+                        "event": "discount_notify_call",
+                        "order_id": getattr(snap, "order_id", None),
+                        "snapshot_id": getattr(snap, "id", None),
+                        "offered_teacher_teo": str(offered_teacher_preview),
+                    })
+                except Exception:
+                    pass
+
+                # Ensure a single absorption opportunity exists for this snapshot
+                try:
+                    from rewards.models import TeacherDiscountAbsorption
+
+                    if snap and snap.id:
+                        TeacherDiscountAbsorption.objects.update_or_create(
+                            teacher=snap.teacher,
+                            course=snap.course,
+                            student=snap.student,
+                            discount_amount_eur=snap.discount_amount_eur,
+                            defaults={
+                                "course_price_eur": getattr(snap, "price_eur", 0),
+                                "discount_percentage": int(getattr(snap, "discount_percent", 0) or 0),
+                                "teo_used_by_student": getattr(snap, "teacher_teo", 0) or 0,
+                                "teacher_commission_rate": getattr(snap, "tier_teacher_split_percent", 0) or 0,
+                                "expires_at": expires_at,
+                            },
+                        )
+                except Exception:
+                    pass
+
+                teocoin_notification_service.notify_teacher_discount_pending(
+                    teacher=snap.teacher,
+                    student=snap.student,
+                    course_title=snap.course.title if snap.course else "",
+                    discount_percent=int(snap.discount_percent or 0),
+                    teo_cost=float(breakdown.get("teacher_teo", 0)),
+                    teacher_bonus=teacher_bonus,
+                    request_id=snap.id,
+                    expires_at=expires_at,
+                    offered_teacher_teo=float(offered_teacher_preview) if offered_teacher_preview is not None else None,
+                )
+            except Exception as e:
+                logger.error(f"Failed to send teocoin teacher notification for snapshot {getattr(snap,'id',None)}: {e}")
+
         except Exception as e:
-            # Outer catch-all for ConfirmPaymentView
-            logger.error(f"Payment confirmation outer error: {e}")
+            logger.error(f"Payment confirmation error: {e}")
             return Response(
                 {
                     "error": "Failed to confirm payment",
@@ -935,6 +1010,59 @@ class ConfirmPaymentView(APIView):
                 },
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+        # If we reached this point (i.e. not inside the inner exception block),
+        # the confirmation flow completed successfully. Provide a structured
+        # success response (this code path was previously unreachable due to
+        # being nested under the exception return block).
+        try:
+            return Response(
+                {
+                    "success": True,
+                    "status": "enrolled",
+                    "enrollment_id": getattr(enrollment, "pk", None),
+                    "course_id": course_id,
+                    "snapshot_id": getattr(snap, "id", None),
+                },
+                status=status.HTTP_200_OK,
+            )
+        except Exception:
+            # Defensive fallback: ensure we still return a generic success when variables are missing
+            return Response({"success": True, "status": "enrolled"}, status=status.HTTP_200_OK)
+
+    def confirmation_error(self, e):
+        # Outer catch-all for ConfirmPaymentView
+        logger.error(f"Payment confirmation outer error: {e}")
+        return Response(
+            {
+                "error": "Failed to confirm payment",
+                "details": str(e),
+                "code": "PAYMENT_CONFIRMATION_ERROR",
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+class ConfirmPaymentAsyncView(AsyncAPIView, ConfirmPaymentView):
+    """
+    ConfirmPaymentView for ASGI workers (ASYNC_IO_VIEWS): the payment is
+    verified with Stripe's async client, the database work runs in a thread
+    """
+
+    async def post(self, request, course_id):
+        try:
+            confirmation = await sync_to_async(self.confirmation_request)(request, course_id)
+            if isinstance(confirmation, Response):
+                return confirmation
+            course, payment_intent_id, process_discount = confirmation
+
+            stripe.api_key = settings.STRIPE_SECRET_KEY
+            payment_intent = await stripe.PaymentIntent.retrieve_async(payment_intent_id)
+
+            return await sync_to_async(self.complete_payment)(
+                request, course_id, course, payment_intent_id, process_discount, payment_intent
+            )
+        except Exception as e:
+            return self.confirmation_error(e)
 
 
 class PaymentSummaryView(APIView):
@@ -16,6 +16,8 @@ class PendingCoursesView(ListAPIView):
     """
     serializer_class = CourseSerializer
     permission_classes = [IsAdminUser]
+    # Max SQL queries per request at any page size (core.query_audit)
+    query_budget = 3
 
     def get_queryset(self):
         qs = Course.objects.filter(is_approved=False, teacher__is_approved=True)
@@ -23,7 +25,7 @@ class PendingCoursesView(ListAPIView):
         q = self.request.GET.get("q")
         if q:
             qs = qs.filter(title__icontains=q)
-        return qs
+        return CourseSerializer.setup_eager_loading(qs)
 
 
 class ApproveCourseView(APIView):
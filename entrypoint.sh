@@ -13,6 +13,20 @@ python manage.py migrate --noinput
 echo "Collecting static files"
 python manage.py collectstatic --noinput
 
+# SERVER_INTERFACE=asgi: uvicorn workers, with the async variants of the
+# blockchain/Stripe views (ASYNC_IO_VIEWS); each worker keeps many of those
+# requests in flight while they wait on the network
+if [ "${SERVER_INTERFACE:-wsgi}" = "asgi" ]; then
+  export ASYNC_IO_VIEWS=${ASYNC_IO_VIEWS:-true}
+  echo "Starting Gunicorn (ASGI, uvicorn workers)"
+  exec gunicorn schoolplatform.asgi:application \
+    -k uvicorn.workers.UvicornWorker \
+    --bind 0.0.0.0:8000 \
+    --workers ${GUNICORN_WORKERS:-3} \
+    --access-logfile - \
+    --error-logfile -
+fi
+
 echo "Starting Gunicorn"
 exec gunicorn schoolplatform.wsgi:application \
   --bind 0.0.0.0:8000 \
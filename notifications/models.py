@@ -63,3 +63,7 @@ class Notification(models.Model):
         ordering = ["-created_at"]
         verbose_name = "Notifica"
         verbose_name_plural = "Notifiche"
+        indexes = [
+            # Feed of a user, newest first (core.query_plans "notifications.feed")
+            models.Index(fields=["user", "created_at"]),
+        ]
@@ -4,6 +4,29 @@ from rest_framework import serializers
 from .models import Notification
 from decimal import Decimal
 
+EXERCISE_TYPES = ("exercise_graded",)
+LESSON_TYPES = ("lesson_purchased", "lesson_sold", "new_lesson_added")
+COURSE_TYPES = (
+    "course_approved",
+    "course_purchased",
+    "course_sold",
+    "course_completed",
+    "new_course_published",
+    "course_updated",
+)
+
+
+class NotificationListSerializer(serializers.ListSerializer):
+    """Loads the objects a page of notifications refers to in one query per kind"""
+
+    def to_representation(self, data):
+        notifications = list(data.all() if hasattr(data, "all") else data)
+        self.child.preload(notifications)
+        try:
+            return super().to_representation(notifications)
+        finally:
+            self.child.preloaded = None
+
 
 class NotificationSerializer(serializers.ModelSerializer):
     related_object = serializers.SerializerMethodField()
@@ -40,6 +63,79 @@ class NotificationSerializer(serializers.ModelSerializer):
             "expires_at",
         ]
         ordering = ["-created_at"]
+        list_serializer_class = NotificationListSerializer
+
+    # Related objects keyed by (kind, key), set by preload() while a list is
+    # serialized; None means every lookup queries on its own
+    preloaded = None
+
+    def preload(self, notifications):
+        """Bulk-load the submissions, lessons, courses, decisions and snapshots referenced"""
+        from courses.models import TeacherDiscountDecision
+        from rewards.models import PaymentDiscountSnapshot
+
+        def ids(types=None):
+            return {
+                n.related_object_id
+                for n in notifications
+                if n.related_object_id and (types is None or n.notification_type in types)
+            }
+
+        preloaded = {}
+        related_ids = ids()
+        if related_ids:
+            loads = [
+                (
+                    "submission",
+                    ExerciseSubmission.objects.select_related("exercise__lesson"),
+                    ids(EXERCISE_TYPES),
+                ),
+                ("lesson", Lesson.objects.all(), ids(LESSON_TYPES)),
+                ("course", Course.objects.all(), ids(COURSE_TYPES)),
+                ("decision", TeacherDiscountDecision.objects.all(), related_ids),
+                ("snapshot", PaymentDiscountSnapshot.objects.all(), related_ids),
+            ]
+            for kind, queryset, pks in loads:
+                if pks:
+                    for pk, instance in queryset.in_bulk(pks).items():
+                        preloaded[(kind, pk)] = instance
+            # Legacy notifications point at the snapshot's order id
+            for snap in PaymentDiscountSnapshot.objects.filter(
+                order_id__in=[str(pk) for pk in related_ids]
+            ).order_by("pk"):
+                preloaded.setdefault(("snapshot_order", snap.order_id), snap)
+        self.preloaded = preloaded
+
+    def _related(self, kind, key, load):
+        """Preloaded object (or None) while serializing a list, else load()"""
+        if self.preloaded is None:
+            return load()
+        return self.preloaded.get((kind, key))
+
+    def _decision(self, pk):
+        from courses.models import TeacherDiscountDecision
+
+        if not pk:
+            return None
+        return self._related(
+            "decision", pk, lambda: TeacherDiscountDecision.objects.filter(pk=pk).first()
+        )
+
+    def _snapshot(self, pk):
+        from rewards.models import PaymentDiscountSnapshot
+
+        return self._related(
+            "snapshot", pk, lambda: PaymentDiscountSnapshot.objects.filter(pk=pk).first()
+        )
+
+    def _snapshot_by_order(self, order_id):
+        from rewards.models import PaymentDiscountSnapshot
+
+        return self._related(
+            "snapshot_order",
+            order_id,
+            lambda: PaymentDiscountSnapshot.objects.filter(order_id=order_id).first(),
+        )
 
     def _get_extra_data(self, obj):
         """Parse extra_data JSON if available"""
@@ -118,34 +214,28 @@ class NotificationSerializer(serializers.ModelSerializer):
 
     def get_related_object(self, obj):
         try:
-            if obj.notification_type == "exercise_graded":
-                submission = ExerciseSubmission.objects.get(id=obj.related_object_id)
+            pk = obj.related_object_id
+            if obj.notification_type in EXERCISE_TYPES:
+                submission = self._related(
+                    "submission",
+                    pk,
+                    lambda: ExerciseSubmission.objects.select_related("exercise__lesson").get(id=pk),
+                )
                 return {
                     "id": getattr(submission, "id", None),
                     "exercise_title": submission.exercise.title,
                     "lesson_title": submission.exercise.lesson.title,
                     "submitted_at": submission.submitted_at,
                 }
-            elif obj.notification_type in [
-                "lesson_purchased",
-                "lesson_sold",
-                "new_lesson_added",
-            ]:
-                lesson = Lesson.objects.get(id=obj.related_object_id)
+            elif obj.notification_type in LESSON_TYPES:
+                lesson = self._related("lesson", pk, lambda: Lesson.objects.get(id=pk))
                 return {
                     "id": getattr(lesson, "id", None),
                     "title": lesson.title,
                     "price": getattr(lesson, "price", None),
                 }
-            elif obj.notification_type in [
-                "course_approved",
-                "course_purchased",
-                "course_sold",
-                "course_completed",
-                "new_course_published",
-                "course_updated",
-            ]:
-                course = Course.objects.get(id=obj.related_object_id)
+            elif obj.notification_type in COURSE_TYPES:
+                course = self._related("course", pk, lambda: Course.objects.get(id=pk))
                 return {
                     "id": getattr(course, "id", None),
                     "title": course.title,
@@ -184,13 +274,7 @@ class NotificationSerializer(serializers.ModelSerializer):
             decision_id = obj.related_object_id
             # Try resolve decision first
             try:
-                from courses.models import TeacherDiscountDecision
-
-                dec = (
-                    TeacherDiscountDecision.objects.filter(pk=decision_id).first()
-                    if decision_id
-                    else None
-                )
+                dec = self._decision(decision_id)
                 if dec:
                     total_wei = Decimal(str(getattr(dec, "teo_cost", 0))) + Decimal(
                         str(getattr(dec, "teacher_bonus", 0))
@@ -204,21 +288,16 @@ class NotificationSerializer(serializers.ModelSerializer):
 
             # Legacy fallback via snapshot
             try:
-                from rewards.models import PaymentDiscountSnapshot
                 from rewards.serializers import PaymentDiscountSnapshotSerializer
 
                 snap = None
                 try:
-                    snap = PaymentDiscountSnapshot.objects.filter(
-                        order_id=str(obj.related_object_id)
-                    ).first()
+                    snap = self._snapshot_by_order(str(obj.related_object_id))
                 except Exception:
                     snap = None
                 if not snap:
                     try:
-                        snap = PaymentDiscountSnapshot.objects.filter(
-                            pk=obj.related_object_id
-                        ).first()
+                        snap = self._snapshot(obj.related_object_id)
                     except Exception:
                         snap = None
                 if snap:
@@ -262,9 +341,7 @@ class NotificationSerializer(serializers.ModelSerializer):
 
             # Fast path: if related_object_id is a real decision id
             try:
-                from courses.models import TeacherDiscountDecision
-
-                dec = TeacherDiscountDecision.objects.filter(pk=obj.related_object_id).first()
+                dec = self._decision(obj.related_object_id)
                 if dec:
                     return getattr(dec, "id", None)
             except Exception:
@@ -272,17 +349,16 @@ class NotificationSerializer(serializers.ModelSerializer):
 
             # Fallback legacy resolution via snapshot
             try:
-                from rewards.models import PaymentDiscountSnapshot
                 from courses.models import TeacherDiscountDecision
 
                 snap = None
                 try:
-                    snap = PaymentDiscountSnapshot.objects.filter(pk=obj.related_object_id).first()
+                    snap = self._snapshot(obj.related_object_id)
                 except Exception:
                     snap = None
                 if not snap:
                     try:
-                        snap = PaymentDiscountSnapshot.objects.filter(order_id=str(obj.related_object_id)).first()
+                        snap = self._snapshot_by_order(str(obj.related_object_id))
                     except Exception:
                         snap = None
                 if not snap:
@@ -323,9 +399,7 @@ class NotificationSerializer(serializers.ModelSerializer):
 
             # Try TeacherDiscountDecision
             try:
-                from courses.models import TeacherDiscountDecision
-
-                dec = TeacherDiscountDecision.objects.filter(pk=obj.related_object_id).first()
+                dec = self._decision(obj.related_object_id)
                 if dec:
                     pct = getattr(dec, "discount_percentage", None)
                     if pct in (5, 10, 15):
@@ -335,11 +409,9 @@ class NotificationSerializer(serializers.ModelSerializer):
 
             # Fallback to snapshot
             try:
-                from rewards.models import PaymentDiscountSnapshot
-
-                snap = PaymentDiscountSnapshot.objects.filter(pk=obj.related_object_id).first()
+                snap = self._snapshot(obj.related_object_id)
                 if not snap:
-                    snap = PaymentDiscountSnapshot.objects.filter(order_id=str(obj.related_object_id)).first()
+                    snap = self._snapshot_by_order(str(obj.related_object_id))
                 if snap:
                     pct = getattr(snap, "discount_percent", None)
                     if pct in (5, 10, 15):
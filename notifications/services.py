@@ -10,10 +10,11 @@ from typing import Optional, Union, Any
 import decimal
 
 from django.conf import settings
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils import timezone
+from core.task_queue import enqueue_on_commit
 from notifications.models import Notification
+from notifications.tasks import send_email
 from users.models import User
 
 logger = logging.getLogger(__name__)
@@ -615,13 +616,12 @@ class TeoCoinDiscountNotificationService:
                 "emails/teacher_discount_decision.txt", context
             )
 
-            send_mail(
+            enqueue_on_commit(
+                send_email,
                 subject=subject,
                 message=plain_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=[teacher.email],
                 html_message=html_message,
-                fail_silently=False,
             )
 
         except Exception as e:
@@ -643,12 +643,8 @@ class TeoCoinDiscountNotificationService:
                 f"If you don't choose, you'll automatically receive full EUR commission."
             )
 
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[teacher.email],
-                fail_silently=False,
+            enqueue_on_commit(
+                send_email, subject=subject, message=message, recipient_list=[teacher.email]
             )
 
         except Exception as e:
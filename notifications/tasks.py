@@ -0,0 +1,28 @@
+"""
+Notification background tasks (queue "notifications").
+"""
+
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.core.mail import send_mail
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, queue="notifications", max_retries=3, soft_time_limit=30, time_limit=60)
+def send_email(self, subject, message, recipient_list, html_message=None):
+    """Send an email off the request path, retrying SMTP failures"""
+    try:
+        return send_mail(
+            subject=subject,
+            message=message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=recipient_list,
+            html_message=html_message,
+            fail_silently=False,
+        )
+    except Exception as exc:
+        logger.error(f"Error sending email '{subject}' to {recipient_list}: {exc}")
+        raise self.retry(countdown=60 * (self.request.retries + 1), exc=exc)
@@ -31,6 +31,8 @@ class NotificationFilter(df_filters.FilterSet):
 
 class NotificationListView(APIView):
     permission_classes = [IsAuthenticated]
+    # Max SQL queries per request at any page size (core.query_audit)
+    query_budget = 8
 
     def get(self, request):
         """Get user notifications with filtering options"""
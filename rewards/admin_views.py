@@ -1,6 +1,7 @@
 import logging
 from datetime import timedelta
 
+from core.db_routing import use_replica
 from django.db.models import Count, Q, Sum
 from django.utils import timezone
 from rest_framework import status
@@ -54,6 +55,7 @@ def admin_transactions_list(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsAdminUser])
+@use_replica
 def admin_transactions_stats(request):
     """
     Statistiche delle transazioni per dashboard admin
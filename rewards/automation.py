@@ -12,11 +12,14 @@ Handles automated TeoCoin rewards for course and lesson completion
 
 import logging
 from decimal import Decimal
+from typing import Dict
 
 from courses.models import Course, CourseEnrollment, Lesson, LessonCompletion
 from django.db import transaction
+from django.db.models import F
 from notifications.models import Notification
 from rewards.models import BlockchainTransaction, TokenBalance
+from services.db_teocoin_service import db_teocoin_service
 from users.models import User
 
 logger = logging.getLogger(__name__)
@@ -88,7 +91,7 @@ class AutomatedRewardSystem:
         self, student: User, lesson: Lesson, course: Course = None
     ):
         """
-        Award TeoCoin reward for lesson completion
+        Award TeoCoin reward for lesson completion (a batch of one lesson)
         """
         if not course:
             course = lesson.course
@@ -99,58 +102,99 @@ class AutomatedRewardSystem:
 
         try:
             with transaction.atomic():
-                # Calculate reward
-                reward_amount = self.calculate_lesson_reward(course, lesson)
-
-                if reward_amount <= 0:
-                    logger.info(
-                        f"No reward calculated for lesson {lesson.id} - budget exhausted"
-                    )
-                    return False
-
-                # Award traditional TeoCoin
-                student.add_teo_coins(
-                    reward_amount,
-                    transaction_type="lesson_completion_reward",
-                    related_object_id=lesson.id,
-                )
-
-                # Update course reward tracking
-                if hasattr(course, "reward_distributed"):
-                    course.reward_distributed = (
-                        course.reward_distributed or 0
-                    ) + reward_amount
-                    course.save(update_fields=["reward_distributed"])
-
-                # Create notification
-                Notification.objects.create(
-                    user=student,
-                    message=f"🎉 Hai completato la lezione '{lesson.title}' e guadagnato {reward_amount} TeoCoins!",
-                    notification_type="lesson_completed",
-                    related_object_id=lesson.id,
-                )
-
-                # Try blockchain reward if enabled
-                if self.blockchain_enabled:
-                    self._award_blockchain_tokens(
-                        student, reward_amount, "lesson_completion", lesson.id
-                    )
-
+                rewards = self.reward_lesson_batch(student, course, [lesson])
+            if not rewards["lesson_reward"]:
                 logger.info(
-                    f"Awarded {reward_amount} TeoCoins to {student.username} for lesson {lesson.id}"
+                    f"No reward calculated for lesson {lesson.id} - budget exhausted"
                 )
-                return True
+            return bool(rewards["lesson_reward"])
 
         except Exception as e:
             logger.error(f"Error rewarding lesson completion: {e}")
             return False
 
+    def reward_lesson_batch(
+        self, student: User, course: Course, lessons, course_completed: bool = False
+    ) -> Dict[str, int]:
+        """
+        Award the rewards of many lesson completions (and the course bonus)
+        with one balance credit per kind, one notification and one update of
+        the course reward budget.
+
+        Must run inside the caller's transaction: the course row is locked so
+        concurrent batches can't overspend the budget.
+        """
+        distributed = (
+            Course.objects.select_for_update()
+            .filter(pk=course.pk)
+            .values_list("reward_distributed", flat=True)
+            .first()
+        ) or 0
+
+        # calculate_* read the budget from the instance: keep it current
+        course.reward_distributed = distributed
+        lesson_total = 0
+        for lesson in lessons:
+            amount = max(self.calculate_lesson_reward(course, lesson), 0)
+            lesson_total += amount
+            course.reward_distributed += amount
+
+        bonus = 0
+        if course_completed:
+            bonus = max(self.calculate_course_completion_bonus(course), 0)
+            course.reward_distributed += bonus
+
+        if lesson_total:
+            db_teocoin_service.add_balance(
+                student,
+                Decimal(lesson_total),
+                transaction_type="earned",
+                description=f"Lesson completion rewards ({len(lessons)} lessons)",
+                course=course,
+            )
+        if bonus:
+            db_teocoin_service.add_balance(
+                student,
+                Decimal(bonus),
+                transaction_type="bonus",
+                description=f"Course completion bonus: {course.title}",
+                course=course,
+            )
+        if lesson_total or bonus:
+            Course.objects.filter(pk=course.pk).update(
+                reward_distributed=F("reward_distributed") + lesson_total + bonus
+            )
+            if len(lessons) == 1:
+                message = f"🎉 Hai completato la lezione '{lessons[0].title}' e guadagnato {lesson_total + bonus} TeoCoins!"
+            elif lessons:
+                message = f"🎉 Hai completato {len(lessons)} lezioni di '{course.title}' e guadagnato {lesson_total + bonus} TeoCoins!"
+            else:
+                message = f"🎓 Congratulazioni! Hai completato il corso '{course.title}' e ricevuto {bonus} TeoCoins bonus!"
+            Notification.objects.create(
+                user=student,
+                message=message,
+                notification_type="lesson_completed" if lessons else "course_completed",
+                related_object_id=course.id,
+            )
+        if course_completed:
+            Notification.objects.create(
+                user=course.teacher,
+                message=f"🎉 Lo studente {student.username} ha completato il tuo corso '{course.title}'!",
+                notification_type="student_completed_course",
+                related_object_id=course.id,
+            )
+
+        logger.info(
+            f"Awarded {lesson_total} + {bonus} TeoCoins to {student.username} for {len(lessons)} lessons of course {course.id}"
+        )
+        return {"lesson_reward": lesson_total, "completion_bonus": bonus}
+
     def check_and_reward_course_completion(self, student: User, course: Course):
         """
         Check if student completed all lessons and award course completion bonus
         """
         try:
-            total_lessons = course.lessons.count()
+            total_lessons = course.lessons_in_course.count()
             completed_lessons = LessonCompletion.objects.filter(
                 student=student, lesson__course=course
             ).count()
@@ -176,55 +220,15 @@ class AutomatedRewardSystem:
 
     def _award_course_completion_bonus(self, student: User, course: Course):
         """
-        Award bonus for completing entire course
+        Award bonus for completing entire course (a batch of no lessons)
         """
         try:
             with transaction.atomic():
-                bonus_amount = self.calculate_course_completion_bonus(course)
-
-                if bonus_amount <= 0:
-                    logger.info(f"No completion bonus available for course {course.id}")
-                    return
-
-                # Award traditional TeoCoin
-                student.add_teo_coins(
-                    bonus_amount,
-                    transaction_type="course_completion_bonus",
-                    related_object_id=course.id,
-                )
-
-                # Update course reward tracking
-                if hasattr(course, "reward_distributed"):
-                    course.reward_distributed = (
-                        course.reward_distributed or 0
-                    ) + bonus_amount
-                    course.save(update_fields=["reward_distributed"])
-
-                # Create notifications
-                Notification.objects.create(
-                    user=student,
-                    message=f"🎓 Congratulazioni! Hai completato il corso '{course.title}' e ricevuto {bonus_amount} TeoCoins bonus!",
-                    notification_type="course_completed",
-                    related_object_id=course.id,
-                )
-
-                # Notify teacher
-                Notification.objects.create(
-                    user=course.teacher,
-                    message=f"🎉 Lo studente {student.username} ha completato il tuo corso '{course.title}'!",
-                    notification_type="student_completed_course",
-                    related_object_id=course.id,
-                )
-
-                # Try blockchain reward if enabled
-                if self.blockchain_enabled:
-                    self._award_blockchain_tokens(
-                        student, bonus_amount, "course_completion", course.id
-                    )
-
-                logger.info(
-                    f"Awarded {bonus_amount} TeoCoins completion bonus to {student.username} for course {course.id}"
+                rewards = self.reward_lesson_batch(
+                    student, course, [], course_completed=True
                 )
+            if not rewards["completion_bonus"]:
+                logger.info(f"No completion bonus available for course {course.id}")
 
         except Exception as e:
             logger.error(f"Error awarding course completion bonus: {e}")
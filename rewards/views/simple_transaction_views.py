@@ -4,6 +4,7 @@ from decimal import Decimal
 import hashlib
 from django.db import transaction, IntegrityError
 from rewards.models import PaymentDiscountSnapshot
+from services.idempotency import idempotent
 
 from rewards.services.transaction_services import (
     apply_discount_and_snapshot,
@@ -21,6 +22,20 @@ class ApplyDiscountView(views.APIView):
             key_data += f":{checkout_session_id}"
         return hashlib.sha256(key_data.encode()).hexdigest()[:32]
 
+    def _request_key(self, request):
+        data = request.data
+        try:
+            return self._generate_idempotency_key(
+                int(data["student_user_id"]),
+                int(data["teacher_id"]),
+                int(data["course_id"]),
+                Decimal(str(data["teo_cost"])),
+                data.get("checkout_session_id"),
+            )
+        except (KeyError, TypeError, ValueError, ArithmeticError):
+            return None  # invalid payload: nothing to deduplicate
+
+    @idempotent("apply_discount", key=lambda view, request, *a, **kw: view._request_key(request))
     def post(self, request, *args, **kwargs):
         data = request.data
         
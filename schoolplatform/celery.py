@@ -0,0 +1,42 @@
+"""
+Celery app for schoolplatform.
+
+Configuration comes from the CELERY_* Django settings (see
+schoolplatform/settings/base.py); tasks are discovered in each app's
+tasks.py. Run a worker with:
+
+    celery -A schoolplatform worker -Q ledger,chain,notifications,analytics
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault(
+    "DJANGO_SETTINGS_MODULE",
+    os.getenv("DJANGO_SETTINGS_MODULE", "schoolplatform.settings.prod"),
+)
+
+app = Celery("schoolplatform")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
+
+
+@app.on_after_configure.connect
+def _create_local_folders(sender, **kwargs):
+    """The filesystem broker and result backend need their folders to exist"""
+    conf = sender.conf
+    if conf.task_always_eager:
+        return
+    folders = []
+    if str(conf.broker_url or "").startswith("filesystem://"):
+        options = conf.broker_transport_options or {}
+        folders += [
+            options.get("data_folder_in"),
+            options.get("data_folder_out"),
+            options.get("control_folder"),
+        ]
+    if str(conf.result_backend or "").startswith("file://"):
+        folders.append(conf.result_backend[len("file://"):])
+    for folder in filter(None, folders):
+        os.makedirs(folder, exist_ok=True)
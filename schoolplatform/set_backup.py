@@ -68,7 +68,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "core.middleware.AutoJWTFromSessionMiddleware",
-    "core.middleware.APITimingMiddleware",  # Performance monitoring
+    "core.middleware.MetricsMiddleware",  # Per-route metrics
     "core.middleware.GlobalErrorHandlingMiddleware",  # Global error handling
 ]
 
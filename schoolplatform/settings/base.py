@@ -47,8 +47,17 @@ INSTALLED_APPS = [
 # Ordine middleware consigliato:
 # Security -> WhiteNoise -> CORS (il più in alto possibile, prima di CommonMiddleware) -> Session -> Common -> Csrf -> Auth -> Messages -> Clickjacking
 MIDDLEWARE = [
+    # Per-route metrics: primo, così misura l'intera richiesta
+    "core.middleware.MetricsMiddleware",
+    # N+1 / query budget audit (solo con QUERY_AUDIT_ENABLED)
+    "core.middleware.QueryAuditMiddleware",
+    # Profiler on richiesta/campionato (solo con PROFILER_ENABLED)
+    "core.middleware.ProfilerMiddleware",
+    # Letture delle view designate dalla replica (solo con READ_REPLICA_ALIAS)
+    "core.middleware.ReadReplicaMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # WhiteNoise, anche async (ASGI)
+    "core.middleware.StaticFilesMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -57,7 +66,6 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     # Middleware progetto (rimosso duplicato)
-    "core.middleware.APITimingMiddleware",
     "core.middleware.GlobalErrorHandlingMiddleware",
 ]
 
@@ -103,7 +111,8 @@ SIMPLE_JWT = {
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # simplejwt's JWTAuthentication with cached user lookups
+        "authentication.backends.CachedJWTAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
@@ -155,6 +164,126 @@ ADMIN_WALLET_ADDRESS = os.getenv("ADMIN_WALLET_ADDRESS")
 PLATFORM_WALLET_ADDRESS = os.getenv("PLATFORM_WALLET_ADDRESS", "0x3b72a4E942CF1467134510cA3952F01b63005044")
 PLATFORM_PRIVATE_KEY = os.getenv("PLATFORM_PRIVATE_KEY")
 
+# Withdrawal settlement: pending withdrawals are netted per destination address
+# and minted together once the oldest has waited the window (or the batch is full).
+# Batch mint packs the per-address mintTo calls into one multicall transaction.
+WITHDRAWAL_BATCH_MINT_ENABLED = os.getenv("WITHDRAWAL_BATCH_MINT_ENABLED", "False").lower() == "true"
+WITHDRAWAL_SETTLEMENT_WINDOW_SECONDS = int(os.getenv("WITHDRAWAL_SETTLEMENT_WINDOW_SECONDS", "300"))
+WITHDRAWAL_SETTLEMENT_MAX_BATCH = int(os.getenv("WITHDRAWAL_SETTLEMENT_MAX_BATCH", "200"))
+
+# Request metrics (core.metrics): per-worker counters flushed every
+# METRICS_FLUSH_SECONDS into METRICS_CACHE; /metrics needs METRICS_TOKEN as a
+# bearer token if set, a staff session otherwise
+METRICS_CACHE = os.getenv("METRICS_CACHE", "default")
+METRICS_FLUSH_SECONDS = int(os.getenv("METRICS_FLUSH_SECONDS", "10"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Query audit (core.query_audit): logs requests that repeat a query shape
+# QUERY_AUDIT_THRESHOLD times from one call site or exceed their view's
+# query_budget. Costly (a stack walk per query): development only.
+QUERY_AUDIT_ENABLED = os.getenv("QUERY_AUDIT_ENABLED", "False").lower() == "true"
+QUERY_AUDIT_THRESHOLD = int(os.getenv("QUERY_AUDIT_THRESHOLD", "5"))
+
+# Request profiler (core.profiling): staff requests with "X-Profile: 1" and
+# a PROFILER_SAMPLE_RATE fraction of requests (kept if slower than
+# PROFILER_SLOW_SECONDS) are sampled every PROFILER_INTERVAL_MS and saved as
+# collapsed stacks under PROFILER_DIR, listed on /admin/profiles/
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "False").lower() == "true"
+PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))
+PROFILER_SLOW_SECONDS = float(os.getenv("PROFILER_SLOW_SECONDS", "3"))
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+PROFILER_DIR = os.getenv("PROFILER_DIR", str(BASE_DIR / "logs" / "profiles"))
+PROFILER_MAX_PROFILES = int(os.getenv("PROFILER_MAX_PROFILES", "200"))
+
+# Slow query log (core.slow_queries): statements slower than
+# SLOW_QUERY_THRESHOLD_MS go to a rotating JSONL file with their call site
+# and, on Postgres, their EXPLAIN plan; `manage.py slow_queries` summarizes
+SLOW_QUERY_LOG_ENABLED = os.getenv("SLOW_QUERY_LOG_ENABLED", "False").lower() == "true"
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_LOG_FILE = os.getenv("SLOW_QUERY_LOG_FILE", str(BASE_DIR / "logs" / "slow_queries.jsonl"))
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+SLOW_QUERY_MAX_PENDING = int(os.getenv("SLOW_QUERY_MAX_PENDING", "100"))
+
+# Query plan checks (core.query_plans): critical queries must not full-scan
+# and, on Postgres, must stay within QUERY_PLAN_MAX_COST planner cost units;
+# `manage.py check_query_plans --seed` seeds SEED_VOLUMES x QUERY_PLAN_SEED_SCALE
+QUERY_PLAN_MAX_COST = float(os.getenv("QUERY_PLAN_MAX_COST", "1000"))
+QUERY_PLAN_SEED_SCALE = float(os.getenv("QUERY_PLAN_SEED_SCALE", "1"))
+
+# Background tasks (schoolplatform.celery, core.task_queue): queues ledger,
+# chain, notifications and analytics. Without CELERY_BROKER_URL no worker is
+# deployed, so tasks run inline in the caller (CELERY_TASK_ALWAYS_EAGER);
+# CELERY_BROKER_URL=filesystem:// keeps the broker and results under
+# TASK_QUEUE_DIR for a worker on the same box (no Redis needed)
+TASK_QUEUE_DIR = os.getenv("TASK_QUEUE_DIR", str(BASE_DIR / "var" / "tasks"))
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "filesystem://")
+CELERY_BROKER_TRANSPORT_OPTIONS = (
+    {
+        "data_folder_in": os.path.join(TASK_QUEUE_DIR, "queue"),
+        "data_folder_out": os.path.join(TASK_QUEUE_DIR, "queue"),
+        "control_folder": os.path.join(TASK_QUEUE_DIR, "control"),
+    }
+    if CELERY_BROKER_URL.startswith("filesystem://")
+    else {}
+)
+CELERY_RESULT_BACKEND = os.getenv(
+    "CELERY_RESULT_BACKEND", "file://" + os.path.join(TASK_QUEUE_DIR, "results")
+)
+CELERY_RESULT_EXPIRES = 24 * 3600
+CELERY_TASK_ALWAYS_EAGER = (
+    os.getenv(
+        "CELERY_TASK_ALWAYS_EAGER", "False" if os.getenv("CELERY_BROKER_URL") else "True"
+    ).lower()
+    == "true"
+)
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TASK_DEFAULT_QUEUE = "analytics"
+CELERY_TASK_SERIALIZER = "json"
+CELERY_RESULT_SERIALIZER = "json"
+CELERY_ACCEPT_CONTENT = ["json"]
+# Defaults for tasks that declare no limits of their own
+CELERY_TASK_SOFT_TIME_LIMIT = int(os.getenv("CELERY_TASK_SOFT_TIME_LIMIT", "240"))
+CELERY_TASK_TIME_LIMIT = int(os.getenv("CELERY_TASK_TIME_LIMIT", "300"))
+# A task interrupted by a worker crash is redelivered, not lost
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# JWT user cache (authentication.user_cache): users resolved from a per-process
+# LRU and the shared cache, invalidated by a per-user version stamp
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+AUTH_USER_CACHE_LOCAL_TTL = int(os.getenv("AUTH_USER_CACHE_LOCAL_TTL", "10"))
+AUTH_USER_CACHE_LOCAL_SIZE = int(os.getenv("AUTH_USER_CACHE_LOCAL_SIZE", "2048"))
+
+# Read replica (core.db_routing): designated views read from the
+# READ_REPLICA_ALIAS database; clients that wrote stay on the primary for
+# READ_REPLICA_PIN_SECONDS, a failing replica is skipped for RETRY_SECONDS
+DATABASE_ROUTERS = ["core.db_routing.ReadReplicaRouter"]
+READ_REPLICA_ALIAS = os.getenv("READ_REPLICA_ALIAS", "")
+READ_REPLICA_PIN_SECONDS = int(os.getenv("READ_REPLICA_PIN_SECONDS", "5"))
+READ_REPLICA_RETRY_SECONDS = int(os.getenv("READ_REPLICA_RETRY_SECONDS", "30"))
+
+# Async I/O views (core.async_views): mount the async variants of the
+# blockchain and Stripe endpoints, for ASGI workers (entrypoint.sh)
+ASYNC_IO_VIEWS = os.getenv("ASYNC_IO_VIEWS", "False").lower() == "true"
+
+# Batch API (core.batch): /api/v1/batch/ runs up to BATCH_MAX_REQUESTS
+# sub-requests per call, consecutive reads on BATCH_MAX_WORKERS threads
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "4"))
+
+# Ledger checkpoints: running balance totals every N postings (and daily) for
+# historical balance and statement queries
+LEDGER_CHECKPOINT_EVERY = int(os.getenv("LEDGER_CHECKPOINT_EVERY", "500"))
+
+# Chain simulator: the blockchain services talk to an in-process chain instead
+# of the RPC node (offline benchmarks, CI). Latency and failures are injectable.
+CHAIN_SIMULATOR_ENABLED = os.getenv("CHAIN_SIMULATOR_ENABLED", "False").lower() == "true"
+CHAIN_SIMULATOR_LATENCY_MS = float(os.getenv("CHAIN_SIMULATOR_LATENCY_MS", "0"))
+CHAIN_SIMULATOR_FAILURE_RATE = float(os.getenv("CHAIN_SIMULATOR_FAILURE_RATE", "0"))
+CHAIN_SIMULATOR_REVERT_RATE = float(os.getenv("CHAIN_SIMULATOR_REVERT_RATE", "0"))
+CHAIN_SIMULATOR_SEED = int(os.getenv("CHAIN_SIMULATOR_SEED", "0"))
+
 # Reward Pool Configuration
 REWARD_POOL_ADDRESS = os.getenv("REWARD_POOL_ADDRESS", "0x17051AB7603B0F7263BC86bF1b0ce137EFfdEcc1")
 REWARD_POOL_PRIVATE_KEY = os.getenv("REWARD_POOL_PRIVATE_KEY", os.getenv("ADMIN_PRIVATE_KEY"))
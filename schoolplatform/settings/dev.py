@@ -24,6 +24,15 @@ DATABASES = {
     }
 }
 
+# Simulated read replica: a second SQLite file, refreshed by
+# `manage.py simulate_replica --lag N`
+if os.getenv("READ_REPLICA_SQLITE", "False").lower() == "true":
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": str(BASE_DIR / "db.replica.sqlite3"),
+    }
+    READ_REPLICA_ALIAS = "replica"
+
 
 # Email backend for dev
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
@@ -43,6 +52,9 @@ CORS_ALLOWED_ORIGINS = [
 SESSION_COOKIE_SECURE = False
 CSRF_COOKIE_SECURE = False
 
+# Log N+1 queries and query budget overruns
+QUERY_AUDIT_ENABLED = os.getenv("QUERY_AUDIT_ENABLED", "True").lower() == "true"
+
 # Debug toolbar
 INTERNAL_IPS = ["127.0.0.1", "localhost"]
 INSTALLED_APPS += ["debug_toolbar", "django_extensions"]
@@ -35,6 +35,16 @@ DATABASES = {
     )
 }
 
+# Read replica (optional): designated views read from REPLICA_DATABASE_URL
+if os.getenv("REPLICA_DATABASE_URL"):
+    DATABASES["replica"] = dj_database_url.parse(
+        os.environ["REPLICA_DATABASE_URL"],
+        conn_max_age=600,
+        ssl_require=ssl_require,
+    )
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+    READ_REPLICA_ALIAS = "replica"
+
 # Email backend (prod)
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 
@@ -8,9 +8,18 @@ DATABASES = {
         'ENGINE': 'django.db.backends.sqlite3',
     'NAME': ':memory:',
     'ATOMIC_REQUESTS': False,
-    }
+    },
+    # Separate database: replica routing tests set READ_REPLICA_ALIAS
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
 }
 
+# Background tasks run inline, no worker
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_RESULT_BACKEND = "cache+memory://"
+
 # Use console email backend for tests
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
@@ -1,4 +1,6 @@
 from core.admin_views import custom_admin_logout
+from core.metrics import metrics_admin_view, metrics_view
+from core.profiling import profile_download_view, profiles_admin_view
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
@@ -58,6 +60,13 @@ def healthz(_):
 
 urlpatterns = [
     path("admin/logout/", custom_admin_logout, name="admin_logout"),
+    path("admin/metrics/", metrics_admin_view, name="admin_metrics"),
+    path("admin/profiles/", profiles_admin_view, name="admin_profiles"),
+    path(
+        "admin/profiles/<str:profile_id>/<str:kind>/",
+        profile_download_view,
+        name="admin_profile_download",
+    ),
     path("admin/", admin.site.urls),
     path("api/v1/", include("core.urls")),
     path("api/v1/", include("courses.urls")),
@@ -86,6 +95,7 @@ urlpatterns = [
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
     path("healthz/", healthz),
+    path("metrics", metrics_view, name="metrics"),
     path("version/", version),
 ]
 
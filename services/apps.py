@@ -5,3 +5,7 @@ class ServicesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "services"
     verbose_name = "Services"
+
+    def ready(self):
+        # importa i signal handlers che mantengono i contatori denormalizzati
+        import services.signals  # noqa
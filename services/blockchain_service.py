@@ -10,6 +10,7 @@ import uuid
 from decimal import Decimal
 from typing import Any, Dict, List, Union
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth import get_user_model
 
@@ -18,7 +19,7 @@ from rewards.models import BlockchainTransaction, TokenBalance
 from services.base import TransactionalService
 from services.exceptions import BlockchainTransactionError, WalletNotFoundError
 
-from blockchain.blockchain import TeoCoinService
+from blockchain.blockchain import TeoCoinService, get_async_teocoin_service
 
 User = get_user_model()
 
@@ -64,27 +65,40 @@ class BlockchainService(TransactionalService):
             else:
                 balance = self.teocoin_service.get_balance(user.wallet_address)
 
-            # Update cached balance
-            token_balance, created = TokenBalance.objects.get_or_create(
-                user=user, defaults={"balance": balance}
-            )
-            if not created:
-                token_balance.balance = balance
-                token_balance.save(update_fields=["balance", "updated_at"])
+            self._cache_balance(user, balance)
+            return self._balance_result(user, balance, time.time() - start_time)
 
-            query_time = time.time() - start_time
-            self.log_info(
-                f"Balance query completed in {query_time:.3f}s for user {user.id}"
-            )
+        except BlockchainTransactionError:
+            raise
+        except Exception as e:
+            self.log_error(f"Error getting balance for user {user.id}: {str(e)}")
+            raise BlockchainTransactionError(f"Failed to get wallet balance: {str(e)}")
 
-            return {
-                "balance": str(balance),
-                "wallet_address": user.wallet_address,
-                "user_id": user.id,
-                "username": user.username,
-                "query_time": f"{query_time:.3f}s",
-                "token_info": {"name": "TeoCoin", "symbol": "TEO", "decimals": 18},
-            }
+    async def aget_user_wallet_balance(self, user: User) -> Dict[str, Any]:
+        """
+        Async get_user_wallet_balance(): awaits the RPC query.
+
+        Raises:
+            BlockchainTransactionError: If wallet not linked or query fails
+        """
+        try:
+            self.log_info(f"Getting wallet balance for user {user.id}")
+            start_time = time.time()
+
+            if not user.wallet_address:
+                raise WalletNotFoundError(user.id)
+
+            if self.test_mode:
+                balance = Decimal("100.0")
+                self.log_debug(f"Using test mode balance: {balance}")
+            else:
+                async_teocoin = get_async_teocoin_service()
+                if async_teocoin is None:
+                    raise BlockchainTransactionError("Async blockchain service not available")
+                balance = await async_teocoin.get_balance(user.wallet_address)
+
+            await sync_to_async(self._cache_balance)(user, balance)
+            return self._balance_result(user, balance, time.time() - start_time)
 
         except BlockchainTransactionError:
             raise
@@ -92,6 +106,25 @@ class BlockchainService(TransactionalService):
             self.log_error(f"Error getting balance for user {user.id}: {str(e)}")
             raise BlockchainTransactionError(f"Failed to get wallet balance: {str(e)}")
 
+    def _cache_balance(self, user: User, balance: Decimal):
+        token_balance, created = TokenBalance.objects.get_or_create(
+            user=user, defaults={"balance": balance}
+        )
+        if not created:
+            token_balance.balance = balance
+            token_balance.save(update_fields=["balance", "updated_at"])
+
+    def _balance_result(self, user: User, balance: Decimal, query_time: float) -> Dict[str, Any]:
+        self.log_info(f"Balance query completed in {query_time:.3f}s for user {user.id}")
+        return {
+            "balance": str(balance),
+            "wallet_address": user.wallet_address,
+            "user_id": user.id,
+            "username": user.username,
+            "query_time": f"{query_time:.3f}s",
+            "token_info": {"name": "TeoCoin", "symbol": "TEO", "decimals": 18},
+        }
+
     def link_wallet_to_user(self, user: User, wallet_address: str) -> Dict[str, Any]:
         """
         Link a wallet address to a user account.
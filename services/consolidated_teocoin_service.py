@@ -14,7 +14,9 @@ import logging
 from decimal import Decimal
 from typing import Any, Dict, Optional
 
+from blockchain.simulator import chain_provider
 from django.conf import settings
+from services.gas_oracle_service import gas_oracle_service
 from web3 import Web3
 
 logger = logging.getLogger(__name__)
@@ -43,7 +45,7 @@ class ConsolidatedTeoCoinService:
             raise ValueError("TEOCOIN_CONTRACT_ADDRESS must be configured")
 
         # Initialize Web3
-        self.w3 = Web3(Web3.HTTPProvider(self.rpc_url))
+        self.w3 = Web3(chain_provider(self.rpc_url))
 
         # Add PoA middleware for Polygon
         try:
@@ -256,23 +258,8 @@ class ConsolidatedTeoCoinService:
 
     def _get_gas_price(self) -> int:
         """Get optimized gas price for the network."""
-        try:
-            gas_price = self.w3.eth.gas_price
-            # Add 10% buffer
-            gas_price = int(gas_price * 1.1)
-
-            # Set reasonable limits
-            min_gas_price = self.w3.to_wei("25", "gwei")
-            max_gas_price = self.w3.to_wei("50", "gwei")
-
-            if gas_price < min_gas_price:
-                gas_price = min_gas_price
-            elif gas_price > max_gas_price:
-                gas_price = max_gas_price
-
-            return gas_price
-        except:
-            return self.w3.to_wei("30", "gwei")
+        # Cached network price + 10% buffer, clamped to 25-50 gwei
+        return gas_oracle_service.gas_price(self.w3, capped=True)
 
 
 # Global service instance
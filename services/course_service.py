@@ -7,8 +7,11 @@ purchase workflows, and progress tracking.
 
 from typing import Any, Dict, List
 
-from courses.models import Course, CourseEnrollment, LessonCompletion
+from courses.models import Course, CourseEnrollment, Lesson, LessonCompletion
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
 from django.utils import timezone
 from services.base import TransactionalService
 from services.exceptions import (
@@ -16,9 +19,13 @@ from services.exceptions import (
     TeoArtServiceException,
     UserNotFoundError,
 )
+from users.models import UserProgress
 
 User = get_user_model()
 
+# Maximum number of lessons accepted by one complete_lessons() call
+MAX_LESSON_BATCH = 200
+
 
 class CourseService(TransactionalService):
     """
@@ -286,17 +293,213 @@ class CourseService(TransactionalService):
             )
             raise TeoArtServiceException(f"Error retrieving enrollments: {str(e)}")
 
+    def complete_lessons(self, student, lesson_ids: List[int]) -> Dict[str, Any]:
+        """
+        Mark many lessons as completed in one transaction.
+
+        Completions are inserted with a single bulk_create; course completion
+        is evaluated once per course, and rewards and progress counters are
+        applied once per course instead of once per lesson.
+
+        Args:
+            student: Student completing the lessons
+            lesson_ids: IDs of the completed lessons (duplicates are ignored)
+
+        Returns:
+            Dict with completed, already_completed and rejected lesson IDs and
+            a per-course summary
+        """
+        from rewards.automation import reward_system
+        from services.progress_service import progress_service
+
+        lesson_ids = list(dict.fromkeys(lesson_ids))
+        if len(lesson_ids) > MAX_LESSON_BATCH:
+            raise TeoArtServiceException(
+                f"At most {MAX_LESSON_BATCH} lessons per request",
+                "TOO_MANY_LESSONS",
+                400,
+            )
+
+        def _complete_operation():
+            # Lock the student's progress row: the single and bulk completion
+            # views both end up here, so concurrent requests of the same
+            # student serialize on it between the check and the read-back
+            progress_service.get_progress(student)
+            UserProgress.objects.select_for_update().filter(user=student).exists()
+
+            lessons = {
+                lesson.pk: lesson
+                for lesson in Lesson.objects.filter(pk__in=lesson_ids).select_related(
+                    "course", "course__teacher"
+                )
+            }
+            # Lock the enrollments: concurrent batches of the same student
+            # serialize here instead of double counting progress
+            enrolled = set(
+                CourseEnrollment.objects.select_for_update()
+                .filter(
+                    student=student,
+                    course_id__in={l.course_id for l in lessons.values()},
+                )
+                .values_list("course_id", flat=True)
+            )
+            already = set(
+                LessonCompletion.objects.filter(
+                    student=student, lesson_id__in=lessons
+                ).values_list("lesson_id", flat=True)
+            )
+
+            rejected, accepted, already_completed = [], [], []
+            for lesson_id in lesson_ids:
+                lesson = lessons.get(lesson_id)
+                if lesson is None:
+                    rejected.append({"lesson_id": lesson_id, "reason": "not_found"})
+                elif lesson.course_id is None:
+                    rejected.append({"lesson_id": lesson_id, "reason": "no_course"})
+                elif lesson.course_id not in enrolled:
+                    rejected.append({"lesson_id": lesson_id, "reason": "not_enrolled"})
+                elif lesson_id in already:
+                    already_completed.append(lesson_id)
+                else:
+                    accepted.append(lesson)
+
+            insert_started = timezone.now()
+            LessonCompletion.objects.bulk_create(
+                [LessonCompletion(student=student, lesson=lesson) for lesson in accepted],
+                ignore_conflicts=True,
+            )
+            # ignore_conflicts leaves pk unset: read the inserted rows back,
+            # skipping any a path outside the lock wrote meanwhile
+            created = list(
+                LessonCompletion.objects.filter(
+                    student=student,
+                    lesson_id__in=[l.pk for l in accepted],
+                    completed_at__gte=insert_started,
+                ).values("pk", "lesson_id", "completed_at")
+            )
+            if len(created) != len(accepted):
+                inserted = {row["lesson_id"] for row in created}
+                already_completed += [l.pk for l in accepted if l.pk not in inserted]
+            progress_service.record_lessons_completed(
+                student.pk,
+                [
+                    {
+                        **row,
+                        "title": lessons[row["lesson_id"]].title,
+                        "duration": lessons[row["lesson_id"]].duration,
+                        "course_id": lessons[row["lesson_id"]].course_id,
+                    }
+                    for row in created
+                ],
+            )
+
+            # Course completion, once per course touched by the batch
+            touched = {lessons[row["lesson_id"]].course_id for row in created}
+            totals = dict(
+                Lesson.objects.filter(course_id__in=touched)
+                .values("course_id")
+                .annotate(n=Count("id"))
+                .values_list("course_id", "n")
+            )
+            done = dict(
+                LessonCompletion.objects.filter(
+                    student=student, lesson__course_id__in=touched
+                )
+                .values("lesson__course_id")
+                .annotate(n=Count("id"))
+                .values_list("lesson__course_id", "n")
+            )
+            finished = {
+                course_id
+                for course_id in touched
+                if totals.get(course_id) and done.get(course_id, 0) >= totals[course_id]
+            }
+            now = timezone.now()
+            newly_completed = list(
+                CourseEnrollment.objects.filter(
+                    student=student, course_id__in=finished, completed=False
+                ).values("pk", "course_id", "course__title")
+            )
+            CourseEnrollment.objects.filter(
+                pk__in=[e["pk"] for e in newly_completed]
+            ).update(completed=True, completed_at=now)
+            progress_service.record_courses_completed(
+                student.pk,
+                [
+                    {"pk": e["pk"], "title": e["course__title"], "completed_at": now}
+                    for e in newly_completed
+                ],
+            )
+            if newly_completed:
+                progress_service.refresh_categories([student.pk])
+
+            completed_courses = {e["course_id"] for e in newly_completed}
+            courses = []
+            for course_id in sorted(touched):
+                course_lessons = [
+                    lessons[row["lesson_id"]]
+                    for row in created
+                    if lessons[row["lesson_id"]].course_id == course_id
+                ]
+                rewards = reward_system.reward_lesson_batch(
+                    student,
+                    course_lessons[0].course,
+                    course_lessons,
+                    course_completed=course_id in completed_courses,
+                )
+                courses.append(
+                    {
+                        "course_id": course_id,
+                        "completed_lessons": done.get(course_id, 0),
+                        "total_lessons": totals.get(course_id, 0),
+                        "course_completed": course_id in finished,
+                        **rewards,
+                    }
+                )
+
+            if created:
+                # bulk_create/update() skip the post_save handlers that
+                # invalidate the student dashboard: do it once committed
+                transaction.on_commit(
+                    lambda: cache.delete_many(
+                        [
+                            f"student_dashboard_{student.pk}",
+                            f"student_batch_data_{student.pk}",
+                        ]
+                    )
+                )
+
+            return {
+                "completed": [row["lesson_id"] for row in created],
+                "already_completed": already_completed,
+                "rejected": rejected,
+                "courses": courses,
+            }
+
+        try:
+            result = self.execute_in_transaction(_complete_operation)
+        except Exception as e:
+            self.log_error(
+                f"Error completing lessons for student {student.pk}: {str(e)}"
+            )
+            raise TeoArtServiceException(f"Error completing lessons: {str(e)}")
+
+        self.log_info(
+            f"Student {student.pk} completed {len(result['completed'])} lessons "
+            f"({len(result['rejected'])} rejected)"
+        )
+        return result
+
     def _calculate_course_progress(self, enrollment: CourseEnrollment) -> int:
         """Calculate progress percentage for a course enrollment."""
         total_lessons = enrollment.course.lessons_in_course.count()
         if total_lessons == 0:
             return 0
 
-        completed_lessons = LessonCompletion.objects.filter(
-            student=enrollment.student, lesson__course=enrollment.course
-        ).count()
+        # Maintained incrementally from LessonCompletion events
+        completed_lessons = enrollment.lessons_completed
 
-        return int((completed_lessons / total_lessons) * 100)
+        return min(100, int((completed_lessons / total_lessons) * 100))
 
     def _is_lesson_completed(self, lesson, user) -> bool:
         """Check if a lesson is completed by a user."""
@@ -22,7 +22,7 @@ from typing import TYPE_CHECKING, Dict, List, Optional
 
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import F, Sum
 from django.utils import timezone
 
 if TYPE_CHECKING:
@@ -230,6 +230,69 @@ class DBTeoCoinService:
             print(f"Error deducting balance: {e}")
             return False
 
+    @transaction.atomic
+    def post_many(self, postings: List[Dict]) -> List[str]:
+        """
+        Credit many users in one set-based ledger call.
+
+        Each posting is a dict with user_id, amount, transaction_type,
+        description, idempotency_key and optionally course_id. Postings whose
+        key is already in the ledger are skipped; the others are inserted with
+        one bulk_create and balances move with one F() UPDATE per distinct
+        amount.
+
+        Args:
+            postings: Ledger postings (credits) to apply
+
+        Returns:
+            List of idempotency keys actually posted
+        """
+        keys = [p["idempotency_key"] for p in postings]
+        posted = set(
+            DBTeoCoinTransaction.objects.filter(idempotency_key__in=keys).values_list(
+                "idempotency_key", flat=True
+            )
+        )
+        new = [p for p in postings if p["idempotency_key"] not in posted]
+        if not new:
+            return []
+
+        DBTeoCoinBalance.objects.bulk_create(
+            [DBTeoCoinBalance(user_id=p["user_id"]) for p in new],
+            ignore_conflicts=True,
+        )
+        # The unique idempotency_key makes a concurrent double post fail
+        # (and roll back) instead of crediting twice
+        DBTeoCoinTransaction.objects.bulk_create(
+            [
+                DBTeoCoinTransaction(
+                    user_id=p["user_id"],
+                    transaction_type=p["transaction_type"],
+                    amount=p["amount"],
+                    description=p.get("description", ""),
+                    course_id=p.get("course_id"),
+                    idempotency_key=p["idempotency_key"],
+                )
+                for p in new
+            ]
+        )
+
+        credit: Dict[int, Decimal] = {}
+        for p in new:
+            credit[p["user_id"]] = credit.get(p["user_id"], Decimal("0")) + Decimal(p["amount"])
+        by_amount: Dict[Decimal, List[int]] = {}
+        for user_id, amount in credit.items():
+            by_amount.setdefault(amount, []).append(user_id)
+        now = timezone.now()
+        for amount, user_ids in by_amount.items():
+            DBTeoCoinBalance.objects.filter(user_id__in=user_ids).update(
+                available_balance=F("available_balance") + amount,
+                updated_at=now,
+            )
+
+        logger.info(f"Posted {len(new)} TeoCoin credits ({len(posted)} already posted)")
+        return [p["idempotency_key"] for p in new]
+
     # ========== STAKING OPERATIONS ==========
 
     @transaction.atomic
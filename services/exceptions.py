@@ -159,3 +159,13 @@ class TransactionVerificationError(TeoArtServiceException):
         if reason:
             message += f": {reason}"
         super().__init__(message, "TRANSACTION_VERIFICATION_FAILED", 400)
+
+
+class IdempotencyConflictError(TeoArtServiceException):
+    """Raised when an idempotency key is in use by a running or different request"""
+
+    def __init__(self, scope: str, key: str, reason: str = "in progress"):
+        message = f"Operation {scope}:{key} is {reason}"
+        code = "IDEMPOTENCY_IN_PROGRESS" if reason == "in progress" else "IDEMPOTENCY_KEY_REUSED"
+        status_code = 409 if reason == "in progress" else 422
+        super().__init__(message, code, status_code)
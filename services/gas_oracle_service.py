@@ -0,0 +1,188 @@
+"""
+Gas Oracle Service - Shared Gas Price and Gas Limit Estimates
+
+On-chain writes used to ask the node for the gas price and a gas estimate
+on every transaction. The oracle keeps both in the shared cache instead:
+
+- gas price: sampled from eth_feeHistory (next base fee + median priority
+  fee, falling back to eth_gasPrice) at most every REFRESH_SECONDS and
+  smoothed with an EWMA plus a safety buffer. The EWMA lags spikes, so the
+  price is never below the latest sample; only callers that clamped before
+  (capped=True) are clamped to [MIN_GWEI, MAX_GWEI]
+- gas limits: estimate_gas results memoized per (contract, function
+  selector, shape) for ESTIMATE_TTL_SECONDS, padded with a buffer since
+  calls of the same shape can differ slightly (e.g. first mint to an address)
+
+Only one process resamples at a time; the others keep using the previous
+value meanwhile. Tunables can be overridden in settings (GAS_ORACLE_*).
+"""
+
+import time
+from statistics import median
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from services.base import BaseService
+
+GWEI = 10**9
+STATE_KEY = "gas_oracle_state"
+LOCK_KEY = "gas_oracle_sampling"
+ESTIMATES_KEY = "gas_oracle_estimates"
+
+
+def _setting(name: str, default):
+    return getattr(settings, f"GAS_ORACLE_{name}", default)
+
+
+class GasOracleService(BaseService):
+    """
+    Service providing cached gas prices and gas limits for transactions.
+    """
+
+    FEE_HISTORY_BLOCKS = 10
+    PRIORITY_PERCENTILE = 50
+
+    @property
+    def refresh_seconds(self) -> int:
+        return _setting("REFRESH_SECONDS", 30)
+
+    @property
+    def alpha(self) -> float:
+        return _setting("EWMA_ALPHA", 0.3)
+
+    @property
+    def price_buffer(self) -> float:
+        return _setting("PRICE_BUFFER", 1.1)
+
+    @property
+    def min_price(self) -> int:
+        return int(_setting("MIN_GWEI", 25) * GWEI)
+
+    @property
+    def max_price(self) -> int:
+        return int(_setting("MAX_GWEI", 50) * GWEI)
+
+    # ========== GAS PRICE ==========
+
+    def gas_price(self, w3, capped: bool = False) -> int:
+        """
+        Gas price in wei for a new transaction.
+
+        Args:
+            w3: Web3 instance used to resample a stale price
+            capped: Clamp to [MIN_GWEI, MAX_GWEI]; writes that must land
+                during a fee spike leave it off
+        """
+        state = cache.get(STATE_KEY)
+        if state is None or time.time() - state["sampled_at"] >= self.refresh_seconds:
+            if state is None or cache.add(LOCK_KEY, 1, self.refresh_seconds):
+                state = self.sample(w3) or state
+        if state is None:
+            return self._clamp(30 * GWEI) if capped else 30 * GWEI
+        return self._price(state, capped)
+
+    def sample(self, w3) -> Optional[Dict[str, Any]]:
+        """Read the network fee level and fold it into the EWMA"""
+        state = cache.get(STATE_KEY)
+        try:
+            price, source = self._network_price(w3), "fee_history"
+        except Exception as e:
+            self.log_debug(f"fee_history unavailable, using eth_gasPrice: {e}")
+            try:
+                price, source = int(w3.eth.gas_price), "gas_price"
+            except Exception as e:
+                self.log_error(f"Gas price sampling failed: {e}")
+                return None
+
+        previous = state["ewma"] if state else price
+        state = {
+            "ewma": int(self.alpha * price + (1 - self.alpha) * previous),
+            "last_sample": price,
+            "source": source,
+            "sampled_at": time.time(),
+            "samples": (state["samples"] if state else 0) + 1,
+        }
+        cache.set(STATE_KEY, state, None)
+        return state
+
+    def _network_price(self, w3) -> int:
+        history = w3.eth.fee_history(
+            self.FEE_HISTORY_BLOCKS, "latest", [self.PRIORITY_PERCENTILE]
+        )
+        # The last base fee is the one of the next block
+        base_fee = int(history["baseFeePerGas"][-1])
+        rewards = [int(block[0]) for block in history.get("reward") or [] if block]
+        return base_fee + int(median(rewards) if rewards else 0)
+
+    def _price(self, state: Dict[str, Any], capped: bool) -> int:
+        buffered = int(state["ewma"] * self.price_buffer)
+        if capped:
+            return self._clamp(buffered)
+        return max(buffered, state["last_sample"])
+
+    def _clamp(self, price: int) -> int:
+        return max(self.min_price, min(self.max_price, price))
+
+    # ========== GAS LIMITS ==========
+
+    def estimate_gas(self, function, tx: Dict[str, Any], fallback: int, shape: Any = "") -> int:
+        """
+        Gas limit for a contract call, memoized per (contract, selector, shape).
+
+        Args:
+            function: Bound contract function (w3 ContractFunction)
+            tx: Transaction fields for estimate_gas (at least "from")
+            fallback: Gas limit used when estimation fails
+            shape: Anything else the cost depends on (e.g. number of batched calls)
+        """
+        key = (
+            f"{getattr(function, 'address', '')}:"
+            f"{getattr(function, 'selector', None) or getattr(function, 'fn_name', '')}:{shape}"
+        )
+        estimates = cache.get(ESTIMATES_KEY) or {}
+        entry = estimates.get(key)
+        ttl = _setting("ESTIMATE_TTL_SECONDS", 600)
+        if entry is None or time.time() - entry["at"] >= ttl:
+            try:
+                entry = {"gas": int(function.estimate_gas(tx)), "at": time.time()}
+            except Exception as e:
+                self.log_error(f"Gas estimation failed, using {fallback}: {e}")
+                return fallback
+            # Concurrent refreshes may overwrite each other: harmless, both are fresh
+            estimates[key] = entry
+            cache.set(ESTIMATES_KEY, estimates, None)
+        return int(entry["gas"] * _setting("LIMIT_BUFFER", 1.25))
+
+    # ========== MONITORING ==========
+
+    def state(self) -> Dict[str, Any]:
+        """Current oracle state, for the calculate_gas_costs command"""
+        state = cache.get(STATE_KEY)
+        report = {
+            "min_gwei": self.min_price / GWEI,
+            "max_gwei": self.max_price / GWEI,
+            "refresh_seconds": self.refresh_seconds,
+            "sampled": state is not None,
+            "estimates": {
+                key: {"gas": entry["gas"], "age_seconds": round(time.time() - entry["at"], 1)}
+                for key, entry in (cache.get(ESTIMATES_KEY) or {}).items()
+            },
+        }
+        if state:
+            report.update(
+                {
+                    "ewma_gwei": state["ewma"] / GWEI,
+                    "last_sample_gwei": state["last_sample"] / GWEI,
+                    "price_gwei": self._price(state, capped=False) / GWEI,
+                    "capped_price_gwei": self._price(state, capped=True) / GWEI,
+                    "source": state["source"],
+                    "samples": state["samples"],
+                    "age_seconds": round(time.time() - state["sampled_at"], 1),
+                }
+            )
+        return report
+
+
+# Singleton instance
+gas_oracle_service = GasOracleService()
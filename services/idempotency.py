@@ -0,0 +1,270 @@
+"""
+Idempotency Registry - (scope, key) Deduplication for Money-Moving Operations
+
+Every idempotent operation claims a row of IdempotencyRecord, unique on
+(scope, key), before it runs. A duplicate submission is detected by one
+unique-index probe: while the first attempt is running the duplicate gets a
+409, once it has completed the stored result is replayed without running the
+operation again.
+
+Usage on a DRF view method (the key defaults to the `Idempotency-Key` header
+and is namespaced by the authenticated user):
+
+    @idempotent("burn_deposit", key=lambda view, request: request.data.get("transaction_hash"))
+    def post(self, request): ...
+
+Usage on a service method (the key callable receives the same arguments):
+
+    @idempotent("withdrawal_mint", key=lambda self, withdrawal_id: withdrawal_id)
+    def mint(self, withdrawal_id): ...
+
+Service results must be JSON-serializable; replays return their JSON form.
+Only successful view responses (2xx) are stored: failed attempts release the
+key so the client can retry.
+"""
+
+import functools
+import hashlib
+import json
+from datetime import timedelta
+from typing import Callable, Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, IntegrityError, transaction
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from services.base import BaseService
+from services.exceptions import IdempotencyConflictError
+from services.models import IdempotencyRecord
+
+# How long an in-progress claim blocks duplicates before it can be taken over
+DEFAULT_LEASE = timedelta(seconds=60)
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 191
+
+
+class IdempotencyRegistry(BaseService):
+    """
+    Service managing IdempotencyRecord claims.
+    """
+
+    def claim(
+        self, scope: str, key: str, fingerprint: str = "", lease: timedelta = DEFAULT_LEASE
+    ) -> Tuple[IdempotencyRecord, bool]:
+        """
+        Claim (scope, key) for the caller.
+
+        Returns:
+            (record, True) if the caller owns the operation and must run it,
+            (record, False) if it already completed and record holds the result
+
+        Raises:
+            IdempotencyConflictError: another attempt holds a live lease, or the
+                key was used before with a different payload
+        """
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                record = IdempotencyRecord.objects.create(
+                    scope=scope,
+                    key=key,
+                    fingerprint=fingerprint,
+                    locked_until=now + lease,
+                )
+            return record, True
+        except IntegrityError:
+            record = IdempotencyRecord.objects.get(scope=scope, key=key)
+
+        if record.fingerprint and fingerprint and record.fingerprint != fingerprint:
+            raise IdempotencyConflictError(scope, key, "reused with a different payload")
+        if record.status == "completed":
+            return record, False
+
+        # Take over an attempt that died without releasing its claim
+        taken = IdempotencyRecord.objects.filter(
+            pk=record.pk, status="in_progress", locked_until__lt=now
+        ).update(locked_until=now + lease, fingerprint=fingerprint)
+        if not taken:
+            raise IdempotencyConflictError(scope, key)
+        self.log_info(f"Took over expired idempotency claim {scope}:{key}")
+        record.locked_until = now + lease
+        return record, True
+
+    def complete(self, record: IdempotencyRecord, body, status: Optional[int] = None):
+        """Store the result of a claimed operation"""
+        record.status = "completed"
+        record.response_status = status
+        record.response_body = body
+        record.locked_until = None
+        record.completed_at = timezone.now()
+        record.save(
+            update_fields=[
+                "status",
+                "response_status",
+                "response_body",
+                "locked_until",
+                "completed_at",
+            ]
+        )
+
+    def release(self, record: IdempotencyRecord):
+        """Drop an unfinished claim so the operation can be retried"""
+        try:
+            IdempotencyRecord.objects.filter(pk=record.pk, status="in_progress").delete()
+        except DatabaseError as e:
+            # Broken outer transaction: its rollback removes the claim anyway
+            self.log_error(f"Could not release {record.scope}:{record.key}: {e}")
+
+    def purge(self, older_than: timedelta) -> int:
+        """Delete completed records older than `older_than`"""
+        deleted, _ = IdempotencyRecord.objects.filter(
+            status="completed", created_at__lt=timezone.now() - older_than
+        ).delete()
+        return deleted
+
+
+# Singleton instance
+idempotency_registry = IdempotencyRegistry()
+
+
+def _find_request(args, kwargs):
+    for value in (*args, *kwargs.values()):
+        if isinstance(value, (Request, HttpRequest)):
+            return value
+    return None
+
+
+def _fingerprint(request) -> str:
+    payload = json.dumps(
+        getattr(request, "data", None), sort_keys=True, cls=DjangoJSONEncoder
+    )
+    return hashlib.sha256(f"{request.path}|{payload}".encode()).hexdigest()
+
+
+def _as_json(data):
+    # Same representation the client received (JSONRenderer turns Decimal into
+    # float, dates into ISO strings)
+    return json.loads(JSONRenderer().render(data) or b"null")
+
+
+def idempotent(
+    scope: str, key: Optional[Callable] = None, lease: timedelta = DEFAULT_LEASE
+):
+    """
+    Make a DRF view method or a service method idempotent on (scope, key).
+
+    Works on ``async def`` methods too (core.async_views), the registry
+    being queried through sync_to_async.
+
+    Args:
+        scope: Operation namespace, e.g. "burn_deposit"
+        key: Callable receiving the decorated function's arguments and
+            returning the key, or None to run without idempotency. Defaults
+            to the request's Idempotency-Key header.
+        lease: How long an unfinished attempt blocks duplicates
+    """
+
+    def decorator(func):
+        if iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                record, result = await sync_to_async(_claim)(scope, key, lease, args, kwargs)
+                if result is not _RUN:
+                    return result
+                if record is None:
+                    return await func(*args, **kwargs)
+
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception:
+                    await sync_to_async(idempotency_registry.release)(record)
+                    raise
+                await sync_to_async(_store)(record, result)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            record, result = _claim(scope, key, lease, args, kwargs)
+            if result is not _RUN:
+                return result
+            if record is None:
+                return func(*args, **kwargs)
+
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                idempotency_registry.release(record)
+                raise
+            _store(record, result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+# _claim() result telling the caller to run the operation
+_RUN = object()
+
+
+def _claim(scope, key, lease, args, kwargs):
+    """
+    (record, _RUN) if the caller must run the operation, record being None
+    without a key; (None, result) to return result instead (replay, conflict)
+    """
+    request = _find_request(args, kwargs)
+    if key is not None:
+        op_key = key(*args, **kwargs)
+    elif request is not None:
+        op_key = request.headers.get(IDEMPOTENCY_HEADER)
+    else:
+        op_key = None
+    if op_key in (None, ""):
+        return None, _RUN
+
+    op_key, fingerprint = str(op_key), ""
+    if request is not None:
+        op_key = f"{getattr(request.user, 'pk', None)}:{op_key}"
+        fingerprint = _fingerprint(request)
+    if len(op_key) > MAX_KEY_LENGTH:
+        op_key = hashlib.sha256(op_key.encode()).hexdigest()
+
+    try:
+        record, owner = idempotency_registry.claim(scope, op_key, fingerprint, lease)
+    except IdempotencyConflictError as e:
+        if request is None:
+            raise
+        return None, Response(
+            {"success": False, "error": e.message, "code": e.code},
+            status=e.status_code,
+        )
+
+    if not owner:
+        if record.response_status is None:
+            return None, record.response_body
+        response = Response(record.response_body, status=record.response_status)
+        response["Idempotent-Replayed"] = "true"
+        return None, response
+
+    return record, _RUN
+
+
+def _store(record, result):
+    """Complete the claim with the operation's result, or release it"""
+    if isinstance(result, HttpResponse):
+        if 200 <= result.status_code < 300 and hasattr(result, "data"):
+            idempotency_registry.complete(
+                record, _as_json(result.data), result.status_code
+            )
+        else:
+            idempotency_registry.release(record)
+    else:
+        idempotency_registry.complete(record, _as_json(result))
@@ -0,0 +1,322 @@
+"""
+Ledger Checkpoint Service - Historical Balances and Statements
+
+A user's TEO balance at a past date (or a statement) used to need a replay of
+all their DBTeoCoinTransaction rows. checkpoint_user() stores running totals
+(DBTeoCoinCheckpoint) at the last posting of every day with postings and
+every LEDGER_CHECKPOINT_EVERY postings, so:
+
+- balance_as_of(): latest checkpoint before T + SUM over the postings between
+  it and T (at most a day / CHECKPOINT_EVERY postings)
+- statement(): opening balance as above, then one page of the period's
+  postings with their running balance
+- export(): the whole (or a ranged) history as CSV or JSONL lines, read with
+  .iterator(chunk_size=EXPORT_CHUNK_SIZE) so long histories stream
+
+The balance reported is the user's holdings, available plus staked
+(services.ledger_rules.HOLDINGS): each posting counts per BUCKET_RULES, so
+stakes and unstakes move nothing, and withdrawals count from their request
+rows (WITHDRAWAL_RULES), at the time they were requested. Checkpoints only
+total postings; withdrawals are added at query time, as their status can
+still change. Postings younger than SETTLE_SECONDS are never checkpointed,
+so a transaction still open when the checkpoint is taken can't be skipped.
+"""
+
+import csv
+import heapq
+import io
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterator, Optional
+
+from blockchain.models import (
+    DBTeoCoinCheckpoint,
+    DBTeoCoinTransaction,
+    TeoCoinWithdrawalRequest,
+)
+from django.conf import settings
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery
+from django.utils import timezone
+from services.base import BaseService
+from services.ledger_rules import (
+    bucket_sum,
+    posting_factor,
+    withdrawal_factor,
+    withdrawal_statuses,
+    withdrawal_sum,
+)
+
+SETTLE_SECONDS = 300
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FIELDS = ["id", "created_at", "transaction_type", "amount", "balance_after", "description"]
+
+
+def month_bounds(year: int, month: int):
+    """[start, end) of a calendar month in the current time zone"""
+    start = timezone.make_aware(datetime(year, month, 1))
+    next_month = datetime(year + month // 12, month % 12 + 1, 1)
+    return start, timezone.make_aware(next_month)
+
+
+class LedgerCheckpointService(BaseService):
+    """
+    Service maintaining ledger checkpoints and answering historical queries.
+    """
+
+    @property
+    def every(self) -> int:
+        return getattr(settings, "LEDGER_CHECKPOINT_EVERY", 500)
+
+    def _postings(self, user_id: int):
+        return DBTeoCoinTransaction.objects.filter(user_id=user_id).order_by(
+            "created_at", "id"
+        )
+
+    def _withdrawals(self, user_id: int):
+        """Withdrawal requests that move the holdings, in ledger order"""
+        return TeoCoinWithdrawalRequest.objects.filter(
+            user_id=user_id, status__in=withdrawal_statuses()
+        ).order_by("created_at", "id")
+
+    def _withdrawal_line(self, withdrawal: TeoCoinWithdrawalRequest) -> Dict[str, Any]:
+        return {
+            "id": f"withdrawal-{withdrawal.pk}",
+            "type": "withdrawal",
+            "amount": withdrawal.amount * withdrawal_factor(withdrawal.status),
+            "description": (
+                f"Withdrawal #{withdrawal.pk} to {withdrawal.metamask_address} ({withdrawal.status})"
+            ),
+            "created_at": withdrawal.created_at,
+        }
+
+    def _after(self, checkpoint: DBTeoCoinCheckpoint) -> Q:
+        """Postings after a checkpoint, in ledger order"""
+        return Q(created_at__gt=checkpoint.as_of) | Q(
+            created_at=checkpoint.as_of, id__gt=checkpoint.last_transaction_id
+        )
+
+    def latest(self, user_id: int, before: datetime = None, inclusive: bool = True):
+        """Most recent checkpoint (at or before `before`, if given)"""
+        checkpoints = DBTeoCoinCheckpoint.objects.filter(user_id=user_id)
+        if before is not None:
+            checkpoints = checkpoints.filter(
+                **{"as_of__lte" if inclusive else "as_of__lt": before}
+            )
+        return checkpoints.order_by("-as_of", "-last_transaction_id").first()
+
+    # ========== CHECKPOINTING ==========
+
+    def checkpoint_user(self, user_id: int, until: datetime = None, every: int = None) -> int:
+        """
+        Checkpoint the postings of a user since their last checkpoint.
+
+        Args:
+            until: Only postings created up to then (default: SETTLE_SECONDS ago)
+            every: Postings between checkpoints (default LEDGER_CHECKPOINT_EVERY)
+
+        Returns:
+            Number of checkpoints written
+        """
+        until = until or timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+        every = every or self.every
+        last = self.latest(user_id)
+        postings = self._postings(user_id).filter(created_at__lte=until)
+        if last:
+            postings = postings.filter(self._after(last))
+            totals = [last.balance, last.credits, last.debits, last.posting_count]
+        else:
+            totals = [Decimal("0.00"), Decimal("0.00"), Decimal("0.00"), 0]
+
+        checkpoints = []
+
+        def close(posting_id, created_at):
+            balance, credits, debits, count = totals
+            checkpoints.append(
+                DBTeoCoinCheckpoint(
+                    user_id=user_id,
+                    last_transaction_id=posting_id,
+                    as_of=created_at,
+                    balance=balance,
+                    credits=credits,
+                    debits=debits,
+                    posting_count=count,
+                )
+            )
+
+        previous, pending = None, 0
+        for posting_id, created_at, posting_type, amount in postings.values_list(
+            "id", "created_at", "transaction_type", "amount"
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            if pending and timezone.localdate(created_at) != timezone.localdate(previous[1]):
+                close(*previous)
+                pending = 0
+            moved = amount * posting_factor(posting_type)
+            totals[0] += moved
+            if moved:
+                totals[1 if moved > 0 else 2] += moved
+            totals[3] += 1
+            previous, pending = (posting_id, created_at), pending + 1
+            if pending >= every:
+                close(*previous)
+                pending = 0
+        # The last day is only closed once it's over
+        if pending and timezone.localdate(previous[1]) < timezone.localdate(until):
+            close(*previous)
+
+        DBTeoCoinCheckpoint.objects.bulk_create(checkpoints, ignore_conflicts=True)
+        return len(checkpoints)
+
+    def checkpoint_all(self, until: datetime = None, every: int = None) -> Dict[str, int]:
+        """Checkpoint every user with postings past their last checkpoint"""
+        until = until or timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+        last_checkpointed = (
+            DBTeoCoinCheckpoint.objects.filter(user_id=OuterRef("user_id"))
+            .order_by("-as_of", "-last_transaction_id")
+            .values("last_transaction_id")[:1]
+        )
+        user_ids = (
+            DBTeoCoinTransaction.objects.filter(created_at__lte=until)
+            .values("user_id")
+            .annotate(last_id=Max("id"), checkpointed=Subquery(last_checkpointed))
+            .filter(Q(checkpointed__isnull=True) | Q(last_id__gt=F("checkpointed")))
+            .values_list("user_id", flat=True)
+        )
+        stats = {"users": 0, "checkpoints": 0}
+        for user_id in user_ids.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            stats["users"] += 1
+            stats["checkpoints"] += self.checkpoint_user(user_id, until, every)
+        self.log_info(
+            f"Wrote {stats['checkpoints']} ledger checkpoints for {stats['users']} users"
+        )
+        return stats
+
+    # ========== QUERIES ==========
+
+    def balance_as_of(self, user_id: int, at: datetime, inclusive: bool = True) -> Decimal:
+        """Holdings after the postings and withdrawals created up to `at` (before it if not inclusive)"""
+        until = {"created_at__lte" if inclusive else "created_at__lt": at}
+        checkpoint = self.latest(user_id, at, inclusive)
+        postings = self._postings(user_id).filter(**until)
+        balance = Decimal("0.00")
+        if checkpoint:
+            postings = postings.filter(self._after(checkpoint))
+            balance = checkpoint.balance
+        withdrawn = TeoCoinWithdrawalRequest.objects.filter(user_id=user_id, **until)
+        return (
+            balance
+            + (postings.aggregate(total=bucket_sum())["total"] or 0)
+            + (withdrawn.aggregate(total=withdrawal_sum())["total"] or 0)
+        )
+
+    def statement(
+        self, user_id: int, start: datetime, end: datetime, page: int = 1, page_size: int = 50
+    ) -> Dict[str, Any]:
+        """
+        One page of the postings in [start, end) with running balances, and
+        the period's withdrawals (which the balances include)
+        """
+        opening = self.balance_as_of(user_id, start, inclusive=False)
+        postings = self._postings(user_id).filter(created_at__gte=start, created_at__lt=end)
+        totals = postings.aggregate(total=bucket_sum(), count=Count("id"))
+        withdrawals = [
+            self._withdrawal_line(withdrawal)
+            for withdrawal in self._withdrawals(user_id).filter(
+                created_at__gte=start, created_at__lt=end
+            )
+        ]
+        offset = (page - 1) * page_size
+
+        balance = opening
+        if offset:
+            balance += postings[:offset].aggregate(total=bucket_sum())["total"] or 0
+        rows = []
+        # A withdrawal comes before the postings created at the same time
+        withdrawn = iter(withdrawals)
+        next_withdrawal = next(withdrawn, None)
+        for posting in postings[offset : offset + page_size]:
+            while next_withdrawal and next_withdrawal["created_at"] <= posting.created_at:
+                balance += next_withdrawal["amount"]
+                next_withdrawal = next(withdrawn, None)
+            balance += posting.amount * posting_factor(posting.transaction_type)
+            rows.append(
+                {
+                    "id": posting.id,
+                    "type": posting.transaction_type,
+                    "amount": posting.amount,
+                    "balance_after": balance,
+                    "description": posting.description,
+                    "created_at": posting.created_at,
+                }
+            )
+
+        return {
+            "start": start,
+            "end": end,
+            "opening_balance": opening,
+            "closing_balance": opening
+            + (totals["total"] or 0)
+            + sum(withdrawal["amount"] for withdrawal in withdrawals),
+            "count": totals["count"] or 0,
+            "page": page,
+            "page_size": page_size,
+            "transactions": rows,
+            "withdrawals": withdrawals,
+        }
+
+    def export(
+        self,
+        user_id: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        fmt: str = "csv",
+    ) -> Iterator[str]:
+        """Stream the postings and withdrawals in [start, end) as CSV or JSONL lines"""
+        balance = self.balance_as_of(user_id, start, inclusive=False) if start else Decimal("0.00")
+        postings = self._postings(user_id)
+        withdrawals = self._withdrawals(user_id)
+        if start:
+            postings = postings.filter(created_at__gte=start)
+            withdrawals = withdrawals.filter(created_at__gte=start)
+        if end:
+            postings = postings.filter(created_at__lt=end)
+            withdrawals = withdrawals.filter(created_at__lt=end)
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def csv_line(values):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(values)
+            return buffer.getvalue()
+
+        def posting_lines():
+            for posting_id, created_at, posting_type, amount, description in postings.values_list(
+                "id", "created_at", "transaction_type", "amount", "description"
+            ).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+                moved = amount * posting_factor(posting_type)
+                yield created_at, posting_id, posting_type, amount, moved, description
+
+        # A user has few withdrawals: loaded at once, each merged in before
+        # the postings created at the same time
+        withdrawal_lines = [
+            (line["created_at"], line["id"], line["type"], line["amount"], line["amount"], line["description"])
+            for line in map(self._withdrawal_line, withdrawals)
+        ]
+
+        if fmt == "csv":
+            yield csv_line(EXPORT_FIELDS)
+        for created_at, posting_id, posting_type, amount, moved, description in heapq.merge(
+            withdrawal_lines, posting_lines(), key=lambda line: line[0]
+        ):
+            balance += moved
+            values = [posting_id, created_at.isoformat(), posting_type, str(amount), str(balance), description]
+            if fmt == "csv":
+                yield csv_line(values)
+            else:
+                yield json.dumps(dict(zip(EXPORT_FIELDS, values))) + "\n"
+
+
+# Singleton instance
+ledger_checkpoint_service = LedgerCheckpointService()
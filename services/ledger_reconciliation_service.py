@@ -0,0 +1,271 @@
+"""
+Ledger Reconciliation Service - Balances vs. Ledger Postings
+
+Checks that every DBTeoCoinBalance (available, staked, pending withdrawal)
+matches what the user's DBTeoCoinTransaction postings add up to:
+
+- postings are aggregated per user with one grouped query per id-range chunk
+  of CHUNK_SIZE postings; chunks run in a process pool and the partial sums
+  are merged
+- each transaction type moves its amount between balance buckets per
+  services.ledger_rules.BUCKET_RULES (e.g. a stake moves it from available to staked)
+- withdrawals move the buckets per their TeoCoinWithdrawalRequest rows
+  (WITHDRAWAL_RULES), not per postings: the live request path writes none,
+  and the paths that do only record a move the row already accounts for
+- balance rows are streamed and compared; drifted users go to a CSV report
+  and, with repair, their balance row is set to the ledger's values, unless
+  a ledger value is negative (then the ledger itself is incomplete)
+
+Postings created after the run started (id above the snapshot) are not
+counted, and balance rows updated after the run started are reported but
+never repaired.
+"""
+
+import csv
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from blockchain.models import (
+    DBTeoCoinBalance,
+    DBTeoCoinTransaction,
+    TeoCoinWithdrawalRequest,
+)
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+from services.base import BaseService
+from services.ledger_rules import (
+    AVAILABLE,
+    PENDING,
+    STAKED,
+    ZERO,
+    bucket_sum,
+    withdrawal_sum,
+)
+
+CHUNK_SIZE = 100_000
+BUCKETS = ("available_balance", "staked_balance", "pending_withdrawal")
+
+
+def aggregate_chunk(low: int, high: int) -> Dict[int, Tuple[Decimal, Decimal, Decimal, int]]:
+    """Per-user bucket totals and posting count of the postings with low <= id < high"""
+    rows = (
+        DBTeoCoinTransaction.objects.filter(id__gte=low, id__lt=high, user__isnull=False)
+        .order_by()
+        .values("user_id")
+        .annotate(
+            available=bucket_sum(AVAILABLE),
+            staked=bucket_sum(STAKED),
+            pending=bucket_sum(PENDING),
+            postings=Count("id"),
+        )
+    )
+    return {
+        row["user_id"]: (
+            row["available"] or ZERO,
+            row["staked"] or ZERO,
+            row["pending"] or ZERO,
+            row["postings"],
+        )
+        for row in rows
+    }
+
+
+class LedgerReconciliationService(BaseService):
+    """
+    Service reconciling TeoCoin balance rows against the ledger.
+    """
+
+    def expected_balances(
+        self, chunk_size: int = CHUNK_SIZE, workers: int = 1
+    ) -> Tuple[Dict[int, List[Any]], Dict[str, int]]:
+        """
+        Ledger-derived (available, staked, pending, postings) per user.
+
+        Returns:
+            (totals per user id, {"postings", "chunks", "max_id"})
+        """
+        bounds = DBTeoCoinTransaction.objects.aggregate(low=Min("id"), high=Max("id"))
+        info = {"postings": 0, "chunks": 0, "max_id": bounds["high"] or 0}
+        totals: Dict[int, List[Any]] = {}
+        lows, highs = [], []
+        if bounds["low"] is not None:
+            lows = list(range(bounds["low"], bounds["high"] + 1, chunk_size))
+            highs = [min(low + chunk_size, bounds["high"] + 1) for low in lows]
+        info["chunks"] = len(lows)
+
+        if workers > 1 and len(lows) > 1:
+            # Forked workers must open their own connections
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(lows)),
+                mp_context=multiprocessing.get_context("fork"),
+            ) as pool:
+                partials = list(pool.map(aggregate_chunk, lows, highs))
+        else:
+            partials = map(aggregate_chunk, lows, highs)
+
+        for partial in partials:
+            for user_id, chunk_totals in partial.items():
+                user_totals = totals.setdefault(user_id, [ZERO, ZERO, ZERO, 0])
+                for i, value in enumerate(chunk_totals):
+                    user_totals[i] += value
+                info["postings"] += chunk_totals[3]
+
+        requests = (
+            TeoCoinWithdrawalRequest.objects.order_by()
+            .values("user_id")
+            .annotate(
+                available=withdrawal_sum(AVAILABLE),
+                staked=withdrawal_sum(STAKED),
+                pending=withdrawal_sum(PENDING),
+            )
+        )
+        for row in requests:
+            user_totals = totals.setdefault(row["user_id"], [ZERO, ZERO, ZERO, 0])
+            for i, bucket in enumerate(("available", "staked", "pending")):
+                user_totals[i] += row[bucket] or ZERO
+        return totals, info
+
+    def reconcile(
+        self,
+        chunk_size: int = CHUNK_SIZE,
+        workers: Optional[int] = None,
+        repair: bool = False,
+        report_path: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Diff every balance row against the ledger.
+
+        Args:
+            chunk_size: Posting ids per aggregation chunk
+            workers: Processes aggregating chunks (default: CPU count)
+            repair: Set drifted balance rows to the ledger's values
+            report_path: CSV discrepancy report (default under logs/reconciliation/)
+
+        Returns:
+            Stats with postings, users, chunks, discrepancies, repaired,
+            skipped, elapsed_seconds and report
+        """
+        started_at, clock = timezone.now(), time.monotonic()
+        workers = workers or os.cpu_count() or 1
+        expected, info = self.expected_balances(chunk_size, workers)
+
+        discrepancies = []
+        seen = set()
+        for user_id, *actual, updated_at in DBTeoCoinBalance.objects.values_list(
+            "user_id", *BUCKETS, "updated_at"
+        ).iterator(chunk_size=10_000):
+            seen.add(user_id)
+            ledger = expected.get(user_id, [ZERO, ZERO, ZERO, 0])
+            if list(actual) != ledger[:3]:
+                discrepancies.append(
+                    self._discrepancy(user_id, ledger, actual, updated_at > started_at)
+                )
+        for user_id, ledger in expected.items():
+            if user_id not in seen and any(ledger[:3]):
+                discrepancies.append(self._discrepancy(user_id, ledger, None, False))
+
+        stats = {
+            "postings": info["postings"],
+            "users": len(seen | set(expected)),
+            "chunks": info["chunks"],
+            "workers": workers,
+            "discrepancies": len(discrepancies),
+            "drift": sum(abs(d["total_drift"]) for d in discrepancies),
+            "repaired": 0,
+            "skipped": 0,
+        }
+        if repair and discrepancies:
+            stats["repaired"], stats["skipped"] = self._repair(
+                discrepancies, started_at, info["max_id"]
+            )
+
+        stats["report"] = self._write_report(discrepancies, report_path)
+        stats["elapsed_seconds"] = round(time.monotonic() - clock, 3)
+        self.log_info(
+            f"Reconciled {stats['postings']} postings of {stats['users']} users in "
+            f"{stats['elapsed_seconds']}s: {stats['discrepancies']} discrepancies, "
+            f"{stats['repaired']} repaired"
+        )
+        return stats
+
+    def _discrepancy(self, user_id, ledger, actual, changed_during_run) -> Dict[str, Any]:
+        row = {
+            "user_id": user_id,
+            "postings": ledger[3],
+            "missing_balance_row": actual is None,
+            "changed_during_run": changed_during_run,
+            "negative_expected": any(value < 0 for value in ledger[:3]),
+        }
+        actual = actual or [ZERO, ZERO, ZERO]
+        for i, bucket in enumerate(BUCKETS):
+            row[f"expected_{bucket}"] = ledger[i]
+            row[f"actual_{bucket}"] = actual[i]
+        row["total_drift"] = sum(actual) - sum(ledger[:3])
+        return row
+
+    def _repair(self, discrepancies, started_at: datetime, max_id: int) -> Tuple[int, int]:
+        """
+        Set drifted balances to the ledger's values; skip rows that moved
+        meanwhile and users whose ledger goes negative
+        """
+        repaired = skipped = 0
+        moved_users = set(
+            DBTeoCoinTransaction.objects.filter(id__gt=max_id).values_list("user_id", flat=True)
+        )
+        for row in discrepancies:
+            if row["negative_expected"]:
+                self.log_error(
+                    f"Not repairing user {row['user_id']}: negative ledger balance, "
+                    f"postings are missing"
+                )
+                skipped += 1
+                continue
+            if row["changed_during_run"] or row["user_id"] in moved_users:
+                skipped += 1
+                continue
+            values = {bucket: row[f"expected_{bucket}"] for bucket in BUCKETS}
+            with transaction.atomic():
+                if row["missing_balance_row"]:
+                    _, created = DBTeoCoinBalance.objects.get_or_create(
+                        user_id=row["user_id"], defaults=values
+                    )
+                    updated = int(created)
+                else:
+                    updated = DBTeoCoinBalance.objects.filter(
+                        user_id=row["user_id"], updated_at__lte=started_at
+                    ).update(**values, updated_at=timezone.now())
+            if updated:
+                repaired += 1
+                self.log_info(
+                    f"Repaired balance of user {row['user_id']} (drift {row['total_drift']})"
+                )
+            else:
+                skipped += 1
+        return repaired, skipped
+
+    def _write_report(self, discrepancies, report_path: Optional[str]) -> Optional[str]:
+        if not discrepancies:
+            return None
+        if report_path is None:
+            directory = os.path.join(settings.BASE_DIR, "logs", "reconciliation")
+            os.makedirs(directory, exist_ok=True)
+            report_path = os.path.join(
+                directory, f"ledger-{timezone.now():%Y%m%d-%H%M%S}.csv"
+            )
+        with open(report_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(discrepancies[0]))
+            writer.writeheader()
+            writer.writerows(discrepancies)
+        return str(report_path)
+
+
+# Singleton instance
+ledger_reconciliation_service = LedgerReconciliationService()
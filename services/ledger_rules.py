@@ -0,0 +1,108 @@
+"""
+Ledger Rules - How TeoCoin Postings and Withdrawals Move Balance Buckets
+
+A DBTeoCoinBalance has three buckets: available, staked and pending
+withdrawal. DBTeoCoinTransaction amounts are stored with inconsistent signs
+(stakes and unstakes positive, like credits), so their effect on each bucket
+comes from BUCKET_RULES, shared by the reconciliation job and the ledger
+checkpoints:
+
+- BUCKET_RULES / DEFAULT_RULE: (available, staked, pending) multiplier of a
+  posting's stored amount, by transaction type
+- WITHDRAWAL_RULES: the same for a TeoCoinWithdrawalRequest's amount, by
+  status. Withdrawals are accounted from their request rows, never from
+  postings: the live request path writes none.
+
+HOLDINGS is the balance reported by statements and historical queries: what
+the user holds on the platform, available plus staked.
+"""
+
+from decimal import Decimal
+from typing import Dict, List, Sequence
+
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+
+AVAILABLE, STAKED, PENDING = 0, 1, 2
+HOLDINGS = (AVAILABLE, STAKED)
+ZERO = Decimal("0.00")
+
+DEFAULT_RULE = (1, 0, 0)
+BUCKET_RULES = {
+    "stake": (-1, 1, 0),
+    "staked": (-1, 1, 0),
+    "unstake": (1, -1, 0),
+    "unstaked": (1, -1, 0),
+    "withdrawal_request": (0, 0, 0),
+    "withdrawn": (0, 0, 0),
+    "withdrawal_cancelled": (0, 0, 0),
+    "withdrawal_refund": (0, 0, 0),
+}
+
+# A request moves its amount from available to pending, completing it leaves
+# pending, and cancelled or failed requests are refunded
+WITHDRAWAL_RULES = {
+    "pending": (-1, 0, 1),
+    "processing": (-1, 0, 1),
+    "completed": (-1, 0, 0),
+    "failed": (0, 0, 0),
+    "cancelled": (0, 0, 0),
+}
+
+
+def posting_factor(transaction_type: str, buckets: Sequence[int] = HOLDINGS) -> int:
+    """Multiplier of a posting's amount in the sum of some buckets"""
+    rule = BUCKET_RULES.get(transaction_type, DEFAULT_RULE)
+    return sum(rule[i] for i in buckets)
+
+
+def withdrawal_factor(status: str, buckets: Sequence[int] = HOLDINGS) -> int:
+    """Multiplier of a withdrawal request's amount in the sum of some buckets"""
+    rule = WITHDRAWAL_RULES.get(status, (0, 0, 0))
+    return sum(rule[i] for i in buckets)
+
+
+def withdrawal_statuses(buckets: Sequence[int] = HOLDINGS) -> List[str]:
+    """Statuses of the withdrawal requests that move some buckets"""
+    return [status for status in WITHDRAWAL_RULES if withdrawal_factor(status, buckets)]
+
+
+def _moved_sum(field: str, factors: Dict[str, int], default: int) -> Sum:
+    """SUM of amount * factor, the factor picked by the value of field"""
+    by_factor: Dict[int, List[str]] = {}
+    for key, factor in factors.items():
+        if factor != default:
+            by_factor.setdefault(factor, []).append(key)
+
+    def moved(factor):
+        return F("amount") * factor if factor else Value(ZERO)
+
+    return Sum(
+        Case(
+            *[
+                When(**{f"{field}__in": keys}, then=moved(factor))
+                for factor, keys in by_factor.items()
+            ],
+            default=moved(default),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        )
+    )
+
+
+def bucket_sum(*buckets: int) -> Sum:
+    """SUM of the posting amounts moved into some buckets (default: HOLDINGS)"""
+    buckets = buckets or HOLDINGS
+    return _moved_sum(
+        "transaction_type",
+        {kind: posting_factor(kind, buckets) for kind in BUCKET_RULES},
+        sum(DEFAULT_RULE[i] for i in buckets),
+    )
+
+
+def withdrawal_sum(*buckets: int) -> Sum:
+    """SUM of the withdrawal request amounts moved into some buckets (default: HOLDINGS)"""
+    buckets = buckets or HOLDINGS
+    return _moved_sum(
+        "status",
+        {status: withdrawal_factor(status, buckets) for status in WITHDRAWAL_RULES},
+        0,
+    )
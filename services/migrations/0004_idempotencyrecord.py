@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 09:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0003_delete_teoearning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(help_text='Operation namespace', max_length=64)),
+                ('key', models.CharField(help_text='Client or derived key', max_length=191)),
+                ('status', models.CharField(choices=[('in_progress', 'In Progress'), ('completed', 'Completed')], default='in_progress', max_length=20)),
+                ('fingerprint', models.CharField(blank=True, help_text='SHA-256 of the request payload', max_length=64)),
+                ('response_status', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('response_body', models.JSONField(blank=True, null=True)),
+                ('locked_until', models.DateTimeField(blank=True, help_text='In-progress lease expiry', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='services_id_created_f5ef5f_idx')],
+                'constraints': [models.UniqueConstraint(fields=('scope', 'key'), name='uniq_idempotency_scope_key')],
+            },
+        ),
+    ]
@@ -209,3 +209,46 @@ class PlatformAllowance(models.Model):
 
     def __str__(self):
         return f"Allowance {self.student_address[:10]}...: {self.remaining_allowance}/{self.total_allowance} TEO"
+
+
+class IdempotencyRecord(models.Model):
+    """
+    Registry entry for one idempotent operation, unique on (scope, key).
+
+    Written by services.idempotency: the row is inserted "in_progress" before
+    the operation runs (the unique index makes concurrent duplicates fail
+    fast) and the result is stored when it completes, so retries are answered
+    from here without running the operation again.
+    """
+
+    STATUS_CHOICES = [
+        ("in_progress", "In Progress"),
+        ("completed", "Completed"),
+    ]
+
+    scope = models.CharField(max_length=64, help_text="Operation namespace")
+    key = models.CharField(max_length=191, help_text="Client or derived key")
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default="in_progress"
+    )
+    fingerprint = models.CharField(
+        max_length=64, blank=True, help_text="SHA-256 of the request payload"
+    )
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    locked_until = models.DateTimeField(
+        null=True, blank=True, help_text="In-progress lease expiry"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scope", "key"], name="uniq_idempotency_scope_key"
+            )
+        ]
+        indexes = [models.Index(fields=["created_at"])]
+
+    def __str__(self):
+        return f"Idempotency {self.scope}:{self.key} ({self.status})"
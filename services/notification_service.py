@@ -367,7 +367,8 @@ class NotificationService(TransactionalService):
         """Send email notification for urgent requests"""
         try:
             if notification_type == "discount_request":
-                from django.core.mail import send_mail
+                from core.task_queue import enqueue_on_commit
+                from notifications.tasks import send_email
 
                 subject = f"🔔 Student Discount Request - {data.get('course_title', 'Unknown Course')}"
                 message = f"""
@@ -391,15 +392,11 @@ Best regards,
 SchoolPlatform Team
                 """
 
-                send_mail(
-                    subject=subject,
-                    message=message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[user.email],
-                    fail_silently=True,
+                enqueue_on_commit(
+                    send_email, subject=subject, message=message, recipient_list=[user.email]
                 )
 
-                logger.info(f"Email notification sent to {user.email}")
+                logger.info(f"Email notification queued for {user.email}")
 
         except Exception as e:
             logger.error(f"Email notification failed for {user.email}: {e}")
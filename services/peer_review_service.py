@@ -0,0 +1,170 @@
+"""
+Peer Review Settlement Service - Set-Based Reward Settlement
+
+Settles an ExerciseSubmission once its last review lands: the score aggregate
+comes from one SQL query, the submission is claimed with a conditional
+UPDATE, the student and reviewer rewards are posted through a single
+DBTeoCoinService.post_many() call and the notifications are written with one
+bulk insert.
+
+Every ledger posting carries the key `peer_review:<submission>:<user>`, so a
+settlement retried after a crash or raced by a concurrent request never pays
+the same beneficiary twice.
+"""
+
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from courses.models import ExerciseReview, ExerciseSubmission
+from django.core.cache import cache
+from django.db import transaction
+from notifications.models import Notification
+from services.base import BaseService
+from services.db_teocoin_service import db_teocoin_service
+from services.progress_service import progress_service
+
+STUDENT_REWARD = Decimal("2")
+REVIEWER_REWARD = Decimal("2")
+# Student is rewarded only with at least 3 completed reviews and mean score >= 6
+MIN_REVIEWS_TO_PASS = 3
+PASSING_SCORE = 6
+
+
+def posting_key(submission_id: int, user_id: int) -> str:
+    return f"peer_review:{submission_id}:{user_id}"
+
+
+def reward_description(kind: str, submission_id: int, reference: str = "") -> str:
+    """Same audit format as courses.views.exercises.create_reward_transaction"""
+    pretty = kind.replace("_", " ").title()
+    suffix = f" | ref={reference}" if reference else ""
+    return f"[{kind}] {pretty} (submission {submission_id}){suffix}"
+
+
+class PeerReviewSettlementService(BaseService):
+    """
+    Service settling completed peer reviews.
+    """
+
+    def settle(self, submission: ExerciseSubmission) -> Optional[Dict[str, Any]]:
+        """
+        Settle `submission` if all of its reviews are scored.
+
+        Returns the settlement summary, or None when reviews are still pending
+        or another request already settled the submission.
+        """
+        stats = ExerciseReview.score_aggregate(submission.pk)
+        if not stats["total"] or stats["completed"] < stats["total"]:
+            return None
+
+        score_average = stats["score_average"]
+        passed = (
+            score_average is not None
+            and stats["completed"] >= MIN_REVIEWS_TO_PASS
+            and score_average >= PASSING_SCORE
+        )
+        changes = {
+            "reviewed": True,
+            "passed": passed,
+            "average_score": stats["average"] or 0,
+            "is_approved": stats["average"] is not None and stats["average"] >= 5,
+        }
+        if passed:
+            changes["reward_amount"] = int(STUDENT_REWARD)
+
+        with transaction.atomic():
+            # Claim the submission: only one request flips reviewed to True
+            claimed = ExerciseSubmission.objects.filter(
+                pk=submission.pk, reviewed=False
+            ).update(**changes)
+            if not claimed:
+                return None
+
+            reviews = list(
+                ExerciseReview.objects.filter(
+                    submission_id=submission.pk, score__isnull=False
+                ).values("id", "reviewer_id")
+            )
+            postings = [
+                {
+                    "user_id": review["reviewer_id"],
+                    "amount": REVIEWER_REWARD,
+                    "transaction_type": "bonus",
+                    "description": reward_description(
+                        "review_reward", submission.pk, f"review:{review['id']}"
+                    ),
+                    "idempotency_key": posting_key(submission.pk, review["reviewer_id"]),
+                }
+                for review in reviews
+            ]
+            if passed:
+                postings.append(
+                    {
+                        "user_id": submission.student_id,
+                        "amount": STUDENT_REWARD,
+                        "transaction_type": "bonus",
+                        "description": reward_description(
+                            "exercise_reward", submission.pk
+                        ),
+                        "idempotency_key": posting_key(
+                            submission.pk, submission.student_id
+                        ),
+                    }
+                )
+            posted = db_teocoin_service.post_many(postings)
+
+            # QuerySet.update() skips the post_save handlers, count it here
+            progress_service.record_exercise_reviewed(submission.student_id)
+            Notification.objects.bulk_create(
+                self._notifications(submission, reviews, stats["average"])
+            )
+
+        for k, v in changes.items():
+            setattr(submission, k, v)
+        for user_id in {submission.student_id, *(r["reviewer_id"] for r in reviews)}:
+            cache.delete(f"student_dashboard_{user_id}")
+            cache.delete(f"student_batch_data_{user_id}")
+
+        self.log_info(
+            f"Settled submission {submission.pk}: completed={stats['completed']}, "
+            f"average={stats['average']}, passed={passed}, postings={len(posted)}"
+        )
+        return {
+            "submission_id": submission.pk,
+            "completed_reviews": stats["completed"],
+            "average_score": stats["average"],
+            "passed": passed,
+            "posted": posted,
+        }
+
+    @staticmethod
+    def _notifications(submission, reviews, average):
+        title = submission.exercise.title
+        notifications = [
+            Notification(
+                user_id=submission.student_id,
+                message=(
+                    f"Il tuo esercizio '{title}' è stato valutato con una media di {average:.1f}"
+                    if average is not None
+                    else "Il tuo esercizio è stato valutato."
+                ),
+                notification_type="exercise_graded",
+                related_object_id=submission.pk,
+            )
+        ]
+        notifications += [
+            Notification(
+                user_id=review["reviewer_id"],
+                message=(
+                    f"Hai ricevuto {REVIEWER_REWARD} TEO per la tua review di '{title}'"
+                ),
+                notification_type="reward_earned",
+                related_object_id=submission.pk,
+            )
+            for review in reviews
+        ]
+        return notifications
+
+
+# Singleton instance
+peer_review_settlement_service = PeerReviewSettlementService()
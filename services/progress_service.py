@@ -0,0 +1,519 @@
+"""
+Progress Service - Incremental Student Progress Counters
+
+Keeps UserProgress and the per-course progress fields on CourseEnrollment
+(lessons_completed, last_activity_at) up to date from LessonCompletion,
+CourseEnrollment and ExerciseSubmission events, so progress reads are plain
+row lookups and never scan the completion tables. The per-category course
+counts and earned achievements shown with the progress are stored on the same
+row and rewritten when enrollments or UserAchievement rows change.
+
+The completion tables remain the source of truth: rebuild() recomputes every
+counter from them with grouped queries and verify() reports drift.
+"""
+
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+from courses.models import CourseEnrollment, ExerciseSubmission, LessonCompletion
+from django.db import transaction
+from django.db.models import (
+    Avg,
+    Count,
+    DecimalField,
+    F,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+from services.base import BaseService
+from users.models import UserAchievement, UserProgress
+
+# Number of entries kept in UserProgress.recent_activities
+RECENT_ACTIVITY_LIMIT = 15
+HOURS = Decimal("0.01")
+
+COUNTER_FIELDS = (
+    "total_courses_enrolled",
+    "total_courses_completed",
+    "total_lessons_completed",
+    "total_exercises_completed",
+    "total_hours_studied",
+    "average_score",
+)
+SUMMARY_FIELDS = ("category_counts", "achievements")
+
+
+def lesson_hours(duration_minutes) -> Decimal:
+    """Study hours credited for one completed lesson"""
+    return (Decimal(duration_minutes or 0) / 60).quantize(HOURS)
+
+
+def lesson_activity(completion_id, title, completed_at) -> Dict[str, Any]:
+    return {
+        "id": f"lesson_{completion_id}",
+        "type": "lesson_completed",
+        "title": title,
+        "date": completed_at.isoformat(),
+        "score": None,
+    }
+
+
+def course_activity(enrollment_id, title, completed_at) -> Dict[str, Any]:
+    return {
+        "id": f"course_{enrollment_id}",
+        "type": "course_completed",
+        "title": title,
+        "date": completed_at.isoformat(),
+        "score": None,
+    }
+
+
+def achievement_entry(earned) -> Dict[str, Any]:
+    """A UserAchievement (with its achievement) as served by the progress API"""
+    achievement = earned.achievement
+    return {
+        "achievement": {
+            "id": achievement.pk,
+            "title": achievement.title,
+            "description": achievement.description,
+            "icon": achievement.icon,
+            "color": achievement.color,
+            "achievement_type": achievement.achievement_type,
+        },
+        "earned_date": earned.earned_date.isoformat(),
+        "progress_percentage": str(earned.progress_percentage),
+        "earned": earned.progress_percentage >= 100,
+    }
+
+
+class ProgressService(BaseService):
+    """
+    Service for incremental student progress.
+
+    Event handlers in services/signals.py call the record_* methods, which
+    issue single UPDATE statements with F() expressions. Users without a
+    UserProgress row are skipped; the row is built from scratch by
+    get_progress() on first read.
+    """
+
+    # ========== READS ==========
+
+    def get_progress(self, user) -> UserProgress:
+        """Return the user's UserProgress, building it on first access"""
+        progress = UserProgress.objects.filter(user=user).first()
+        if progress is None:
+            self.rebuild(user)
+            progress = UserProgress.objects.get(user=user)
+        return progress
+
+    # ========== INCREMENTAL UPDATES ==========
+
+    def _update(
+        self,
+        user_id: int,
+        push: Optional[List[Dict[str, Any]]] = None,
+        drop: Optional[str] = None,
+        **changes,
+    ) -> int:
+        """
+        Apply `changes` to the user's UserProgress row in one UPDATE.
+
+        `push`/`drop` add entries to or remove one from recent_activities;
+        the row is locked while the list is rewritten so concurrent events
+        don't lose entries.
+        """
+        qs = UserProgress.objects.filter(user_id=user_id)
+        with transaction.atomic():
+            if push is not None or drop is not None:
+                current = (
+                    qs.select_for_update()
+                    .values_list("recent_activities", flat=True)
+                    .first()
+                )
+                if current is None:
+                    return 0
+                removed = {a["id"] for a in push or []} | {drop}
+                activities = sorted(push or [], key=lambda a: a["date"], reverse=True)
+                activities += [a for a in current if a.get("id") not in removed]
+                changes["recent_activities"] = activities[:RECENT_ACTIVITY_LIMIT]
+            return qs.update(updated_at=timezone.now(), **changes)
+
+    def record_lesson_completed(self, completion, lesson: Dict[str, Any]) -> None:
+        """
+        Count a new LessonCompletion.
+
+        Args:
+            completion: The LessonCompletion just created
+            lesson: Dict with the lesson's title, duration and course_id
+        """
+        CourseEnrollment.objects.filter(
+            student_id=completion.student_id, course_id=lesson["course_id"]
+        ).update(
+            lessons_completed=F("lessons_completed") + 1,
+            last_activity_at=completion.completed_at,
+        )
+        self._update(
+            completion.student_id,
+            push=[
+                lesson_activity(completion.pk, lesson["title"], completion.completed_at)
+            ],
+            total_lessons_completed=F("total_lessons_completed") + 1,
+            total_hours_studied=F("total_hours_studied")
+            + lesson_hours(lesson["duration"]),
+            last_activity_date=completion.completed_at,
+        )
+
+    def record_lesson_removed(self, completion, lesson: Dict[str, Any]) -> None:
+        """Undo record_lesson_completed() for a deleted LessonCompletion"""
+        CourseEnrollment.objects.filter(
+            student_id=completion.student_id,
+            course_id=lesson["course_id"],
+            lessons_completed__gte=1,
+        ).update(lessons_completed=F("lessons_completed") - 1)
+        hours = lesson_hours(lesson["duration"])
+        self._update_positive(
+            completion.student_id,
+            {"total_lessons_completed__gte": 1, "total_hours_studied__gte": hours},
+            drop=f"lesson_{completion.pk}",
+            total_lessons_completed=F("total_lessons_completed") - 1,
+            total_hours_studied=F("total_hours_studied") - hours,
+        )
+
+    def record_lessons_completed(
+        self, student_id: int, completions: Iterable[Dict[str, Any]]
+    ) -> None:
+        """
+        Count many LessonCompletion rows inserted with bulk_create.
+
+        bulk_create() sends no post_save, so the batch is applied with one
+        UPDATE per course plus a single UserProgress UPDATE.
+
+        Args:
+            student_id: Student the completions belong to
+            completions: Dicts with pk, completed_at and the lesson's title,
+                duration and course_id
+        """
+        completions = list(completions)
+        if not completions:
+            return
+
+        per_course: Dict[int, List[Dict[str, Any]]] = {}
+        for completion in completions:
+            per_course.setdefault(completion["course_id"], []).append(completion)
+        for course_id, rows in per_course.items():
+            CourseEnrollment.objects.filter(
+                student_id=student_id, course_id=course_id
+            ).update(
+                lessons_completed=F("lessons_completed") + len(rows),
+                last_activity_at=max(row["completed_at"] for row in rows),
+            )
+
+        hours = sum((lesson_hours(c["duration"]) for c in completions), Decimal("0.00"))
+        self._update(
+            student_id,
+            push=[
+                lesson_activity(c["pk"], c["title"], c["completed_at"])
+                for c in completions
+            ],
+            total_lessons_completed=F("total_lessons_completed") + len(completions),
+            total_hours_studied=F("total_hours_studied") + hours,
+            last_activity_date=max(c["completed_at"] for c in completions),
+        )
+
+    def record_courses_completed(
+        self, student_id: int, enrollments: Iterable[Dict[str, Any]]
+    ) -> None:
+        """
+        Count enrollments marked completed with a queryset update().
+
+        Args:
+            student_id: Student the enrollments belong to
+            enrollments: Dicts with pk, title and completed_at
+        """
+        enrollments = list(enrollments)
+        if not enrollments:
+            return
+        self._update(
+            student_id,
+            push=[
+                course_activity(e["pk"], e["title"], e["completed_at"])
+                for e in enrollments
+            ],
+            total_courses_completed=F("total_courses_completed") + len(enrollments),
+            last_activity_date=max(e["completed_at"] for e in enrollments),
+        )
+
+    def record_enrollments(self, user_ids, delta: int = 1, completed: int = 0) -> int:
+        """Add `delta` enrollments (`completed` of them completed) per user"""
+        changes = {"total_courses_enrolled": F("total_courses_enrolled") + delta}
+        if completed:
+            changes["total_courses_completed"] = (
+                F("total_courses_completed") + completed
+            )
+        qs = UserProgress.objects.filter(user_id__in=user_ids)
+        if delta < 0:
+            qs = qs.filter(total_courses_enrolled__gte=-delta)
+        if completed < 0:
+            qs = qs.filter(total_courses_completed__gte=-completed)
+        return qs.update(updated_at=timezone.now(), **changes)
+
+    def record_course_completion(self, enrollment, title: str, completed: bool):
+        """Count an enrollment switching to (or back from) completed"""
+        if completed:
+            completed_at = enrollment.completed_at or timezone.now()
+            self._update(
+                enrollment.student_id,
+                push=[course_activity(enrollment.pk, title, completed_at)],
+                total_courses_completed=F("total_courses_completed") + 1,
+                last_activity_date=completed_at,
+            )
+        else:
+            self._update_positive(
+                enrollment.student_id,
+                {"total_courses_completed__gte": 1},
+                drop=f"course_{enrollment.pk}",
+                total_courses_completed=F("total_courses_completed") - 1,
+            )
+
+    def record_exercise_reviewed(self, student_id: int, delta: int = 1) -> int:
+        """
+        Count a reviewed ExerciseSubmission and refresh the average score.
+
+        The average is recomputed by a correlated subquery inside the same
+        UPDATE, so it stays exact instead of drifting with repeated rounding.
+        """
+        changes = {
+            "total_exercises_completed": F("total_exercises_completed") + delta,
+            "average_score": self._average_score_subquery(),
+        }
+        if delta < 0:
+            return self._update_positive(
+                student_id, {"total_exercises_completed__gte": -delta}, **changes
+            )
+        return self._update(student_id, **changes)
+
+    def _update_positive(self, user_id, guards, drop=None, **changes) -> int:
+        """_update() for decrements: skip rows that would go below zero"""
+        if not UserProgress.objects.filter(user_id=user_id, **guards).exists():
+            return 0
+        return self._update(user_id, drop=drop, **changes)
+
+    @staticmethod
+    def _average_score_subquery():
+        average = (
+            ExerciseSubmission.objects.filter(
+                student_id=OuterRef("user_id"), reviewed=True
+            )
+            .values("student_id")
+            .annotate(avg=Avg("average_score"))
+            .values("avg")
+        )
+        output = DecimalField(max_digits=5, decimal_places=2)
+        return Coalesce(
+            Cast(Subquery(average), output), Value(Decimal("0.00")), output_field=output
+        )
+
+    # ========== CATEGORY / ACHIEVEMENT SUMMARIES ==========
+
+    def refresh_categories(self, user_ids) -> int:
+        """
+        Recount enrolled and completed courses per category for `user_ids`.
+
+        Called on enrollment and completion events, so the grouped query runs
+        once per write instead of on every progress read.
+        """
+        return self._refresh("category_counts", self._category_counts, user_ids)
+
+    def refresh_achievements(self, user_ids) -> int:
+        """Rewrite the earned achievements stored with the users' progress"""
+        return self._refresh("achievements", self._achievements, user_ids)
+
+    def _refresh(self, field: str, compute, user_ids) -> int:
+        """Lock the users' rows, then store `compute(user_ids)` in `field`"""
+        with transaction.atomic():
+            locked = list(
+                UserProgress.objects.select_for_update()
+                .filter(user_id__in=list(user_ids))
+                .values_list("user_id", flat=True)
+            )
+            if not locked:
+                return 0
+            now = timezone.now()
+            for user_id, value in compute(locked).items():
+                UserProgress.objects.filter(user_id=user_id).update(
+                    updated_at=now, **{field: value}
+                )
+            return len(locked)
+
+    @staticmethod
+    def _category_counts(user_ids) -> Dict[int, Dict[str, List[int]]]:
+        """{user_id: {category: [enrolled, completed]}}"""
+        counts: Dict[int, Dict[str, List[int]]] = {pk: {} for pk in user_ids}
+        rows = (
+            CourseEnrollment.objects.filter(student_id__in=user_ids)
+            .values("student_id", "course__category")
+            .annotate(
+                total=Count("id"), completed=Count("id", filter=Q(completed=True))
+            )
+        )
+        for row in rows:
+            counts[row["student_id"]][row["course__category"]] = [
+                row["total"],
+                row["completed"],
+            ]
+        return counts
+
+    @staticmethod
+    def _achievements(user_ids) -> Dict[int, List[Dict[str, Any]]]:
+        entries: Dict[int, List[Dict[str, Any]]] = {pk: [] for pk in user_ids}
+        earned = (
+            UserAchievement.objects.filter(user_id__in=user_ids)
+            .select_related("achievement")
+            .order_by("pk")
+        )
+        for user_achievement in earned:
+            entries[user_achievement.user_id].append(
+                achievement_entry(user_achievement)
+            )
+        return entries
+
+    # ========== REBUILD / VERIFY ==========
+
+    def compute(self, user) -> Dict[str, Any]:
+        """
+        Recompute progress for `user` from the source tables.
+
+        Returns:
+            Dict with the UserProgress counters, `last_activity_date`,
+            `recent_activities`, `category_counts`, `achievements` and
+            `enrollments` ({enrollment_id: (lessons_completed,
+            last_activity_at)})
+        """
+        enrollment_stats = CourseEnrollment.objects.filter(student=user).aggregate(
+            total=Count("id"), completed=Count("id", filter=Q(completed=True))
+        )
+
+        completions = LessonCompletion.objects.filter(student=user)
+        per_course = {
+            row["lesson__course_id"]: (row["lessons"], row["last"])
+            for row in completions.values("lesson__course_id").annotate(
+                lessons=Count("id"), last=Max("completed_at")
+            )
+        }
+        enrollments = {
+            enrollment_id: per_course.get(course_id, (0, None))
+            for enrollment_id, course_id in CourseEnrollment.objects.filter(
+                student=user
+            ).values_list("id", "course_id")
+        }
+
+        # Hours are credited per lesson (rounded), so sum them the same way
+        total_hours = Decimal("0.00")
+        for row in completions.values("lesson__duration").annotate(n=Count("id")):
+            total_hours += lesson_hours(row["lesson__duration"]) * row["n"]
+
+        exercise_stats = ExerciseSubmission.objects.filter(
+            student=user, reviewed=True
+        ).aggregate(total=Count("id"), avg=Avg("average_score"))
+
+        activities = [
+            lesson_activity(pk, title, completed_at)
+            for pk, title, completed_at in completions.order_by(
+                "-completed_at"
+            ).values_list("pk", "lesson__title", "completed_at")[
+                :RECENT_ACTIVITY_LIMIT
+            ]
+        ]
+        activities += [
+            course_activity(pk, title, completed_at)
+            for pk, title, completed_at in CourseEnrollment.objects.filter(
+                student=user, completed=True
+            )
+            .annotate(done_at=Coalesce("completed_at", "enrolled_at"))
+            .order_by("-done_at")
+            .values_list("pk", "course__title", "done_at")[:RECENT_ACTIVITY_LIMIT]
+        ]
+        activities.sort(key=lambda a: a["date"], reverse=True)
+
+        last_lesson = max((last for _, last in per_course.values()), default=None)
+        return {
+            "total_courses_enrolled": enrollment_stats["total"],
+            "total_courses_completed": enrollment_stats["completed"],
+            "total_lessons_completed": sum(n for n, _ in per_course.values()),
+            "total_exercises_completed": exercise_stats["total"],
+            "total_hours_studied": total_hours,
+            "average_score": Decimal(str(exercise_stats["avg"] or 0)).quantize(
+                Decimal("0.01")
+            ),
+            "last_activity_date": last_lesson,
+            "recent_activities": activities[:RECENT_ACTIVITY_LIMIT],
+            "category_counts": self._category_counts([user.pk])[user.pk],
+            "achievements": self._achievements([user.pk])[user.pk],
+            "enrollments": enrollments,
+        }
+
+    @transaction.atomic
+    def rebuild(self, user) -> Dict[str, Any]:
+        """Overwrite the user's progress counters with freshly computed values"""
+        expected = self.compute(user)
+        enrollments = expected.pop("enrollments")
+
+        stale = []
+        for enrollment in CourseEnrollment.objects.filter(pk__in=enrollments):
+            lessons, last = enrollments[enrollment.pk]
+            if (enrollment.lessons_completed, enrollment.last_activity_at) != (
+                lessons,
+                last,
+            ):
+                enrollment.lessons_completed = lessons
+                enrollment.last_activity_at = last
+                stale.append(enrollment)
+        if stale:
+            CourseEnrollment.objects.bulk_update(
+                stale, ["lessons_completed", "last_activity_at"]
+            )
+
+        defaults = dict(expected)
+        if defaults["last_activity_date"] is None:
+            # keep activity recorded by other flows (e.g. course completion)
+            defaults.pop("last_activity_date")
+        UserProgress.objects.update_or_create(user=user, defaults=defaults)
+        self.log_debug(f"Rebuilt progress for user {user.pk}")
+        return expected
+
+    def verify(self, user) -> Dict[str, Any]:
+        """
+        Compare stored counters with freshly computed values.
+
+        Returns:
+            Dict of {field: (stored, expected)} for every drifted counter;
+            per-course drift is reported under `enrollments`
+        """
+        expected = self.compute(user)
+        fields = COUNTER_FIELDS + SUMMARY_FIELDS
+        stored = UserProgress.objects.filter(user=user).values(*fields).first()
+        drift = {}
+        for field in fields:
+            current = stored[field] if stored else None
+            if current != expected[field]:
+                drift[field] = (current, expected[field])
+
+        enrollment_drift = {
+            pk: (lessons, expected["enrollments"][pk][0])
+            for pk, lessons in CourseEnrollment.objects.filter(
+                pk__in=expected["enrollments"]
+            ).values_list("pk", "lessons_completed")
+            if lessons != expected["enrollments"][pk][0]
+        }
+        if enrollment_drift:
+            drift["enrollments"] = enrollment_drift
+        return drift
+
+
+# Singleton instance
+progress_service = ProgressService()
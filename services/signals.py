@@ -0,0 +1,447 @@
+"""
+Service-layer signal handlers
+
+Keeps denormalized counters maintained by the services package in sync with
+the rows they summarize. Handlers only issue F()-expression updates so they
+are safe under concurrent writes.
+
+Signal Handlers:
+    - Course created/approved/deleted: TeacherProfile.total_courses and
+      published_courses
+    - CourseEnrollment created/deleted: TeacherProfile.total_earnings and
+      total_students
+    - LessonCompletion, CourseEnrollment, ExerciseSubmission changes:
+      UserProgress counters and CourseEnrollment.lessons_completed
+    - CourseEnrollment changes, course category changes: UserProgress
+      per-category course counts
+    - UserAchievement/Achievement changes: UserProgress.achievements
+    - Lesson/Exercise changes: teacher cache generation
+    - ExerciseReview assigned/completed: ReviewerInboxEntry read model
+      (rotated reviews are deleted, their entry goes with them by CASCADE)
+    - Exercise/Lesson moved or renamed, username changes: open
+      ReviewerInboxEntry rows
+    - TeoCoinWithdrawalRequest created/status changes: WithdrawalLimitCounter
+"""
+
+import logging
+
+from blockchain.models import TeoCoinWithdrawalRequest
+from courses.models import (
+    Course,
+    CourseEnrollment,
+    Exercise,
+    ExerciseReview,
+    ExerciseSubmission,
+    Lesson,
+    LessonCompletion,
+    ReviewerInboxEntry,
+)
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from users.models import Achievement, User, UserAchievement
+
+from .progress_service import progress_service
+from .teacher_stats_service import teacher_stats_service
+from .withdrawal_limit_service import IN_FLIGHT_STATUSES, withdrawal_limit_service
+
+logger = logging.getLogger(__name__)
+
+
+def _invalidate_teacher_dashboard(teacher_id):
+    cache.delete(f"teacher_dashboard_{teacher_id}")
+    teacher_stats_service.bump_cache_generation(teacher_id)
+
+
+def _invalidate_student_dashboard(student_id):
+    cache.delete(f"student_dashboard_{student_id}")
+    cache.delete(f"student_batch_data_{student_id}")
+
+
+def _stash_previous(instance, field, update_fields):
+    """Remember the stored value of `field` before an update (None on create)"""
+    previous = None
+    if not instance._state.adding and instance.pk and (
+        update_fields is None or field in update_fields
+    ):
+        previous = (
+            type(instance)
+            .objects.filter(pk=instance.pk)
+            .values_list(field, flat=True)
+            .first()
+        )
+    setattr(instance, f"_previous_{field}", previous)
+
+
+@receiver(pre_save, sender=Course)
+def remember_course_approved(sender, instance, update_fields=None, **kwargs):
+    _stash_previous(instance, "is_approved", update_fields)
+    _stash_previous(instance, "category", update_fields)
+
+
+@receiver(post_save, sender=Course)
+def count_created_course(sender, instance, created, **kwargs):
+    """Increment the teacher's course counters for new or approved courses"""
+    if created:
+        teacher_stats_service.record_course(instance.teacher_id, 1)
+        if instance.is_approved:
+            teacher_stats_service.record_published(instance.teacher_id, 1)
+    else:
+        previous = getattr(instance, "_previous_is_approved", None)
+        if previous is not None and previous != instance.is_approved:
+            teacher_stats_service.record_published(
+                instance.teacher_id, 1 if instance.is_approved else -1
+            )
+        previous = getattr(instance, "_previous_category", None)
+        if previous is not None and previous != instance.category:
+            progress_service.refresh_categories(
+                CourseEnrollment.objects.filter(course=instance).values_list(
+                    "student_id", flat=True
+                )
+            )
+    _invalidate_teacher_dashboard(instance.teacher_id)
+
+
+@receiver(post_delete, sender=Course)
+def count_deleted_course(sender, instance, **kwargs):
+    """Decrement the teacher's course counters for deleted courses"""
+    teacher_stats_service.record_course(instance.teacher_id, -1)
+    if instance.is_approved:
+        teacher_stats_service.record_published(instance.teacher_id, -1)
+    _invalidate_teacher_dashboard(instance.teacher_id)
+
+
+@receiver(post_save, sender=CourseEnrollment)
+def count_created_enrollment(sender, instance, created, **kwargs):
+    """Credit the teacher earnings counter for a new enrollment"""
+    if not created:
+        return
+    course = Course.objects.filter(pk=instance.course_id).values(
+        "teacher_id", "price_eur"
+    ).first()
+    if course:
+        teacher_stats_service.record_enrollments(
+            course["teacher_id"], course["price_eur"], 1
+        )
+        teacher_stats_service.record_students_added(
+            course["teacher_id"], [instance.student_id], [instance.course_id]
+        )
+        _invalidate_teacher_dashboard(course["teacher_id"])
+    progress_service.record_enrollments(
+        [instance.student_id], 1, completed=int(instance.completed)
+    )
+    progress_service.refresh_categories([instance.student_id])
+
+
+@receiver(post_delete, sender=CourseEnrollment)
+def count_deleted_enrollment(sender, instance, **kwargs):
+    """Debit the teacher earnings counter for a removed enrollment"""
+    course = Course.objects.filter(pk=instance.course_id).values(
+        "teacher_id", "price_eur"
+    ).first()
+    if course:
+        teacher_stats_service.record_enrollments(
+            course["teacher_id"], course["price_eur"], -1
+        )
+        teacher_stats_service.recount_students(course["teacher_id"])
+        _invalidate_teacher_dashboard(course["teacher_id"])
+    progress_service.record_enrollments(
+        [instance.student_id], -1, completed=-int(instance.completed)
+    )
+    progress_service.refresh_categories([instance.student_id])
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def count_course_students_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Credit earnings and students for enrollments created by `course.students.add()`.
+
+    The through model is CourseEnrollment, but Django creates those rows with
+    bulk_create, so post_save never fires for them. remove()/clear() delete
+    through a queryset and are already counted by post_delete.
+    """
+    if action != "post_add" or not pk_set:
+        return
+
+    if reverse:
+        # user.core_students.add(course, ...): pk_set holds course ids
+        courses = Course.objects.filter(pk__in=pk_set).values(
+            "pk", "teacher_id", "price_eur"
+        )
+        added_by_teacher = {}
+        for course in courses:
+            teacher_stats_service.record_enrollments(
+                course["teacher_id"], course["price_eur"], 1
+            )
+            added_by_teacher.setdefault(course["teacher_id"], []).append(course["pk"])
+        for teacher_id, course_ids in added_by_teacher.items():
+            teacher_stats_service.record_students_added(
+                teacher_id, [instance.pk], course_ids
+            )
+            _invalidate_teacher_dashboard(teacher_id)
+        progress_service.record_enrollments([instance.pk], len(pk_set))
+        progress_service.refresh_categories([instance.pk])
+    else:
+        teacher_stats_service.record_enrollments(
+            instance.teacher_id, instance.price_eur, len(pk_set)
+        )
+        teacher_stats_service.record_students_added(
+            instance.teacher_id, pk_set, [instance.pk]
+        )
+        _invalidate_teacher_dashboard(instance.teacher_id)
+        progress_service.record_enrollments(pk_set, 1)
+        progress_service.refresh_categories(pk_set)
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+def invalidate_teacher_on_lesson_change(sender, instance, **kwargs):
+    teacher_ids = {instance.teacher_id}
+    if instance.course_id:
+        teacher_ids.update(
+            Course.objects.filter(pk=instance.course_id).values_list(
+                "teacher_id", flat=True
+            )
+        )
+    for teacher_id in teacher_ids:
+        _invalidate_teacher_dashboard(teacher_id)
+
+
+@receiver([post_save, post_delete], sender=Exercise)
+def invalidate_teacher_on_exercise_change(sender, instance, **kwargs):
+    """Exercise counts are part of the teacher course listing"""
+    teacher_id = (
+        Lesson.objects.filter(pk=instance.lesson_id)
+        .values_list("teacher_id", flat=True)
+        .first()
+    )
+    if teacher_id:
+        _invalidate_teacher_dashboard(teacher_id)
+
+
+@receiver(m2m_changed, sender=Course.lessons.through)
+def invalidate_teacher_on_course_lessons_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    # pre_clear: the links to invalidate are gone after the clear
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        _invalidate_teacher_dashboard(instance.teacher_id)
+        return
+    # lesson.courses_included.add(...): pk_set holds course ids
+    courses = instance.courses_included.all()
+    if pk_set:
+        courses = Course.objects.filter(pk__in=pk_set)
+    for teacher_id in set(courses.values_list("teacher_id", flat=True)):
+        _invalidate_teacher_dashboard(teacher_id)
+
+
+@receiver(pre_save, sender=CourseEnrollment)
+def remember_enrollment_completed(sender, instance, update_fields=None, **kwargs):
+    if instance._state.adding or update_fields is not None:
+        _stash_previous(instance, "completed", update_fields)
+        return
+    current = (
+        CourseEnrollment.objects.filter(pk=instance.pk)
+        .values("completed", "lessons_completed", "last_activity_at")
+        .first()
+    ) or {}
+    instance._previous_completed = current.get("completed")
+    if current:
+        # A full save() of an instance loaded before the latest lesson
+        # completions would otherwise write back stale progress counters
+        instance.lessons_completed = current["lessons_completed"]
+        instance.last_activity_at = current["last_activity_at"]
+
+
+@receiver(post_save, sender=CourseEnrollment)
+def count_course_completion(sender, instance, created, **kwargs):
+    """Track enrollments switching to (or back from) completed"""
+    previous = getattr(instance, "_previous_completed", None)
+    if created or previous is None or previous == instance.completed:
+        return
+    title = (
+        Course.objects.filter(pk=instance.course_id)
+        .values_list("title", flat=True)
+        .first()
+    )
+    progress_service.record_course_completion(instance, title, instance.completed)
+    progress_service.refresh_categories([instance.student_id])
+    _invalidate_student_dashboard(instance.student_id)
+
+
+def _lesson_values(lesson_id):
+    return (
+        Lesson.objects.filter(pk=lesson_id)
+        .values("title", "duration", "course_id")
+        .first()
+    )
+
+
+@receiver(post_save, sender=LessonCompletion)
+def count_lesson_completion(sender, instance, created, **kwargs):
+    """Credit lesson, hours and per-course progress for a completed lesson"""
+    if not created:
+        return
+    lesson = _lesson_values(instance.lesson_id)
+    if lesson:
+        progress_service.record_lesson_completed(instance, lesson)
+        _invalidate_student_dashboard(instance.student_id)
+
+
+@receiver(post_delete, sender=LessonCompletion)
+def count_removed_lesson_completion(sender, instance, **kwargs):
+    lesson = _lesson_values(instance.lesson_id)
+    if lesson:
+        progress_service.record_lesson_removed(instance, lesson)
+        _invalidate_student_dashboard(instance.student_id)
+
+
+@receiver(pre_save, sender=ExerciseSubmission)
+def remember_submission_reviewed(sender, instance, update_fields=None, **kwargs):
+    _stash_previous(instance, "reviewed", update_fields)
+
+
+@receiver(post_save, sender=ExerciseSubmission)
+def count_reviewed_submission(sender, instance, created, **kwargs):
+    """Count an exercise as completed once its review round is over"""
+    if created:
+        changed = instance.reviewed
+    else:
+        previous = getattr(instance, "_previous_reviewed", None)
+        changed = previous is not None and previous != instance.reviewed
+    if changed:
+        progress_service.record_exercise_reviewed(
+            instance.student_id, 1 if instance.reviewed else -1
+        )
+        _invalidate_student_dashboard(instance.student_id)
+
+
+@receiver(post_delete, sender=ExerciseSubmission)
+def count_removed_submission(sender, instance, **kwargs):
+    if instance.reviewed:
+        progress_service.record_exercise_reviewed(instance.student_id, -1)
+
+
+@receiver(post_save, sender=ExerciseReview)
+def sync_reviewer_inbox(sender, instance, created, **kwargs):
+    """Keep the reviewer inbox row of an assigned or completed review current"""
+    reviews = ExerciseReview.objects.filter(pk=instance.pk)
+    if created:
+        ReviewerInboxEntry.sync(reviews)
+        return
+    completed_at = None
+    if instance.score is not None:
+        completed_at = instance.reviewed_at or instance.assigned_at
+    updated = ReviewerInboxEntry.objects.filter(review_id=instance.pk).update(
+        reviewer_id=instance.reviewer_id, completed_at=completed_at
+    )
+    if not updated:
+        ReviewerInboxEntry.sync(reviews)
+
+
+@receiver([post_save, post_delete], sender=UserAchievement)
+def sync_progress_achievements(sender, instance, **kwargs):
+    progress_service.refresh_achievements([instance.user_id])
+
+
+@receiver(post_save, sender=Achievement)
+def sync_achievement_holders(sender, instance, created, **kwargs):
+    """Title, icon etc. are copied into each holder's progress"""
+    if created:
+        return
+    progress_service.refresh_achievements(
+        UserAchievement.objects.filter(achievement=instance).values_list(
+            "user_id", flat=True
+        )
+    )
+
+
+@receiver(pre_save, sender=Exercise)
+def remember_exercise_inbox_fields(sender, instance, update_fields=None, **kwargs):
+    _stash_previous(instance, "title", update_fields)
+    _stash_previous(instance, "lesson", update_fields)
+
+
+@receiver(post_save, sender=Exercise)
+def refresh_inbox_exercise(sender, instance, created, **kwargs):
+    """Copy a renamed or moved exercise into its open inbox entries"""
+    current = {"title": instance.title, "lesson": instance.lesson_id}
+    if created or all(
+        getattr(instance, f"_previous_{field}", None) in (None, value)
+        for field, value in current.items()
+    ):
+        return
+    course_id = (
+        Lesson.objects.filter(pk=instance.lesson_id)
+        .values_list("course_id", flat=True)
+        .first()
+    )
+    ReviewerInboxEntry.objects.filter(
+        exercise_id=instance.pk, completed_at__isnull=True
+    ).update(
+        exercise_title=instance.title,
+        lesson_id=instance.lesson_id,
+        course_id=course_id,
+    )
+
+
+@receiver(pre_save, sender=Lesson)
+def remember_lesson_course(sender, instance, update_fields=None, **kwargs):
+    _stash_previous(instance, "course", update_fields)
+
+
+@receiver(post_save, sender=Lesson)
+def refresh_inbox_lesson(sender, instance, created, update_fields=None, **kwargs):
+    # course is nullable: None is only "not loaded" when course wasn't saved
+    if created or (update_fields is not None and "course" not in update_fields):
+        return
+    if getattr(instance, "_previous_course", None) == instance.course_id:
+        return
+    ReviewerInboxEntry.objects.filter(
+        lesson_id=instance.pk, completed_at__isnull=True
+    ).update(course_id=instance.course_id)
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, update_fields=None, **kwargs):
+    _stash_previous(instance, "username", update_fields)
+
+
+@receiver(post_save, sender=User)
+def refresh_inbox_student(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_username", None)
+    if created or previous is None or previous == instance.username:
+        return
+    ReviewerInboxEntry.objects.filter(
+        student_id=instance.pk, completed_at__isnull=True
+    ).update(student_username=instance.username)
+
+
+@receiver(pre_save, sender=TeoCoinWithdrawalRequest)
+def remember_withdrawal_status(sender, instance, update_fields=None, **kwargs):
+    _stash_previous(instance, "status", update_fields)
+
+
+@receiver(post_save, sender=TeoCoinWithdrawalRequest)
+def count_withdrawal_request(sender, instance, created, **kwargs):
+    """Keep the user's rolling withdrawal limit counter current"""
+    if created:
+        withdrawal_limit_service.record_created(instance)
+        return
+    previous = getattr(instance, "_previous_status", None)
+    if previous is None:
+        return
+    was_in_flight = previous in IN_FLIGHT_STATUSES
+    is_in_flight = instance.status in IN_FLIGHT_STATUSES
+    if was_in_flight != is_in_flight:
+        withdrawal_limit_service.record_in_flight(
+            instance.user_id, 1 if is_in_flight else -1
+        )
+
+
+@receiver(post_delete, sender=TeoCoinWithdrawalRequest)
+def count_removed_withdrawal_request(sender, instance, **kwargs):
+    # The request stays in its hour bucket until the bucket leaves the window
+    if instance.status in IN_FLIGHT_STATUSES:
+        withdrawal_limit_service.record_in_flight(instance.user_id, -1)
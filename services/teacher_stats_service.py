@@ -0,0 +1,277 @@
+"""
+Teacher Stats Service - Aggregated Teacher Dashboard Statistics
+
+Computes teacher course statistics with a single grouped query and keeps the
+denormalized counters on TeacherProfile (total_courses, published_courses,
+total_students, total_earnings) up to date incrementally from course and
+enrollment events, so the teacher dashboard is built from a handful of
+indexed reads.
+"""
+
+import time
+from decimal import Decimal
+from typing import Any, Dict, Iterable
+
+from courses.models import Course, CourseEnrollment, Lesson
+from django.core.cache import cache
+from django.db.models import Count, F, Prefetch, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Length, Substr
+from django.utils import timezone
+from services.base import BaseService
+from users.models import TeacherProfile
+
+# Share of the course price credited to the teacher (10% platform fee)
+TEACHER_EARNINGS_SHARE = Decimal("0.9")
+CENTS = Decimal("0.01")
+# Characters of lesson content shown as description in the teacher listing
+LESSON_PREVIEW_LENGTH = 100
+# TeacherProfile counters maintained from course and enrollment events
+COUNTER_FIELDS = ("total_courses", "published_courses", "total_students", "total_earnings")
+
+
+class TeacherStatsService(BaseService):
+    """
+    Service for teacher course statistics and TeacherProfile counters.
+
+    The grouped aggregate is the source of truth; the TeacherProfile counters
+    are a cache of it maintained through F() expressions by the handlers in
+    services/signals.py and realigned with rebuild_counters().
+    """
+
+    def earnings_for(self, price_eur, enrollments: int = 1) -> Decimal:
+        """Teacher earnings for `enrollments` sales of a course at `price_eur`"""
+        price = price_eur or Decimal("0")
+        return (price * enrollments * TEACHER_EARNINGS_SHARE).quantize(CENTS)
+
+    def aggregate_course_stats(self, teacher) -> Dict[str, Any]:
+        """
+        Compute per-status course counts, distinct students and earnings.
+
+        One grouped query over the teacher's courses LEFT JOINed with their
+        enrollments; course counts use DISTINCT because of the join fan-out.
+        """
+        stats = Course.objects.filter(teacher=teacher).aggregate(
+            total_courses=Count("id", distinct=True),
+            published_courses=Count("id", filter=Q(is_approved=True), distinct=True),
+            draft_courses=Count("id", filter=Q(is_approved=False), distinct=True),
+            total_students=Count("enrollments__student", distinct=True),
+            gross_sales=Sum("price_eur", filter=Q(enrollments__isnull=False)),
+        )
+        stats["total_earnings"] = self.earnings_for(stats.pop("gross_sales"))
+        return stats
+
+    def get_dashboard_courses(self, teacher) -> Iterable[Course]:
+        """
+        Teacher courses annotated with student counts and prefetched lessons.
+
+        Lessons carry an `exercises_total` annotation so TeacherCourseSerializer
+        does not run a count query per lesson.
+        """
+        return (
+            Course.objects.filter(teacher=teacher)
+            .annotate(student_count=Count("enrollments"))
+            .prefetch_related(Prefetch("lessons", queryset=self.lesson_summaries()))
+            .order_by("-created_at")
+        )
+
+    def get_course_listing(self, teacher) -> Iterable[Course]:
+        """
+        Courses of the teacher course management listing (TeacherCoursesView).
+
+        One annotated course query plus one grouped lesson query; lesson content
+        never leaves the database, only its SQL-truncated preview does.
+        """
+        return (
+            self.get_dashboard_courses(teacher)
+            .select_related("teacher")
+            .only(
+                "id",
+                "title",
+                "description",
+                "price_eur",
+                "cover_image",
+                "is_approved",
+                "created_at",
+                "updated_at",
+                "category",
+                "teacher",
+            )
+        )
+
+    @staticmethod
+    def lesson_summaries():
+        """Lessons with `exercises_total` and a `content_preview` of the content"""
+        return (
+            Lesson.objects.only(
+                "id", "title", "order", "duration", "lesson_type", "created_at"
+            )
+            .annotate(
+                exercises_total=Count("exercises"),
+                content_preview=Substr("content", 1, LESSON_PREVIEW_LENGTH),
+                content_length=Length("content"),
+            )
+            .order_by("order", "created_at")
+        )
+
+    # ========== CACHE GENERATION ==========
+
+    def cache_generation(self, teacher_id: int) -> int:
+        """
+        Current cache generation of a teacher.
+
+        Cached teacher payloads embed the generation in their key, so bumping
+        it invalidates all of them at once without knowing their keys.
+        """
+        key = f"teacher_cache_gen_{teacher_id}"
+        generation = cache.get(key)
+        if generation is None:
+            # Seed from the clock so an evicted counter never reuses old keys
+            cache.add(key, time.time_ns(), None)
+            generation = cache.get(key)
+        return generation
+
+    def bump_cache_generation(self, teacher_id: int) -> None:
+        """Invalidate every payload cached under the teacher's generation"""
+        try:
+            cache.incr(f"teacher_cache_gen_{teacher_id}")
+        except ValueError:
+            # Not seeded yet: nothing can be cached under it
+            pass
+
+    # ========== INCREMENTAL COUNTERS ==========
+
+    def record_course(self, teacher_id: int, delta: int) -> int:
+        """Add `delta` to the teacher's total_courses counter"""
+        qs = TeacherProfile.objects.filter(user_id=teacher_id)
+        if delta < 0:
+            # PositiveIntegerField: never go below zero on drifted rows
+            qs = qs.filter(total_courses__gte=-delta)
+        return qs.update(
+            total_courses=F("total_courses") + delta, updated_at=timezone.now()
+        )
+
+    def record_published(self, teacher_id: int, delta: int) -> int:
+        """Add `delta` to the teacher's published_courses counter"""
+        qs = TeacherProfile.objects.filter(user_id=teacher_id)
+        if delta < 0:
+            qs = qs.filter(published_courses__gte=-delta)
+        return qs.update(
+            published_courses=F("published_courses") + delta, updated_at=timezone.now()
+        )
+
+    def record_students_added(self, teacher_id: int, student_ids, course_ids) -> int:
+        """
+        Count the students just enrolled in `course_ids` that had no other
+        enrollment with the teacher.
+        """
+        known = set(
+            CourseEnrollment.objects.filter(
+                student_id__in=student_ids, course__teacher_id=teacher_id
+            )
+            .exclude(course_id__in=course_ids)
+            .values_list("student_id", flat=True)
+        )
+        new = len(set(student_ids) - known)
+        if not new:
+            return 0
+        return TeacherProfile.objects.filter(user_id=teacher_id).update(
+            total_students=F("total_students") + new, updated_at=timezone.now()
+        )
+
+    def recount_students(self, teacher_id: int) -> int:
+        """
+        Recount the teacher's distinct students in the database.
+
+        Used on unenrollment: a queryset delete sends post_delete once every
+        row is gone, so per-row "was it the last enrollment?" checks would
+        uncount a student once per deleted enrollment.
+        """
+        students = (
+            CourseEnrollment.objects.filter(course__teacher_id=teacher_id)
+            .order_by()
+            .values("course__teacher_id")
+            .annotate(n=Count("student_id", distinct=True))
+            .values("n")
+        )
+        return TeacherProfile.objects.filter(user_id=teacher_id).update(
+            total_students=Coalesce(Subquery(students), 0), updated_at=timezone.now()
+        )
+
+    def record_enrollments(self, teacher_id: int, price_eur, delta: int) -> int:
+        """Add the earnings of `delta` enrollments at `price_eur` to the counter"""
+        amount = self.earnings_for(price_eur, delta)
+        if not amount:
+            return 0
+        return TeacherProfile.objects.filter(user_id=teacher_id).update(
+            total_earnings=F("total_earnings") + amount, updated_at=timezone.now()
+        )
+
+    def rebuild_counters(self, teacher, course_stats: Dict[str, Any] = None):
+        """
+        Realign the TeacherProfile counters with the grouped aggregate.
+
+        Args:
+            teacher: Teacher user instance
+            course_stats: Result of aggregate_course_stats() if already computed
+
+        Returns:
+            Dict with the stored counters and stats_synced_at
+        """
+        if course_stats is None:
+            course_stats = self.aggregate_course_stats(teacher)
+
+        counters = {field: course_stats[field] for field in COUNTER_FIELDS}
+        counters["stats_synced_at"] = timezone.now()
+        TeacherProfile.objects.update_or_create(user=teacher, defaults=counters)
+        self.log_info(
+            f"Rebuilt counters for teacher {teacher.pk}: "
+            f"{counters['total_courses']} courses, {counters['total_earnings']} EUR"
+        )
+        return counters
+
+    def verify(self, teacher) -> Dict[str, Dict[str, Any]]:
+        """Counters that differ from the aggregate: {field: {"stored", "expected"}}"""
+        course_stats = self.aggregate_course_stats(teacher)
+        stored = (
+            TeacherProfile.objects.filter(user=teacher).values(*COUNTER_FIELDS).first()
+            or {}
+        )
+        return {
+            field: {"stored": stored.get(field), "expected": course_stats[field]}
+            for field in COUNTER_FIELDS
+            if stored.get(field) != course_stats[field]
+        }
+
+    def get_dashboard_stats(self, teacher) -> Dict[str, Any]:
+        """
+        Build the `stats` block of the teacher dashboard.
+
+        Reads the TeacherProfile counters only; the grouped aggregate runs
+        when they were never synced (new profile) and in rebuild_counters().
+        """
+        counters = (
+            TeacherProfile.objects.filter(user=teacher)
+            .values(*COUNTER_FIELDS, "stats_synced_at")
+            .first()
+        )
+        if counters is None or counters["stats_synced_at"] is None:
+            counters = self.rebuild_counters(teacher)
+
+        return {
+            "total_courses": counters["total_courses"],
+            "total_earnings": str(counters["total_earnings"]),
+            # backward-compatible: original active_students field
+            "active_students": counters["total_students"],
+            # clearer names expected by frontend
+            "total_students": counters["total_students"],
+            "published_courses": counters["published_courses"],
+            "draft_courses": max(
+                counters["total_courses"] - counters["published_courses"], 0
+            ),
+            # legacy potential field for pending; set to 0 if not applicable
+            "pending_courses": 0,
+        }
+
+
+# Singleton instance
+teacher_stats_service = TeacherStatsService()
@@ -20,6 +20,7 @@ from django.core.cache import cache
 from django.utils import timezone
 from eth_account import Account
 from notifications.services import teocoin_notification_service
+from services.gas_oracle_service import gas_oracle_service
 from users.models import User
 from web3 import Web3
 from web3.contract import Contract
@@ -1096,7 +1097,7 @@ class TeoCoinDiscountService:
                         self.platform_account.address
                     ),
                     "gas": 500000,  # Reasonable gas limit
-                    "gasPrice": self.w3.eth.gas_price,
+                    "gasPrice": gas_oracle_service.gas_price(self.w3),
                 }
             )
 
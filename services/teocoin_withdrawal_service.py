@@ -13,11 +13,18 @@ from decimal import Decimal
 from typing import Any, Dict, List, Union
 
 from blockchain.models import DBTeoCoinBalance, TeoCoinWithdrawalRequest
+from blockchain.simulator import chain_provider
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from django.utils import timezone
 from services.db_teocoin_service import db_teocoin_service
+from services.gas_oracle_service import gas_oracle_service
+from services.withdrawal_limit_service import withdrawal_limit_service
+from services.withdrawal_queue_service import (
+    default_worker_id,
+    withdrawal_queue_service,
+)
 from web3 import Web3
 
 User = get_user_model()
@@ -65,7 +72,7 @@ class TeoCoinWithdrawalService:
 
         if self.polygon_rpc_url:
             try:
-                self.web3 = Web3(Web3.HTTPProvider(self.polygon_rpc_url))
+                self.web3 = Web3(chain_provider(self.polygon_rpc_url))
                 self._load_contract()
             except Exception as e:
                 logger.warning(f"Could not initialize Web3 connection: {e}")
@@ -175,14 +182,8 @@ class TeoCoinWithdrawalService:
             balance_obj.updated_at = timezone.now()
             balance_obj.save()
 
-            # Get daily withdrawal count
-            today = timezone.now().date()
-            daily_count = (
-                TeoCoinWithdrawalRequest.objects.filter(
-                    user=user, created_at__date=today
-                ).count()
-                + 1
-            )
+            # Position of this request in the user's rolling daily window
+            daily_count = validation_result["usage"]["count"] + 1
 
             # Create withdrawal request with enhanced fields
             withdrawal_request = TeoCoinWithdrawalRequest.objects.create(
@@ -214,6 +215,8 @@ class TeoCoinWithdrawalService:
             }
 
         except Exception as e:
+            # Don't commit a half-created request (balance moved, counter stale)
+            transaction.set_rollback(True)
             logger.error(f"Error creating withdrawal request for {user.email}: {e}")
             return {
                 "success": False,
@@ -254,13 +257,13 @@ class TeoCoinWithdrawalService:
                 "code": "INVALID_ADDRESS",
             }
 
-        # Check daily limits
-        today = timezone.now().date()
-        daily_withdrawals = TeoCoinWithdrawalRequest.objects.filter(
-            user=user, created_at__date=today
-        )
+        # Check daily limits against the user's rolling counter; the row lock
+        # is held until the request is created, so concurrent requests of the
+        # same user are checked one at a time
+        counter, _ = withdrawal_limit_service.lock(user.pk)
+        usage = withdrawal_limit_service.usage(counter)
 
-        if daily_withdrawals.count() >= self.MAX_DAILY_WITHDRAWALS:
+        if usage["count"] >= self.MAX_DAILY_WITHDRAWALS:
             return {
                 "valid": False,
                 "reason": f"Daily withdrawal limit reached ({self.MAX_DAILY_WITHDRAWALS} withdrawals per day)",
@@ -268,9 +271,8 @@ class TeoCoinWithdrawalService:
             }
 
         # Check daily amount limit
-        daily_amount = sum(w.amount for w in daily_withdrawals) + amount
-        if daily_amount > self.MAX_DAILY_AMOUNT:
-            remaining = self.MAX_DAILY_AMOUNT - sum(w.amount for w in daily_withdrawals)
+        if usage["amount"] + amount > self.MAX_DAILY_AMOUNT:
+            remaining = self.MAX_DAILY_AMOUNT - usage["amount"]
             return {
                 "valid": False,
                 "reason": f"Daily amount limit exceeded. Remaining today: {remaining} TEO",
@@ -278,18 +280,14 @@ class TeoCoinWithdrawalService:
             }
 
         # Check for pending withdrawals (limit concurrent withdrawals)
-        pending_withdrawals = TeoCoinWithdrawalRequest.objects.filter(
-            user=user, status__in=["pending", "processing"]
-        ).count()
-
-        if pending_withdrawals >= 3:  # Maximum 3 concurrent withdrawals
+        if usage["in_flight"] >= 3:  # Maximum 3 concurrent withdrawals
             return {
                 "valid": False,
                 "reason": "You have too many pending withdrawals. Please wait for current withdrawals to complete.",
                 "code": "TOO_MANY_PENDING",
             }
 
-        return {"valid": True}
+        return {"valid": True, "usage": usage}
 
     def _is_valid_ethereum_address(self, address: str) -> bool:
         """Validate Ethereum/Polygon address format"""
@@ -674,40 +672,38 @@ class TeoCoinWithdrawalService:
                 "success_rate": round(success_rate, 2),
                 "pending_requests": status_counts.get("pending", 0),
                 "processing_requests": status_counts.get("processing", 0),
+                "worker_throughput": withdrawal_queue_service.worker_throughput(),
             }
 
         except Exception as e:
             logger.error(f"Error getting withdrawal statistics: {e}")
             return {"error": f"Failed to get statistics: {str(e)}"}
 
-    def process_pending_withdrawals(self) -> Dict[str, Any]:
+    def process_pending_withdrawals(
+        self, worker_id: str = None, batch_size: int = 10, limit: int = None
+    ) -> Dict[str, Any]:
         """
-        Process all pending withdrawal requests by minting tokens
+        Process pending withdrawal requests by minting tokens
+
+        Withdrawals are claimed through the leased queue, so several workers
+        can run this concurrently without processing a withdrawal twice.
         """
         if not self.web3 or not self.teo_contract:
             return {"success": False, "error": "Web3 or contract not initialized"}
 
-        pending_withdrawals = TeoCoinWithdrawalRequest.objects.filter(status="pending")
-        results = {"total_processed": 0, "successful": 0, "failed": 0, "details": []}
-
-        for withdrawal in pending_withdrawals:
-            result = self._process_withdrawal_minting(withdrawal)
-            results["details"].append(
-                {
-                    "withdrawal_id": withdrawal.pk,
-                    "user": withdrawal.user.email,
-                    "amount": str(withdrawal.amount),
-                    "result": result,
-                }
-            )
-
-            if result["success"]:
-                results["successful"] += 1
-            else:
-                results["failed"] += 1
-
-            results["total_processed"] += 1
-
+        withdrawal_queue_service.recover_expired_leases()
+        stats = withdrawal_queue_service.drain(
+            worker_id or default_worker_id(),
+            self._process_withdrawal_minting,
+            batch_size=batch_size,
+            limit=limit,
+        )
+        results = {
+            "total_processed": stats["processed"],
+            "successful": stats["succeeded"],
+            "failed": stats["failed"],
+            "worker": stats,
+        }
         return {"success": True, "results": results}
 
     def _process_withdrawal_minting(self, withdrawal) -> Dict[str, Any]:
@@ -845,15 +841,11 @@ class TeoCoinWithdrawalService:
                     "error": "Contract does not have mint or mintTo function",
                 }
 
-            # Estimate gas
-            try:
-                gas_estimate = mint_function.estimate_gas(
-                    {"from": platform_address_checksum}
-                )
-                logger.info(f"⛽ Estimated gas: {gas_estimate}")
-            except Exception as gas_error:
-                logger.error(f"Gas estimation failed: {gas_error}")
-                gas_estimate = 200000  # Default gas limit
+            # Estimate gas (memoized per function by the gas oracle)
+            gas_estimate = gas_oracle_service.estimate_gas(
+                mint_function, {"from": platform_address_checksum}, fallback=200000
+            )
+            logger.info(f"⛽ Estimated gas: {gas_estimate}")
 
             # Get private key from settings
             private_key = getattr(settings, "PLATFORM_PRIVATE_KEY", None)
@@ -877,7 +869,7 @@ class TeoCoinWithdrawalService:
                 {
                     "from": platform_address_checksum,
                     "gas": gas_estimate,
-                    "gasPrice": self.web3.eth.gas_price,
+                    "gasPrice": gas_oracle_service.gas_price(self.web3),
                     "nonce": nonce,
                 }
             )
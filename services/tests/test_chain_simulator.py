@@ -0,0 +1,220 @@
+import json
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from api.burn_deposit_views import BurnDepositView
+from asgiref.sync import async_to_sync
+from blockchain import blockchain as blockchain_module
+from blockchain.blockchain import AsyncTeoCoinService, teocoin_service
+from blockchain.models import (
+    DBTeoCoinBalance,
+    TeoCoinWithdrawalRequest,
+    WithdrawalSettlementBatch,
+)
+from blockchain.simulator import (
+    ZERO_ADDRESS,
+    AsyncChainSimulatorProvider,
+    ChainSimulatorProvider,
+)
+from blockchain.views_simplified import check_transaction_status_async
+from django.conf import settings as django_settings
+from django.core.cache import cache
+from eth_account import Account
+from rest_framework.test import APIRequestFactory, force_authenticate
+from web3 import AsyncWeb3, Web3
+
+from services.teocoin_withdrawal_service import teocoin_withdrawal_service
+from services.withdrawal_settlement_service import withdrawal_settlement_service
+
+PRIVATE_KEY = "0x" + "11" * 32
+USER_KEY = "0x" + "22" * 32
+TOKEN = Web3.to_checksum_address("0x20d6656a31297ab3b8a87291ed562d4228be9ff8")
+
+with open(django_settings.BASE_DIR / "blockchain" / "abi" / "teoCoin2_ABI.json") as f:
+    ABI = json.load(f)
+
+
+def _chain(monkeypatch, **options):
+    provider = ChainSimulatorProvider(**options)
+    w3 = Web3(provider)
+    contract = w3.eth.contract(address=TOKEN, abi=ABI)
+    monkeypatch.setattr(teocoin_withdrawal_service, "web3", w3)
+    monkeypatch.setattr(teocoin_withdrawal_service, "teo_contract", contract)
+    return SimpleNamespace(provider=provider, w3=w3, contract=contract)
+
+
+@pytest.fixture
+def chain(monkeypatch, settings):
+    cache.clear()
+    settings.PLATFORM_PRIVATE_KEY = PRIVATE_KEY
+    settings.PLATFORM_WALLET_ADDRESS = Account.from_key(PRIVATE_KEY).address
+    settings.WITHDRAWAL_BATCH_MINT_ENABLED = True
+    yield _chain(monkeypatch)
+    cache.clear()
+
+
+@pytest.fixture
+def withdrawals(django_user_model):
+    """20 withdrawals of 4 users to 4 addresses"""
+    created = []
+    for u in range(4):
+        user = django_user_model.objects.create_user(
+            username=f"u{u}", email=f"u{u}@example.com", password=None, role="student"
+        )
+        DBTeoCoinBalance.objects.create(user=user, pending_withdrawal=Decimal("50.00"))
+        for _ in range(5):
+            created.append(
+                TeoCoinWithdrawalRequest.objects.create(
+                    user=user,
+                    amount=Decimal("10.00"),
+                    metamask_address="0x" + f"{u + 1:040x}",
+                )
+            )
+    return created
+
+
+def _mint(amount, address):
+    return teocoin_withdrawal_service.mint_tokens_to_address(Decimal(amount), address)
+
+
+def _burn(chain, account, amount):
+    tx = chain.contract.functions.burn(Web3.to_wei(amount, "ether")).build_transaction(
+        {
+            "from": account.address,
+            "gas": 100000,
+            "gasPrice": chain.w3.eth.gas_price,
+            "nonce": chain.w3.eth.get_transaction_count(account.address),
+        }
+    )
+    signed = account.sign_transaction(tx)
+    return Web3.to_hex(chain.w3.eth.send_raw_transaction(signed.raw_transaction))
+
+
+def test_mint_pipeline_emits_transfer_logs(chain):
+    to = Account.from_key(USER_KEY).address
+    result = _mint("12.5", to)
+    assert result["success"], result
+
+    assert chain.contract.functions.balanceOf(to).call() == Web3.to_wei(12.5, "ether")
+    [event] = chain.contract.events.Transfer().get_logs(from_block=0)
+    assert event["args"]["from"] == ZERO_ADDRESS
+    assert event["args"]["to"] == to
+    assert event["transactionHash"].hex() == result["transaction_hash"]
+    assert chain.w3.eth.block_number == 1
+
+
+@pytest.mark.django_db
+def test_batched_settlement_pays_netted_totals(chain, withdrawals):
+    stats = withdrawal_settlement_service.settle(force=True)
+    assert stats["settled"] == 20 and stats["transactions"] == 1
+
+    batch = WithdrawalSettlementBatch.objects.get()
+    receipt = chain.w3.eth.get_transaction_receipt(batch.transaction_hash)
+    assert receipt["status"] == 1 and batch.gas_used == receipt["gasUsed"]
+    assert len(chain.contract.events.Transfer().process_receipt(receipt)) == 4
+    for u in range(4):
+        address = Web3.to_checksum_address("0x" + f"{u + 1:040x}")
+        assert chain.provider.balance_of(TOKEN, address) == Web3.to_wei(50, "ether")
+
+
+@pytest.mark.django_db
+def test_burn_deposit_is_verified_from_receipt(chain, monkeypatch):
+    monkeypatch.setattr(teocoin_service, "w3", chain.w3, raising=False)
+    monkeypatch.setattr(teocoin_service, "contract", chain.contract, raising=False)
+    monkeypatch.setattr(teocoin_service, "contract_address", TOKEN, raising=False)
+    user = Account.from_key(USER_KEY)
+    assert _mint("20", user.address)["success"]
+
+    verified = BurnDepositView().verify_burn_transaction(
+        _burn(chain, user, 5), Decimal("5"), user.address
+    )
+    assert verified["valid"] and verified["verification_method"] == "events"
+    assert chain.contract.functions.totalSupply().call() == Web3.to_wei(15, "ether")
+
+    # Burning more than the balance reverts on chain
+    rejected = BurnDepositView().verify_burn_transaction(
+        _burn(chain, user, 100), Decimal("100"), user.address
+    )
+    assert rejected == {"valid": False, "error": "Transaction failed on blockchain"}
+
+
+@pytest.mark.django_db
+def test_async_views_read_the_same_chain(chain, monkeypatch, django_user_model):
+    async_teocoin = AsyncTeoCoinService()
+    async_teocoin.w3 = AsyncWeb3(AsyncChainSimulatorProvider(chain.provider))
+    async_teocoin.contract = async_teocoin.w3.eth.contract(address=TOKEN, abi=ABI)
+    monkeypatch.setattr(blockchain_module, "async_teocoin_service", async_teocoin)
+    user = Account.from_key(USER_KEY)
+    assert _mint("20", user.address)["success"]
+    tx_hash = _burn(chain, user, 5)
+
+    verify = async_to_sync(BurnDepositView().averify_burn_transaction)
+    verified = verify(tx_hash, Decimal("5"), user.address)
+    assert verified["valid"] and verified["verification_method"] == "events"
+
+    request = APIRequestFactory().post("/tx-status/", {"tx_hash": tx_hash}, format="json")
+    force_authenticate(request, user=django_user_model(pk=1, username="student"))
+    response = async_to_sync(check_transaction_status_async)(request)
+    assert response.data["status"] == "confirmed"
+    assert response.data["block_number"] == verified["block_number"]
+
+
+def test_failure_injection_is_seeded(chain, monkeypatch):
+    def run():
+        _chain(
+            monkeypatch,
+            failure_rate=0.5,
+            failure_methods=["eth_sendRawTransaction"],
+            seed=3,
+        )
+        return [_mint("1", "0x" + "33" * 20)["success"] for _ in range(10)]
+
+    outcomes = run()
+    assert outcomes == run()
+    assert 0 < outcomes.count(True) < 10
+    # Failed sends don't consume nonces: every successful one was mined
+    w3 = teocoin_withdrawal_service.web3
+    assert w3.eth.block_number == outcomes.count(True)
+
+
+@pytest.mark.django_db
+def test_reverted_settlement_releases_withdrawals(chain, withdrawals, monkeypatch):
+    _chain(monkeypatch, revert_rate=1)
+    stats = withdrawal_settlement_service.settle(force=True)
+    assert stats["failed"] == 20
+    assert TeoCoinWithdrawalRequest.objects.filter(status="pending").count() == 20
+
+
+def test_simulated_revert_commits_nothing(chain, monkeypatch):
+    sim = _chain(monkeypatch, revert_rate=1)
+    to = Account.from_key(USER_KEY).address
+    result = _mint("100", to)
+    assert not result["success"]
+
+    receipt = sim.w3.eth.get_transaction_receipt(result["transaction_hash"])
+    assert receipt["status"] == 0 and receipt["logs"] == []
+    assert sim.provider.balance_of(TOKEN, to) == 0
+    assert sim.contract.functions.totalSupply().call() == 0
+
+
+@pytest.mark.django_db
+def test_latency_benchmark_batched_vs_single(chain, withdrawals, monkeypatch):
+    latency = 0.002
+    sim = _chain(monkeypatch, latency=latency)
+
+    started = time.perf_counter()
+    for withdrawal in withdrawals:
+        assert _mint(withdrawal.amount, withdrawal.metamask_address)["success"]
+    single = time.perf_counter() - started
+    single_calls = sim.provider.calls.total()
+    assert single >= single_calls * latency
+
+    sim.provider.calls.clear()
+    started = time.perf_counter()
+    assert withdrawal_settlement_service.settle(force=True)["settled"] == 20
+    batched = time.perf_counter() - started
+
+    assert sim.provider.calls.total() * 5 < single_calls
+    assert batched < single
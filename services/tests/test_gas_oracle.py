@@ -0,0 +1,101 @@
+from collections import Counter
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+
+from services.gas_oracle_service import GWEI, gas_oracle_service
+from services.teocoin_withdrawal_service import teocoin_withdrawal_service
+
+
+class FakeEth:
+    def __init__(self, base_fee_gwei, tip_gwei=2, fee_history=True):
+        self.rpc = Counter()
+        self.base_fee = base_fee_gwei * GWEI
+        self.tip = tip_gwei * GWEI
+        self.has_fee_history = fee_history
+
+    def fee_history(self, blocks, newest, percentiles):
+        self.rpc["fee_history"] += 1
+        if not self.has_fee_history:
+            raise ValueError("method not found")
+        return {
+            "baseFeePerGas": [self.base_fee] * (blocks + 1),
+            "reward": [[self.tip]] * blocks,
+        }
+
+    @property
+    def gas_price(self):
+        self.rpc["gas_price"] += 1
+        return self.base_fee + self.tip
+
+
+class FakeFunction:
+    address = "0xToken"
+    selector = "0x449a52f8"
+
+    def __init__(self):
+        self.calls = 0
+
+    def estimate_gas(self, tx):
+        self.calls += 1
+        return 100000
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _w3(**kwargs):
+    w3 = mock.Mock()
+    w3.eth = FakeEth(**kwargs)
+    return w3
+
+
+def test_price_is_sampled_once_per_refresh_and_smoothed(settings):
+    settings.GAS_ORACLE_REFRESH_SECONDS = 30
+    w3 = _w3(base_fee_gwei=28)
+    with mock.patch("services.gas_oracle_service.time.time", return_value=1000.0):
+        first = gas_oracle_service.gas_price(w3)
+        for _ in range(20):
+            assert gas_oracle_service.gas_price(w3) == first
+    assert w3.eth.rpc == {"fee_history": 1}
+    assert first == int(30 * GWEI * 1.1)
+
+    # A spike moves the EWMA only partway: writes still pay the spiked
+    # sample, only capped prices are clamped
+    w3.eth.base_fee = 98 * GWEI
+    with mock.patch("services.gas_oracle_service.time.time", return_value=1031.0):
+        spiked = gas_oracle_service.gas_price(w3)
+        assert gas_oracle_service.gas_price(w3, capped=True) == 50 * GWEI
+    assert spiked == 100 * GWEI
+    assert gas_oracle_service.state()["ewma_gwei"] == pytest.approx(0.3 * 100 + 0.7 * 30)
+
+
+def test_falls_back_to_gas_price_and_clamps_low_capped_prices():
+    w3 = _w3(base_fee_gwei=1, fee_history=False)
+    assert gas_oracle_service.gas_price(w3, capped=True) == 25 * GWEI
+    assert gas_oracle_service.gas_price(w3) == int(3 * GWEI * 1.1)
+    assert gas_oracle_service.state()["source"] == "gas_price"
+
+
+def test_estimates_are_memoized_per_shape():
+    function = FakeFunction()
+    for _ in range(5):
+        assert gas_oracle_service.estimate_gas(function, {}, 1) == 125000
+    gas_oracle_service.estimate_gas(function, {}, 1, shape=10)
+    assert function.calls == 2
+    assert len(gas_oracle_service.state()["estimates"]) == 2
+
+
+def test_calculate_gas_costs_reports_state(monkeypatch):
+    monkeypatch.setattr(teocoin_withdrawal_service, "web3", _w3(base_fee_gwei=28))
+    out = StringIO()
+    call_command("calculate_gas_costs", "--sample", stdout=out)
+    assert "Price: 33.0 gwei" in out.getvalue()
+    assert "TEO mint: 120000 gas" in out.getvalue()
@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from core.async_views import AsyncAPIView
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from services.exceptions import IdempotencyConflictError
+from services.idempotency import idempotency_registry, idempotent
+from services.models import IdempotencyRecord
+
+calls = []
+
+
+class ChargeView(APIView):
+    @idempotent("test_charge")
+    def post(self, request):
+        calls.append(request.data)
+        if request.data.get("amount") == "bad":
+            return Response({"error": "invalid"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"charged": request.data["amount"]}, status=status.HTTP_201_CREATED)
+
+
+class AsyncChargeView(AsyncAPIView):
+    @idempotent("test_charge")
+    async def post(self, request):
+        calls.append(request.data)
+        return Response({"charged": request.data["amount"]}, status=status.HTTP_201_CREATED)
+
+
+class Ledger:
+    @idempotent("test_mint", key=lambda self, withdrawal_id: withdrawal_id)
+    def mint(self, withdrawal_id):
+        calls.append(withdrawal_id)
+        return {"withdrawal_id": withdrawal_id, "tx": f"0x{len(calls)}"}
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+
+def _charge(user, data, key="k1"):
+    headers = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+    request = APIRequestFactory().post("/charge/", data, format="json", **headers)
+    force_authenticate(request, user=user)
+    return ChargeView.as_view()(request)
+
+
+@pytest.mark.django_db
+def test_view_retries_replay_the_stored_response(django_user_model):
+    user = django_user_model.objects.create_user(
+        username="u", email="u@example.com", password="p", role="student"
+    )
+    first = _charge(user, {"amount": "10"})
+    retry = _charge(user, {"amount": "10"})
+    assert first.status_code == retry.status_code == 201
+    assert retry.data == {"charged": "10"}
+    assert retry["Idempotent-Replayed"] == "true"
+    assert len(calls) == 1
+
+    assert _charge(user, {"amount": "20"}).status_code == 422
+    # without a key the view is not deduplicated
+    _charge(user, {"amount": "10"}, key=None)
+    _charge(user, {"amount": "10"}, key=None)
+    assert len(calls) == 3
+
+
+@pytest.mark.django_db
+def test_failed_attempts_release_the_key(django_user_model):
+    user = django_user_model.objects.create_user(
+        username="u", email="u@example.com", password="p", role="student"
+    )
+    assert _charge(user, {"amount": "bad"}, key="k2").status_code == 400
+    assert not IdempotencyRecord.objects.exists()
+    assert _charge(user, {"amount": "bad"}, key="k2").status_code == 400
+    assert len(calls) == 2
+
+
+@pytest.mark.django_db
+def test_service_method_claims_and_leases():
+    ledger = Ledger()
+    assert ledger.mint(7) == {"withdrawal_id": 7, "tx": "0x1"}
+    assert ledger.mint(7) == {"withdrawal_id": 7, "tx": "0x1"}
+    assert calls == [7]
+
+    # a live claim blocks duplicates, an expired one can be taken over
+    record, owner = idempotency_registry.claim("test_mint", "8")
+    assert owner
+    with pytest.raises(IdempotencyConflictError) as exc:
+        ledger.mint(8)
+    assert exc.value.status_code == 409
+    IdempotencyRecord.objects.filter(pk=record.pk).update(
+        locked_until=timezone.now() - timedelta(seconds=1)
+    )
+    assert ledger.mint(8)["withdrawal_id"] == 8
+    assert calls == [7, 8]
+
+
+@pytest.mark.django_db
+def test_async_views_share_the_registry(django_user_model):
+    user = django_user_model.objects.create_user(
+        username="u", email="u@example.com", password="p", role="student"
+    )
+    assert _charge(user, {"amount": "10"}, key="k3").status_code == 201
+
+    request = APIRequestFactory().post(
+        "/charge/", {"amount": "10"}, format="json", HTTP_IDEMPOTENCY_KEY="k3"
+    )
+    force_authenticate(request, user=user)
+    retry = async_to_sync(AsyncChargeView.as_view())(request)
+    assert retry.status_code == 201
+    assert retry["Idempotent-Replayed"] == "true"
+    assert len(calls) == 1
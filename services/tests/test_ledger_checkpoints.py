@@ -0,0 +1,158 @@
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from api.db_teocoin_views import BalanceAsOfView, StatementExportView, StatementView
+from blockchain.models import DBTeoCoinCheckpoint, DBTeoCoinTransaction
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from services.db_teocoin_service import db_teocoin_service
+from services.ledger_checkpoint_service import ledger_checkpoint_service
+from services.teocoin_withdrawal_service import teocoin_withdrawal_service
+
+START = timezone.make_aware(datetime(2025, 1, 1, 9))
+DAYS = 60
+PER_DAY = 4
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username="ledger", email="ledger@example.com", password=None, role="student"
+    )
+
+
+@pytest.fixture
+def history(user):
+    """4 postings a day for 60 days, with a debit every third posting"""
+    rows = DBTeoCoinTransaction.objects.bulk_create(
+        [
+            DBTeoCoinTransaction(
+                user=user,
+                transaction_type="spent_discount" if i % 3 == 2 else "earned",
+                amount=Decimal("-4.00") if i % 3 == 2 else Decimal("2.50"),
+                description=f"posting {i}",
+            )
+            for i in range(DAYS * PER_DAY)
+        ]
+    )
+    for i, row in enumerate(rows):
+        row.created_at = START + timedelta(days=i // PER_DAY, hours=i % PER_DAY)
+    DBTeoCoinTransaction.objects.bulk_update(rows, ["created_at"])
+    return rows
+
+
+def replay(rows, at):
+    return sum((r.amount for r in rows if r.created_at <= at), Decimal("0.00"))
+
+
+@pytest.mark.django_db
+def test_balance_as_of_matches_replay(user, history, django_assert_num_queries):
+    # One checkpoint after 3 postings, one at the end of each day
+    assert ledger_checkpoint_service.checkpoint_user(user.id, every=3) == DAYS * 2
+    # Re-running only checkpoints what's new
+    assert ledger_checkpoint_service.checkpoint_user(user.id, every=3) == 0
+    assert DBTeoCoinCheckpoint.objects.filter(user=user).latest("as_of").posting_count == len(history)
+
+    for at in (
+        START - timedelta(days=1),
+        START + timedelta(days=3, hours=1, minutes=30),
+        START + timedelta(days=31),
+        START + timedelta(days=DAYS + 5),
+    ):
+        # Checkpoint, postings since, withdrawals
+        with django_assert_num_queries(3):
+            balance = ledger_checkpoint_service.balance_as_of(user.id, at)
+        assert balance == replay(history, at)
+
+
+@pytest.mark.django_db
+def test_checkpoint_all_picks_up_new_postings(user, history):
+    out = StringIO()
+    call_command("checkpoint_ledger", stdout=out)
+    assert "for 1 users" in out.getvalue()
+    assert ledger_checkpoint_service.checkpoint_all()["users"] == 0
+
+    late = DBTeoCoinTransaction.objects.create(
+        user=user, transaction_type="bonus", amount=Decimal("100.00"), description="late"
+    )
+    DBTeoCoinTransaction.objects.filter(pk=late.pk).update(
+        created_at=START + timedelta(days=DAYS + 1)
+    )
+    assert ledger_checkpoint_service.checkpoint_all() == {"users": 1, "checkpoints": 1}
+    assert ledger_checkpoint_service.latest(user.id).last_transaction_id == late.pk
+
+
+@pytest.mark.django_db
+def test_statement_pages_carry_running_balance(user, history):
+    ledger_checkpoint_service.checkpoint_all(every=10)
+    factory = APIRequestFactory()
+    request = factory.get("/statement/", {"month": "2025-02", "page": 2, "page_size": 20})
+    force_authenticate(request, user=user)
+    statement = StatementView.as_view()(request).data["statement"]
+
+    february = [r for r in history if r.created_at.month == 2]
+    opening = replay(history, START + timedelta(days=30, hours=23))
+    assert statement["opening_balance"] == opening
+    assert statement["count"] == len(february)
+    assert statement["closing_balance"] == opening + sum(r.amount for r in february)
+    assert [row["id"] for row in statement["transactions"]] == [r.id for r in february[20:40]]
+    assert statement["transactions"][0]["balance_after"] == replay(history, february[20].created_at)
+
+    request = factory.get("/balance/as-of/", {"at": "2025-01-31"})
+    force_authenticate(request, user=user)
+    assert BalanceAsOfView.as_view()(request).data["balance"] == opening
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_statement_export_streams(user, history, fmt):
+    ledger_checkpoint_service.checkpoint_all(every=10)
+    request = APIRequestFactory().get("/statement/export/", {"start": "2025-01-15"})
+    force_authenticate(request, user=user)
+    response = StatementExportView.as_view()(request, fmt=fmt)
+
+    assert response.streaming
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    rows = [r for r in history if r.created_at.date() >= datetime(2025, 1, 15).date()]
+    if fmt == "csv":
+        assert lines[0].startswith("id,created_at")
+        lines = lines[1:]
+        last_balance = lines[-1].split(",")[4]
+    else:
+        last_balance = json.loads(lines[-1])["balance_after"]
+    assert len(lines) == len(rows)
+    assert Decimal(last_balance) == replay(history, history[-1].created_at)
+
+
+@pytest.mark.django_db
+def test_balances_are_holdings_across_stakes_and_withdrawals(django_user_model):
+    teacher = django_user_model.objects.create_user(
+        username="staker", email="staker@example.com", password=None, role="teacher"
+    )
+    db_teocoin_service.add_balance(teacher, Decimal("200.00"), "earned", "Teaching")
+    assert db_teocoin_service.stake_tokens(teacher, Decimal("100.00"))
+    # The live request path moves available -> pending without a posting
+    result = teocoin_withdrawal_service.create_withdrawal_request(
+        teacher, Decimal("50.00"), "0x" + "1" * 40
+    )
+    assert result["success"], result
+
+    wallet = db_teocoin_service.get_user_balance(teacher)
+    holdings = wallet["available_balance"] + wallet["staked_balance"]
+    assert holdings == Decimal("150.00")
+
+    now = timezone.now()
+    assert ledger_checkpoint_service.balance_as_of(teacher.id, now) == holdings
+    statement = ledger_checkpoint_service.statement(teacher.id, START, now + timedelta(seconds=1))
+    assert statement["closing_balance"] == holdings
+    assert [w["amount"] for w in statement["withdrawals"]] == [Decimal("-50.00")]
+    assert [t["balance_after"] for t in statement["transactions"]] == [200, 200]
+
+    lines = list(ledger_checkpoint_service.export(teacher.id, fmt="jsonl"))
+    assert [json.loads(line)["transaction_type"] for line in lines] == ["earned", "stake", "withdrawal"]
+    assert Decimal(json.loads(lines[-1])["balance_after"]) == holdings
@@ -0,0 +1,158 @@
+import csv
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from blockchain.models import (
+    DBTeoCoinBalance,
+    DBTeoCoinTransaction,
+    TeoCoinWithdrawalRequest,
+)
+from django.core.management import call_command
+from web3 import Web3
+
+from blockchain.simulator import ChainSimulatorProvider
+from services.db_teocoin_service import db_teocoin_service
+from services.ledger_reconciliation_service import (
+    aggregate_chunk,
+    ledger_reconciliation_service,
+)
+from services.teocoin_withdrawal_service import teocoin_withdrawal_service
+
+POSTINGS = [
+    ("earned", "100.00"),
+    ("stake", "30.00"),
+    ("unstake", "10.00"),
+    ("withdrawal_request", "-20.00"),
+    ("withdrawal_request", "-5.00"),
+    ("spent_discount", "-15.00"),
+]
+
+
+@pytest.fixture
+def ledger(django_user_model):
+    """30 users whose balances match their postings"""
+    users = [
+        django_user_model.objects.create_user(
+            username=f"r{i}", email=f"r{i}@example.com", password=None, role="teacher"
+        )
+        for i in range(30)
+    ]
+    DBTeoCoinTransaction.objects.bulk_create(
+        [
+            DBTeoCoinTransaction(
+                user=user, transaction_type=kind, amount=Decimal(amount), description=kind
+            )
+            for kind, amount in POSTINGS
+            for user in users
+        ]
+    )
+    for user in users:
+        TeoCoinWithdrawalRequest.objects.create(
+            user=user, amount=Decimal("20.00"), metamask_address="0x" + "1" * 40, status="completed"
+        )
+        TeoCoinWithdrawalRequest.objects.create(
+            user=user, amount=Decimal("5.00"), metamask_address="0x" + "1" * 40
+        )
+    DBTeoCoinBalance.objects.bulk_create(
+        [
+            DBTeoCoinBalance(
+                user=user,
+                available_balance=Decimal("40.00"),
+                staked_balance=Decimal("20.00"),
+                pending_withdrawal=Decimal("5.00"),
+            )
+            for user in users
+        ]
+    )
+    return users
+
+
+@pytest.mark.django_db
+def test_consistent_ledger_has_no_discrepancies(ledger):
+    stats = ledger_reconciliation_service.reconcile(chunk_size=7, workers=1)
+    assert stats["postings"] == len(POSTINGS) * len(ledger)
+    assert stats["chunks"] == -(-stats["postings"] // 7)
+    assert stats["users"] == 30
+    assert stats["discrepancies"] == 0 and stats["report"] is None
+
+
+@pytest.mark.django_db
+def test_chunks_are_grouped_per_user(ledger):
+    first = DBTeoCoinTransaction.objects.order_by("id").first().id
+    # The first 30 postings are the "earned" credit of every user
+    totals = aggregate_chunk(first, first + 30)
+    assert len(totals) == 30
+    assert set(totals.values()) == {(Decimal("100.00"), 0, 0, 1)}
+
+
+@pytest.mark.django_db
+def test_drift_is_reported_and_repaired(ledger, tmp_path):
+    drifted, missing = ledger[0], ledger[1]
+    DBTeoCoinBalance.objects.filter(user=drifted).update(available_balance=Decimal("55.00"))
+    DBTeoCoinBalance.objects.filter(user=missing).delete()
+
+    report = tmp_path / "drift.csv"
+    out = StringIO()
+    call_command("reconcile_ledger", "--workers", "1", "--report", str(report), stdout=out)
+    assert "Discrepancies: 2 (total drift 80.00 TEO)" in out.getvalue()
+
+    with open(report) as f:
+        rows = {int(row["user_id"]): row for row in csv.DictReader(f)}
+    assert rows[drifted.id]["actual_available_balance"] == "55.00"
+    assert rows[drifted.id]["expected_available_balance"] == "40.00"
+    assert rows[missing.id]["missing_balance_row"] == "True"
+
+    stats = ledger_reconciliation_service.reconcile(workers=1, repair=True, report_path=str(report))
+    assert stats["repaired"] == 2
+    assert DBTeoCoinBalance.objects.get(user=missing).staked_balance == Decimal("20.00")
+    assert ledger_reconciliation_service.reconcile(workers=1)["discrepancies"] == 0
+
+
+@pytest.mark.django_db
+def test_withdrawals_without_postings_reconcile(django_user_model, monkeypatch, settings):
+    # The live request path moves available -> pending without a posting
+    w3 = Web3(ChainSimulatorProvider())
+    monkeypatch.setattr(teocoin_withdrawal_service, "web3", w3)
+    monkeypatch.setattr(teocoin_withdrawal_service, "teo_contract", object())
+    settings.PLATFORM_WALLET_ADDRESS = "0x" + "2" * 40
+    user = django_user_model.objects.create_user(
+        username="w", email="w@example.com", password=None, role="student"
+    )
+    db_teocoin_service.add_balance(user, Decimal("100.00"), "earned", "Lesson reward")
+
+    for amount in ("50.00", "20.00"):
+        result = teocoin_withdrawal_service.create_withdrawal_request(
+            user, Decimal(amount), "0x" + "1" * 40
+        )
+        assert result["success"], result
+    first = TeoCoinWithdrawalRequest.objects.filter(user=user).order_by("id").first()
+    teocoin_withdrawal_service.process_pending_withdrawals(worker_id="t", limit=1)
+    first.refresh_from_db()
+    assert first.status == "completed"
+
+    balance = DBTeoCoinBalance.objects.get(user=user)
+    assert (balance.available_balance, balance.pending_withdrawal) == (30, 20)
+    stats = ledger_reconciliation_service.reconcile(workers=1, repair=True)
+    assert stats["discrepancies"] == 0
+    balance.refresh_from_db()
+    assert (balance.available_balance, balance.pending_withdrawal) == (30, 20)
+
+
+@pytest.mark.django_db
+def test_negative_ledger_balances_are_not_repaired(django_user_model, tmp_path):
+    # A balance migrated without postings, then withdrawn
+    user = django_user_model.objects.create_user(
+        username="m", email="m@example.com", password=None, role="student"
+    )
+    DBTeoCoinBalance.objects.create(user=user, available_balance=Decimal("60.00"))
+    TeoCoinWithdrawalRequest.objects.create(
+        user=user, amount=Decimal("40.00"), metamask_address="0x" + "1" * 40, status="completed"
+    )
+
+    stats = ledger_reconciliation_service.reconcile(
+        workers=1, repair=True, report_path=str(tmp_path / "drift.csv")
+    )
+    assert stats["discrepancies"] == 1
+    assert (stats["repaired"], stats["skipped"]) == (0, 1)
+    assert DBTeoCoinBalance.objects.get(user=user).available_balance == Decimal("60.00")
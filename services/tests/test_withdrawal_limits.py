@@ -0,0 +1,109 @@
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from blockchain.models import (
+    DBTeoCoinBalance,
+    TeoCoinWithdrawalRequest,
+    WithdrawalLimitCounter,
+)
+from django.db import connection
+from django.utils import timezone
+
+from services.teocoin_withdrawal_service import teocoin_withdrawal_service
+from services.withdrawal_limit_service import withdrawal_limit_service
+
+ADDRESS = "0x" + "a" * 40
+
+
+@pytest.fixture
+def holder(django_user_model):
+    user = django_user_model.objects.create_user(
+        username="holder", email="holder@example.com", password="p", role="student"
+    )
+    DBTeoCoinBalance.objects.create(user=user, available_balance=Decimal("100000.00"))
+    return user
+
+
+def _withdraw(user, amount="10"):
+    return teocoin_withdrawal_service.create_withdrawal_request(user, amount, ADDRESS)
+
+
+@pytest.mark.django_db
+def test_counter_tracks_window_and_in_flight(holder):
+    # requests made before the counter existed are picked up on first use
+    old = TeoCoinWithdrawalRequest.objects.create(
+        user=holder, amount=Decimal("100.00"), metamask_address=ADDRESS, status="completed"
+    )
+    TeoCoinWithdrawalRequest.objects.filter(pk=old.pk).update(
+        created_at=timezone.now() - timedelta(hours=30)
+    )
+    WithdrawalLimitCounter.objects.all().delete()
+
+    first = _withdraw(holder, "20")
+    second = _withdraw(holder, "30")
+    assert first["success"] and second["success"]
+    assert second["daily_withdrawal_count"] == 2
+
+    usage = withdrawal_limit_service.get_usage(holder)
+    assert usage == {"count": 2, "amount": Decimal("50.00"), "in_flight": 2}
+
+    withdrawal = TeoCoinWithdrawalRequest.objects.get(pk=first["withdrawal_id"])
+    withdrawal.status = "cancelled"
+    withdrawal.save()
+    assert withdrawal_limit_service.get_usage(holder)["in_flight"] == 1
+
+    counter = WithdrawalLimitCounter.objects.get(user=holder)
+    assert withdrawal_limit_service.usage(counter) == withdrawal_limit_service.usage(
+        withdrawal_limit_service.rebuild(holder.pk)
+    )
+
+
+@pytest.mark.django_db
+def test_limits_are_checked_against_counter(holder, monkeypatch):
+    monkeypatch.setattr(teocoin_withdrawal_service, "MAX_DAILY_AMOUNT", Decimal("50.00"))
+    assert _withdraw(holder, "40")["success"]
+    result = _withdraw(holder, "20")
+    assert result["error_code"] == "DAILY_AMOUNT_EXCEEDED"
+    assert "Remaining today: 10.00" in result["error"]
+
+    assert _withdraw(holder, "10")["success"]
+    assert _withdraw(holder, "10")["error_code"] == "DAILY_AMOUNT_EXCEEDED"
+    monkeypatch.setattr(teocoin_withdrawal_service, "MAX_DAILY_AMOUNT", Decimal("1000.00"))
+    assert _withdraw(holder, "10")["success"]
+    assert _withdraw(holder, "10")["error_code"] == "TOO_MANY_PENDING"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_requests_cannot_overrun_the_pending_limit(holder):
+    results = []
+    barrier = threading.Barrier(6)
+
+    def attempt():
+        try:
+            barrier.wait()
+            # SQLite reports lock contention as errors instead of waiting on
+            # it: retry until the request is accepted or refused by the limit
+            for _ in range(50):
+                result = _withdraw(holder)
+                if result["success"] or result["error_code"] == "TOO_MANY_PENDING":
+                    break
+                time.sleep(0.01)
+            results.append(result)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=attempt) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    created = [r for r in results if r["success"]]
+    assert len(created) == 3
+    assert {r["error_code"] for r in results if not r["success"]} == {"TOO_MANY_PENDING"}
+    assert TeoCoinWithdrawalRequest.objects.filter(user=holder).count() == len(created)
+    usage = withdrawal_limit_service.get_usage(holder)
+    assert usage["count"] == usage["in_flight"] == len(created)
@@ -0,0 +1,133 @@
+import threading
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from blockchain.models import DBTeoCoinBalance, TeoCoinWithdrawalRequest
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from services.withdrawal_limit_service import withdrawal_limit_service
+from services.withdrawal_queue_service import MAX_ATTEMPTS, withdrawal_queue_service
+
+ADDRESS = "0x" + "b" * 40
+
+
+@pytest.fixture
+def holder(django_user_model):
+    return django_user_model.objects.create_user(
+        username="holder", email="holder@example.com", password="p", role="student"
+    )
+
+
+def _enqueue(user, n):
+    return [
+        TeoCoinWithdrawalRequest.objects.create(
+            user=user, amount=Decimal("10.00"), metamask_address=ADDRESS
+        )
+        for _ in range(n)
+    ]
+
+
+def _complete(withdrawal):
+    withdrawal.status = "completed"
+    withdrawal.transaction_hash = "0x" + "c" * 64
+    withdrawal.completed_at = timezone.now()
+    withdrawal.save()
+    return {"success": True}
+
+
+@pytest.mark.django_db
+def test_claims_are_exclusive_and_leased(holder):
+    _enqueue(holder, 3)
+    first = withdrawal_queue_service.claim("w1", batch_size=2)
+    second = withdrawal_queue_service.claim("w2", batch_size=2)
+    assert len(first) == 2 and len(second) == 1
+    assert not {w.pk for w in first} & {w.pk for w in second}
+    assert withdrawal_queue_service.claim("w3") == []
+    assert all(w.status == "processing" and w.lease_expires_at for w in first)
+
+    # w1 dies: its lease expires and the withdrawals go back to the queue
+    TeoCoinWithdrawalRequest.objects.filter(claimed_by="w1").update(
+        lease_expires_at=timezone.now() - timedelta(seconds=1)
+    )
+    assert withdrawal_queue_service.recover_expired_leases()["requeued"] == 2
+    assert withdrawal_queue_service.process(first[0], "w1", _complete) == "lost"
+
+    stats = withdrawal_queue_service.drain("w3", _complete)
+    assert stats["succeeded"] == stats["processed"] == 2
+    [report] = withdrawal_queue_service.worker_throughput()
+    assert report["worker"] == "w3" and report["completed"] == 2
+
+
+@pytest.mark.django_db
+def test_failed_attempts_are_retried_then_failed(holder):
+    [withdrawal] = _enqueue(holder, 1)
+    DBTeoCoinBalance.objects.create(user=holder, pending_withdrawal=Decimal("10.00"))
+    withdrawal_limit_service.rebuild(holder.pk)
+
+    def broken(withdrawal):
+        raise RuntimeError("rpc down")
+
+    for _ in range(MAX_ATTEMPTS):
+        assert withdrawal_queue_service.drain("w1", broken)["failed"] == 1
+    withdrawal.refresh_from_db()
+    assert withdrawal.status == "failed"
+    assert withdrawal.retry_count == MAX_ATTEMPTS
+    assert withdrawal.error_message == "rpc down"
+    assert withdrawal_limit_service.get_usage(holder)["in_flight"] == 0
+    balance = DBTeoCoinBalance.objects.get(user=holder)
+    assert (balance.available_balance, balance.pending_withdrawal) == (10, 0)
+
+
+@pytest.mark.django_db
+def test_stuck_broadcast_withdrawals_are_reported_not_requeued(holder):
+    [withdrawal] = _enqueue(holder, 1)
+    TeoCoinWithdrawalRequest.objects.filter(pk=withdrawal.pk).update(
+        status="processing",
+        transaction_hash="0x" + "d" * 64,
+        created_at=timezone.now() - timedelta(hours=25),
+    )
+    withdrawal.refresh_from_db()
+    assert withdrawal.is_processing_too_long
+    assert withdrawal_queue_service.recover_expired_leases() == {
+        "requeued": 0,
+        "stuck": [withdrawal.pk],
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_workers_process_each_withdrawal_once(holder):
+    _enqueue(holder, 12)
+    handled = []
+    barrier = threading.Barrier(3)
+
+    def handler(withdrawal):
+        result = _complete(withdrawal)
+        handled.append(withdrawal.pk)
+        return result
+
+    def worker(name):
+        try:
+            barrier.wait()
+            withdrawal_queue_service.drain(name, handler, batch_size=2)
+        except DatabaseError:
+            pass  # a crashed worker: its claims are recovered below
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    TeoCoinWithdrawalRequest.objects.filter(status="processing").update(
+        lease_expires_at=timezone.now() - timedelta(seconds=1)
+    )
+    withdrawal_queue_service.recover_expired_leases()
+    withdrawal_queue_service.drain("w-final", handler)
+
+    assert sorted(handled) == sorted(set(handled))
+    assert len(handled) == 12
+    assert not TeoCoinWithdrawalRequest.objects.exclude(status="completed").exists()
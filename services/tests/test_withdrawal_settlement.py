@@ -0,0 +1,181 @@
+from collections import Counter
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from blockchain.models import (
+    DBTeoCoinBalance,
+    TeoCoinWithdrawalRequest,
+    WithdrawalSettlementBatch,
+)
+from eth_account import Account
+from hexbytes import HexBytes
+from web3 import Web3
+
+from services.teocoin_withdrawal_service import teocoin_withdrawal_service
+from services.withdrawal_settlement_service import withdrawal_settlement_service
+
+PRIVATE_KEY = "0x" + "11" * 32
+TX_GAS = 21000
+MINT_GAS = 30000
+
+
+class FakeChain:
+    """Counts RPC round trips; gas is 21k per transaction plus 30k per mint"""
+
+    def __init__(self, revert=False):
+        self.rpc = Counter()
+        self.sent = []
+        self.revert = revert
+        self.eth = self
+        self.account = self
+        self.functions = self
+
+    to_wei = staticmethod(Web3.to_wei)
+
+    # web3.eth
+    @property
+    def gas_price(self):
+        self.rpc["gas_price"] += 1
+        return 30 * 10**9
+
+    @property
+    def chain_id(self):
+        self.rpc["chain_id"] += 1
+        return 80002
+
+    def get_transaction_count(self, address, block="latest"):
+        self.rpc["nonce"] += 1
+        return len(self.sent)
+
+    def sign_transaction(self, tx, key):
+        return SimpleNamespace(raw_transaction=tx)
+
+    def send_raw_transaction(self, tx):
+        self.rpc["send"] += 1
+        self.sent.append(tx)
+        return HexBytes(len(self.sent).to_bytes(32, "big"))
+
+    def wait_for_transaction_receipt(self, tx_hash):
+        self.rpc["receipt"] += 1
+        tx = self.sent[int(HexBytes(tx_hash).hex(), 16) - 1]
+        return {
+            "status": 0 if self.revert else 1,
+            "transactionHash": HexBytes(tx_hash),
+            "gasUsed": TX_GAS + MINT_GAS * tx["calls"],
+            "effectiveGasPrice": tx["gasPrice"],
+        }
+
+    # contract
+    def mintTo(self, address, amount_wei):
+        return FakeFunction(self, [(address, amount_wei)])
+
+    def multicall(self, calls):
+        return FakeFunction(self, calls)
+
+    def encode_abi(self, name, args):
+        return tuple(args)
+
+
+class FakeFunction:
+    def __init__(self, chain, calls):
+        self.chain = chain
+        self.calls = calls
+
+    def estimate_gas(self, tx):
+        self.chain.rpc["estimate_gas"] += 1
+        return TX_GAS + MINT_GAS * len(self.calls)
+
+    def build_transaction(self, tx):
+        return {**tx, "calls": len(self.calls), "mints": self.calls}
+
+
+@pytest.fixture
+def chain(monkeypatch, settings):
+    fake = FakeChain()
+    settings.PLATFORM_PRIVATE_KEY = PRIVATE_KEY
+    settings.PLATFORM_WALLET_ADDRESS = Account.from_key(PRIVATE_KEY).address
+    settings.WITHDRAWAL_BATCH_MINT_ENABLED = True
+    monkeypatch.setattr(teocoin_withdrawal_service, "web3", fake)
+    monkeypatch.setattr(teocoin_withdrawal_service, "teo_contract", fake)
+    return fake
+
+
+@pytest.fixture
+def withdrawals(django_user_model):
+    """50 withdrawals of 10 users to 10 addresses"""
+    created = []
+    for u in range(10):
+        user = django_user_model.objects.create_user(
+            username=f"u{u}", email=f"u{u}@example.com", password=None, role="student"
+        )
+        DBTeoCoinBalance.objects.create(user=user, pending_withdrawal=Decimal("50.00"))
+        for _ in range(5):
+            created.append(
+                TeoCoinWithdrawalRequest.objects.create(
+                    user=user,
+                    amount=Decimal("10.00"),
+                    metamask_address="0x" + f"{u + 1:040x}",
+                )
+            )
+    return created
+
+
+@pytest.mark.django_db
+def test_batched_settlement_cuts_round_trips_and_gas(chain, withdrawals):
+    # Baseline: one mint transaction per withdrawal
+    for withdrawal in withdrawals:
+        assert teocoin_withdrawal_service.mint_tokens_to_address(
+            withdrawal.amount, withdrawal.metamask_address, withdrawal.pk
+        )["success"]
+    single_rpc = sum(chain.rpc.values())
+    single_gas = (TX_GAS + MINT_GAS) * len(withdrawals)
+
+    chain.rpc.clear()
+    stats = withdrawal_settlement_service.settle(force=True)
+    assert stats["settled"] == 50 and stats["transactions"] == 1
+    batched_rpc = sum(chain.rpc.values())
+    [batch] = WithdrawalSettlementBatch.objects.all()
+    assert batch.call_count == 10 and batch.withdrawal_count == 50
+
+    assert single_rpc >= 10 * batched_rpc
+    assert batch.gas_used * 4 < single_gas
+    # every address is paid its netted total once
+    [tx] = chain.sent[-1:]
+    assert sorted(amount for _, amount in tx["mints"]) == [50 * 10**18] * 10
+
+
+@pytest.mark.django_db
+def test_receipt_is_split_back_to_withdrawals(chain, withdrawals, settings):
+    settings.WITHDRAWAL_BATCH_MINT_ENABLED = False
+    stats = withdrawal_settlement_service.settle(force=True)
+    assert stats["transactions"] == 10
+
+    batches = WithdrawalSettlementBatch.objects.all()
+    assert {b.status for b in batches} == {"confirmed"}
+    for batch in batches:
+        rows = list(batch.withdrawals.all())
+        assert len(rows) == 5
+        assert {w.transaction_hash for w in rows} == {batch.transaction_hash}
+        assert sum(w.gas_used for w in rows) == batch.gas_used
+    assert not TeoCoinWithdrawalRequest.objects.exclude(status="completed").exists()
+    assert set(
+        DBTeoCoinBalance.objects.values_list("pending_withdrawal", flat=True)
+    ) == {Decimal("0.00")}
+
+
+@pytest.mark.django_db
+def test_reverted_batch_releases_withdrawals(chain, withdrawals):
+    chain.revert = True
+    stats = withdrawal_settlement_service.settle(force=True)
+    assert stats["failed"] == 50
+    assert WithdrawalSettlementBatch.objects.get().status == "failed"
+    pending = TeoCoinWithdrawalRequest.objects.filter(status="pending")
+    assert pending.count() == 50
+    assert not pending.exclude(transaction_hash=None).exists()
+
+
+@pytest.mark.django_db
+def test_settlement_waits_for_window(chain, withdrawals):
+    assert withdrawal_settlement_service.settle()["due"] is False
+    assert withdrawal_settlement_service.settle(max_batch=50)["settled"] == 50
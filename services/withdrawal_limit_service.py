@@ -0,0 +1,148 @@
+"""
+Withdrawal Limit Service - Rolling Per-User Withdrawal Counters
+
+Keeps WithdrawalLimitCounter in step with TeoCoinWithdrawalRequest so limit
+checks read one row instead of summing the user's requests:
+
+- hourly buckets (count, amount) of the requests created in the last
+  WINDOW_HOURS hours
+- the number of in-flight (pending/processing) requests
+
+lock() row-locks the counter, so a limit check and the request it admits are
+serialized per user: concurrent withdrawal attempts cannot both pass a check
+that only one of them fits in. Counters are built from the request table the
+first time a user is seen, and rebuild() realigns a drifted one.
+"""
+
+from datetime import timedelta, timezone as dt_timezone
+from decimal import Decimal
+from typing import Any, Dict, Tuple
+
+from blockchain.models import TeoCoinWithdrawalRequest, WithdrawalLimitCounter
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from services.base import BaseService
+
+# Rolling window of the daily limits, at one-hour granularity
+WINDOW_HOURS = 24
+IN_FLIGHT_STATUSES = ("pending", "processing")
+
+
+def bucket_key(when) -> str:
+    return when.astimezone(dt_timezone.utc).strftime("%Y-%m-%dT%H")
+
+
+def window_start(now):
+    """Start of the oldest hour bucket still inside the window"""
+    hour = now.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return hour - timedelta(hours=WINDOW_HOURS - 1)
+
+
+class WithdrawalLimitService(BaseService):
+    """
+    Service maintaining and reading the rolling withdrawal counters.
+    """
+
+    def lock(self, user_id: int) -> Tuple[WithdrawalLimitCounter, bool]:
+        """
+        Row-lock the user's counter; call inside a transaction.
+
+        Returns:
+            (counter, created) where created means the counter was just built
+            from the request table (and already includes every stored request)
+        """
+        counter = (
+            WithdrawalLimitCounter.objects.select_for_update()
+            .filter(user_id=user_id)
+            .first()
+        )
+        if counter is not None:
+            return counter, False
+        created = WithdrawalLimitCounter.objects.bulk_create(
+            [self._build(user_id)], ignore_conflicts=True
+        )
+        counter = WithdrawalLimitCounter.objects.select_for_update().get(
+            user_id=user_id
+        )
+        return counter, bool(created)
+
+    def usage(self, counter: WithdrawalLimitCounter, now=None) -> Dict[str, Any]:
+        """Withdrawals created in the window, their amount and the in-flight count"""
+        since = bucket_key(window_start(now or timezone.now()))
+        count, amount = 0, Decimal("0.00")
+        for hour, bucket in counter.buckets.items():
+            if hour >= since:
+                count += bucket["count"]
+                amount += Decimal(bucket["amount"])
+        return {"count": count, "amount": amount, "in_flight": counter.in_flight}
+
+    def get_usage(self, user) -> Dict[str, Any]:
+        """Read-only usage for display (WithdrawalLimitsView)"""
+        counter = WithdrawalLimitCounter.objects.filter(user=user).first()
+        return self.usage(counter or self._build(user.pk))
+
+    # ========== COUNTER MAINTENANCE ==========
+
+    @transaction.atomic
+    def record_created(self, withdrawal: TeoCoinWithdrawalRequest):
+        """Count a new withdrawal request in its hour bucket"""
+        counter, created = self.lock(withdrawal.user_id)
+        if created:
+            return
+        now = timezone.now()
+        buckets = self._prune(counter.buckets, now)
+        bucket = buckets.setdefault(
+            bucket_key(withdrawal.created_at or now), {"count": 0, "amount": "0.00"}
+        )
+        bucket["count"] += 1
+        bucket["amount"] = str(Decimal(bucket["amount"]) + withdrawal.amount)
+        counter.buckets = buckets
+        if withdrawal.status in IN_FLIGHT_STATUSES:
+            counter.in_flight += 1
+        counter.save(update_fields=["buckets", "in_flight", "updated_at"])
+
+    def record_in_flight(self, user_id: int, delta: int) -> int:
+        """Move the in-flight count when a request enters or leaves pending/processing"""
+        qs = WithdrawalLimitCounter.objects.filter(user_id=user_id)
+        if delta < 0:
+            qs = qs.filter(in_flight__gte=-delta)
+        # Missing counters are built from the request table on first lock()
+        return qs.update(in_flight=F("in_flight") + delta, updated_at=timezone.now())
+
+    def rebuild(self, user_id: int) -> WithdrawalLimitCounter:
+        """Realign the counter with the request table"""
+        counter = self._build(user_id)
+        WithdrawalLimitCounter.objects.update_or_create(
+            user_id=user_id,
+            defaults={"buckets": counter.buckets, "in_flight": counter.in_flight},
+        )
+        return counter
+
+    def _build(self, user_id: int, now=None) -> WithdrawalLimitCounter:
+        now = now or timezone.now()
+        requests = TeoCoinWithdrawalRequest.objects.filter(user_id=user_id)
+        buckets: Dict[str, Dict[str, Any]] = {}
+        recent = requests.filter(created_at__gte=window_start(now)).values_list(
+            "created_at", "amount"
+        )
+        for created_at, amount in recent:
+            bucket = buckets.setdefault(
+                bucket_key(created_at), {"count": 0, "amount": "0.00"}
+            )
+            bucket["count"] += 1
+            bucket["amount"] = str(Decimal(bucket["amount"]) + amount)
+        return WithdrawalLimitCounter(
+            user_id=user_id,
+            buckets=buckets,
+            in_flight=requests.filter(status__in=IN_FLIGHT_STATUSES).count(),
+        )
+
+    @staticmethod
+    def _prune(buckets: Dict[str, Any], now) -> Dict[str, Any]:
+        since = bucket_key(window_start(now))
+        return {hour: b for hour, b in buckets.items() if hour >= since}
+
+
+# Singleton instance
+withdrawal_limit_service = WithdrawalLimitService()
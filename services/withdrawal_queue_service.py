@@ -0,0 +1,277 @@
+"""
+Withdrawal Queue Service - Leased Multi-Worker Withdrawal Processing
+
+Pending TeoCoinWithdrawalRequest rows form a FIFO queue that any number of
+worker processes can drain in parallel:
+
+- claim() picks the oldest pending rows with SELECT ... FOR UPDATE SKIP LOCKED
+  and moves them to "processing" under the worker's id with a lease, so two
+  workers never get the same withdrawal and neither waits on the other
+- a worker renews the lease right before minting and gives up a withdrawal
+  whose lease it lost
+- failed attempts go back to the queue until MAX_ATTEMPTS, then fail and
+  are refunded to the available balance
+- recover_expired_leases() requeues withdrawals whose worker died, unless a
+  transaction was already broadcast for them
+
+Usage:
+    stats = withdrawal_queue_service.drain(worker_id, handler)
+
+where handler(withdrawal) returns a dict with a "success" key (e.g.
+TeoCoinWithdrawalService._process_withdrawal_minting).
+"""
+
+import os
+import socket
+import time
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from blockchain.models import DBTeoCoinBalance, TeoCoinWithdrawalRequest
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q
+from django.utils import timezone
+from services.base import BaseService
+from services.withdrawal_limit_service import withdrawal_limit_service
+
+# How long a claimed withdrawal stays reserved to its worker
+DEFAULT_LEASE = timedelta(minutes=10)
+DEFAULT_BATCH_SIZE = 10
+# Attempts before a withdrawal is marked failed instead of requeued
+MAX_ATTEMPTS = 3
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WithdrawalQueueService(BaseService):
+    """
+    Service claiming and settling withdrawals for processing workers.
+    """
+
+    def claim(
+        self,
+        worker_id: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        lease: timedelta = DEFAULT_LEASE,
+        exclude: Iterable[int] = (),
+        only: Optional[Iterable[int]] = None,
+    ) -> List[TeoCoinWithdrawalRequest]:
+        """
+        Reserve up to batch_size pending withdrawals, oldest first.
+
+        Rows locked by another worker's claim are skipped, not waited on.
+        `only` restricts the claim to the given withdrawal ids.
+        """
+        now = timezone.now()
+        pending = TeoCoinWithdrawalRequest.objects.filter(status="pending")
+        if only is not None:
+            pending = pending.filter(pk__in=list(only))
+        with transaction.atomic():
+            ids = list(
+                pending.select_for_update(skip_locked=True)
+                .exclude(pk__in=list(exclude))
+                .order_by("created_at", "pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                return []
+            # pending -> processing keeps the withdrawal in flight, so the
+            # limit counters need no update
+            TeoCoinWithdrawalRequest.objects.filter(pk__in=ids, status="pending").update(
+                status="processing",
+                claimed_by=worker_id,
+                lease_expires_at=now + lease,
+                processed_at=now,
+            )
+        return list(
+            TeoCoinWithdrawalRequest.objects.select_related("user")
+            .filter(pk__in=ids, status="processing", claimed_by=worker_id)
+            .order_by("created_at", "pk")
+        )
+
+    def renew(
+        self,
+        withdrawal: TeoCoinWithdrawalRequest,
+        worker_id: str,
+        lease: timedelta = DEFAULT_LEASE,
+    ) -> bool:
+        """Extend the lease; False if the withdrawal is no longer ours"""
+        expires = timezone.now() + lease
+        renewed = TeoCoinWithdrawalRequest.objects.filter(
+            pk=withdrawal.pk, status="processing", claimed_by=worker_id
+        ).update(lease_expires_at=expires)
+        if renewed:
+            withdrawal.lease_expires_at = expires
+        return bool(renewed)
+
+    @transaction.atomic
+    def release(
+        self, withdrawal: TeoCoinWithdrawalRequest, worker_id: str, error: str
+    ) -> str:
+        """
+        Give a failed attempt back to the queue, or fail the withdrawal once
+        it has used MAX_ATTEMPTS and refund it to the available balance, as
+        every other failure path does.
+
+        Returns:
+            The new status ("pending" or "failed"), or "" if the claim was lost
+        """
+        ours = TeoCoinWithdrawalRequest.objects.filter(
+            pk=withdrawal.pk, status="processing", claimed_by=worker_id
+        )
+        status = "failed" if withdrawal.retry_count + 1 >= MAX_ATTEMPTS else "pending"
+        released = ours.update(
+            status=status,
+            claimed_by="",
+            lease_expires_at=None,
+            retry_count=F("retry_count") + 1,
+            error_message=error,
+        )
+        if not released:
+            return ""
+        if status == "failed":
+            DBTeoCoinBalance.objects.filter(user_id=withdrawal.user_id).update(
+                available_balance=F("available_balance") + withdrawal.amount,
+                pending_withdrawal=F("pending_withdrawal") - withdrawal.amount,
+                updated_at=timezone.now(),
+            )
+            withdrawal_limit_service.record_in_flight(withdrawal.user_id, -1)
+        return status
+
+    def process(
+        self,
+        withdrawal: TeoCoinWithdrawalRequest,
+        worker_id: str,
+        handler: Callable[[TeoCoinWithdrawalRequest], Dict[str, Any]],
+        lease: timedelta = DEFAULT_LEASE,
+    ) -> str:
+        """
+        Run handler on a claimed withdrawal.
+
+        Returns:
+            "succeeded", "failed" (requeued or failed for good) or "lost"
+        """
+        if not self.renew(withdrawal, worker_id, lease):
+            self.log_info(f"Lost the lease on withdrawal #{withdrawal.pk}, skipping")
+            return "lost"
+        try:
+            result = handler(withdrawal)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        if result.get("success"):
+            TeoCoinWithdrawalRequest.objects.filter(
+                pk=withdrawal.pk, claimed_by=worker_id
+            ).update(lease_expires_at=None)
+            return "succeeded"
+        status = self.release(withdrawal, worker_id, result.get("error", "unknown error"))
+        self.log_error(
+            f"Withdrawal #{withdrawal.pk} attempt failed ({status or 'lost'}): "
+            f"{result.get('error')}"
+        )
+        return "failed" if status else "lost"
+
+    def drain(
+        self,
+        worker_id: str,
+        handler: Callable[[TeoCoinWithdrawalRequest], Dict[str, Any]],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        limit: Optional[int] = None,
+        lease: timedelta = DEFAULT_LEASE,
+        only: Optional[Iterable[int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Claim and process withdrawals until the queue is empty or `limit`
+        withdrawals were handled. Each withdrawal is attempted at most once
+        per drain.
+
+        Returns:
+            Per-worker statistics including throughput (withdrawals/minute)
+        """
+        started = time.monotonic()
+        stats = {"worker": worker_id, "succeeded": 0, "failed": 0, "lost": 0}
+        attempted = set()
+        while limit is None or len(attempted) < limit:
+            size = batch_size if limit is None else min(batch_size, limit - len(attempted))
+            batch = self.claim(worker_id, size, lease, exclude=attempted, only=only)
+            if not batch:
+                break
+            for withdrawal in batch:
+                attempted.add(withdrawal.pk)
+                stats[self.process(withdrawal, worker_id, handler, lease)] += 1
+
+        elapsed = time.monotonic() - started
+        stats["processed"] = len(attempted)
+        stats["elapsed_seconds"] = round(elapsed, 3)
+        stats["per_minute"] = round(len(attempted) / elapsed * 60, 2) if elapsed else 0.0
+        self.log_info(
+            f"Worker {worker_id} drained {len(attempted)} withdrawals "
+            f"({stats['succeeded']} ok, {stats['failed']} failed) "
+            f"in {stats['elapsed_seconds']}s"
+        )
+        return stats
+
+    # ========== RECOVERY AND MONITORING ==========
+
+    def recover_expired_leases(self) -> Dict[str, Any]:
+        """
+        Requeue processing withdrawals whose worker stopped renewing its lease.
+
+        Claims without a lease (taken before the queue existed) are requeued
+        once they are processing too long. Withdrawals with a transaction hash
+        may have been minted already: they are only reported, as "stuck" once
+        processing too long.
+        """
+        now = timezone.now()
+        too_old = now - TeoCoinWithdrawalRequest.PROCESSING_TOO_LONG
+        processing = TeoCoinWithdrawalRequest.objects.filter(status="processing")
+        not_broadcast = Q(transaction_hash__isnull=True) | Q(transaction_hash="")
+        expired = Q(lease_expires_at__lt=now) | Q(
+            lease_expires_at__isnull=True, created_at__lt=too_old
+        )
+        requeued = processing.filter(not_broadcast & expired).update(
+            status="pending", claimed_by="", lease_expires_at=None
+        )
+        stuck = list(
+            processing.filter(created_at__lt=too_old)
+            .exclude(not_broadcast)
+            .values_list("pk", flat=True)
+        )
+        if requeued or stuck:
+            self.log_info(
+                f"Requeued {requeued} expired withdrawal claims, "
+                f"{len(stuck)} stuck after broadcast: {stuck}"
+            )
+        return {"requeued": requeued, "stuck": stuck}
+
+    def worker_throughput(self, since: timedelta = timedelta(hours=1)) -> List[Dict]:
+        """Withdrawals completed per worker since `since` ago"""
+        rows = (
+            TeoCoinWithdrawalRequest.objects.filter(
+                status="completed", completed_at__gte=timezone.now() - since
+            )
+            .exclude(claimed_by="")
+            .values("claimed_by")
+            .annotate(
+                completed=Count("pk"),
+                first_claimed=Min("processed_at"),
+                last_completed=Max("completed_at"),
+            )
+            .order_by("-completed")
+        )
+        report = []
+        for row in rows:
+            span = (row["last_completed"] - row["first_claimed"]).total_seconds()
+            report.append(
+                {
+                    "worker": row["claimed_by"],
+                    "completed": row["completed"],
+                    "per_minute": round(row["completed"] / span * 60, 2) if span > 0 else None,
+                }
+            )
+        return report
+
+
+# Singleton instance
+withdrawal_queue_service = WithdrawalQueueService()
@@ -0,0 +1,256 @@
+"""
+Withdrawal Settlement Service - Netted, Batched Withdrawal Mints
+
+Instead of one mint transaction (gas estimate, nonce, gas price, send,
+receipt wait) per withdrawal, settle() claims a batch of pending withdrawals
+from the withdrawal queue, nets them per destination address and mints the
+totals:
+
+- with WITHDRAWAL_BATCH_MINT_ENABLED the per-address mintTo calls are packed
+  into multicall transactions of up to MAX_CALLS_PER_TX calls
+- otherwise each address gets one mintTo transaction
+
+Gas price and gas limits come from the gas oracle, nonce and chain id are
+read once per settlement, and every transaction is broadcast before waiting
+on the first receipt. Each WithdrawalSettlementBatch records the withdrawals
+it settled; its receipt's gas is split back to them. A reverted or unsent
+batch releases its withdrawals to the queue.
+
+Settlement runs once the oldest pending withdrawal has waited
+WITHDRAWAL_SETTLEMENT_WINDOW_SECONDS or WITHDRAWAL_SETTLEMENT_MAX_BATCH
+withdrawals are waiting.
+"""
+
+from collections import OrderedDict
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from blockchain.models import (
+    DBTeoCoinBalance,
+    TeoCoinWithdrawalRequest,
+    WithdrawalSettlementBatch,
+)
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from services.base import BaseService
+from services.gas_oracle_service import gas_oracle_service
+from services.withdrawal_queue_service import (
+    DEFAULT_LEASE,
+    default_worker_id,
+    withdrawal_queue_service,
+)
+from web3 import Web3
+
+MAX_CALLS_PER_TX = 100
+# Fallback gas limits when estimation fails
+MINT_GAS_LIMIT = 200000
+MULTICALL_GAS_PER_CALL = 80000
+
+
+def split_evenly(total: int, parts: int) -> List[int]:
+    """Integer shares of `total` summing to it exactly"""
+    share, remainder = divmod(total, parts)
+    return [share + (1 if i < remainder else 0) for i in range(parts)]
+
+
+class WithdrawalSettlementService(BaseService):
+    """
+    Service settling pending withdrawals in netted batches.
+    """
+
+    def is_due(self, window: timedelta = None, max_batch: int = None) -> bool:
+        """True once the oldest pending withdrawal waited `window` or the batch is full"""
+        window = window or timedelta(seconds=settings.WITHDRAWAL_SETTLEMENT_WINDOW_SECONDS)
+        max_batch = max_batch or settings.WITHDRAWAL_SETTLEMENT_MAX_BATCH
+        pending = TeoCoinWithdrawalRequest.objects.filter(status="pending")
+        if pending.filter(created_at__lte=timezone.now() - window).exists():
+            return True
+        return pending[:max_batch].count() >= max_batch
+
+    def net_by_address(self, withdrawals) -> "OrderedDict[str, Decimal]":
+        """Total amount per (checksummed) destination address, in claim order"""
+        legs: "OrderedDict[str, Decimal]" = OrderedDict()
+        for withdrawal in withdrawals:
+            address = Web3.to_checksum_address(withdrawal.metamask_address)
+            legs[address] = legs.get(address, Decimal("0")) + withdrawal.amount
+        return legs
+
+    def settle(
+        self,
+        worker_id: Optional[str] = None,
+        window: timedelta = None,
+        max_batch: int = None,
+        force: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Claim, net and mint one batch of pending withdrawals.
+
+        Args:
+            force: Settle now even if the window has not elapsed
+        """
+        from services.teocoin_withdrawal_service import teocoin_withdrawal_service
+
+        stats = {"due": True, "withdrawals": 0, "transactions": 0, "settled": 0, "failed": 0}
+        if not force and not self.is_due(window, max_batch):
+            stats["due"] = False
+            return stats
+
+        web3 = teocoin_withdrawal_service.web3
+        contract = teocoin_withdrawal_service.teo_contract
+        private_key = getattr(settings, "PLATFORM_PRIVATE_KEY", None)
+        if not web3 or not contract or not private_key:
+            return {**stats, "error": "Web3, contract or platform key not configured"}
+
+        worker_id = worker_id or default_worker_id()
+        withdrawals = withdrawal_queue_service.claim(
+            worker_id,
+            max_batch or settings.WITHDRAWAL_SETTLEMENT_MAX_BATCH,
+            DEFAULT_LEASE,
+        )
+        if not withdrawals:
+            return stats
+        stats["withdrawals"] = len(withdrawals)
+
+        legs = list(self.net_by_address(withdrawals).items())
+        calls_per_tx = MAX_CALLS_PER_TX if settings.WITHDRAWAL_BATCH_MINT_ENABLED else 1
+        chunks = [legs[i : i + calls_per_tx] for i in range(0, len(legs), calls_per_tx)]
+
+        platform_address = Web3.to_checksum_address(settings.PLATFORM_WALLET_ADDRESS)
+        base_tx = {
+            "from": platform_address,
+            "gasPrice": gas_oracle_service.gas_price(web3),
+            "chainId": web3.eth.chain_id,
+            "nonce": web3.eth.get_transaction_count(platform_address, "pending"),
+        }
+
+        # Broadcast every batch first, then wait on the receipts
+        sent = []
+        for chunk in chunks:
+            addresses = {address for address, _ in chunk}
+            group = [
+                w
+                for w in withdrawals
+                if Web3.to_checksum_address(w.metamask_address) in addresses
+            ]
+            batch = self._submit(web3, contract, private_key, base_tx, chunk, group, worker_id)
+            if batch is None:
+                stats["failed"] += len(group)
+                continue
+            base_tx["nonce"] += 1
+            stats["transactions"] += 1
+            sent.append((batch, group))
+
+        for batch, group in sent:
+            if self._confirm(web3, batch, group, worker_id):
+                stats["settled"] += len(group)
+            else:
+                stats["failed"] += len(group)
+
+        self.log_info(
+            f"Settled {stats['settled']}/{stats['withdrawals']} withdrawals "
+            f"in {stats['transactions']} transactions ({len(legs)} addresses)"
+        )
+        return stats
+
+    def _submit(self, web3, contract, private_key, base_tx, chunk, group, worker_id):
+        """Sign and broadcast one batch; None (withdrawals released) on failure"""
+        batch = WithdrawalSettlementBatch.objects.create(
+            worker=worker_id,
+            call_count=len(chunk),
+            withdrawal_count=len(group),
+            total_amount=sum(amount for _, amount in chunk),
+        )
+        try:
+            if len(chunk) == 1:
+                address, amount = chunk[0]
+                function = contract.functions.mintTo(address, Web3.to_wei(amount, "ether"))
+                fallback_gas = MINT_GAS_LIMIT
+            else:
+                function = contract.functions.multicall(
+                    [
+                        contract.encode_abi("mintTo", args=[address, Web3.to_wei(amount, "ether")])
+                        for address, amount in chunk
+                    ]
+                )
+                fallback_gas = MULTICALL_GAS_PER_CALL * len(chunk)
+            gas = gas_oracle_service.estimate_gas(
+                function, {"from": base_tx["from"]}, fallback_gas, shape=len(chunk)
+            )
+
+            signed = web3.eth.account.sign_transaction(
+                function.build_transaction({**base_tx, "gas": gas}), private_key
+            )
+            tx_hash = Web3.to_hex(web3.eth.send_raw_transaction(signed.raw_transaction))
+        except Exception as e:
+            self.log_error(f"Settlement batch #{batch.pk} not sent: {e}")
+            self._fail(batch, group, worker_id, str(e))
+            return None
+
+        batch.transaction_hash = tx_hash
+        batch.save(update_fields=["transaction_hash"])
+        # Broadcast withdrawals carry the hash, so lease recovery won't requeue them
+        TeoCoinWithdrawalRequest.objects.filter(pk__in=[w.pk for w in group]).update(
+            settlement_batch=batch, transaction_hash=tx_hash
+        )
+        return batch
+
+    def _confirm(self, web3, batch, group, worker_id) -> bool:
+        """Wait for a batch receipt and settle (or release) its withdrawals"""
+        try:
+            receipt = web3.eth.wait_for_transaction_receipt(batch.transaction_hash)
+        except Exception as e:
+            # Outcome unknown: the withdrawals keep the hash for manual review
+            self.log_error(f"No receipt for settlement batch #{batch.pk}: {e}")
+            batch.error_message = str(e)
+            batch.save(update_fields=["error_message"])
+            return False
+        if receipt["status"] != 1:
+            self._fail(batch, group, worker_id, f"Transaction reverted: {batch.transaction_hash}")
+            return False
+
+        now = timezone.now()
+        gas_price_gwei = (Decimal(receipt.get("effectiveGasPrice") or 0) / Decimal(10**9)).quantize(
+            Decimal("0.01")
+        )
+        with transaction.atomic():
+            for withdrawal, gas_share in zip(group, split_evenly(receipt["gasUsed"], len(group))):
+                withdrawal.status = "completed"
+                withdrawal.settlement_batch = batch
+                withdrawal.transaction_hash = batch.transaction_hash
+                withdrawal.gas_used = gas_share
+                withdrawal.gas_price_gwei = gas_price_gwei
+                withdrawal.completed_at = now
+                withdrawal.lease_expires_at = None
+                withdrawal.save()
+
+            per_user: Dict[int, Decimal] = {}
+            for withdrawal in group:
+                per_user[withdrawal.user_id] = per_user.get(withdrawal.user_id, 0) + withdrawal.amount
+            for user_id, amount in per_user.items():
+                DBTeoCoinBalance.objects.filter(user_id=user_id).update(
+                    pending_withdrawal=F("pending_withdrawal") - amount, updated_at=now
+                )
+
+            batch.status = "confirmed"
+            batch.gas_used = receipt["gasUsed"]
+            batch.gas_price_gwei = gas_price_gwei
+            batch.confirmed_at = now
+            batch.save(update_fields=["status", "gas_used", "gas_price_gwei", "confirmed_at"])
+        return True
+
+    def _fail(self, batch, group, worker_id, error):
+        batch.status = "failed"
+        batch.error_message = error
+        batch.save(update_fields=["status", "error_message"])
+        TeoCoinWithdrawalRequest.objects.filter(pk__in=[w.pk for w in group]).update(
+            transaction_hash=None
+        )
+        for withdrawal in group:
+            withdrawal_queue_service.release(withdrawal, worker_id, error)
+
+
+# Singleton instance
+withdrawal_settlement_service = WithdrawalSettlementService()
@@ -1,3 +1,4 @@
+from authentication.user_cache import bump_user_version
 from courses.models import Course
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
@@ -7,7 +8,12 @@ from .models import User
 
 @admin.action(description="Approva i teacher selezionati")
 def make_teachers_approved(modeladmin, request, queryset):
-    queryset.filter(role="teacher").update(is_approved=True)
+    teachers = queryset.filter(role="teacher")
+    teacher_ids = list(teachers.values_list("pk", flat=True))
+    teachers.update(is_approved=True)
+    # update() skips save(): invalidate the cached users by hand
+    for teacher_id in teacher_ids:
+        bump_user_version(teacher_id)
 
 
 @admin.register(User)
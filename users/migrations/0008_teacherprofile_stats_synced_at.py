@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_add_wallet_nonce'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teacherprofile',
+            name='stats_synced_at',
+            field=models.DateTimeField(blank=True, help_text='Last rebuild of total_courses/total_earnings from course data', null=True),
+        ),
+    ]
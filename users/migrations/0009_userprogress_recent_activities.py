@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_teacherprofile_stats_synced_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprogress',
+            name='recent_activities',
+            field=models.JSONField(blank=True, default=list, help_text='Latest lesson/course completions'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:12
+
+from django.db import migrations, models
+
+
+def resync_counters(apps, schema_editor):
+    # The new counters start at 0: have every profile rebuilt on next read
+    TeacherProfile = apps.get_model('users', 'TeacherProfile')
+    TeacherProfile.objects.update(stats_synced_at=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_userprogress_recent_activities'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teacherprofile',
+            name='published_courses',
+            field=models.PositiveIntegerField(default=0, help_text='Number of approved courses of this teacher'),
+        ),
+        migrations.AddField(
+            model_name='teacherprofile',
+            name='total_students',
+            field=models.PositiveIntegerField(default=0, help_text="Distinct students enrolled in this teacher's courses"),
+        ),
+        migrations.AlterField(
+            model_name='teacherprofile',
+            name='stats_synced_at',
+            field=models.DateTimeField(blank=True, help_text='Last rebuild of the course counters from course data', null=True),
+        ),
+        migrations.RunPython(resync_counters, migrations.RunPython.noop),
+    ]
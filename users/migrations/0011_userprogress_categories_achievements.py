@@ -0,0 +1,66 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:02
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_summaries(apps, schema_editor):
+    # Same shape as services.progress_service stores them
+    UserProgress = apps.get_model('users', 'UserProgress')
+    UserAchievement = apps.get_model('users', 'UserAchievement')
+    CourseEnrollment = apps.get_model('courses', 'CourseEnrollment')
+
+    categories = {}
+    rows = CourseEnrollment.objects.values('student_id', 'course__category').annotate(
+        total=Count('id'), completed=Count('id', filter=Q(completed=True))
+    )
+    for row in rows:
+        categories.setdefault(row['student_id'], {})[row['course__category']] = [
+            row['total'],
+            row['completed'],
+        ]
+
+    achievements = {}
+    for earned in UserAchievement.objects.select_related('achievement').order_by('pk'):
+        achievement = earned.achievement
+        achievements.setdefault(earned.user_id, []).append({
+            'achievement': {
+                'id': achievement.pk,
+                'title': achievement.title,
+                'description': achievement.description,
+                'icon': achievement.icon,
+                'color': achievement.color,
+                'achievement_type': achievement.achievement_type,
+            },
+            'earned_date': earned.earned_date.isoformat(),
+            'progress_percentage': str(earned.progress_percentage),
+            'earned': earned.progress_percentage >= 100,
+        })
+
+    for user_id in set(categories) | set(achievements):
+        UserProgress.objects.filter(user_id=user_id).update(
+            category_counts=categories.get(user_id, {}),
+            achievements=achievements.get(user_id, []),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0016_reviewerinboxentry'),
+        ('users', '0010_teacherprofile_course_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprogress',
+            name='achievements',
+            field=models.JSONField(blank=True, default=list, help_text='Earned achievements, as served'),
+        ),
+        migrations.AddField(
+            model_name='userprogress',
+            name='category_counts',
+            field=models.JSONField(blank=True, default=dict, help_text='Enrolled and completed courses per course category'),
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
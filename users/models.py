@@ -184,6 +184,17 @@ class UserProgress(models.Model):
     # Tracking fields
     last_activity_date = models.DateTimeField(null=True, blank=True)
     streak_days = models.PositiveIntegerField(default=0)
+    recent_activities = models.JSONField(
+        default=list, blank=True, help_text="Latest lesson/course completions"
+    )
+    category_counts = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Enrolled and completed courses per course category",
+    )
+    achievements = models.JSONField(
+        default=list, blank=True, help_text="Earned achievements, as served"
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -327,6 +338,14 @@ class TeacherProfile(models.Model):
         default=0, help_text="Total number of courses created by this teacher"
     )
 
+    published_courses = models.PositiveIntegerField(
+        default=0, help_text="Number of approved courses of this teacher"
+    )
+
+    total_students = models.PositiveIntegerField(
+        default=0, help_text="Distinct students enrolled in this teacher's courses"
+    )
+
     total_earnings = models.DecimalField(
         max_digits=12,
         decimal_places=2,
@@ -334,6 +353,12 @@ class TeacherProfile(models.Model):
         help_text="Combined total earnings (EUR equivalent)",
     )
 
+    stats_synced_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Last rebuild of the course counters from course data",
+    )
+
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -1,4 +1,3 @@
-from django.db.models import Count, Q
 from rest_framework import serializers
 
 from .models import Achievement, User, UserAchievement, UserProgress, UserSettings
@@ -138,36 +137,18 @@ class UserProgressSerializer(serializers.ModelSerializer):
         return obj.calculate_overall_progress()
 
     def get_categories(self, obj):
-        from courses.models import Course, CourseEnrollment
+        from courses.models import Course
 
-        # ✅ OTTIMIZZATO - Single query con annotations invece di N queries
+        # Per-category counts are maintained by services.progress_service
         category_choices = (
             Course.CATEGORY_CHOICES if hasattr(Course, "CATEGORY_CHOICES") else []
         )
 
-        # Single query con annotations invece di N queries
-        enrollments_by_category = (
-            CourseEnrollment.objects.filter(student=obj.user)
-            .select_related("course")
-            .values("course__category")
-            .annotate(
-                total_courses=Count("pk"),
-                completed_courses=Count("pk", filter=Q(completed=True)),
-            )
-        )
-
-        # Convert to dict for O(1) lookup
-        category_data = {
-            item["course__category"]: item for item in enrollments_by_category
-        }
-
         categories = []
         for category_code, category_name in category_choices:
-            data = category_data.get(
-                category_code, {"total_courses": 0, "completed_courses": 0}
+            total_courses, completed_courses = obj.category_counts.get(
+                category_code, (0, 0)
             )
-            total_courses = data["total_courses"]
-            completed_courses = data["completed_courses"]
             progress_percentage = (
                 (completed_courses / total_courses * 100) if total_courses > 0 else 0
             )
@@ -185,56 +166,15 @@ class UserProgressSerializer(serializers.ModelSerializer):
         return categories
 
     def get_achievements(self, obj):
-        user_achievements = UserAchievement.objects.filter(
-            user=obj.user
-        ).select_related("achievement")
-        return UserAchievementSerializer(user_achievements, many=True).data
+        # Stored in UserAchievementSerializer's shape by services.progress_service
+        return obj.achievements
 
     def get_recent_activities(self, obj):
         from datetime import timedelta
 
-        from courses.models import CourseEnrollment, LessonCompletion
         from django.utils import timezone
 
-        # Get recent activities from the last 30 days
-        recent_date = timezone.now() - timedelta(days=30)
-        activities = []
-
-        # Recent lesson completions - ✅ OPTIMIZED
-        lesson_completions = LessonCompletion.objects.filter(
-            student=obj.user, completed_at__gte=recent_date
-        ).select_related("lesson")[:10]
-
-        for completion in lesson_completions:
-            activities.append(
-                {
-                    "id": f"lesson_{completion.pk}",
-                    "type": "lesson_completed",
-                    "title": completion.lesson.title,
-                    "date": completion.completed_at,
-                    "score": None,  # LessonCompletion doesn't have score field
-                }
-            )
-
-        # Recent course completions - ✅ OPTIMIZED with correct field name
-        course_completions = CourseEnrollment.objects.filter(
-            student=obj.user,
-            completed=True,
-            # Fixed field name: enrolled_at instead of enrollment_date
-            enrolled_at__gte=recent_date,
-        ).select_related("course")[:5]
-
-        for enrollment in course_completions:
-            activities.append(
-                {
-                    "id": f"course_{enrollment.pk}",
-                    "type": "course_completed",
-                    "title": enrollment.course.title,
-                    "date": enrollment.enrolled_at,  # Fixed field name
-                    "score": None,
-                }
-            )
-
-        # Sort by date
-        activities.sort(key=lambda x: x["date"], reverse=True)
-        return activities[:15]
+        # Maintained incrementally by services.progress_service; keep only
+        # activities from the last 30 days
+        recent_date = (timezone.now() - timedelta(days=30)).isoformat()
+        return [a for a in obj.recent_activities if a["date"] >= recent_date]
@@ -0,0 +1,150 @@
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from courses.models import (
+    Course,
+    CourseEnrollment,
+    Exercise,
+    ExerciseSubmission,
+    Lesson,
+    LessonCompletion,
+)
+from services.progress_service import progress_service
+from users.models import Achievement, UserAchievement, UserProgress
+from users.views import UserProgressView
+
+
+@pytest.fixture
+def catalog(django_user_model):
+    teacher = django_user_model.objects.create_user(
+        username="teacher", email="teacher@example.com", password="p", role="teacher"
+    )
+    student = django_user_model.objects.create_user(
+        username="student", email="student@example.com", password="p", role="student"
+    )
+    course = Course.objects.create(
+        title="Course", description="d", teacher=teacher, price_eur=Decimal("10.00")
+    )
+    lessons = [
+        Lesson.objects.create(
+            title=f"L{i}", content="x", teacher=teacher, course=course, duration=45
+        )
+        for i in range(3)
+    ]
+    course.lessons.add(*lessons)
+    exercise = Exercise.objects.create(title="E", lesson=lessons[0])
+    return student, course, lessons, exercise
+
+
+@pytest.mark.django_db
+def test_counters_follow_completion_events(catalog):
+    student, course, lessons, exercise = catalog
+    progress_service.get_progress(student)  # progress row exists from here on
+
+    enrollment = CourseEnrollment.objects.create(student=student, course=course)
+    for lesson in lessons[:2]:
+        LessonCompletion.objects.create(student=student, lesson=lesson)
+    enrollment.completed = True
+    enrollment.save()
+    submission = ExerciseSubmission.objects.create(
+        exercise=exercise, student=student, content="c", average_score=8
+    )
+    submission.reviewed = True
+    submission.save(update_fields=["reviewed"])
+
+    progress = UserProgress.objects.get(user=student)
+    enrollment.refresh_from_db()
+    assert enrollment.lessons_completed == 2
+    assert progress.total_courses_enrolled == 1
+    assert progress.total_courses_completed == 1
+    assert progress.total_lessons_completed == 2
+    assert progress.total_hours_studied == Decimal("1.50")
+    assert progress.total_exercises_completed == 1
+    assert progress.average_score == Decimal("8.00")
+    assert [a["type"] for a in progress.recent_activities] == [
+        "course_completed",
+        "lesson_completed",
+        "lesson_completed",
+    ]
+
+    LessonCompletion.objects.filter(lesson=lessons[0]).delete()
+    assert progress_service.verify(student) == {}
+
+
+@pytest.mark.django_db
+def test_rebuild_command_fixes_drift(catalog):
+    student, course, lessons, _ = catalog
+    CourseEnrollment.objects.create(student=student, course=course)
+    LessonCompletion.objects.create(student=student, lesson=lessons[0])
+    progress_service.rebuild(student)
+
+    UserProgress.objects.filter(user=student).update(total_lessons_completed=7)
+    CourseEnrollment.objects.filter(student=student).update(lessons_completed=0)
+    assert set(progress_service.verify(student)) == {
+        "total_lessons_completed",
+        "enrollments",
+    }
+
+    call_command("rebuild_user_progress", user=[student.pk])
+    assert progress_service.verify(student) == {}
+
+
+@pytest.mark.django_db
+def test_progress_read_does_not_touch_completion_tables(catalog):
+    student, course, lessons, _ = catalog
+    CourseEnrollment.objects.create(student=student, course=course)
+    LessonCompletion.objects.create(student=student, lesson=lessons[0])
+    progress_service.get_progress(student)
+
+    request = APIRequestFactory().get("/api/v1/profile/progress/")
+    force_authenticate(request, user=student)
+    with CaptureQueriesContext(connection) as ctx:
+        response = UserProgressView.as_view()(request)
+
+    assert response.status_code == 200
+    assert response.data["total_lessons_completed"] == 1
+    assert len(response.data["recent_activities"]) == 1
+    sql = " ".join(q["sql"] for q in ctx.captured_queries)
+    assert "courses_lessoncompletion" not in sql
+    assert "courses_exercisesubmission" not in sql
+    assert "courses_courseenrollment" not in sql
+    assert "users_userachievement" not in sql
+
+
+@pytest.mark.django_db
+def test_categories_and_achievements_follow_events(catalog):
+    student, course, _, _ = catalog
+    progress_service.get_progress(student)
+
+    enrollment = CourseEnrollment.objects.create(student=student, course=course)
+    enrollment.completed = True
+    enrollment.save()
+    badge = Achievement.objects.create(
+        title="First", description="d", achievement_type="course_completion"
+    )
+    UserAchievement.objects.create(
+        user=student, achievement=badge, progress_percentage=100
+    )
+    badge.title = "First course"
+    badge.save()
+    course.category = "acquerello"
+    course.save()
+
+    progress = UserProgress.objects.get(user=student)
+    assert progress.category_counts == {"acquerello": [1, 1]}
+    assert [a["achievement"]["title"] for a in progress.achievements] == [
+        "First course"
+    ]
+    assert progress.achievements[0]["earned"] is True
+    assert progress_service.verify(student) == {}
+
+    enrollment.delete()
+    UserAchievement.objects.filter(user=student).delete()
+    progress.refresh_from_db()
+    assert progress.category_counts == {}
+    assert progress.achievements == []
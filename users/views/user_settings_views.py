@@ -5,7 +5,8 @@ User settings and progress management views
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from users.models import UserProgress, UserSettings
+from services.progress_service import progress_service
+from users.models import UserSettings
 from users.serializers import UserProgressSerializer, UserSettingsSerializer
 
 
@@ -43,41 +44,7 @@ class UserProgressView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        """Get user progress with updated statistics"""
-        progress, created = UserProgress.objects.get_or_create(user=request.user)
-
-        # Update progress data before returning
-        self.update_progress_data(request.user, progress)
-
+        """Get user progress (counters are maintained incrementally)"""
+        progress = progress_service.get_progress(request.user)
         serializer = UserProgressSerializer(progress)
         return Response(serializer.data)
-
-    def update_progress_data(self, user, progress):
-        """Update user progress with current data"""
-        from courses.models import CourseEnrollment, LessonCompletion
-        from django.db.models import Avg
-
-        # Update course statistics
-        enrollments = CourseEnrollment.objects.filter(student=user)
-        progress.total_courses_enrolled = enrollments.count()
-        progress.total_courses_completed = enrollments.filter(completed=True).count()
-
-        # Update lesson statistics
-        lesson_completions = LessonCompletion.objects.filter(student=user)
-        progress.total_lessons_completed = lesson_completions.count()
-
-        # Calculate average score (if score field exists)
-        if lesson_completions.exists():
-            avg_score = (
-                lesson_completions.aggregate(avg=Avg("score"))["avg"]
-                if hasattr(LessonCompletion, "score")
-                else 0
-            )
-            progress.average_score = avg_score or 0
-
-        # Update last activity
-        last_completion = lesson_completions.order_by("-completed_at").first()
-        if last_completion:
-            progress.last_activity_date = last_completion.completed_at
-
-        progress.save()